@@ -36,6 +36,9 @@ class Settings(BaseSettings):
     JWT_SECRET: str = Field(default="change-this-secret-key-in-production", env="JWT_SECRET")
     JWT_ALGORITHM: str = Field(default="HS256", env="JWT_ALGORITHM")
     JWT_EXPIRY_DAYS: int = Field(default=7, env="JWT_EXPIRY_DAYS")
+    # Short-lived tickets for the job event stream (EventSource cannot send
+    # headers, so the ticket travels in the URL instead of the access token)
+    STREAM_TICKET_TTL_SECONDS: int = Field(default=60, env="STREAM_TICKET_TTL_SECONDS")
     
     # SQLite Database settings
     DATABASE_PATH: str = Field(default="database/app.db", env="DATABASE_PATH")
@@ -63,6 +66,70 @@ class Settings(BaseSettings):
     # Recaptcha API Authentication (Bearer token)
     RECAPTCHA_AUTH_KEY: Optional[str] = Field(default="", env="RECAPTCHA_AUTH_KEY")
 
+    # Bearer token Prometheus must send to scrape /metrics (empty = endpoint disabled)
+    METRICS_TOKEN: Optional[str] = Field(default="", env="METRICS_TOKEN")
+
+    # Dispatch workers (provider submissions for promoted jobs)
+    DISPATCH_WORKERS: int = Field(default=4, env="DISPATCH_WORKERS")
+
+    # Generate endpoints return 202 and submit in the background unless ?async_dispatch=false
+    ASYNC_DISPATCH_DEFAULT: bool = Field(default=False, env="ASYNC_DISPATCH_DEFAULT")
+
+    # Public API submissions (not queued) wait this long for a free Higgsfield account before a 503
+    PUBLIC_API_ACCOUNT_WAIT_SECONDS: float = Field(default=10.0, env="PUBLIC_API_ACCOUNT_WAIT_SECONDS")
+
+    # Global in-flight (processing) job capacity per provider, 0 = unlimited
+    HIGGSFIELD_MAX_IN_FLIGHT: int = Field(default=0, env="HIGGSFIELD_MAX_IN_FLIGHT")
+    GOOGLE_VEO_MAX_IN_FLIGHT: int = Field(default=0, env="GOOGLE_VEO_MAX_IN_FLIGHT")
+
+    # Failed provider submissions: retried with jittered exponential backoff,
+    # dead-lettered (failed + refunded) after DISPATCH_MAX_ATTEMPTS
+    DISPATCH_MAX_ATTEMPTS: int = Field(default=5, env="DISPATCH_MAX_ATTEMPTS")
+    DISPATCH_RETRY_BASE_SECONDS: float = Field(default=10.0, env="DISPATCH_RETRY_BASE_SECONDS")
+    DISPATCH_RETRY_MAX_SECONDS: float = Field(default=300.0, env="DISPATCH_RETRY_MAX_SECONDS")
+
+    # Dispatch lease: a worker submitting a job renews it every third of the
+    # lease; jobs whose lease expires (crashed worker) go back to the queue
+    DISPATCH_LEASE_SECONDS: float = Field(default=60.0, env="DISPATCH_LEASE_SECONDS")
+
+    # Job event broker (job_events table): rows older than the retention
+    # window are pruned by the relay task every prune interval
+    JOB_EVENTS_RETENTION_MINUTES: int = Field(default=10, env="JOB_EVENTS_RETENTION_MINUTES")
+    JOB_EVENTS_PRUNE_INTERVAL_SECONDS: int = Field(default=60, env="JOB_EVENTS_PRUNE_INTERVAL_SECONDS")
+
+    # Higgsfield account health: accounts whose submissions keep failing are
+    # quarantined (skipped by selection), then probed with one job at a time
+    ACCOUNT_HEALTH_WINDOW_SECONDS: float = Field(default=600.0, env="ACCOUNT_HEALTH_WINDOW_SECONDS")
+    ACCOUNT_HEALTH_MIN_SAMPLES: int = Field(default=5, env="ACCOUNT_HEALTH_MIN_SAMPLES")
+    ACCOUNT_MAX_ERROR_RATE: float = Field(default=0.5, env="ACCOUNT_MAX_ERROR_RATE")
+    ACCOUNT_AUTH_FAILURE_THRESHOLD: int = Field(default=2, env="ACCOUNT_AUTH_FAILURE_THRESHOLD")
+    ACCOUNT_QUARANTINE_SECONDS: float = Field(default=120.0, env="ACCOUNT_QUARANTINE_SECONDS")
+    ACCOUNT_QUARANTINE_MAX_SECONDS: float = Field(default=1800.0, env="ACCOUNT_QUARANTINE_MAX_SECONDS")
+
+    # Higgsfield JWTs are cached until this close to expiry, and refreshed
+    # in the background once they get within the refresh-ahead window
+    HIGGSFIELD_JWT_EXPIRY_MARGIN_SECONDS: float = Field(default=5.0, env="HIGGSFIELD_JWT_EXPIRY_MARGIN_SECONDS")
+    HIGGSFIELD_JWT_REFRESH_AHEAD_SECONDS: float = Field(default=20.0, env="HIGGSFIELD_JWT_REFRESH_AHEAD_SECONDS")
+
+    # Provider HTTP calls (Higgsfield, Google Veo): time allowed to open a
+    # connection, and to wait for the response once connected
+    PROVIDER_CONNECT_TIMEOUT_SECONDS: float = Field(default=10.0, env="PROVIDER_CONNECT_TIMEOUT_SECONDS")
+    PROVIDER_READ_TIMEOUT_SECONDS: float = Field(default=120.0, env="PROVIDER_READ_TIMEOUT_SECONDS")
+    # Concurrent connections of a Higgsfield client's async session (per event loop)
+    PROVIDER_ASYNC_MAX_CONNECTIONS: int = Field(default=200, env="PROVIDER_ASYNC_MAX_CONNECTIONS")
+
+    # User images are normalized before provider upload (image_preprocessing.py):
+    # long edge capped per provider (0 = no limit), re-encoded at this JPEG quality
+    IMAGE_UPLOAD_MAX_EDGE_HIGGSFIELD: int = Field(default=2048, env="IMAGE_UPLOAD_MAX_EDGE_HIGGSFIELD")
+    IMAGE_UPLOAD_MAX_EDGE_VEO: int = Field(default=1920, env="IMAGE_UPLOAD_MAX_EDGE_VEO")
+    IMAGE_UPLOAD_JPEG_QUALITY: int = Field(default=90, env="IMAGE_UPLOAD_JPEG_QUALITY")
+    IMAGE_PREPROCESS_WORKERS: int = Field(default=2, env="IMAGE_PREPROCESS_WORKERS")
+
+    # Processing deadlines (observed p95 duration x multiplier, clamped to min/max minutes)
+    PROCESSING_TIMEOUT_MULTIPLIER: float = Field(default=3.0, env="PROCESSING_TIMEOUT_MULTIPLIER")
+    PROCESSING_TIMEOUT_MIN_MINUTES: int = Field(default=10, env="PROCESSING_TIMEOUT_MIN_MINUTES")
+    PROCESSING_TIMEOUT_MAX_MINUTES: int = Field(default=180, env="PROCESSING_TIMEOUT_MAX_MINUTES")
+
     # PayOS Credentials
     PAYOS_CLIENT_ID: Optional[str] = Field(default="", env="PAYOS_CLIENT_ID")
     PAYOS_API_KEY: Optional[str] = Field(default="", env="PAYOS_API_KEY")
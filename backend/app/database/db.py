@@ -92,7 +92,9 @@ def execute_in_transaction(operations: Callable[[sqlite3.Connection], Any]) -> A
 def init_higgsfield_accounts_table(conn=None) -> None:
     """
     Initialize Higgsfield Accounts table for managing multiple provider accounts.
-    Also migrates jobs table to add account_id foreign key.
+    Also migrates jobs table to add account_id foreign key and is_slow (the
+    account scheduler's slow-job classification, counted against
+    max_slow_images / max_slow_videos).
     """
     should_close = False
     if conn is None:
@@ -137,6 +139,22 @@ def init_higgsfield_accounts_table(conn=None) -> None:
             """)
             print("Jobs table migrated successfully")
         
+        if 'is_slow' not in job_columns:
+            print("Migrating jobs table to add is_slow...")
+            conn.execute("ALTER TABLE jobs ADD COLUMN is_slow BOOLEAN DEFAULT FALSE")
+        
+        # Per-account in-flight counts (account stats, capacity reconcile)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_account_status 
+            ON jobs(account_id, status);
+        """)
+        
+        # Recently finished jobs (account throughput on the capacity dashboard)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_jobs_status_completed 
+            ON jobs(status, completed_at);
+        """)
+        
         conn.commit()
         print("Higgsfield accounts table initialized/migrated successfully")
         
@@ -148,6 +166,95 @@ def init_higgsfield_accounts_table(conn=None) -> None:
             conn.close()
 
 
+def init_job_events_table(conn=None) -> None:
+    """
+    Initialize the job_events table.
+    Acts as a local broker so job status events reach SSE subscribers on every worker.
+    """
+    should_close = False
+    if conn is None:
+        conn = get_db_connection()
+        should_close = True
+    
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                worker_id TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            );
+        """)
+        
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_job_events_created 
+            ON job_events(created_at);
+        """)
+        
+        conn.commit()
+        print("Job events table initialized successfully")
+        
+    except Exception as e:
+        print(f"Error initializing job events table: {e}")
+        raise
+    finally:
+        if should_close:
+            conn.close()
+
+
+def init_job_lifecycle_columns(conn=None) -> None:
+    """
+    Add job lifecycle columns.
+    Timestamps used for pipeline metrics:
+    create -> dispatched_at -> provider_accepted_at -> first_polled_at
+    -> completed_at -> client_notified_at
+    dispatch_state tracks provider submission (queued/accepted/dispatching/submitted,
+    dead_letter once retries are exhausted); dispatch_attempts, last_dispatch_error
+    and next_attempt_at drive the retry backoff; lease_owner and lease_expires
+    hold the dispatch lease of the worker submitting it.
+    """
+    should_close = False
+    if conn is None:
+        conn = get_db_connection()
+        should_close = True
+    
+    try:
+        cursor = conn.execute("PRAGMA table_info(jobs)")
+        job_columns = [row[1] for row in cursor.fetchall()]
+        
+        new_columns = {
+            'dispatched_at': 'TIMESTAMP',
+            'provider_accepted_at': 'TIMESTAMP',
+            'first_polled_at': 'TIMESTAMP',
+            'client_notified_at': 'TIMESTAMP',
+            'dispatch_state': 'TEXT',
+            'dispatch_attempts': 'INTEGER DEFAULT 0',
+            'last_dispatch_error': 'TEXT',
+            'next_attempt_at': 'TIMESTAMP',
+            'lease_owner': 'TEXT',
+            'lease_expires': 'TIMESTAMP',
+        }
+        for column, column_type in new_columns.items():
+            if column not in job_columns:
+                print(f"Migrating jobs table to add {column}...")
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_dispatch_state ON jobs(dispatch_state)"
+        )
+        
+        conn.commit()
+        
+    except Exception as e:
+        print(f"Error migrating job lifecycle columns: {e}")
+        raise
+    finally:
+        if should_close:
+            conn.close()
+
+
 def init_database() -> None:
     """
     Initialize the database schema.
@@ -181,6 +288,12 @@ def init_database() -> None:
         # Initialize Higgsfield Accounts table
         init_higgsfield_accounts_table(conn)
         
+        # Initialize job events broker table
+        init_job_events_table(conn)
+        
+        # Job lifecycle timestamps (pipeline metrics)
+        init_job_lifecycle_columns(conn)
+        
     except Exception as e:
         print(f"Error initializing database: {e}")
         raise
@@ -208,6 +321,7 @@ def init_subscription_tables(conn=None) -> None:
                 image_concurrent_limit INTEGER NOT NULL,
                 video_concurrent_limit INTEGER NOT NULL,
                 queue_limit INTEGER NOT NULL DEFAULT 5,
+                queue_lane TEXT, -- stable fair-scheduler lane, e.g. free (not renamed with the plan)
                 description TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
@@ -228,6 +342,12 @@ def init_subscription_tables(conn=None) -> None:
             conn.commit()
             print("queue_limit column added successfully")
 
+        if 'queue_lane' not in sp_columns:
+            print("Adding queue_lane column to subscription_plans...")
+            conn.execute("ALTER TABLE subscription_plans ADD COLUMN queue_lane TEXT")
+        # Plans without a lane take their current name once; renames keep the lane
+        conn.execute("UPDATE subscription_plans SET queue_lane = LOWER(name) WHERE queue_lane IS NULL")
+
         # 2. Seed Default Plans (now queue_limit column exists)
         seed_subscription_plans(conn)
 
@@ -283,6 +403,7 @@ def seed_subscription_plans(conn):
         # ID 1: Free
         {
             "name": "Free",
+            "queue_lane": "free",
             "price": 0.0,
             "total_concurrent_limit": 2,
             "image_concurrent_limit": 1,
@@ -293,6 +414,7 @@ def seed_subscription_plans(conn):
         # ID 2: Starter
         {
             "name": "Starter",
+            "queue_lane": "starter",
             "price": 49000.0,
             "total_concurrent_limit": 2,
             "image_concurrent_limit": 1,
@@ -303,6 +425,7 @@ def seed_subscription_plans(conn):
         # ID 3: Professional
         {
             "name": "Professional",
+            "queue_lane": "professional",
             "price": 149000.0,
             "total_concurrent_limit": 4,
             "image_concurrent_limit": 2,
@@ -313,6 +436,7 @@ def seed_subscription_plans(conn):
         # ID 4: Business
         {
             "name": "Business",
+            "queue_lane": "business",
             "price": 499000.0,
             "total_concurrent_limit": 6,
             "image_concurrent_limit": 3,
@@ -325,8 +449,8 @@ def seed_subscription_plans(conn):
     for plan in plans:
         conn.execute("""
             INSERT OR IGNORE INTO subscription_plans 
-            (name, price, total_concurrent_limit, image_concurrent_limit, video_concurrent_limit, queue_limit, description)
-            VALUES (:name, :price, :total_concurrent_limit, :image_concurrent_limit, :video_concurrent_limit, :queue_limit, :description)
+            (name, queue_lane, price, total_concurrent_limit, image_concurrent_limit, video_concurrent_limit, queue_limit, description)
+            VALUES (:name, :queue_lane, :price, :total_concurrent_limit, :image_concurrent_limit, :video_concurrent_limit, :queue_limit, :description)
         """, plan)
         
         # If the plan exists but parameters might have changed (optional: update logic could go here)
@@ -511,6 +635,32 @@ def init_admin_tables(conn=None) -> None:
             """)
         except Exception as e:
             print(f"Error seeding settings: {e}")
+        
+        # Seed per-model processing deadline overrides (see processing_timeouts.py)
+        conn.execute("""
+            INSERT OR IGNORE INTO system_settings (setting_key, setting_value, description, is_public)
+            VALUES ('processing_timeout_minutes', '{}', 'JSON map of model -> max minutes in processing before the job is failed and refunded ("default" applies to all models). Empty = derive from observed durations', 0)
+        """)
+
+        # Seed queue priority lanes (see fair_scheduler.py)
+        conn.execute("""
+            INSERT OR IGNORE INTO system_settings (setting_key, setting_value, description, is_public)
+            VALUES 
+            ('queue_lane_weights', '{"free": 1, "starter": 2, "professional": 4, "business": 8}', 'JSON map of queue lane (subscription_plans.queue_lane) -> share of dispatch slots when the queue is backlogged', 0),
+            ('queue_aging_seconds', '120', 'Seconds a queued job waits to gain one extra dispatch turn (starvation protection for low-priority lanes)', 0)
+        """)
+
+        # Seed provider/model in-flight caps (see provider_capacity.py)
+        conn.execute("""
+            INSERT OR IGNORE INTO system_settings (setting_key, setting_value, description, is_public)
+            VALUES ('max_in_flight', '{}', 'JSON map of provider ("higgsfield", "google_veo") or model -> max in-flight jobs; overrides *_MAX_IN_FLIGHT, 0 = unlimited', 0)
+        """)
+
+        # Seed Higgsfield account selection policy (see account_policies.py)
+        conn.execute("""
+            INSERT OR IGNORE INTO system_settings (setting_key, setting_value, description, is_public)
+            VALUES ('account_selection_policy', '{"default": "strict_priority"}', 'JSON map of job type (t2i, i2i, t2v, i2v) or "default" -> Higgsfield account selection policy: strict_priority, weighted_round_robin, least_loaded or latency_aware', 0)
+        """)
 
         conn.commit()
         print("Admin tables initialized successfully")
@@ -2,12 +2,13 @@
 """FastAPI dependency injection for authentication and database access."""
 
 from typing import Optional
-from fastapi import Header, HTTPException, Depends
+from fastapi import Header, HTTPException, Depends, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from app.utils.jwt_utils import decode_access_token, JWTError
+from app.utils.jwt_utils import decode_access_token, decode_stream_ticket, JWTError
 from app.repositories import users_repo
 from app.schemas.users import UserInDB
+from app.config import settings
 
 
 # HTTP Bearer token security scheme
@@ -50,6 +51,11 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
+    return _load_active_user(payload)
+
+
+def _load_active_user(payload: dict) -> UserInDB:
+    """Load the user a validated token was issued for (401 if gone, 403 if banned)."""
     user_id = payload.get("user_id")
     if not user_id:
         raise HTTPException(
@@ -94,6 +100,46 @@ async def get_current_user_optional(
         return None
 
 
+async def get_current_user_sse(
+    ticket: Optional[str] = Query(
+        None, description="Stream ticket from POST /api/jobs/stream/ticket (EventSource cannot send headers)"
+    ),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> UserInDB:
+    """
+    Authentication for Server-Sent Events endpoints.
+    
+    Browsers' EventSource API cannot set an Authorization header, so a
+    short-lived stream ticket may be passed as the `ticket` query parameter
+    instead. Access tokens are never accepted in the URL (query strings end
+    up in access logs). The header takes precedence when both are present.
+    """
+    if credentials is None and ticket:
+        try:
+            payload = decode_stream_ticket(ticket)
+        except JWTError as e:
+            raise HTTPException(status_code=401, detail=str(e))
+        return _load_active_user(payload)
+    
+    return await get_current_user(credentials)
+
+
+def get_async_dispatch(
+    async_dispatch: Optional[bool] = Query(
+        None,
+        description="Return 202 right after the job is persisted; a dispatch worker submits it to the provider"
+    )
+) -> bool:
+    """
+    Whether a generate endpoint should accept-then-dispatch.
+    
+    Defaults to the ASYNC_DISPATCH_DEFAULT setting when the client does not choose.
+    """
+    if async_dispatch is None:
+        return settings.ASYNC_DISPATCH_DEFAULT
+    return async_dispatch
+
+
 def require_credits(min_credits: int = 1):
     """
     Dependency factory that checks if user has sufficient credits.
@@ -24,7 +24,8 @@ from app.routers import (
     admin_api_keys,
     image,
     video,
-    sora
+    sora,
+    metrics
 )
 from app.routers import settings as public_settings
 from .config import settings
@@ -34,6 +35,14 @@ from .repositories import model_costs_repo
 from .tasks.cleanup import run_pending_jobs_cleanup
 from .tasks.job_monitor import run_job_monitor
 from .tasks.old_jobs_cleanup import run_old_jobs_cleanup
+from .tasks.job_events_relay import run_job_events_relay
+from .tasks.promotion_sweep import run_promotion_sweep
+from .services.job_events import job_event_bus
+from .services.dispatch_workers import dispatch_pool
+from .services.fair_scheduler import fair_scheduler
+from .services.account_scheduler import account_scheduler
+from .services.providers.client_registry import higgsfield_clients
+from .services.providers.google_client import google_veo_client
 import asyncio
 
 
@@ -71,11 +80,36 @@ async def lifespan(app: FastAPI):
         print(f"Warning: Database initialization failed: {e}")
         print("The app will continue but database features may not work.")
     
+    # Bind job event bus to this loop (publishers may run in threads)
+    try:
+        job_event_bus.bind_loop(asyncio.get_running_loop())
+    except Exception as e:
+        print(f"Warning: Job event bus setup failed: {e}")
+    
+    # Rebuild pending queues and keep them current from job events
+    try:
+        fair_scheduler.rebuild()
+        job_event_bus.add_listener(fair_scheduler.on_job_event)
+    except Exception as e:
+        print(f"Warning: Fair scheduler setup failed: {e}")
+    
+    # Load account capacity and follow it from job events
+    try:
+        account_scheduler.capacity.reconcile()
+        job_event_bus.add_listener(account_scheduler.capacity.on_job_event)
+    except Exception as e:
+        print(f"Warning: Account capacity setup failed: {e}")
+    
     # Start background tasks
     print("Starting background tasks...")
+    dispatch_pool.num_workers = settings.DISPATCH_WORKERS
+    dispatch_pool.start()
+    fair_scheduler.request_round()
     cleanup_task = asyncio.create_task(run_pending_jobs_cleanup())
     job_monitor_task = asyncio.create_task(run_job_monitor())
     old_jobs_cleanup_task = asyncio.create_task(run_old_jobs_cleanup())
+    job_events_relay_task = asyncio.create_task(run_job_events_relay())
+    promotion_sweep_task = asyncio.create_task(run_promotion_sweep())
     
     yield
     
@@ -83,9 +117,12 @@ async def lifespan(app: FastAPI):
     print("Shutting down...")
     
     # Cancel background tasks
+    await dispatch_pool.stop()
     cleanup_task.cancel()
     job_monitor_task.cancel()
     old_jobs_cleanup_task.cancel()
+    job_events_relay_task.cancel()
+    promotion_sweep_task.cancel()
     try:
         await cleanup_task
     except asyncio.CancelledError:
@@ -98,6 +135,18 @@ async def lifespan(app: FastAPI):
         await old_jobs_cleanup_task
     except asyncio.CancelledError:
         print("Old jobs cleanup task cancelled")
+    try:
+        await job_events_relay_task
+    except asyncio.CancelledError:
+        print("Job events relay task cancelled")
+    try:
+        await promotion_sweep_task
+    except asyncio.CancelledError:
+        print("Promotion sweep task cancelled")
+    
+    # Close provider HTTP sessions
+    await higgsfield_clients.close()
+    google_veo_client.close()
 
 
 app = FastAPI(
@@ -198,6 +247,9 @@ app.include_router(health.router, prefix="/health", tags=["health"])
 # Sora Downloader
 app.include_router(sora.router, prefix="/api/sora", tags=["sora"])
 
+# Prometheus metrics (scraped by monitoring, hidden from docs)
+app.include_router(metrics.router, prefix="/metrics", include_in_schema=False)
+
 # ============================================
 # Admin Panel Routes (prefixed with /api to avoid frontend collision)
 # Hidden from public docs for security
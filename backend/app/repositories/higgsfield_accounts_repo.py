@@ -3,6 +3,7 @@ Repository for managing Higgsfield provider accounts.
 Handles CRUD operations and job statistics for multiple accounts.
 """
 
+from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from app.database.db import get_db_context, fetch_one, fetch_all, execute_returning_id
 
@@ -142,16 +143,17 @@ class HiggsfieldAccountsRepository:
         - video_jobs: Active video jobs
         - slow_image_jobs: Active slow/high-quality image jobs
         - slow_video_jobs: Active slow/high-quality video jobs
-        """
-        # TODO: Implement slow job detection logic
-        # For now, we count all jobs as potentially slow
-        # In production, this should check model names/parameters
         
+        Slow jobs are classified when created (jobs.is_slow, see
+        AccountScheduler.classify_job_as_slow).
+        """
         query = """
             SELECT 
                 COUNT(*) as total_jobs,
                 SUM(CASE WHEN type IN ('t2i', 'i2i') THEN 1 ELSE 0 END) as image_jobs,
-                SUM(CASE WHEN type IN ('t2v', 'i2v') THEN 1 ELSE 0 END) as video_jobs
+                SUM(CASE WHEN type IN ('t2v', 'i2v') THEN 1 ELSE 0 END) as video_jobs,
+                SUM(CASE WHEN is_slow AND type IN ('t2i', 'i2i') THEN 1 ELSE 0 END) as slow_image_jobs,
+                SUM(CASE WHEN is_slow AND type IN ('t2v', 'i2v') THEN 1 ELSE 0 END) as slow_video_jobs
             FROM jobs
             WHERE account_id = ? 
             AND status IN ('pending', 'processing')
@@ -168,33 +170,96 @@ class HiggsfieldAccountsRepository:
                 'slow_video_jobs': 0
             }
         
-        # TODO: Add slow job counting when we have model classification
-        # For now, assume up to half of jobs could be slow
         return {
             'total_jobs': result['total_jobs'] or 0,
             'image_jobs': result['image_jobs'] or 0,
             'video_jobs': result['video_jobs'] or 0,
-            'slow_image_jobs': 0,  # Placeholder
-            'slow_video_jobs': 0   # Placeholder
+            'slow_image_jobs': result['slow_image_jobs'] or 0,
+            'slow_video_jobs': result['slow_video_jobs'] or 0
+        }
+    
+    def get_in_flight_jobs(self) -> List[Dict]:
+        """
+        Get every active (pending or processing) job bound to an account.
+        Used to rebuild the in-memory account capacity table.
+        """
+        query = """
+            SELECT job_id, account_id, type, model, is_slow
+            FROM jobs
+            WHERE account_id IS NOT NULL
+            AND status IN ('pending', 'processing')
+        """
+        return fetch_all(query)
+
+    @staticmethod
+    def empty_stats() -> Dict[str, int]:
+        return {
+            'total_jobs': 0,
+            'image_jobs': 0,
+            'video_jobs': 0,
+            'slow_image_jobs': 0,
+            'slow_video_jobs': 0
         }
     
+    def get_stats_by_account(self) -> Dict[int, Dict[str, int]]:
+        """
+        Active job statistics of every account with active jobs, in one
+        grouped query (same shape as get_account_stats).
+        """
+        query = """
+            SELECT account_id, type, is_slow, COUNT(*) as count
+            FROM jobs
+            WHERE account_id IS NOT NULL
+            AND status IN ('pending', 'processing')
+            GROUP BY account_id, type, is_slow
+        """
+        result: Dict[int, Dict[str, int]] = {}
+        for row in fetch_all(query):
+            stats = result.setdefault(row['account_id'], self.empty_stats())
+            category = 'image' if row['type'] in ('t2i', 'i2i') else 'video'
+            stats['total_jobs'] += row['count']
+            stats[f'{category}_jobs'] += row['count']
+            if row['is_slow']:
+                stats[f'slow_{category}_jobs'] += row['count']
+        return result
+    
+    def get_recent_completions(self, minutes: int = 15) -> Dict[int, Dict]:
+        """
+        Jobs each account finished in the last `minutes`: completed and
+        failed counts and the average completion time (seconds from start
+        of processing to completion) of the completed ones.
+        """
+        cutoff = (datetime.utcnow() - timedelta(minutes=minutes)).isoformat() + 'Z'
+        query = """
+            SELECT account_id,
+                   SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed_jobs,
+                   SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed_jobs,
+                   AVG(CASE WHEN status = 'completed' THEN
+                       (julianday(REPLACE(completed_at, 'Z', ''))
+                        - julianday(REPLACE(COALESCE(started_processing_at, created_at), 'Z', ''))) * 86400.0
+                   END) as avg_completion_seconds
+            FROM jobs
+            WHERE status IN ('completed', 'failed')
+            AND completed_at > ?
+            AND account_id IS NOT NULL
+            GROUP BY account_id
+        """
+        return {row['account_id']: row for row in fetch_all(query, (cutoff,))}
+    
     def get_all_account_stats(self) -> List[Dict]:
         """
         Get statistics for all accounts.
         
         Returns list of dicts with account info + current stats.
         """
-        accounts = self.list_accounts()
-        result = []
-        
-        for account in accounts:
-            stats = self.get_account_stats(account['account_id'])
-            result.append({
+        stats = self.get_stats_by_account()
+        return [
+            {
                 **account,
-                'stats': stats
-            })
-        
-        return result
+                'stats': stats.get(account['account_id']) or self.empty_stats()
+            }
+            for account in self.list_accounts()
+        ]
 
 
 # Singleton instance
@@ -18,47 +18,69 @@ def get_utc_now() -> str:
     return datetime.utcnow().isoformat() + 'Z'  # Z suffix indicates UTC
 
 
-def create(job_data: JobCreate, status: str = 'pending') -> dict:
+def create(job_data: JobCreate, status: str = 'pending', dispatch_state: Optional[str] = None) -> dict:
     """
     Create a new job record.
     
     Args:
         job_data: Job creation data
         status: Initial status (pending or processing)
+        dispatch_state: Provider submission state (derived from status if omitted)
         
     Returns:
         Created job record as dictionary
     """
-    now = get_utc_now()
-    
     with get_db_context() as conn:
-        conn.execute(
-            """
-            INSERT INTO jobs (
-                job_id, user_id, type, model, status, prompt,
-                input_params, input_images, credits_cost, created_at,
-                provider_job_id
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                job_data.job_id,
-                job_data.user_id,
-                job_data.type,
-                job_data.model,
-                status,
-                job_data.prompt,
-                job_data.input_params,
-                job_data.input_images,
-                job_data.credits_cost,
-                now,
-                job_data.provider_job_id
-            )
-        )
+        insert_job(conn, job_data, status, dispatch_state)
     
     return get_by_id(job_data.job_id)
 
 
+def insert_job(conn, job_data: JobCreate, status: str = 'pending', dispatch_state: Optional[str] = None) -> None:
+    """
+    Insert a job row inside the caller's transaction.
+    Call jobs_service.publish_created once the transaction has committed.
+    """
+    now = get_utc_now()
+    
+    if dispatch_state is None:
+        dispatch_state = {'processing': 'submitted', 'pending': 'queued'}.get(status)
+    
+    # Jobs started inline were already accepted by the provider
+    accepted_at = now if status == 'processing' and job_data.provider_job_id else None
+    
+    conn.execute(
+        """
+        INSERT INTO jobs (
+            job_id, user_id, type, model, status, prompt,
+            input_params, input_images, credits_cost, created_at,
+            provider_job_id, dispatched_at, provider_accepted_at,
+            started_processing_at, dispatch_state, account_id, is_slow
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            job_data.job_id,
+            job_data.user_id,
+            job_data.type,
+            job_data.model,
+            status,
+            job_data.prompt,
+            job_data.input_params,
+            job_data.input_images,
+            job_data.credits_cost,
+            now,
+            job_data.provider_job_id,
+            accepted_at,
+            accepted_at,
+            accepted_at,
+            dispatch_state,
+            job_data.account_id,
+            job_data.is_slow
+        )
+    )
+
+
 def get_by_id(job_id: str) -> Optional[dict]:
     """Find job by job ID."""
     return fetch_one(
@@ -139,7 +161,7 @@ def update_status(
     status: str,
     output_url: Optional[str] = None,
     error_message: Optional[str] = None
-) -> bool:
+) -> Optional[dict]:
     """
     Update job status and related fields.
     
@@ -150,51 +172,323 @@ def update_status(
         error_message: Error message (for failed jobs)
         
     Returns:
-        True if update succeeded
+        The updated job row, or None if the job does not exist
     """
     now = get_utc_now()
     
     if status == "completed":
-        affected = execute(
-            """
+        query = """
             UPDATE jobs 
             SET status = ?, output_url = ?, completed_at = ?
             WHERE job_id = ?
-            """,
-            (status, output_url, now, job_id)
-        )
+            RETURNING *
+        """
+        params = (status, output_url, now, job_id)
     elif status == "failed":
-        affected = execute(
-            """
+        query = """
             UPDATE jobs 
             SET status = ?, error_message = ?, completed_at = ?
             WHERE job_id = ?
-            """,
-            (status, error_message, now, job_id)
-        )
+            RETURNING *
+        """
+        params = (status, error_message, now, job_id)
     elif status == "processing":
-        affected = execute(
-            """
+        query = """
             UPDATE jobs 
             SET status = ?, started_processing_at = ?
             WHERE job_id = ?
-            """,
-            (status, now, job_id)
-        )
+            RETURNING *
+        """
+        params = (status, now, job_id)
     else:
-        affected = execute(
-            "UPDATE jobs SET status = ? WHERE job_id = ?",
-            (status, job_id)
-        )
+        query = "UPDATE jobs SET status = ? WHERE job_id = ? RETURNING *"
+        params = (status, job_id)
     
-    return affected > 0
+    return _update_returning(query, params)
+
+
+def _update_returning(query: str, params: tuple) -> Optional[dict]:
+    """Run an UPDATE ... RETURNING * and return the updated row (None if no row matched)."""
+    with get_db_context() as conn:
+        row = conn.execute(query, params).fetchone()
+    return dict(row) if row else None
+
+
+def mark_submitted(job_id: str, lease_owner: str, provider_job_id: str) -> Optional[dict]:
+    """
+    Record that the provider accepted a job and start processing it, in one
+    write: provider id, acceptance time, status 'processing', lease ended.
+    
+    Only applies while lease_owner still holds the lease on the pending job,
+    so a worker whose lease expired (and was re-claimed) cannot overwrite
+    the new owner's dispatch, and a job cancelled or failed meanwhile is
+    never revived.
+    
+    Returns:
+        The processing job row, or None if the lease was lost or the job left pending
+    """
+    now = get_utc_now()
+    return _update_returning(
+        """
+        UPDATE jobs 
+        SET status = 'processing', provider_job_id = ?, provider_accepted_at = ?,
+            started_processing_at = ?, dispatch_state = 'submitted',
+            lease_owner = NULL, lease_expires = NULL
+        WHERE job_id = ? AND lease_owner = ? AND status = 'pending'
+        RETURNING *
+        """,
+        (provider_job_id, now, now, job_id, lease_owner)
+    )
+
 
+def _lease_expiry(lease_seconds: float) -> str:
+    return (datetime.utcnow() + timedelta(seconds=lease_seconds)).isoformat() + 'Z'
 
-def set_provider_id(job_id: str, provider_job_id: str) -> bool:
-    """Set the provider job ID for a job."""
+
+def claim_for_dispatch(job_id: str, lease_owner: str, lease_seconds: float) -> Optional[dict]:
+    """
+    Atomically claim a pending job for dispatch under a lease.
+    
+    Records dispatched_at and the lease (owner, expiry). Fails if the job is
+    no longer pending, another worker holds an unexpired lease on it, or its
+    retry backoff has not elapsed. The owner keeps the lease alive with
+    extend_lease while submitting; an expired lease can be claimed again
+    (or is recovered by recover_expired_leases).
+    
+    Returns:
+        The claimed job row, or None if this caller does not own the dispatch
+    """
+    with get_db_context() as conn:
+        return claim_in_transaction(conn, job_id, lease_owner, lease_seconds)
+
+
+def claim_in_transaction(conn, job_id: str, lease_owner: str, lease_seconds: float) -> Optional[dict]:
+    """claim_for_dispatch inside the caller's transaction (e.g. right after insert_job)."""
+    now = get_utc_now()
+    row = conn.execute(
+        """
+        UPDATE jobs 
+        SET dispatched_at = ?, dispatch_state = 'dispatching',
+            lease_owner = ?, lease_expires = ?
+        WHERE job_id = ?
+        AND status = 'pending'
+        AND (lease_expires IS NULL OR lease_expires <= ?)
+        AND (next_attempt_at IS NULL OR next_attempt_at <= ?)
+        RETURNING *
+        """,
+        (now, lease_owner, _lease_expiry(lease_seconds), job_id, now, now)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def extend_lease(job_id: str, lease_owner: str, lease_seconds: float) -> bool:
+    """
+    Heartbeat: push back the expiry of a dispatch lease still held by lease_owner.
+    
+    Returns:
+        False if the lease was lost (expired and re-claimed, or the job left pending)
+    """
     return execute(
-        "UPDATE jobs SET provider_job_id = ? WHERE job_id = ?",
-        (provider_job_id, job_id)
+        """
+        UPDATE jobs SET lease_expires = ?
+        WHERE job_id = ? AND lease_owner = ? AND status = 'pending'
+        """,
+        (_lease_expiry(lease_seconds), job_id, lease_owner)
+    ) > 0
+
+
+def recover_expired_leases() -> List[dict]:
+    """
+    Return jobs whose dispatch lease expired (the worker died or hung
+    mid-submission) to the queue. They keep their reserved slot ('accepted')
+    so they are dispatched first.
+    
+    Returns:
+        The recovered job rows
+    """
+    with get_db_context() as conn:
+        rows = conn.execute(
+            """
+            UPDATE jobs 
+            SET dispatch_state = 'accepted', dispatched_at = NULL, account_id = NULL,
+                lease_owner = NULL, lease_expires = NULL
+            WHERE status = 'pending'
+            AND dispatch_state = 'dispatching'
+            AND (lease_expires IS NULL OR lease_expires <= ?)
+            RETURNING *
+            """,
+            (get_utc_now(),)
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def set_account(job_id: str, account_id: Optional[int]) -> bool:
+    """Record the Higgsfield account a job is being submitted on."""
+    return execute(
+        "UPDATE jobs SET account_id = ? WHERE job_id = ?",
+        (account_id, job_id)
+    ) > 0
+
+
+def release_dispatch_claim(job_id: str, lease_owner: str) -> bool:
+    """
+    Release a dispatch claim so the job can be retried (back in the queue).
+    A reserved slot ('accepted') is given up: the job competes for provider
+    capacity again.
+    """
+    return execute(
+        """
+        UPDATE jobs SET dispatched_at = NULL, dispatch_state = 'queued', account_id = NULL,
+            lease_owner = NULL, lease_expires = NULL
+        WHERE job_id = ? AND status = 'pending' AND lease_owner = ?
+        """,
+        (job_id, lease_owner)
+    ) > 0
+
+
+def record_dispatch_failure(job_id: str, error: str, next_attempt_at: str, lease_owner: str) -> bool:
+    """
+    Record a failed provider submission and put the job back in the queue,
+    not to be claimed again before next_attempt_at. Like
+    release_dispatch_claim, a reserved slot is given up during the backoff.
+    """
+    return execute(
+        """
+        UPDATE jobs 
+        SET dispatch_attempts = COALESCE(dispatch_attempts, 0) + 1,
+            last_dispatch_error = ?,
+            next_attempt_at = ?,
+            dispatched_at = NULL,
+            dispatch_state = 'queued',
+            account_id = NULL,
+            lease_owner = NULL,
+            lease_expires = NULL
+        WHERE job_id = ? AND status = 'pending' AND lease_owner = ?
+        """,
+        (error, next_attempt_at, job_id, lease_owner)
+    ) > 0
+
+
+def mark_dead_letter(job_id: str, error: str, lease_owner: str) -> Optional[dict]:
+    """
+    Fail a pending job whose submission will not be retried (dead letter).
+    The caller refunds the credits.
+    
+    Returns:
+        The failed job row, or None if the job left pending or the lease was lost
+    """
+    return _update_returning(
+        """
+        UPDATE jobs 
+        SET status = 'failed',
+            dispatch_state = 'dead_letter',
+            dispatch_attempts = COALESCE(dispatch_attempts, 0) + 1,
+            last_dispatch_error = ?,
+            error_message = ?,
+            next_attempt_at = NULL,
+            dispatched_at = NULL,
+            lease_owner = NULL,
+            lease_expires = NULL,
+            completed_at = ?
+        WHERE job_id = ? AND status = 'pending' AND lease_owner = ?
+        RETURNING *
+        """,
+        (error, f"Submission failed: {error}", get_utc_now(), job_id, lease_owner)
+    )
+
+
+def get_dead_letter_jobs(limit: int = 50, offset: int = 0) -> List[dict]:
+    """Get dead-lettered jobs, most recent first."""
+    return fetch_all(
+        """
+        SELECT j.job_id, j.user_id, u.email as user_email, j.type, j.model,
+               j.credits_cost, j.credits_refunded, j.dispatch_attempts,
+               j.last_dispatch_error, j.created_at, j.completed_at
+        FROM jobs j
+        LEFT JOIN users u ON u.user_id = j.user_id
+        WHERE j.dispatch_state = 'dead_letter'
+        ORDER BY j.completed_at DESC
+        LIMIT ? OFFSET ?
+        """,
+        (limit, offset)
+    )
+
+
+def count_dead_letter_jobs() -> int:
+    """Count dead-lettered jobs."""
+    result = fetch_one(
+        "SELECT COUNT(*) as count FROM jobs WHERE dispatch_state = 'dead_letter'"
+    )
+    return result["count"] if result else 0
+
+
+def requeue_dead_letter(conn, job_id: str) -> Optional[dict]:
+    """
+    Put a dead-lettered job back in the queue with a fresh attempt budget,
+    due now (which also restarts its stale-pending clock).
+    
+    Runs inside the caller's transaction (see JobQueueService.requeue_dead_letter_jobs),
+    which also charges the credits again if they were refunded.
+    
+    Returns:
+        The job row as it was before the requeue, or None if the job is not dead-lettered
+    """
+    row = conn.execute(
+        """
+        SELECT * FROM jobs 
+        WHERE job_id = ? AND status = 'failed' AND dispatch_state = 'dead_letter'
+        """,
+        (job_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    
+    conn.execute(
+        """
+        UPDATE jobs 
+        SET status = 'pending',
+            dispatch_state = 'queued',
+            dispatch_attempts = 0,
+            next_attempt_at = ?,
+            dispatched_at = NULL,
+            error_message = NULL,
+            completed_at = NULL,
+            credits_refunded = FALSE
+        WHERE job_id = ?
+        """,
+        (get_utc_now(), job_id)
+    )
+    return dict(row)
+
+
+def mark_first_polled(job_id: str) -> bool:
+    """
+    Record the first provider status poll of a job.
+    
+    Returns:
+        True if this was the first poll
+    """
+    return execute(
+        "UPDATE jobs SET first_polled_at = ? WHERE job_id = ? AND first_polled_at IS NULL",
+        (get_utc_now(), job_id)
+    ) > 0
+
+
+def mark_client_notified(job_id: str) -> bool:
+    """
+    Record when the client first received a job's terminal state.
+    
+    Returns:
+        True if this was the first notification
+    """
+    return execute(
+        """
+        UPDATE jobs SET client_notified_at = ?
+        WHERE job_id = ?
+        AND client_notified_at IS NULL
+        AND status IN ('completed', 'failed')
+        """,
+        (get_utc_now(), job_id)
     ) > 0
 
 
@@ -255,9 +549,175 @@ def get_recent_by_user(user_id: str, limit: int = 10) -> List[dict]:
     )
 
 
+def get_active_by_user(user_id: str) -> List[dict]:
+    """Get a user's pending and processing jobs (oldest first)."""
+    return fetch_all(
+        """
+        SELECT * FROM jobs 
+        WHERE user_id = ?
+        AND status IN ('pending', 'processing')
+        ORDER BY created_at ASC
+        """,
+        (user_id,)
+    )
+
+
+def get_pending_jobs(user_ids: Optional[List[str]] = None) -> List[dict]:
+    """
+    Get pending jobs, oldest first (used to rebuild the scheduler).
+    
+    Args:
+        user_ids: Only these users' jobs (all users if None)
+    """
+    if user_ids is None:
+        return fetch_all(
+            """
+            SELECT job_id, user_id, type, model, created_at, dispatch_state, next_attempt_at FROM jobs 
+            WHERE status = 'pending'
+            ORDER BY created_at ASC
+            """
+        )
+    
+    if not user_ids:
+        return []
+    
+    placeholders = ",".join("?" for _ in user_ids)
+    return fetch_all(
+        f"""
+        SELECT job_id, user_id, type, model, created_at, dispatch_state, next_attempt_at FROM jobs 
+        WHERE status = 'pending'
+        AND user_id IN ({placeholders})
+        ORDER BY created_at ASC
+        """,
+        tuple(user_ids)
+    )
+
+
+def get_queued_by_user(user_id: str) -> List[dict]:
+    """Get a user's queued jobs (pending without a reserved slot), oldest first."""
+    return fetch_all(
+        """
+        SELECT job_id, type, model, created_at, next_attempt_at FROM jobs 
+        WHERE user_id = ?
+        AND status = 'pending'
+        AND COALESCE(dispatch_state, 'queued') NOT IN ('accepted', 'dispatching')
+        ORDER BY created_at ASC, job_id ASC
+        """,
+        (user_id,)
+    )
+
+
+def count_queued_ahead(user_id: str) -> List[dict]:
+    """
+    For each of a user's queued jobs, count the queued jobs (all users)
+    created before it, per model, in one aggregate query.
+    
+    Returns:
+        Rows of job_id, model, count (jobs with nothing ahead have no rows)
+    """
+    return fetch_all(
+        """
+        SELECT mine.job_id, ahead.model, COUNT(*) as count
+        FROM jobs mine
+        JOIN jobs ahead
+            ON ahead.status = 'pending'
+            AND COALESCE(ahead.dispatch_state, 'queued') NOT IN ('accepted', 'dispatching')
+            AND (ahead.created_at < mine.created_at
+                 OR (ahead.created_at = mine.created_at AND ahead.job_id < mine.job_id))
+        WHERE mine.user_id = ?
+        AND mine.status = 'pending'
+        AND COALESCE(mine.dispatch_state, 'queued') NOT IN ('accepted', 'dispatching')
+        GROUP BY mine.job_id, ahead.model
+        """,
+        (user_id,)
+    )
+
+
+def get_in_flight_counts(conn=None) -> List[dict]:
+    """
+    Count in-flight jobs per model (all users): processing, or pending with
+    a reserved slot (accepted / being dispatched).
+
+    Args:
+        conn: Count inside the caller's transaction (own connection if None)
+    """
+    query = """
+        SELECT model, COUNT(*) as count
+        FROM jobs
+        WHERE status = 'processing'
+        OR (status = 'pending' AND dispatch_state IN ('accepted', 'dispatching'))
+        GROUP BY model
+    """
+    if conn is None:
+        return fetch_all(query)
+    return [dict(row) for row in conn.execute(query).fetchall()]
+
+
+def get_users_with_promotable_jobs(limit: int = 500) -> List[dict]:
+    """
+    Find users that have pending jobs and free concurrent capacity, in one query.
+    
+    Capacity counts processing jobs and jobs being dispatched against the
+    plan's total concurrent limit (Free defaults for users without a plan).
+    Accepted jobs are not counted: they are what the free slot is for.
+    Jobs waiting out a retry backoff are not promotable yet.
+    
+    Returns:
+        Rows of user_id, pending_count, oldest_pending_at, active_count,
+        total_limit - users with the oldest pending job first
+    """
+    return fetch_all(
+        """
+        SELECT 
+            p.user_id,
+            COUNT(*) as pending_count,
+            MIN(p.created_at) as oldest_pending_at,
+            COALESCE(a.n, 0) as active_count,
+            COALESCE(sp.total_concurrent_limit, 2) as total_limit
+        FROM jobs p
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) as n
+            FROM jobs
+            WHERE status = 'processing'
+            OR (status = 'pending' AND dispatch_state = 'dispatching')
+            GROUP BY user_id
+        ) a ON a.user_id = p.user_id
+        LEFT JOIN users u ON u.user_id = p.user_id
+        LEFT JOIN subscription_plans sp ON sp.plan_id = u.plan_id
+        WHERE p.status = 'pending'
+        AND (p.next_attempt_at IS NULL OR p.next_attempt_at <= ?)
+        GROUP BY p.user_id
+        HAVING active_count < total_limit
+        ORDER BY oldest_pending_at ASC
+        LIMIT ?
+        """,
+        (get_utc_now(), limit)
+    )
+
+
+# A pending job is stale when nobody is dispatching it (no lease) and it
+# has been waiting since before the cutoff: since creation, or since its
+# last retry became due (requeued jobs restart the clock the same way).
+# Jobs created before dispatch_state existed have NULL: they are queued.
+_STALE_PENDING_SQL = """
+    status = 'pending'
+    AND lease_owner IS NULL
+    AND COALESCE(dispatch_state, 'queued') IN ('queued', 'accepted')
+    AND COALESCE(next_attempt_at, created_at) < ?
+"""
+
+
+def _stale_cutoff(minutes: int) -> str:
+    return (datetime.utcnow() - timedelta(minutes=minutes)).isoformat() + 'Z'
+
+
 def get_stale_pending_jobs(minutes: int = 30) -> List[dict]:
     """
-    Get job IDs that have been pending for longer than the specified minutes.
+    Get pending jobs that have been waiting for longer than the specified minutes.
+    
+    Jobs being dispatched (leased) or waiting out a retry backoff are not
+    stale: staleness counts from creation or from the last time a retry
+    became due.
     
     Args:
         minutes: Number of minutes to consider a job stale
@@ -265,28 +725,89 @@ def get_stale_pending_jobs(minutes: int = 30) -> List[dict]:
     Returns:
         List of stale jobs
     """
-    # SQLite datetime calculation: datetime('now', '-30 minutes')
-    # But since we store created_at as ISO string, we can use datetime comparison
-    # generated in Python or rely on SQLite functions if dates are standard.
-    # We use ISO format in Python, so standard string comparison works IF purely ISO.
-    # However, 'now' in SQLite is UTC, our app uses UTC.
-    
-    # Let's use Python to calculate the cutoff time string to be safe and consistent
-    
-    from datetime import timedelta
-    utc_cutoff = datetime.utcnow() - timedelta(minutes=minutes)
-    cutoff = utc_cutoff.isoformat() + 'Z'
+    return fetch_all(
+        f"SELECT * FROM jobs WHERE {_STALE_PENDING_SQL}",
+        (_stale_cutoff(minutes),)
+    )
+
+
+def fail_if_stale_pending(job_id: str, error_message: str, minutes: int = 30) -> Optional[dict]:
+    """
+    Fail a pending job only if it is still stale (see get_stale_pending_jobs).
+    Guards against failing a job a worker claimed since it was listed.
     
+    Returns:
+        The failed job row, or None if the job is no longer stale
+    """
+    return _update_returning(
+        f"""
+        UPDATE jobs 
+        SET status = 'failed', error_message = ?, completed_at = ?
+        WHERE job_id = ?
+        AND {_STALE_PENDING_SQL}
+        RETURNING *
+        """,
+        (error_message, get_utc_now(), job_id, _stale_cutoff(minutes))
+    )
+
+
+def get_processing_jobs_started_before(cutoff: str) -> List[dict]:
+    """
+    Get processing jobs that started before the cutoff (UTC ISO string).
+    Jobs without started_processing_at fall back to created_at.
+    """
     return fetch_all(
         """
         SELECT * FROM jobs 
-        WHERE status = 'pending' 
-        AND created_at < ?
+        WHERE status = 'processing'
+        AND COALESCE(started_processing_at, created_at) < ?
+        ORDER BY created_at ASC
         """,
         (cutoff,)
     )
 
 
+def get_recent_processing_durations(days: int = 7, limit: int = 5000) -> List[dict]:
+    """
+    Get model and processing duration (seconds) of recently completed jobs.
+    Used to derive per-model processing deadlines.
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat() + 'Z'
+    return fetch_all(
+        """
+        SELECT model,
+               (julianday(REPLACE(completed_at, 'Z', '')) 
+                - julianday(REPLACE(COALESCE(started_processing_at, created_at), 'Z', ''))) * 86400.0 as duration_seconds
+        FROM jobs
+        WHERE status = 'completed'
+        AND completed_at IS NOT NULL
+        AND completed_at > ?
+        ORDER BY completed_at DESC
+        LIMIT ?
+        """,
+        (cutoff, limit)
+    )
+
+
+def fail_if_processing(job_id: str, error_message: str) -> Optional[dict]:
+    """
+    Mark a job failed only if it is still processing.
+    Guards against overwriting a completion detected concurrently by the monitor.
+    
+    Returns:
+        The failed job row, or None if the job was no longer processing
+    """
+    return _update_returning(
+        """
+        UPDATE jobs 
+        SET status = 'failed', error_message = ?, completed_at = ?
+        WHERE job_id = ? AND status = 'processing'
+        RETURNING *
+        """,
+        (error_message, get_utc_now(), job_id)
+    )
+
+
 def get_active_jobs() -> List[dict]:
     """
     Get all jobs that are currently pending or processing AND are actively running on provider.
@@ -305,7 +826,7 @@ def get_active_jobs() -> List[dict]:
     )
 
 
-def cancel_job(job_id: str, user_id: str) -> bool:
+def cancel_job(job_id: str, user_id: str) -> Optional[dict]:
     """
     Cancel a job if it belongs to the user and is still active.
     
@@ -314,24 +835,24 @@ def cancel_job(job_id: str, user_id: str) -> bool:
         user_id: User ID (for ownership check)
         
     Returns:
-        True if cancelled successfully, False otherwise
+        The cancelled job row, or None if the job was not cancelled
     """
     now = get_utc_now()
     
-    affected = execute(
+    return _update_returning(
         """
         UPDATE jobs 
         SET status = 'cancelled', completed_at = ?
         WHERE job_id = ? 
         AND user_id = ? 
         AND status IN ('pending', 'processing')
+        RETURNING *
         """,
         (now, job_id, user_id)
     )
-    return affected > 0
 
 
-def delete_job(job_id: str, user_id: str) -> bool:
+def delete_job(job_id: str, user_id: str) -> Optional[str]:
     """
     Delete a job permanently.
     
@@ -340,16 +861,19 @@ def delete_job(job_id: str, user_id: str) -> bool:
         user_id: User ID (for ownership check)
         
     Returns:
-        True if deleted successfully, False otherwise
+        The status the job had, or None if it was not deleted
     """
-    affected = execute(
-        """
-        DELETE FROM jobs 
-        WHERE job_id = ? AND user_id = ?
-        """,
-        (job_id, user_id)
-    )
-    return affected > 0
+    with get_db_context() as conn:
+        deleted = conn.execute(
+            """
+            DELETE FROM jobs 
+            WHERE job_id = ? AND user_id = ?
+            RETURNING status
+            """,
+            (job_id, user_id)
+        ).fetchone()
+    
+    return deleted["status"] if deleted else None
 
 
 def delete_old_jobs(days: int = 7) -> int:
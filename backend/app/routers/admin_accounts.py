@@ -2,12 +2,13 @@
 Admin API endpoints for managing Higgsfield provider accounts.
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.deps import get_current_admin
 from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
-from app.services.providers.higgsfield_client import HiggsfieldClient
+from app.services.account_scheduler import account_scheduler
 
 
 router = APIRouter()
@@ -70,11 +71,125 @@ async def list_accounts(
 
 @router.get("/accounts/stats")
 async def get_all_account_stats(admin=Depends(get_current_admin)):
-    """Get statistics for all accounts including current job counts."""
+    """Get statistics for all accounts including current job counts and health."""
     stats = higgsfield_accounts_repo.get_all_account_stats()
+    for account in stats:
+        account['health'] = account_scheduler.capacity.get_health(account['account_id'])
     return {"accounts": stats}
 
 
+def _utilization(stats: Dict[str, int], limits: Dict[str, int]) -> Dict[str, float]:
+    """Share of each kind of slot in use (0 when the limit is 0)."""
+    return {
+        kind: round(stats[f'{kind}_jobs'] / limits[f'max_{name}'], 3) if limits[f'max_{name}'] else 0.0
+        for kind, name in (
+            ('image', 'parallel_images'),
+            ('video', 'parallel_videos'),
+            ('slow_image', 'slow_images'),
+            ('slow_video', 'slow_videos'),
+        )
+    }
+
+
+@router.get("/accounts/capacity")
+async def get_accounts_capacity(
+    window_minutes: int = Query(default=15, ge=1, le=1440),
+    admin=Depends(get_current_admin)
+):
+    """
+    Live capacity dashboard: per account in-flight jobs, limits,
+    utilization, jobs finished in the last window_minutes and average
+    completion time, plus totals over the active accounts.
+    
+    Three indexed queries regardless of the number of accounts, so the
+    admin page can refresh it every few seconds.
+    """
+    accounts = higgsfield_accounts_repo.list_accounts()
+    in_flight = higgsfield_accounts_repo.get_stats_by_account()
+    recent = higgsfield_accounts_repo.get_recent_completions(window_minutes)
+    
+    limit_keys = ('max_parallel_images', 'max_parallel_videos', 'max_slow_images', 'max_slow_videos')
+    totals_stats = higgsfield_accounts_repo.empty_stats()
+    totals_limits = {key: 0 for key in limit_keys}
+    totals_completed = 0
+    totals_failed = 0
+    
+    result = []
+    for account in accounts:
+        account_id = account['account_id']
+        stats = in_flight.get(account_id) or higgsfield_accounts_repo.empty_stats()
+        limits = {key: account[key] for key in limit_keys}
+        finished = recent.get(account_id) or {}
+        completed = finished.get('completed_jobs') or 0
+        failed = finished.get('failed_jobs') or 0
+        avg_completion = finished.get('avg_completion_seconds')
+        
+        if account['is_active']:
+            for key in totals_stats:
+                totals_stats[key] += stats[key]
+            for key in limit_keys:
+                totals_limits[key] += limits[key]
+        totals_completed += completed
+        totals_failed += failed
+        
+        result.append({
+            "account_id": account_id,
+            "name": account['name'],
+            "is_active": bool(account['is_active']),
+            "priority": account['priority'],
+            "health": account_scheduler.capacity.get_health(account_id)['status'],
+            "in_flight": stats,
+            "limits": limits,
+            "utilization": _utilization(stats, limits),
+            "recent": {
+                "completed_jobs": completed,
+                "failed_jobs": failed,
+                "completed_per_minute": round(completed / window_minutes, 2),
+                "avg_completion_seconds": round(avg_completion, 1) if avg_completion is not None else None,
+            },
+        })
+    
+    return {
+        "generated_at": datetime.utcnow().isoformat() + 'Z',
+        "window_minutes": window_minutes,
+        "accounts": result,
+        "totals": {
+            "in_flight": totals_stats,
+            "limits": totals_limits,
+            "utilization": _utilization(totals_stats, totals_limits),
+            "completed_jobs": totals_completed,
+            "failed_jobs": totals_failed,
+            "completed_per_minute": round(totals_completed / window_minutes, 2),
+            "waiting_for_account": account_scheduler.capacity.waiters.count(),
+        },
+    }
+
+
+@router.get("/accounts/health")
+async def get_accounts_health(admin=Depends(get_current_admin)):
+    """
+    Health of every account: status (healthy, quarantined, probation),
+    score, rolling error rate, auth failures, submission latency and the
+    per-host stats of its HTTP session (requests, errors, mean latency,
+    connections opened). Quarantined accounts are skipped by account selection until their
+    probation probe succeeds.
+    """
+    accounts = higgsfield_accounts_repo.list_accounts()
+    return {
+        "accounts": [
+            {
+                "account_id": account['account_id'],
+                "name": account['name'],
+                "is_active": bool(account['is_active']),
+                "health": account_scheduler.capacity.get_health(account['account_id']),
+                "latency": account_scheduler.capacity.get_latency(account['account_id']),
+                "http": account_scheduler.get_session_stats(account['account_id']),
+            }
+            for account in accounts
+        ]
+    }
+
+
 @router.post("/accounts", response_model=HiggsfieldAccountDetailResponse, status_code=201)
 async def create_account(
     data: HiggsfieldAccountCreate,
@@ -93,6 +208,7 @@ async def create_account(
             priority=data.priority,
             is_active=data.is_active
         )
+        account_scheduler.capacity.reconcile()
         
         account = higgsfield_accounts_repo.get_account(account_id)
         return account
@@ -137,6 +253,11 @@ async def update_account(
     
     if not success:
         raise HTTPException(status_code=400, detail="Failed to update account")
+    if 'sses' in update_data or 'cookie' in update_data:
+        # New credentials: forget failures of the old ones
+        account_scheduler.capacity.reset_health(account_id)
+    account_scheduler.invalidate_client(account_id)
+    account_scheduler.capacity.reconcile()
     
     # Return updated account
     updated_account = higgsfield_accounts_repo.get_account(account_id)
@@ -167,6 +288,8 @@ async def delete_account(
     
     if not success:
         raise HTTPException(status_code=400, detail="Failed to delete account")
+    account_scheduler.invalidate_client(account_id)
+    account_scheduler.capacity.reconcile()
     
     return None
 
@@ -184,9 +307,9 @@ async def test_account_credentials(
         raise HTTPException(status_code=404, detail="Account not found")
     
     try:
-        # Create client instance and test authentication
-        client = HiggsfieldClient.create_from_account(account_id)
-        jwt_token = client.get_jwt_token()
+        # Test authentication with the account's client
+        client = account_scheduler.get_client(account_id)
+        jwt_token = await client.get_jwt_token_async()
         
         return {
             "success": True,
@@ -217,6 +340,7 @@ async def get_account_stats(
         "account_id": account_id,
         "account_name": account['name'],
         "stats": stats,
+        "health": account_scheduler.capacity.get_health(account_id),
         "limits": {
             "max_parallel_images": account['max_parallel_images'],
             "max_parallel_videos": account['max_parallel_videos'],
@@ -224,3 +348,20 @@ async def get_account_stats(
             "max_slow_videos": account['max_slow_videos']
         }
     }
+
+
+@router.post("/accounts/{account_id}/health/reset")
+async def reset_account_health(
+    account_id: int,
+    admin=Depends(get_current_admin)
+):
+    """Lift an account's quarantine and clear its health history."""
+    account = higgsfield_accounts_repo.get_account(account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    
+    account_scheduler.capacity.reset_health(account_id)
+    return {
+        "account_id": account_id,
+        "health": account_scheduler.capacity.get_health(account_id)
+    }
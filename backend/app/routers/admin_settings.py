@@ -4,6 +4,8 @@ from pydantic import BaseModel
 from typing import List, Optional
 from app.deps import get_current_admin, AdminInDB
 from app.repositories import settings_repo
+from app.services.account_policies import SETTING_KEY as ACCOUNT_POLICY_KEY
+from app.services.account_scheduler import account_scheduler
 
 router = APIRouter(prefix="/admin/settings", tags=["admin-settings"])
 
@@ -130,6 +132,10 @@ async def update_setting(
     success = settings_repo.update_setting(key, body.value, admin.admin_id)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to update setting")
+
+    if key == ACCOUNT_POLICY_KEY:
+        # Apply now instead of at the next capacity reconcile
+        account_scheduler.capacity.load_policies()
         
     updated = settings_repo.get_setting(key)
     return SettingResponse(**dict(updated))
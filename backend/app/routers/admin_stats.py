@@ -1,13 +1,16 @@
 # routers/admin_stats.py
 """Admin dashboard statistics endpoints."""
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
 from app.deps import get_current_admin, AdminInDB
 from app.database.db import fetch_one, fetch_all
+from app.repositories import jobs_repo
+from app.repositories.admin_audit_repo import log_action, AuditLogCreate
+from app.services.job_queue_service import JobQueueService
 
 
 router = APIRouter(prefix="/admin/stats", tags=["admin-stats"])
@@ -52,6 +55,36 @@ class DashboardResponse(BaseModel):
     recent_jobs: List[RecentJob]
 
 
+class DeadLetterJob(BaseModel):
+    job_id: str
+    user_id: str
+    user_email: Optional[str]
+    model: str
+    type: str
+    credits_cost: int
+    credits_refunded: bool
+    dispatch_attempts: int
+    last_dispatch_error: Optional[str]
+    created_at: str
+    completed_at: Optional[str]
+
+
+class DeadLetterResponse(BaseModel):
+    jobs: List[DeadLetterJob]
+    total: int
+    page: int
+    pages: int
+
+
+class RequeueRequest(BaseModel):
+    job_ids: Optional[List[str]] = None  # All dead-lettered jobs (up to 500) if omitted
+
+
+class RequeueResponse(BaseModel):
+    requeued: List[str]
+    skipped: Dict[str, str]
+
+
 # ============================================
 # Endpoints
 # ============================================
@@ -229,3 +262,56 @@ async def get_all_jobs(
         "page": page,
         "pages": pages
     }
+
+
+@router.get("/jobs/dead-letter", response_model=DeadLetterResponse)
+async def get_dead_letter_jobs(
+    current_admin: AdminInDB = Depends(get_current_admin),
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=100)
+):
+    """Get jobs whose provider submission failed after all retries."""
+    offset = (page - 1) * limit
+    total = jobs_repo.count_dead_letter_jobs()
+    jobs = jobs_repo.get_dead_letter_jobs(limit=limit, offset=offset)
+    
+    return DeadLetterResponse(
+        jobs=[
+            DeadLetterJob(
+                **{**j, "credits_refunded": bool(j["credits_refunded"]), "dispatch_attempts": j["dispatch_attempts"] or 0}
+            )
+            for j in jobs
+        ],
+        total=total,
+        page=page,
+        pages=(total + limit - 1) // limit
+    )
+
+
+@router.post("/jobs/dead-letter/requeue", response_model=RequeueResponse)
+async def requeue_dead_letter_jobs(
+    body: RequeueRequest,
+    request: Request,
+    current_admin: AdminInDB = Depends(get_current_admin)
+):
+    """Requeue dead-lettered jobs in bulk (credits are charged again)."""
+    job_ids = body.job_ids
+    if job_ids is None:
+        job_ids = [j["job_id"] for j in jobs_repo.get_dead_letter_jobs(limit=500)]
+    
+    result = JobQueueService.requeue_dead_letter_jobs(job_ids)
+    
+    if result["requeued"]:
+        log_action(AuditLogCreate(
+            admin_id=current_admin.admin_id,
+            action="requeue_dead_letter_jobs",
+            target_type="job",
+            details={
+                "requeued": result["requeued"],
+                "skipped": result["skipped"]
+            },
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent")
+        ))
+    
+    return RequeueResponse(**result)
@@ -2,6 +2,7 @@
 from fastapi import APIRouter, HTTPException, File, UploadFile, Form
 from app.services.providers.higgsfield_client import higgsfield_client
 from app.schemas.higgsfield import GenerateImageResponse
+from app.utils.images import InvalidImageError
 from pydantic import BaseModel
 from typing import Optional
 
@@ -24,13 +25,15 @@ async def upload_image(image: UploadFile = File(...)):
     """
     try:
         image_data = await image.read()
-        result = higgsfield_client.upload_image_complete(image_data)
+        result = await higgsfield_client.upload_image_complete_async(image_data)
         return UploadResponse(
             id=result["id"],
             url=result["url"],
             width=result["width"],
             height=result["height"]
         )
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"Upload failed: {str(e)}\n{traceback.format_exc()}"
@@ -64,7 +67,7 @@ async def generate_kling_2_5_turbo_i2v(
         print(f"  - img_url: {img_url}")
         print(f"  - width: {width}, height: {height}")
         
-        job_id = higgsfield_client.send_job_kling_2_5_turbo_i2v(
+        job_id = await higgsfield_client.send_job_kling_2_5_turbo_i2v_async(
             prompt=prompt,
             duration=duration,
             resolution=resolution,
@@ -102,7 +105,7 @@ async def generate_kling_o1_i2v(
     Step 2: Use img_id/url from upload endpoint
     """
     try:
-        job_id = higgsfield_client.send_job_kling_o1_i2v(
+        job_id = await higgsfield_client.send_job_kling_o1_i2v_async(
             prompt=prompt,
             duration=duration,
             aspect_ratio=aspect_ratio,
@@ -133,7 +136,7 @@ async def generate_kling_2_6_t2v(
     Kling 2.6 Text-to-Video (no image needed)
     """
     try:
-        job_id = higgsfield_client.send_job_kling_2_6_t2v(
+        job_id = await higgsfield_client.send_job_kling_2_6_t2v_async(
             prompt=prompt,
             duration=duration,
             aspect_ratio=aspect_ratio,
@@ -165,7 +168,7 @@ async def generate_kling_2_6_i2v(
     Step 2: Use img_id/url from upload endpoint
     """
     try:
-        job_id = higgsfield_client.send_job_kling_2_6_i2v(
+        job_id = await higgsfield_client.send_job_kling_2_6_i2v_async(
             prompt=prompt,
             duration=duration,
             sound=sound,
@@ -5,7 +5,7 @@ import json
 from fastapi import APIRouter, HTTPException, Depends
 from typing import Optional
 
-from app.services.providers.higgsfield_client import higgsfield_client, HiggsfieldClient
+from app.services.account_scheduler import account_scheduler
 from app.schemas.higgsfield import (
     UploadURLResponse,
     UploadCheckRequest,
@@ -21,36 +21,13 @@ from app.deps import get_current_user, get_current_user_optional
 from app.services.credits_service import credits_service, InsufficientCreditsError
 from app.services.cost_calculator import CostCalculationError
 from app.repositories import jobs_repo
-from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
+from app.services import jobs_service
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["higgsfield"])
 
-# ============================================
-# HELPER FUNCTIONS
-# ============================================
-
-def get_higgsfield_client():
-    """
-    Get Higgsfield client using active account from DB (highest priority).
-    Falls back to default .env client if no active accounts found.
-    """
-    try:
-        accounts = higgsfield_accounts_repo.list_accounts(active_only=True)
-        if accounts:
-            # Accounts are already ordered by priority DESC in repo
-            # Pick the first one (highest priority)
-            account_id = accounts[0]['account_id']
-            return HiggsfieldClient.create_from_account(account_id)
-    except Exception as e:
-        logger.error(f"Error fetching Higgsfield account: {e}")
-    
-    # Fallback to default
-    return higgsfield_client
-
-
 # ============================================
 # PUBLIC ENDPOINTS (no auth required)
 # ============================================
@@ -59,8 +36,8 @@ def get_higgsfield_client():
 async def get_token():
     """Get JWT token for Higgsfield API (internal use)"""
     try:
-        client = get_higgsfield_client()
-        token = client.get_jwt_token_with_retry()
+        client = account_scheduler.get_default_client()
+        token = await client.get_jwt_token_with_retry_async()
         return {"token": token}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -79,22 +56,8 @@ async def create_media_upload(
     Frontend will upload directly to the returned upload_url.
     """
     try:
-        client = get_higgsfield_client()
-        jwt_token = client.get_jwt_token_with_retry()
-        url = f"{client.base_url}/media?require_consent=true"
-        headers = client._get_headers(jwt_token)
-        headers['content-length'] = '0'
-        
-        import requests
-        response = requests.post(url, headers=headers, data={})
-        response.raise_for_status()
-        
-        data = response.json()
-        return {
-            "id": data.get("id"),
-            "url": data.get("url"),
-            "upload_url": data.get("upload_url")
-        }
+        client = account_scheduler.get_default_client()
+        return await client.create_upload_link_async()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -104,8 +67,8 @@ async def get_upload_url(
     current_user: UserInDB = Depends(get_current_user)
 ):
     try:
-        client = get_higgsfield_client()
-        result = client.get_upload_url()
+        client = account_scheduler.get_default_client()
+        result = await client.create_upload_link_async()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -116,8 +79,8 @@ async def create_reference_media(
     current_user: UserInDB = Depends(get_current_user)
 ):
     try:
-        client = get_higgsfield_client()
-        result = client.create_reference_media()
+        client = account_scheduler.get_default_client()
+        result = await client.create_reference_media_async()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -128,8 +91,8 @@ async def batch_media(
     current_user: UserInDB = Depends(get_current_user)
 ):
     try:
-        client = get_higgsfield_client()
-        result = client.batch_media()
+        client = account_scheduler.get_default_client()
+        result = await client.batch_media_async()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -141,8 +104,8 @@ async def check_upload(
     current_user: UserInDB = Depends(get_current_user)
 ):
     try:
-        client = get_higgsfield_client()
-        response_text = client.check_upload(request.img_id)
+        client = account_scheduler.get_default_client()
+        response_text = await client.check_upload_async(request.img_id)
         return {"status": "success", "message": response_text}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -187,8 +150,8 @@ async def generate_image(
             )
         
         # 3. Generate image via Higgsfield API
-        client = get_higgsfield_client()
-        job_id = client.generate_image(
+        client = account_scheduler.get_default_client()
+        job_id = await client.generate_image_async(
             prompt=request.prompt,
             input_images=request.input_images or [],
             aspect_ratio=request.aspect_ratio,
@@ -228,7 +191,7 @@ async def generate_image(
             input_images=json.dumps([img.dict() if hasattr(img, 'dict') else img for img in (request.input_images or [])]),
             credits_cost=cost
         )
-        jobs_repo.create(job_data)
+        jobs_service.create(job_data)
         
         return GenerateResponse(
             job_id=job_id,
@@ -290,8 +253,8 @@ async def generate_video(
             )
         
         # 3. Generate video via Higgsfield API
-        client = get_higgsfield_client()
-        job_id = client.generate_video(
+        client = account_scheduler.get_default_client()
+        job_id = await client.generate_video_async(
             prompt=request.prompt,
             model=request.model,
             duration=request.duration,
@@ -335,7 +298,7 @@ async def generate_video(
             input_images=json.dumps([img.dict() if hasattr(img, 'dict') else img for img in (request.input_images or [])]),
             credits_cost=cost
         )
-        jobs_repo.create(job_data)
+        jobs_service.create(job_data)
         
         return GenerateResponse(
             job_id=job_id,
@@ -376,8 +339,13 @@ async def get_job_status(
     """
     try:
         # Get latest status from Higgsfield API
-        client = get_higgsfield_client()
-        result = client.get_job_status(job_id)
+        # Poll on the account the job was submitted on
+        job = jobs_repo.get_by_id(job_id)
+        if job and job.get("account_id") is not None:
+            client = account_scheduler.get_client(job["account_id"])
+        else:
+            client = account_scheduler.get_default_client()
+        result = await client.get_job_status_async(job_id)
         
         # If user is authenticated, update our database
         if current_user:
@@ -399,10 +367,10 @@ async def get_job_status(
                 if new_status != job["status"]:
                     # Status changed - update database
                     if new_status == "completed":
-                        jobs_repo.update_status(job_id, new_status, output_url=output_url)
+                        jobs_service.update_status(job_id, new_status, output_url=output_url)
                     elif new_status == "failed":
                         error_msg = result.get("error", "Generation failed")
-                        jobs_repo.update_status(job_id, new_status, error_message=error_msg)
+                        jobs_service.update_status(job_id, new_status, error_message=error_msg)
                         
                         # Trigger refund if not already refunded
                         if not job.get("credits_refunded", False):
@@ -414,7 +382,7 @@ async def get_job_status(
                                 result["refunded"] = True
                                 result["new_balance"] = refund_result
                     else:
-                        jobs_repo.update_status(job_id, new_status)
+                        jobs_service.update_status(job_id, new_status)
                 
                 # Add credits info to response
                 result["credits_cost"] = job["credits_cost"]
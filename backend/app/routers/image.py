@@ -3,11 +3,10 @@
 
 import json
 import uuid
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form
+from fastapi import APIRouter, HTTPException, Depends, Response, File, UploadFile, Form
 from typing import Optional, List
 
-from app.services.providers.higgsfield_client import higgsfield_client, HiggsfieldClient
-from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
+from app.services.account_scheduler import account_scheduler
 from app.schemas.higgsfield import (
     UploadURLResponse,
     UploadCheckRequest,
@@ -15,11 +14,11 @@ from app.schemas.higgsfield import (
 )
 from app.schemas.jobs import GenerateResponse, JobCreate
 from app.schemas.users import UserInDB
-from app.deps import get_current_user
+from app.deps import get_current_user, get_async_dispatch
 from app.services.credits_service import credits_service, InsufficientCreditsError
 from app.services.cost_calculator import CostCalculationError
-from app.services.concurrency_service import ConcurrencyService
-from app.repositories import jobs_repo
+from app.services.job_queue_service import JobQueueService, QueueFullError, SubmissionFailedError
+from app.utils.images import InvalidImageError
 from pydantic import BaseModel
 
 
@@ -55,29 +54,6 @@ class NanoBananaProRequest(BaseModel):
     speed: Optional[str] = "fast"  # fast (standard) or slow (unlimited)
 
 
-# ============================================
-# HELPER FUNCTIONS
-# ============================================
-
-def get_higgsfield_client():
-    """
-    Get Higgsfield client using active account from DB (highest priority).
-    Falls back to default .env client if no active accounts found.
-    """
-    try:
-        accounts = higgsfield_accounts_repo.list_accounts(active_only=True)
-        if accounts:
-            # Accounts are already ordered by priority DESC in repo
-            # Pick the first one (highest priority)
-            account_id = accounts[0]['account_id']
-            return HiggsfieldClient.create_from_account(account_id)
-    except Exception as e:
-        print(f"Error fetching Higgsfield account: {e}")
-    
-    # Fallback to default
-    return higgsfield_client
-
-
 # ============================================
 # UPLOAD ENDPOINTS
 # ============================================
@@ -88,8 +64,8 @@ async def create_upload_url(
 ):
     """Create a presigned URL for image upload."""
     try:
-        client = get_higgsfield_client()
-        result = client.create_reference_media()
+        client = account_scheduler.get_default_client()
+        result = await client.create_reference_media_async()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to create reference media")
@@ -101,8 +77,8 @@ async def create_batch_upload_url(
 ):
     """Create a presigned URL for batch image upload."""
     try:
-        client = get_higgsfield_client()
-        result = client.batch_media()
+        client = account_scheduler.get_default_client()
+        result = await client.batch_media_async()
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to create batch media")
@@ -115,8 +91,8 @@ async def check_upload(
 ):
     """Verify that an image has been successfully uploaded."""
     try:
-        client = get_higgsfield_client()
-        response_text = client.check_upload(request.img_id)
+        client = account_scheduler.get_default_client()
+        response_text = await client.check_upload_async(request.img_id)
         return {"status": "success", "message": response_text}
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to check upload")
@@ -133,14 +109,16 @@ async def upload_image_complete(
     """
     try:
         image_data = await image.read()
-        client = get_higgsfield_client()
-        result = client.upload_image_complete(image_data)
+        client = account_scheduler.get_default_client()
+        result = await client.upload_image_complete_async(image_data)
         return UploadResponse(
             id=result["id"],
             url=result["url"],
             width=result["width"],
             height=result["height"]
         )
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         print(f"Upload failed: {str(e)}\n{traceback.format_exc()}")
@@ -154,7 +132,9 @@ async def upload_image_complete(
 @router.post("/nano-banana/generate", response_model=GenerateResponse)
 async def generate_nano_banana(
     request: NanoBananaRequest,
-    current_user: UserInDB = Depends(get_current_user)
+    response: Response,
+    current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch)
 ):
     """
     Generate image using Nano Banana (standard model).
@@ -187,64 +167,10 @@ async def generate_nano_banana(
                 }
             )
             
-        # 3. Check Concurrent limits (Plan Limits)
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, job_type)
-        can_start = limit_check.get("can_start", limit_check["allowed"])
-        can_queue = limit_check.get("can_queue", True)
-        
-        # If neither start nor queue is possible, reject with 429
-        if not can_start and not can_queue:
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "Queue full",
-                    "message": limit_check.get("reason", "Queue limit reached. Please wait for existing jobs to complete."),
-                    "current_usage": limit_check.get("current_usage"),
-                    "limits": limit_check.get("limits")
-                }
-            )
-        
         # Prepare Job ID (Local UUID)
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
         
-        if can_start:
-            # 4. Generate image via Higgsfield API (Only if allowed)
-            # fast -> use_unlim=False (standard queue)
-            # slow -> use_unlim=True (relaxed queue)
-            use_unlim = True if request.speed == "slow" else False
-            
-            # Debug (commented out)
-            # print(f"\n=== SENDING JOB TO HIGGSFIELD ===")
-            # print(f"Model: {model}")
-            # print(f"Prompt: {request.prompt}")
-            # print(f"Aspect Ratio: {request.aspect_ratio}")
-            # print(f"Speed: {request.speed} (use_unlim={use_unlim})")
-            # print(f"Input Images: {len(request.input_images or [])}")
-            
-            # print(f"Input Images: {len(request.input_images or [])}")
-            
-            client = get_higgsfield_client()
-            provider_job_id = client.generate_image(
-                prompt=request.prompt,
-                input_images=request.input_images or [],
-                aspect_ratio=request.aspect_ratio,
-                model=model,
-                use_unlim=use_unlim
-            )
-            
-            # Debug (commented out)
-            # print(f"Provider Job ID received: {provider_job_id}")
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create job on provider")
-            
-            status = "processing"
-            # Debug (commented out)
-            # print(f"Job status: {status}")
-        
-        # 5. Create job in database
+        # 3. Job record (created by the reservation)
         job_data = JobCreate(
             job_id=job_id,
             user_id=current_user.user_id,
@@ -256,33 +182,17 @@ async def generate_nano_banana(
                 "speed": request.speed
             }),
             input_images=json.dumps([img if isinstance(img, dict) else img for img in (request.input_images or [])]),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
+            credits_cost=cost
         )
-        # Pass explicit status ('processing' if started, 'pending' if queued)
-        jobs_repo.create(job_data, status=status)
-        # Debug (commented out)
-        # print(f"Job created in DB: {job_id} with status={status}")
         
-        # 6. Deduct credits (creates credit_transaction with FK to job)
+        # 4. Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
         reason = f"Image generation: {model} {request.aspect_ratio} ({request.speed})"
         
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=reason
-        )
-        
-        # Debug (commented out)
-        # print(f"Credits deducted: {cost}, new balance: {new_balance}")
-        # print(f"=== JOB CREATION COMPLETE ===\n")
-        
-        return GenerateResponse(
-            job_id=job_id,
-            credits_cost=cost,
-            credits_remaining=new_balance
-        )
+        result = await JobQueueService.submit_or_queue(job_data, reason=reason, defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
         
     except CostCalculationError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -297,6 +207,10 @@ async def generate_nano_banana(
         )
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
     except Exception as e:
         import traceback
         print(f"Generation error: {str(e)}\n{traceback.format_exc()}")
@@ -310,7 +224,9 @@ async def generate_nano_banana(
 @router.post("/nano-banana-pro/generate", response_model=GenerateResponse)
 async def generate_nano_banana_pro(
     request: NanoBananaProRequest,
-    current_user: UserInDB = Depends(get_current_user)
+    response: Response,
+    current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch)
 ):
     """
     Generate image using Nano Banana Pro (high quality model).
@@ -344,51 +260,10 @@ async def generate_nano_banana_pro(
                 }
             )
             
-        # 3. Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, job_type)
-        can_start = limit_check.get("can_start", limit_check["allowed"])
-        can_queue = limit_check.get("can_queue", True)
-        
-        # If neither start nor queue is possible, reject with 429
-        if not can_start and not can_queue:
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "Queue full",
-                    "message": limit_check.get("reason", "Queue limit reached. Please wait for existing jobs to complete."),
-                    "current_usage": limit_check.get("current_usage"),
-                    "limits": limit_check.get("limits")
-                }
-            )
-        
         # Prepare Job ID (Local UUID)
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
         
-        if can_start:
-            # 4. Generate image via Higgsfield API
-            # fast -> use_unlim=False (standard)
-            # slow -> use_unlim=True (relaxed)
-            # slow -> use_unlim=True (relaxed)
-            use_unlim = True if request.speed == "slow" else False
-            
-            client = get_higgsfield_client()
-            provider_job_id = client.generate_image(
-                prompt=request.prompt,
-                input_images=request.input_images or [],
-                aspect_ratio=request.aspect_ratio,
-                resolution=request.resolution,
-                model=model,
-                use_unlim=use_unlim
-            )
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create job on provider")
-            
-            status = "processing"
-        
-        # 5. Create job in database
+        # 3. Job record (created by the reservation)
         job_data = JobCreate(
             job_id=job_id,
             user_id=current_user.user_id,
@@ -397,30 +272,21 @@ async def generate_nano_banana_pro(
             prompt=request.prompt,
             input_params=json.dumps({
                 "aspect_ratio": request.aspect_ratio,
-                "resolution": request.resolution
+                "resolution": request.resolution,
+                "speed": request.speed
             }),
             input_images=json.dumps([img if isinstance(img, dict) else img for img in (request.input_images or [])]),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
+            credits_cost=cost
         )
         
-        jobs_repo.create(job_data, status=status)
-        
-        # 6. Deduct credits
+        # 4. Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
         reason = f"Image generation: {model} {request.aspect_ratio} {request.resolution}"
         
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=reason
-        )
-        
-        return GenerateResponse(
-            job_id=job_id,
-            credits_cost=cost,
-            credits_remaining=new_balance
-        )
+        result = await JobQueueService.submit_or_queue(job_data, reason=reason, defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
         
     except CostCalculationError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -435,6 +301,10 @@ async def generate_nano_banana_pro(
         )
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
     except Exception as e:
         import traceback
         print(f"Generation error: {str(e)}\n{traceback.format_exc()}")
@@ -1,16 +1,24 @@
 # routers/jobs.py
 """Job status and management endpoints with authentication."""
 
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional
 
 from app.services.providers.higgsfield_client import higgsfield_client
 from app.services.providers.google_client import google_veo_client
 from app.schemas.higgsfield import JobStatusResponse
 from app.schemas.users import UserInDB
-from app.deps import get_current_user, get_current_user_optional
+from app.deps import get_current_user, get_current_user_optional, get_current_user_sse
 from app.services.credits_service import credits_service
+from app.services.job_events import job_event_bus
+from app.services import jobs_service
+from app.services import metrics
 from app.repositories import jobs_repo
+from app.config import settings
+from app.utils.jwt_utils import create_stream_ticket
 
 
 router = APIRouter(tags=["jobs"])
@@ -109,6 +117,93 @@ async def list_jobs(
     }
 
 
+# Statuses whose first delivery to the client is recorded (notify lag)
+NOTIFY_STATUSES = ("completed", "failed")
+
+
+def format_sse(event: dict, event_type: str = "job_update") -> str:
+    """Serialize a job event as a Server-Sent Events message."""
+    return f"event: {event_type}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def record_client_notified(job: dict) -> None:
+    """
+    Observe notify lag the first time a client receives a job's terminal
+    state (NOTIFY_STATUSES). Writes to the database: run it off the loop.
+    """
+    if jobs_repo.mark_client_notified(job["job_id"]):
+        metrics.job_notify_lag_seconds.observe(
+            metrics.elapsed_seconds(job.get("completed_at")), **metrics.job_labels(job)
+        )
+
+
+@router.post("/stream/ticket")
+async def create_job_stream_ticket(
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """
+    Issue a short-lived ticket for GET /api/jobs/stream.
+    
+    EventSource cannot send an Authorization header: request a ticket with
+    the access token, then connect with `/api/jobs/stream?ticket=...`
+    within `expires_in` seconds.
+    """
+    return {
+        "ticket": create_stream_ticket(current_user.user_id),
+        "expires_in": settings.STREAM_TICKET_TTL_SECONDS
+    }
+
+
+@router.get("/stream")
+async def stream_job_updates(
+    request: Request,
+    current_user: UserInDB = Depends(get_current_user_sse)
+):
+    """
+    Push job status updates for the current user (Server-Sent Events).
+    
+    On connect, the current state of every pending/processing job is sent,
+    followed by one `job_update` event per status transition. A comment
+    line is sent every 15s to keep proxies from closing the connection.
+    Clients can subscribe with `new EventSource('/api/jobs/stream?ticket=...')`
+    (ticket from POST /api/jobs/stream/ticket) instead of polling
+    GET /api/jobs/{job_id}.
+    """
+    user_id = current_user.user_id
+    queue = job_event_bus.subscribe(user_id)
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            
+            # Snapshot so reconnecting clients catch up on missed transitions
+            for job in await asyncio.to_thread(jobs_repo.get_active_by_user, user_id):
+                yield format_sse(job_event_bus.build_event(job))
+            
+            while True:
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+                if event.get("status") in NOTIFY_STATUSES:
+                    await asyncio.to_thread(record_client_notified, event)
+        finally:
+            job_event_bus.unsubscribe(user_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable nginx response buffering
+        }
+    )
+
+
 @router.get("/{job_id}")
 async def get_job_status(
     job_id: str,
@@ -143,6 +238,9 @@ async def get_job_status(
             "prompt": extract_user_prompt(job.get("prompt", "")),  # Filter technical prompt
         }
         
+        if job["status"] in NOTIFY_STATUSES:
+            await asyncio.to_thread(record_client_notified, job)
+        
         # 4. Add refund info if job failed
         if job["status"] == "failed" and job.get("credits_refunded"):
             result["refunded"] = True
@@ -185,7 +283,7 @@ async def cancel_job(
         )
     
     # Cancel the job (no refund)
-    cancelled = jobs_repo.cancel_job(job_id, current_user.user_id)
+    cancelled = jobs_service.cancel_job(job_id, current_user.user_id)
     
     if not cancelled:
         raise HTTPException(status_code=500, detail="Failed to cancel job")
@@ -218,7 +316,7 @@ async def delete_job(
         raise HTTPException(status_code=403, detail="You don't have access to this job")
     
     # Delete the job
-    deleted = jobs_repo.delete_job(job_id, current_user.user_id)
+    deleted = jobs_service.delete_job(job_id, current_user.user_id)
     
     if not deleted:
         raise HTTPException(status_code=500, detail="Failed to delete job")
@@ -261,7 +359,7 @@ async def batch_delete_jobs(
             })
             continue
 
-        if jobs_repo.delete_job(job_id, current_user.user_id):
+        if jobs_service.delete_job(job_id, current_user.user_id):
             deleted_count += 1
         else:
             failures.append({"job_id": job_id, "reason": "Database delete failed"})
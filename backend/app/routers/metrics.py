@@ -0,0 +1,80 @@
+# routers/metrics.py
+"""Prometheus metrics endpoint."""
+
+import logging
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.config import settings
+from app.database.db import fetch_all
+from app.deps import security
+from app.services import metrics
+from app.services.dispatch_workers import dispatch_pool
+from app.services.fair_scheduler import fair_scheduler
+from app.services.job_events import job_event_bus
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+jobs_active = metrics.registry.gauge(
+    "jobs_active", "Jobs currently pending or processing", metrics.JOB_LABELS + ("status",))
+dispatch_queue_depth = metrics.registry.gauge(
+    "dispatch_queue_depth", "Promotion requests waiting for a dispatch worker")
+dispatch_queue_depth.set_function(dispatch_pool.queue_depth)
+scheduler_pending_jobs = metrics.registry.gauge(
+    "scheduler_pending_jobs", "Pending jobs held by the fair scheduler")
+scheduler_pending_jobs.set_function(fair_scheduler.pending_count)
+sse_subscribers = metrics.registry.gauge(
+    "job_events_subscribers", "Open job event streams in this worker")
+sse_subscribers.set_function(job_event_bus.subscriber_count)
+
+
+def refresh_job_gauges() -> None:
+    """Recompute active job counts from the database."""
+    rows = fetch_all(
+        """
+        SELECT model, status, COUNT(*) as count FROM jobs
+        WHERE status IN ('pending', 'processing')
+        GROUP BY model, status
+        """
+    )
+    jobs_active.clear()
+    for row in rows:
+        jobs_active.set(row["count"], status=row["status"], **metrics.job_labels(row))
+
+
+def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+) -> None:
+    """
+    Only scrapers holding METRICS_TOKEN may read the metrics (they expose
+    per-account and per-lane load). Without a configured token the
+    endpoint is disabled.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+@router.get("", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_token)])
+async def prometheus_metrics():
+    """Export job pipeline metrics in Prometheus text format."""
+    try:
+        refresh_job_gauges()
+    except Exception as e:
+        logger.error(f"Error refreshing job gauges: {e}")
+    return PlainTextResponse(metrics.registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,13 +1,28 @@
+import asyncio
+import uuid
 from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File
 from typing import Optional
+from app.config import settings
 from app.middleware.api_key_auth import verify_api_key_dependency
 from app.repositories import api_keys_repo, jobs_repo, model_costs_repo
 from app.schemas.jobs import JobCreate
-from app.services.providers.higgsfield_client import higgsfield_client
 from app.services.providers.google_client import google_veo_client
+from app.services.account_scheduler import account_scheduler
+from app.services import jobs_service, metrics
+from app.services.job_queue_service import is_account_error
+from app.utils.images import InvalidImageError
 
 router = APIRouter()
 
+
+def _release_slot(job_id: str, error: BaseException) -> None:
+    """Free the account slot reserved for a submission that did not go through."""
+    if is_account_error(error):
+        account_scheduler.record_failure(job_id, error)
+    else:
+        account_scheduler.release_job(job_id)
+
+
 @router.get("/balance")
 async def check_balance(
     key_record: dict = Depends(verify_api_key_dependency)
@@ -58,9 +73,25 @@ async def public_generate_image(
             detail=f"Insufficient balance. Required: {cost}, Available: {current_balance}"
         )
 
+    # Pick a Higgsfield account with free capacity, waiting briefly for one
+    # (the public API does not queue); the job id holds the account slot
+    # until the job finishes
+    job_id = str(uuid.uuid4())
+    account_id, client = await account_scheduler.wait_for_client_for_job(
+        "t2i", model, job_id, settings.PUBLIC_API_ACCOUNT_WAIT_SECONDS, resolution=resolution
+    )
+    if client is None:
+        raise HTTPException(
+            status_code=503,
+            detail="All provider accounts are busy. Please retry shortly.",
+            headers={"Retry-After": "10"}
+        )
+
     # 3. Call Provider (Higgsfield)
+    submitted = False
     try:
-        result = higgsfield_client.generate_image(
+        submit_started = metrics.monotonic()
+        result = await client.generate_image_async(
             prompt=prompt,
             model=model,
             resolution=resolution,
@@ -68,9 +99,12 @@ async def public_generate_image(
         )
         
         if isinstance(result, dict):
-            job_id = result.get("job_id", "unknown")
+            provider_job_id = result.get("job_id")
         else:
-            job_id = result if result else "unknown"
+            provider_job_id = result
+        if not provider_job_id:
+            raise Exception("Provider returned no job id")
+        account_scheduler.record_submission(job_id, metrics.monotonic() - submit_started)
         
         # 4. Create Job Record
         real_user_id = key_record.get("user_id")
@@ -82,10 +116,14 @@ async def public_generate_image(
             type="t2i",
             model=model,
             prompt=prompt,
-            credits_cost=cost
+            credits_cost=cost,
+            provider_job_id=provider_job_id,
+            account_id=account_id
         )
         
-        jobs_repo.create(job_data)
+        # Already submitted: tracked by the job monitor, never re-dispatched
+        jobs_service.create(job_data, status="processing")
+        submitted = True
         
         # 5. Deduct Balance & Log Usage
         # Use execute_in_transaction for atomicity
@@ -109,6 +147,8 @@ async def public_generate_image(
         }
         
     except Exception as e:
+        if not submitted:
+            _release_slot(job_id, e)
         api_keys_repo.log_usage(
             key_id=key_record["key_id"],
             endpoint="/v1/image/generate",
@@ -125,13 +165,18 @@ async def check_public_job(
     key_record: dict = Depends(verify_api_key_dependency)
 ):
     """Check status of a job created via API."""
+    # Jobs created before local job ids were used directly as provider ids
+    job = jobs_repo.get_by_id(job_id)
+    provider_job_id = (job.get("provider_job_id") if job else None) or job_id
+    
     # Detect provider based on ID format
-    if "|" in job_id:
+    if "|" in provider_job_id:
         # Google Veo ID format: operation_name|scene_id
-        return google_veo_client.get_job_status(job_id)
+        return google_veo_client.get_job_status(provider_job_id)
     else:
-        # Default to Higgsfield (Kling/Nano)
-        return higgsfield_client.get_job_status(job_id)
+        # Default to Higgsfield (Kling/Nano), on the account the job was submitted on
+        client = account_scheduler.get_client(job.get("account_id") if job else None)
+        return await client.get_job_status_async(provider_job_id)
 
 @router.post("/video/generate")
 async def public_generate_video(
@@ -195,7 +240,44 @@ async def public_generate_video(
             detail=f"Insufficient balance. Required: {cost}, Available: {current_balance}"
         )
         
+    if "veo" not in model and "kling" not in model:
+        raise HTTPException(400, f"Unsupported model: {model}")
+    
+    kling_input_images = None
+    if "kling" in model and mode == "i2v":
+        if img_id and img_url:
+            # New flow: explicit ID + URL
+            kling_input_images = [{
+                "id": img_id,
+                "url": img_url,
+                "width": 1024, # Default fallback
+                "height": 1024 
+            }]
+        elif img_url:
+            # Legacy flow: URL only
+            kling_input_images = [{"url": img_url}]
+        else:
+            raise HTTPException(400, "For Kling I2V, provide 'img_id' & 'img_url' (preferred) or 'img_url'")
+        
+    # Pick a Higgsfield account with free capacity for Kling, waiting briefly
+    # for one (the public API does not queue); the job id holds the account
+    # slot until the job finishes
+    job_id = str(uuid.uuid4())
+    account_id, client = None, None
+    if "kling" in model:
+        account_id, client = await account_scheduler.wait_for_client_for_job(
+            mode, model, job_id, settings.PUBLIC_API_ACCOUNT_WAIT_SECONDS,
+            resolution=resolution, duration=duration
+        )
+        if client is None:
+            raise HTTPException(
+                status_code=503,
+                detail="All provider accounts are busy. Please retry shortly.",
+                headers={"Retry-After": "10"}
+            )
+        
     # 3. Call Provider
+    submitted = False
     try:
         result = {}
         if "veo" in model:
@@ -210,34 +292,18 @@ async def public_generate_video(
                 else:
                     raise HTTPException(400, "For Veo I2V, provide 'media_id' (preferred) or 'img_url'")
 
-            result_str = google_veo_client.generate_video(
+            provider_job_id = google_veo_client.generate_video(
                 model=model,
                 prompt=prompt,
                 aspect_ratio=aspect_ratio,
                 input_image=veo_input_image
             )
-            job_id = result_str
-            result = {"job_id": job_id}
+            result = {"job_id": provider_job_id}
             
-        elif "kling" in model:
+        else:
              # Kling Logic
-             kling_input_images = None
-             if mode == "i2v":
-                 if img_id and img_url:
-                     # New flow: explicit ID + URL
-                     kling_input_images = [{
-                         "id": img_id,
-                         "url": img_url,
-                         "width": 1024, # Default fallback
-                         "height": 1024 
-                     }]
-                 elif img_url:
-                     # Legacy flow: URL only
-                     kling_input_images = [{"url": img_url}]
-                 else:
-                     raise HTTPException(400, "For Kling I2V, provide 'img_id' & 'img_url' (preferred) or 'img_url'")
-             
-             hf_res = higgsfield_client.generate_video(
+             submit_started = metrics.monotonic()
+             provider_job_id = await client.generate_video_async(
                  prompt=prompt,
                  model=model,
                  duration=duration,
@@ -245,11 +311,10 @@ async def public_generate_video(
                  aspect_ratio=aspect_ratio,
                  input_images=kling_input_images
              )
-             job_id = hf_res if hf_res else "unknown"
-             result = {"job_id": job_id}
-             
-        else:
-            raise HTTPException(400, f"Unsupported model: {model}")
+             if not provider_job_id:
+                 raise Exception("Provider returned no job id")
+             account_scheduler.record_submission(job_id, metrics.monotonic() - submit_started)
+             result = {"job_id": provider_job_id}
             
         
         # 4. Job Record
@@ -262,10 +327,14 @@ async def public_generate_video(
             type=mode,
             model=model,
             prompt=prompt,
-            credits_cost=cost
+            credits_cost=cost,
+            provider_job_id=provider_job_id,
+            account_id=account_id
         )
         
-        jobs_repo.create(job_data)
+        # Already submitted: tracked by the job monitor, never re-dispatched
+        jobs_service.create(job_data, status="processing")
+        submitted = True
         
         # 5. Deduct & Log
         new_balance = api_keys_repo.deduct_balance(key_record["key_id"], cost)
@@ -289,6 +358,8 @@ async def public_generate_video(
         }
         
     except Exception as e:
+        if not submitted:
+            _release_slot(job_id, e)
         api_keys_repo.log_usage(
             key_id=key_record["key_id"],
             endpoint="/v1/video/generate",
@@ -314,8 +385,12 @@ async def upload_file_kling(
         if not content:
             raise HTTPException(400, "Empty file")
             
-        result = higgsfield_client.upload_image_complete(content)
+        result = await account_scheduler.get_default_client().upload_image_complete_async(content)
         return result
+    except HTTPException:
+        raise
+    except InvalidImageError as e:
+        raise HTTPException(400, str(e))
     except Exception as e:
         raise HTTPException(500, f"Upload failed: {str(e)}")
 
@@ -334,7 +409,12 @@ async def upload_file_veo(
         if not content:
             raise HTTPException(400, "Empty file")
             
-        media_id = google_veo_client.upload_image_bytes(content, aspect_ratio)
+        # Normalizing and uploading block: keep them off the event loop
+        media_id = await asyncio.to_thread(google_veo_client.upload_image_bytes, content, aspect_ratio)
         return {"media_id": media_id}
+    except HTTPException:
+        raise
+    except InvalidImageError as e:
+        raise HTTPException(400, str(e))
     except Exception as e:
         raise HTTPException(500, f"Upload failed: {str(e)}")
@@ -6,7 +6,7 @@ from fastapi import APIRouter, Depends, Query, HTTPException
 from typing import Optional
 
 from app.deps import get_current_user
-from app.schemas.users import UserInDB, UserProfile, UserCreditsResponse, UserLimitsResponse, ConcurrentLimitDetails
+from app.schemas.users import UserInDB, UserProfile, UserCreditsResponse, UserLimitsResponse, ConcurrentLimitDetails, QueuedJobEstimate
 from app.schemas.jobs import JobListResponse, JobInfo
 from app.schemas.transactions import TransactionListResponse, CreditTransaction
 from app.repositories import users_repo, jobs_repo, transactions_repo
@@ -157,7 +157,11 @@ async def get_limits(
             total=active_counts.get("total_pending", 0),
             image=active_counts.get("image_pending", 0),
             video=active_counts.get("video_pending", 0)
-        )
+        ),
+        queued_jobs=[
+            QueuedJobEstimate(**estimate)
+            for estimate in ConcurrencyService.get_queue_estimates(current_user.user_id, plan_limits)
+        ]
     )
 
 @router.get("/me/stats")
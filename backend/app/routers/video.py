@@ -3,21 +3,18 @@
 
 import json
 import uuid
-from fastapi import APIRouter, HTTPException, Depends, Form, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, Response, Form, File, UploadFile
 from typing import Optional, List
 
-from app.services.providers.higgsfield_client import higgsfield_client, HiggsfieldClient
-from app.services.providers.google_client import google_veo_client
-from app.services.providers.selenium_solver import solve_recaptcha_v3_enterprise
+from app.services.account_scheduler import account_scheduler
 from app.schemas.higgsfield import GenerateVideoRequest
 from app.schemas.jobs import GenerateResponse, JobCreate
 from app.schemas.users import UserInDB
-from app.deps import get_current_user
+from app.deps import get_current_user, get_async_dispatch
 from app.services.credits_service import credits_service, InsufficientCreditsError
 from app.services.cost_calculator import CostCalculationError
-from app.services.concurrency_service import ConcurrencyService
-from app.repositories import jobs_repo
-from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
+from app.services.job_queue_service import JobQueueService, QueueFullError, SubmissionFailedError
+from app.utils.images import InvalidImageError
 from pydantic import BaseModel
 
 
@@ -37,29 +34,6 @@ class UploadResponse(BaseModel):
     height: int
 
 
-# ============================================
-# HELPER FUNCTIONS
-# ============================================
-
-def get_higgsfield_client():
-    """
-    Get Higgsfield client using active account from DB (highest priority).
-    Falls back to default .env client if no active accounts found.
-    """
-    try:
-        accounts = higgsfield_accounts_repo.list_accounts(active_only=True)
-        if accounts:
-            # Accounts are already ordered by priority DESC in repo
-            # Pick the first one (highest priority)
-            account_id = accounts[0]['account_id']
-            return HiggsfieldClient.create_from_account(account_id)
-    except Exception as e:
-        print(f"Error fetching Higgsfield account: {e}")
-    
-    # Fallback to default
-    return higgsfield_client
-
-
 # ============================================
 # UPLOAD ENDPOINT (for I2V)
 # ============================================
@@ -75,14 +49,16 @@ async def upload_image_for_video(
     """
     try:
         image_data = await image.read()
-        client = get_higgsfield_client()
-        result = client.upload_image_complete(image_data)
+        client = account_scheduler.get_default_client()
+        result = await client.upload_image_complete_async(image_data)
         return UploadResponse(
             id=result["id"],
             url=result["url"],
             width=result["width"],
             height=result["height"]
         )
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         print(f"Upload failed: {str(e)}\n{traceback.format_exc()}")
@@ -96,7 +72,9 @@ async def upload_image_for_video(
 @router.post("/generate", response_model=GenerateResponse)
 async def generate_video(
     request: GenerateVideoRequest,
-    current_user: UserInDB = Depends(get_current_user)
+    response: Response,
+    current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch)
 ):
     """
     Generate video using Kling models.
@@ -134,112 +112,12 @@ async def generate_video(
                 }
             )
             
-        # 3. Check Concurrent limits
         job_type = "i2v" if request.input_images else "t2v"
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, job_type)
-        can_start = limit_check.get("can_start", limit_check["allowed"])
-        can_queue = limit_check.get("can_queue", True)
-        
-        # If neither start nor queue is possible, reject with 429
-        if not can_start and not can_queue:
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "Queue full",
-                    "message": limit_check.get("reason", "Queue limit reached. Please wait for existing jobs to complete."),
-                    "current_usage": limit_check.get("current_usage"),
-                    "limits": limit_check.get("limits")
-                }
-            )
         
         # Prepare Job ID (Local UUID)
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
-        
-        if can_start:
-            # 4. Generate video via appropriate API
-            veo_models = ["veo3.1-low", "veo3.1-fast", "veo3.1-high"]
-            
-            if request.model in veo_models:
-                # Route to Google Veo 3.1 API
-                input_image = None
-                if request.input_images and len(request.input_images) > 0:
-                    input_image = request.input_images[0]
-                
-                # Fetch recaptcha token for Google Veo
-                SITE_KEY = '6LdsFiUsAAAAAIjVDZcuLhaHiDn5nnHVXVRQGeMV'
-                SITE_URL = 'https://labs.google'
-                try:
-                    token_data = solve_recaptcha_v3_enterprise(SITE_KEY, SITE_URL)
-                    if isinstance(token_data, tuple):
-                        recaptcha_token, user_agent = token_data
-                    else:
-                        recaptcha_token = token_data
-                        user_agent = None
-                except ValueError as captcha_error:
-                    # CAPTCHA solving failed - create failed job without charging credits
-                    print(f"[CAPTCHA ERROR] Failed to get token: {captcha_error}")
-                    
-                    # Create failed job (no credits deducted)
-                    job_data = JobCreate(
-                        job_id=job_id,
-                        user_id=current_user.user_id,
-                        type=job_type,
-                        model=request.model,
-                        prompt=request.prompt,
-                        input_params=json.dumps({
-                            "aspect_ratio": request.aspect_ratio,
-                            "resolution": request.resolution,
-                            "duration": request.duration,
-                            "audio": request.audio
-                        }),
-                        input_images=json.dumps([img if isinstance(img, dict) else img for img in (request.input_images or [])]),
-                        credits_cost=0,  # No charge for failed CAPTCHA
-                        provider_job_id=None
-                    )
-                    jobs_repo.create(job_data, status="failed")
-                    jobs_repo.update_status(
-                        job_id=job_id,
-                        status="failed",
-                        error_message=f"CAPTCHA verification failed: {str(captcha_error)}"
-                    )
-                    
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Failed to verify CAPTCHA. Please try again."
-                    )
-                
-                provider_job_id = google_veo_client.generate_video(
-                    prompt=request.prompt,
-                    model=request.model,
-                    aspect_ratio=request.aspect_ratio or "9:16",
-                    input_image=input_image,
-                    recaptchaToken=recaptcha_token,
-                    user_agent=user_agent
-                )
-            else:
-                # Route to Higgsfield (Kling models)
-                use_unlim = True if request.speed == "slow" else False
-                
-                client = get_higgsfield_client()
-                provider_job_id = client.generate_video(
-                    prompt=request.prompt,
-                    model=request.model,
-                    duration=request.duration,
-                    resolution=request.resolution or "720p",
-                    aspect_ratio=request.aspect_ratio or "16:9",
-                    audio=request.audio if request.audio is not None else True,
-                    input_images=request.input_images or [],
-                    use_unlim=use_unlim
-                )
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
         
-        # 5. Create job in database
+        # 3. Job record (created by the reservation)
         job_data = JobCreate(
             job_id=job_id,
             user_id=current_user.user_id,
@@ -250,31 +128,24 @@ async def generate_video(
                 "aspect_ratio": request.aspect_ratio,
                 "resolution": request.resolution,
                 "duration": request.duration,
-                "audio": request.audio
+                "audio": request.audio,
+                "speed": request.speed,
+                "route": "generate"  # Dispatcher replays via client.generate_video
             }),
             input_images=json.dumps([img if isinstance(img, dict) else img for img in (request.input_images or [])]),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
+            credits_cost=cost
         )
-        jobs_repo.create(job_data, status=status)
         
-        # 6. Deduct credits (creates credit_transaction with FK to job)
+        # 4. Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
         reason = f"Video generation: {request.model} {request.duration}"
         if request.resolution:
             reason += f" {request.resolution}"
         
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=reason
-        )
-        
-        return GenerateResponse(
-            job_id=job_id,
-            credits_cost=cost,
-            credits_remaining=new_balance
-        )
+        result = await JobQueueService.submit_or_queue(job_data, reason=reason, defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
         
     except CostCalculationError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -289,6 +160,10 @@ async def generate_video(
         )
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
     except ValueError as e:
         # Client errors (like missing cookie or validation)
         raise HTTPException(status_code=400, detail=str(e))
@@ -304,7 +179,9 @@ async def generate_video(
 
 @router.post("/kling-2.5-turbo/i2v", response_model=GenerateResponse)
 async def generate_kling_turbo_i2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     duration: int = Form(5),
     resolution: str = Form("720p"),
@@ -336,58 +213,20 @@ async def generate_kling_turbo_i2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
         
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "i2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
         
         input_images_data = [{"id": img_id, "url": img_url, "width": width, "height": height}]
         
-        if can_start:
-            # Determine unlimited usage
-            use_unlim = True if speed == "slow" else False
-
-            # Determine mode and end frame
-            mode = "std"
-            input_image_end = None
-            
-            if resolution == "1080p":
-                mode = "pro"
-                if end_img_id and end_img_url:
-                    input_image_end = {
-                        "type": "media_input",
-                        "id": end_img_id,
-                        "url": end_img_url,
-                        "width": end_width if end_width else width,
-                        "height": end_height if end_height else height
-                    }
-                    input_images_data.append({"id": end_img_id, "url": end_img_url, "width": end_width, "height": end_height})
-
-            # Generate
-            client = get_higgsfield_client()
-            provider_job_id = client.send_job_kling_2_5_turbo_i2v(
-                prompt=prompt,
-                duration=duration,
-                resolution=resolution,
-                img_id=img_id,
-                img_url=img_url,
-                width=width,
-                height=height,
-                input_image_end=input_image_end,
-                mode=mode,
-                use_unlim=use_unlim
-            )
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
+        # Determine mode and end frame (the dispatcher submits the stored job)
+        mode = "std"
         
-        # Create job record FIRST
+        if resolution == "1080p":
+            mode = "pro"
+            if end_img_id and end_img_url:
+                input_images_data.append({"id": end_img_id, "url": end_img_url, "width": end_width, "height": end_height})
+        
+        # Job record (created by the reservation)
         job_data = JobCreate(
             job_id=job_id,
             user_id=current_user.user_id,
@@ -396,22 +235,23 @@ async def generate_kling_turbo_i2v(
             prompt=prompt,
             input_params=json.dumps({"duration": duration, "resolution": resolution, "speed": speed, "mode": mode}),
             input_images=json.dumps(input_images_data),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
+            credits_cost=cost
         )
-        jobs_repo.create(job_data, status=status)
         
-        # Deduct credits AFTER job exists
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: kling-2.5-turbo {duration}s ({speed})"
-        )
-        
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: kling-2.5-turbo {duration}s ({speed})", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Kling 2.5 Turbo I2V error: {str(e)}\n{traceback.format_exc()}")
@@ -420,7 +260,9 @@ async def generate_kling_turbo_i2v(
 
 @router.post("/kling-o1/i2v", response_model=GenerateResponse)
 async def generate_kling_o1_i2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     duration: int = Form(5),
     aspect_ratio: str = Form("16:9"),
@@ -449,52 +291,17 @@ async def generate_kling_o1_i2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
         
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "i2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
         
         input_images_data = [{"id": img_id, "url": img_url, "width": width, "height": height}]
         
-        if can_start:
-            use_unlim = True if speed == "slow" else False
-
-            # Prepare end frame
-            input_image_end = None
-            if end_img_id and end_img_url:
-                input_image_end = {
-                    "type": "media_input",
-                    "id": end_img_id,
-                    "url": end_img_url,
-                    # Fallback to start image dims if end image dims missing
-                    "width": end_width if end_width else width,
-                    "height": end_height if end_height else height
-                }
-                input_images_data.append({"id": end_img_id, "url": end_img_url, "width": end_width, "height": end_height})
-
-            client = get_higgsfield_client()
-            provider_job_id = client.send_job_kling_o1_i2v(
-                prompt=prompt,
-                duration=duration,
-                aspect_ratio=aspect_ratio,
-                img_id=img_id,
-                img_url=img_url,
-                width=width,
-                height=height,
-                input_image_end=input_image_end,
-                use_unlim=use_unlim
-            )
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
+        # End frame (the dispatcher submits the stored job; missing end
+        # frame dimensions fall back to the start image)
+        if end_img_id and end_img_url:
+            input_images_data.append({"id": end_img_id, "url": end_img_url, "width": end_width, "height": end_height})
         
-        # Create job record FIRST
+        # Job record (created by the reservation)
         job_data = JobCreate(
             job_id=job_id,
             user_id=current_user.user_id,
@@ -503,22 +310,23 @@ async def generate_kling_o1_i2v(
             prompt=prompt,
             input_params=json.dumps({"duration": duration, "aspect_ratio": aspect_ratio, "speed": speed}),
             input_images=json.dumps(input_images_data),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
+            credits_cost=cost
         )
-        jobs_repo.create(job_data, status=status)
         
-        # Deduct credits AFTER job exists
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: kling-o1 {duration}s {aspect_ratio} ({speed})"
-        )
-        
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: kling-o1 {duration}s {aspect_ratio} ({speed})", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Kling O1 I2V error: {str(e)}\n{traceback.format_exc()}")
@@ -527,7 +335,9 @@ async def generate_kling_o1_i2v(
 
 @router.post("/kling-2.6/t2v", response_model=GenerateResponse)
 async def generate_kling_2_6_t2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     duration: int = Form(5),
     aspect_ratio: str = Form("16:9"),
@@ -547,33 +357,10 @@ async def generate_kling_2_6_t2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
         
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "t2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
         
-        if can_start:
-            use_unlim = True if speed == "slow" else False
-
-            client = get_higgsfield_client()
-            provider_job_id = client.send_job_kling_2_6_t2v(
-                prompt=prompt,
-                duration=duration,
-                aspect_ratio=aspect_ratio,
-                sound=sound,
-                use_unlim=use_unlim
-            )
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
-        
-        # Create job record FIRST
+        # Job record (created by the reservation)
         job_data = JobCreate(
             job_id=job_id,
             user_id=current_user.user_id,
@@ -582,22 +369,23 @@ async def generate_kling_2_6_t2v(
             prompt=prompt,
             input_params=json.dumps({"duration": duration, "aspect_ratio": aspect_ratio, "sound": sound, "speed": speed}),
             input_images=None,
-            credits_cost=cost,
-            provider_job_id=provider_job_id
-        )
-        jobs_repo.create(job_data, status=status)
-        
-        # Deduct credits AFTER job exists
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: kling-2.6 {duration}s {'with' if sound else 'no'} audio ({speed})"
+            credits_cost=cost
         )
         
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: kling-2.6 {duration}s {'with' if sound else 'no'} audio ({speed})", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Kling 2.6 T2V error: {str(e)}\n{traceback.format_exc()}")
@@ -606,7 +394,9 @@ async def generate_kling_2_6_t2v(
 
 @router.post("/kling-2.6/i2v", response_model=GenerateResponse)
 async def generate_kling_2_6_i2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     duration: int = Form(5),
     sound: bool = Form(True),
@@ -629,36 +419,10 @@ async def generate_kling_2_6_i2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
         
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "i2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
         
-        if can_start:
-            use_unlim = True if speed == "slow" else False
-
-            client = get_higgsfield_client()
-            provider_job_id = client.send_job_kling_2_6_i2v(
-                prompt=prompt,
-                duration=duration,
-                sound=sound,
-                img_id=img_id,
-                img_url=img_url,
-                width=width,
-                height=height,
-                use_unlim=use_unlim
-            )
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
-        
-        # Create job record FIRST
+        # Job record (created by the reservation)
         job_data = JobCreate(
             job_id=job_id,
             user_id=current_user.user_id,
@@ -667,22 +431,23 @@ async def generate_kling_2_6_i2v(
             prompt=prompt,
             input_params=json.dumps({"duration": duration, "sound": sound, "speed": speed}),
             input_images=json.dumps([{"id": img_id, "url": img_url, "width": width, "height": height}]),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
+            credits_cost=cost
         )
-        jobs_repo.create(job_data, status=status)
         
-        # Deduct credits AFTER job exists
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: kling-2.6 i2v {duration}s ({speed})"
-        )
-        
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: kling-2.6 i2v {duration}s ({speed})", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Kling 2.6 I2V error: {str(e)}\n{traceback.format_exc()}")
@@ -695,7 +460,9 @@ async def generate_kling_2_6_i2v(
 
 @router.post("/veo3_1-low/t2v", response_model=GenerateResponse)
 async def generate_veo31_low_t2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     aspect_ratio: str = Form("9:16")
 ):
@@ -715,42 +482,10 @@ async def generate_veo31_low_t2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
         
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "t2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
         
-        if can_start:
-            # Fetch recaptcha token
-            SITE_KEY = '6LdsFiUsAAAAAIjVDZcuLhaHiDn5nnHVXVRQGeMV'
-            SITE_URL = 'https://labs.google'
-            token_data = solve_recaptcha_v3_enterprise(SITE_KEY, SITE_URL)
-            if isinstance(token_data, tuple):
-                recaptcha_token, user_agent = token_data
-            else:
-                recaptcha_token = token_data
-                user_agent = None
-            
-            # Generate via Google Veo client
-            provider_job_id = google_veo_client.generate_video(
-                prompt=prompt,
-                model="veo3.1-low",
-                aspect_ratio=aspect_ratio,
-                input_image=None,  # T2V mode
-                recaptchaToken=recaptcha_token,
-                user_agent=user_agent
-            )
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
-        
-        # Create job record FIRST
+        # Job record (created by the reservation)
         job_data = JobCreate(
             job_id=job_id,
             user_id=current_user.user_id,
@@ -758,22 +493,23 @@ async def generate_veo31_low_t2v(
             model="veo3.1-low",
             prompt=prompt,
             input_params=json.dumps({"aspect_ratio": aspect_ratio}),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
-        )
-        jobs_repo.create(job_data, status=status)
-        
-        # Deduct credits AFTER job exists
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: veo3.1-low t2v {aspect_ratio}"
+            credits_cost=cost
         )
         
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: veo3.1-low t2v {aspect_ratio}", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Veo 3.1 LOW T2V error: {str(e)}\n{traceback.format_exc()}")
@@ -782,7 +518,9 @@ async def generate_veo31_low_t2v(
 
 @router.post("/veo3_1-low/i2v", response_model=GenerateResponse)
 async def generate_veo31_low_i2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     aspect_ratio: str = Form("9:16"),
     img_url: str = Form(...)
@@ -803,42 +541,10 @@ async def generate_veo31_low_i2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
         
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "i2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
         
-        if can_start:
-            # Fetch recaptcha token
-            SITE_KEY = '6LdsFiUsAAAAAIjVDZcuLhaHiDn5nnHVXVRQGeMV'
-            SITE_URL = 'https://labs.google'
-            token_data = solve_recaptcha_v3_enterprise(SITE_KEY, SITE_URL)
-            if isinstance(token_data, tuple):
-                recaptcha_token, user_agent = token_data
-            else:
-                recaptcha_token = token_data
-                user_agent = None
-            
-            # Generate via Google Veo client with image
-            provider_job_id = google_veo_client.generate_video(
-                prompt=prompt,
-                model="veo3.1-low",
-                aspect_ratio=aspect_ratio,
-                input_image={"url": img_url},
-                recaptchaToken=recaptcha_token,
-                user_agent=user_agent
-            )
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
-        
-        # Create job record FIRST
+        # Job record (created by the reservation)
         job_data = JobCreate(
             job_id=job_id,
             user_id=current_user.user_id,
@@ -847,22 +553,23 @@ async def generate_veo31_low_i2v(
             prompt=prompt,
             input_params=json.dumps({"aspect_ratio": aspect_ratio}),
             input_images=json.dumps([{"url": img_url}]),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
+            credits_cost=cost
         )
-        jobs_repo.create(job_data, status=status)
         
-        # Deduct credits AFTER job exists
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: veo3.1-low i2v {aspect_ratio}"
-        )
-        
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: veo3.1-low i2v {aspect_ratio}", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Veo 3.1 LOW I2V error: {str(e)}\n{traceback.format_exc()}")
@@ -871,7 +578,9 @@ async def generate_veo31_low_i2v(
 
 @router.post("/veo3_1-fast/t2v", response_model=GenerateResponse)
 async def generate_veo31_fast_t2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     aspect_ratio: str = Form("9:16")
 ):
@@ -889,40 +598,8 @@ async def generate_veo31_fast_t2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
         
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "t2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
-        
-        if can_start:
-            # Fetch recaptcha token
-            SITE_KEY = '6LdsFiUsAAAAAIjVDZcuLhaHiDn5nnHVXVRQGeMV'
-            SITE_URL = 'https://labs.google'
-            token_data = solve_recaptcha_v3_enterprise(SITE_KEY, SITE_URL)
-            if isinstance(token_data, tuple):
-                recaptcha_token, user_agent = token_data
-            else:
-                recaptcha_token = token_data
-                user_agent = None
-            
-            job_id = google_veo_client.generate_video(
-                prompt=prompt,
-                model="veo3.1-fast",
-                aspect_ratio=aspect_ratio,
-                input_image=None,
-                recaptchaToken=recaptcha_token,
-                user_agent=user_agent
-            )
-            provider_job_id = job_id
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
         
         job_data = JobCreate(
             job_id=job_id,
@@ -931,21 +608,23 @@ async def generate_veo31_fast_t2v(
             model="veo3.1-fast",
             prompt=prompt,
             input_params=json.dumps({"aspect_ratio": aspect_ratio}),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
+            credits_cost=cost
         )
-        jobs_repo.create(job_data, status=status)
         
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: veo3.1-fast t2v {aspect_ratio}"
-        )
-        
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: veo3.1-fast t2v {aspect_ratio}", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Veo 3.1 FAST T2V error: {str(e)}\n{traceback.format_exc()}")
@@ -954,7 +633,9 @@ async def generate_veo31_fast_t2v(
 
 @router.post("/veo3_1-fast/i2v", response_model=GenerateResponse)
 async def generate_veo31_fast_i2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     aspect_ratio: str = Form("9:16"),
     img_url: str = Form(...)
@@ -973,40 +654,8 @@ async def generate_veo31_fast_i2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
         
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "i2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
-        
-        if can_start:
-            # Fetch recaptcha token
-            SITE_KEY = '6LdsFiUsAAAAAIjVDZcuLhaHiDn5nnHVXVRQGeMV'
-            SITE_URL = 'https://labs.google'
-            token_data = solve_recaptcha_v3_enterprise(SITE_KEY, SITE_URL)
-            if isinstance(token_data, tuple):
-                recaptcha_token, user_agent = token_data
-            else:
-                recaptcha_token = token_data
-                user_agent = None
-            
-            job_id = google_veo_client.generate_video(
-                prompt=prompt,
-                model="veo3.1-fast",
-                aspect_ratio=aspect_ratio,
-                input_image={"url": img_url},
-                recaptchaToken=recaptcha_token,
-                user_agent=user_agent
-            )
-            provider_job_id = job_id
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
         
         job_data = JobCreate(
             job_id=job_id,
@@ -1016,21 +665,23 @@ async def generate_veo31_fast_i2v(
             prompt=prompt,
             input_params=json.dumps({"aspect_ratio": aspect_ratio}),
             input_images=json.dumps([{"url": img_url}]),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
+            credits_cost=cost
         )
-        jobs_repo.create(job_data, status=status)
         
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: veo3.1-fast i2v {aspect_ratio}"
-        )
-        
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: veo3.1-fast i2v {aspect_ratio}", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Veo 3.1 FAST I2V error: {str(e)}\n{traceback.format_exc()}")
@@ -1039,7 +690,9 @@ async def generate_veo31_fast_i2v(
 
 @router.post("/veo3_1-high/t2v", response_model=GenerateResponse)
 async def generate_veo31_high_t2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     aspect_ratio: str = Form("9:16")
 ):
@@ -1057,40 +710,8 @@ async def generate_veo31_high_t2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
             
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "t2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
-        
-        if can_start:
-            # Fetch recaptcha token
-            SITE_KEY = '6LdsFiUsAAAAAIjVDZcuLhaHiDn5nnHVXVRQGeMV'
-            SITE_URL = 'https://labs.google'
-            token_data = solve_recaptcha_v3_enterprise(SITE_KEY, SITE_URL)
-            if isinstance(token_data, tuple):
-                recaptcha_token, user_agent = token_data
-            else:
-                recaptcha_token = token_data
-                user_agent = None
-            
-            job_id = google_veo_client.generate_video(
-                prompt=prompt,
-                model="veo3.1-high",
-                aspect_ratio=aspect_ratio,
-                input_image=None,
-                recaptchaToken=recaptcha_token,
-                user_agent=user_agent
-            )
-            provider_job_id = job_id
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
         
         job_data = JobCreate(
             job_id=job_id,
@@ -1099,21 +720,23 @@ async def generate_veo31_high_t2v(
             model="veo3.1-high",
             prompt=prompt,
             input_params=json.dumps({"aspect_ratio": aspect_ratio}),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
-        )
-        jobs_repo.create(job_data, status=status)
-        
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: veo3.1-high t2v {aspect_ratio}"
+            credits_cost=cost
         )
         
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: veo3.1-high t2v {aspect_ratio}", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Veo 3.1 HIGH T2V error: {str(e)}\n{traceback.format_exc()}")
@@ -1122,7 +745,9 @@ async def generate_veo31_high_t2v(
 
 @router.post("/veo3_1-high/i2v", response_model=GenerateResponse)
 async def generate_veo31_high_i2v(
+    response: Response,
     current_user: UserInDB = Depends(get_current_user),
+    defer: bool = Depends(get_async_dispatch),
     prompt: str = Form(...),
     aspect_ratio: str = Form("9:16"),
     img_url: str = Form(...)
@@ -1141,40 +766,8 @@ async def generate_veo31_high_i2v(
         if not has_enough:
             raise HTTPException(status_code=402, detail="Insufficient credits")
             
-        # Check Concurrent limits
-        limit_check = ConcurrencyService.check_can_start_job(current_user.user_id, "i2v")
-        can_start = limit_check["allowed"]
-        
         # Prepare Job ID
         job_id = str(uuid.uuid4())
-        provider_job_id = None
-        status = "pending"
-        
-        if can_start:
-            # Fetch recaptcha token
-            SITE_KEY = '6LdsFiUsAAAAAIjVDZcuLhaHiDn5nnHVXVRQGeMV'
-            SITE_URL = 'https://labs.google'
-            token_data = solve_recaptcha_v3_enterprise(SITE_KEY, SITE_URL)
-            if isinstance(token_data, tuple):
-                recaptcha_token, user_agent = token_data
-            else:
-                recaptcha_token = token_data
-                user_agent = None
-            
-            job_id = google_veo_client.generate_video(
-                prompt=prompt,
-                model="veo3.1-high",
-                aspect_ratio=aspect_ratio,
-                input_image={"url": img_url},
-                recaptchaToken=recaptcha_token,
-                user_agent=user_agent
-            )
-            provider_job_id = job_id
-            
-            if not provider_job_id:
-                raise HTTPException(status_code=500, detail="Failed to create video job on provider")
-            
-            status = "processing"
         
         job_data = JobCreate(
             job_id=job_id,
@@ -1184,21 +777,23 @@ async def generate_veo31_high_i2v(
             prompt=prompt,
             input_params=json.dumps({"aspect_ratio": aspect_ratio}),
             input_images=json.dumps([{"url": img_url}]),
-            credits_cost=cost,
-            provider_job_id=provider_job_id
-        )
-        jobs_repo.create(job_data, status=status)
-        
-        new_balance = credits_service.deduct_credits(
-            user_id=current_user.user_id,
-            amount=cost,
-            job_id=job_id,
-            reason=f"Video: veo3.1-high i2v {aspect_ratio}"
+            credits_cost=cost
         )
         
-        return GenerateResponse(job_id=job_id, credits_cost=cost, credits_remaining=new_balance)
+        # Reserve a slot, create the job and charge credits atomically;
+        # submitted right away unless deferred
+        result = await JobQueueService.submit_or_queue(job_data, reason=f"Video: veo3.1-high i2v {aspect_ratio}", defer=defer)
+        if defer:
+            response.status_code = 202
+        return GenerateResponse(job_id=job_id, credits_cost=cost, **result)
     except HTTPException:
         raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=e.detail)
+    except SubmissionFailedError:
+        raise HTTPException(status_code=500, detail="Failed to create job on provider")
+    except InsufficientCreditsError:
+        raise HTTPException(status_code=402, detail="Insufficient credits")
     except Exception as e:
         import traceback
         print(f"Veo 3.1 HIGH I2V error: {str(e)}\n{traceback.format_exc()}")
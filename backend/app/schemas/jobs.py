@@ -34,6 +34,8 @@ class JobCreate(JobBase):
     user_id: str
     credits_cost: int
     provider_job_id: Optional[str] = None
+    account_id: Optional[int] = None  # Higgsfield account the job was submitted on
+    is_slow: Optional[bool] = None  # Slow-job classification (derived from model/params if None)
 
 
 class JobInDB(JobBase):
@@ -42,6 +44,7 @@ class JobInDB(JobBase):
     user_id: str
     status: JobStatus = "pending"
     provider_job_id: Optional[str] = None
+    account_id: Optional[int] = None
     output_url: Optional[str] = None
     credits_cost: int
     credits_refunded: bool = False
@@ -91,8 +94,18 @@ class JobStatusResponse(BaseModel):
     completed_at: Optional[datetime] = None
 
 
+# submitted: sent to the provider during the request
+# accepted: slot reserved, a dispatch worker is submitting it
+# queued: waiting for a free slot
+# dispatching: a dispatch worker is submitting it right now
+DispatchState = Literal["submitted", "accepted", "queued", "dispatching"]
+
+
 class GenerateResponse(BaseModel):
     """Response from generate endpoint."""
     job_id: str
     credits_cost: int
     credits_remaining: int
+    dispatch_state: Optional[DispatchState] = None
+    queue_position: Optional[int] = None  # Queued jobs: place in the provider's queue
+    estimated_start_at: Optional[str] = None  # Queued jobs: estimated dispatch time (UTC)
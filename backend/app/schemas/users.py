@@ -79,6 +79,14 @@ class ConcurrentLimitDetails(BaseModel):
     video: int
 
 
+class QueuedJobEstimate(BaseModel):
+    """Queue position and estimated start time of a queued job."""
+    job_id: str
+    model: str
+    queue_position: int
+    estimated_start_at: str
+
+
 class UserLimitsResponse(BaseModel):
     """Response with user's concurrent limits and usage."""
     plan_id: str
@@ -88,3 +96,4 @@ class UserLimitsResponse(BaseModel):
     limits: ConcurrentLimitDetails
     active_counts: ConcurrentLimitDetails
     pending_counts: ConcurrentLimitDetails
+    queued_jobs: List[QueuedJobEstimate] = []
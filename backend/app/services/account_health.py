@@ -0,0 +1,229 @@
+"""
+Health tracking and automatic quarantine of Higgsfield accounts.
+
+Submission outcomes are recorded per account (JobQueueService.dispatch_job):
+a rolling window of successes and account errors (network errors, 5xx,
+rate limits, auth failures; bad requests say nothing about the account)
+plus consecutive auth failures.
+
+An account is quarantined - skipped by account selection - when its
+credentials keep failing (ACCOUNT_AUTH_FAILURE_THRESHOLD consecutive auth
+failures) or its error rate over the window reaches
+ACCOUNT_MAX_ERROR_RATE. Once the quarantine expires the account is on
+probation: it gets one job at a time as a probe; a successful probe makes
+it healthy again, a failed one quarantines it for twice as long (up to
+ACCOUNT_QUARANTINE_MAX_SECONDS).
+
+Health is kept in memory per process (like the capacity table);
+AccountCapacityTracker guards it with its lock.
+"""
+
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+from app.config import settings
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = "healthy"
+QUARANTINED = "quarantined"
+PROBATION = "probation"
+
+# Provider errors without a status_code attribute carry it in the message
+_STATUS_CODE_RE = re.compile(r"\b(?:status|Error) (\d{3})\b")
+_AUTH_MARKERS = ("jwt token not found", "failed to parse authentication", "unauthorized")
+
+
+def status_code_of(error: Optional[BaseException]) -> Optional[int]:
+    """HTTP status of a failed provider call (HiggsfieldAPIError.status_code, else parsed from the message)."""
+    if error is None:
+        return None
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code
+    match = _STATUS_CODE_RE.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def is_auth_error(error: Optional[BaseException]) -> bool:
+    """Whether a submission failed because the account's credentials were rejected."""
+    if error is None:
+        return False
+    if status_code_of(error) in (401, 403):
+        return True
+    lowered = str(error).lower()
+    return any(marker in lowered for marker in _AUTH_MARKERS)
+
+
+@dataclass
+class _AccountHealthState:
+    outcomes: Deque[Tuple[float, bool]] = field(default_factory=deque)  # (monotonic, ok)
+    auth_failures: int = 0  # consecutive
+    strikes: int = 0        # quarantines since the account was last healthy
+    quarantined_until: Optional[float] = None
+    probe_job_id: Optional[str] = None
+    probe_started_at: Optional[float] = None
+    last_error: Optional[str] = None
+    last_error_at: Optional[float] = None
+
+
+class AccountHealth:
+    """Rolling error rates, auth failures and quarantine state per account. Not thread-safe."""
+
+    def __init__(self):
+        self._states: Dict[int, _AccountHealthState] = {}
+
+    def _state(self, account_id: int) -> _AccountHealthState:
+        state = self._states.get(account_id)
+        if state is None:
+            state = self._states[account_id] = _AccountHealthState()
+        return state
+
+    @staticmethod
+    def _trim(state: _AccountHealthState, now: float) -> None:
+        horizon = now - settings.ACCOUNT_HEALTH_WINDOW_SECONDS
+        while state.outcomes and state.outcomes[0][0] < horizon:
+            state.outcomes.popleft()
+
+    # ============================================
+    # State
+    # ============================================
+
+    def status(self, account_id: int, now: Optional[float] = None) -> str:
+        state = self._states.get(account_id)
+        if state is None or state.quarantined_until is None:
+            return HEALTHY
+        now = time.monotonic() if now is None else now
+        return QUARANTINED if now < state.quarantined_until else PROBATION
+
+    def is_selectable(self, account_id: int, now: float) -> bool:
+        """Whether selection may route a job to the account right now."""
+        status = self.status(account_id, now)
+        if status == HEALTHY:
+            return True
+        if status == QUARANTINED:
+            return False
+        return self.needs_probe(account_id, now)
+
+    def needs_probe(self, account_id: int, now: float) -> bool:
+        """On probation with no probe in flight (or the last probe never reported back)."""
+        if self.status(account_id, now) != PROBATION:
+            return False
+        state = self._states[account_id]
+        return (
+            state.probe_job_id is None
+            or now - state.probe_started_at > settings.DISPATCH_LEASE_SECONDS * 2
+        )
+
+    def start_probe(self, account_id: int, job_id: str, now: float) -> None:
+        state = self._state(account_id)
+        state.probe_job_id = job_id
+        state.probe_started_at = now
+        logger.info(f"Probing Higgsfield account {account_id} with job {job_id}")
+
+    def cancel_probe(self, account_id: int, job_id: str) -> None:
+        """The probe job left without a submission outcome (cancelled, no slot)."""
+        state = self._states.get(account_id)
+        if state is not None and state.probe_job_id == job_id:
+            state.probe_job_id = None
+
+    # ============================================
+    # Outcomes
+    # ============================================
+
+    def record_success(self, account_id: int, now: float) -> None:
+        state = self._state(account_id)
+        self._trim(state, now)
+        state.outcomes.append((now, True))
+        state.auth_failures = 0
+        if state.quarantined_until is not None and now >= state.quarantined_until:
+            logger.info(f"Higgsfield account {account_id} passed probation, back in rotation")
+            state.quarantined_until = None
+            state.probe_job_id = None
+            state.strikes = 0
+
+    def record_failure(self, account_id: int, error: Optional[BaseException], now: float) -> None:
+        """Record an account error; quarantines the account if it is unhealthy."""
+        state = self._state(account_id)
+        self._trim(state, now)
+        state.outcomes.append((now, False))
+        state.last_error = str(error)[:200] if error is not None else "Provider returned no job id"
+        state.last_error_at = now
+        if is_auth_error(error):
+            state.auth_failures += 1
+        else:
+            state.auth_failures = 0
+
+        status = self.status(account_id, now)
+        if status == QUARANTINED:
+            return
+
+        reason = None
+        if status == PROBATION:
+            reason = "probe failed"
+        elif state.auth_failures >= settings.ACCOUNT_AUTH_FAILURE_THRESHOLD:
+            reason = f"{state.auth_failures} consecutive auth failures"
+        else:
+            samples = len(state.outcomes)
+            error_rate = self.error_rate(account_id)
+            if samples >= settings.ACCOUNT_HEALTH_MIN_SAMPLES and error_rate >= settings.ACCOUNT_MAX_ERROR_RATE:
+                reason = f"error rate {error_rate:.0%} over {samples} submissions"
+
+        if reason:
+            self._quarantine(account_id, state, now, reason)
+
+    def _quarantine(self, account_id: int, state: _AccountHealthState, now: float, reason: str) -> None:
+        state.strikes += 1
+        seconds = min(
+            settings.ACCOUNT_QUARANTINE_SECONDS * (2 ** (state.strikes - 1)),
+            settings.ACCOUNT_QUARANTINE_MAX_SECONDS
+        )
+        state.quarantined_until = now + seconds
+        state.probe_job_id = None
+        state.outcomes.clear()
+        metrics.account_quarantines_total.inc(account=str(account_id))
+        logger.warning(f"Quarantined Higgsfield account {account_id} for {seconds:.0f}s: {reason} ({state.last_error})")
+
+    def reset(self, account_id: int) -> None:
+        """Forget an account's history (e.g. its credentials were replaced)."""
+        self._states.pop(account_id, None)
+
+    # ============================================
+    # Reporting
+    # ============================================
+
+    def error_rate(self, account_id: int) -> float:
+        state = self._states.get(account_id)
+        if state is None or not state.outcomes:
+            return 0.0
+        return sum(1 for _, ok in state.outcomes if not ok) / len(state.outcomes)
+
+    def snapshot(self, account_id: int, latency_factor: float = 1.0) -> Dict:
+        """
+        Health of an account. The score (0-1) is the success rate over the
+        window times latency_factor (how the account's submission time
+        compares with the other accounts'); 0 while quarantined.
+        """
+        now = time.monotonic()
+        state = self._states.get(account_id) or _AccountHealthState()
+        self._trim(state, now)
+        status = self.status(account_id, now)
+        error_rate = self.error_rate(account_id)
+        score = 0.0 if status == QUARANTINED else (1 - error_rate) * latency_factor
+        return {
+            "status": status,
+            "score": round(score, 3),
+            "error_rate": round(error_rate, 3),
+            "submissions": len(state.outcomes),
+            "consecutive_auth_failures": state.auth_failures,
+            "quarantine_remaining_seconds": (
+                round(state.quarantined_until - now) if status == QUARANTINED else None
+            ),
+            "last_error": state.last_error,
+            "last_error_seconds_ago": round(now - state.last_error_at) if state.last_error_at else None,
+        }
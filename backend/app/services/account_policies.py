@@ -0,0 +1,218 @@
+"""
+Account selection policies for the Higgsfield account scheduler.
+
+A policy picks one account out of the active accounts with room for a job
+(AccountCapacityTracker passes them highest priority first). Built-in
+policies:
+
+- strict_priority: fast jobs go to the highest-priority account with room,
+  slow jobs to the account with the smallest share of its slow slots in use.
+- weighted_round_robin: smooth weighted round-robin, weight = account priority.
+- least_loaded: the account with the smallest share of its slots in use.
+- latency_aware: the account with the lowest expected turnaround, from the
+  EWMA of its submission and completion times (AccountLatency), inflated
+  by its current load.
+
+The policy is chosen per job type with the 'account_selection_policy'
+system setting (JSON map of job type or "default" -> policy name).
+Policies only look at in-memory state, so selecting an account does no I/O.
+"""
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Sequence, Tuple
+
+from app.repositories import settings_repo
+
+logger = logging.getLogger(__name__)
+
+SETTING_KEY = "account_selection_policy"
+DEFAULT_POLICY = "strict_priority"
+
+IMAGE_TYPES = ('t2i', 'i2i')
+
+
+def job_category(job_type: str) -> str:
+    return "image" if job_type in IMAGE_TYPES else "video"
+
+
+# ============================================
+# Latency tracking
+# ============================================
+
+class AccountLatency:
+    """
+    Exponentially weighted moving averages of submission and completion
+    times per account and job category (image/video).
+
+    Not thread-safe; AccountCapacityTracker guards it with its lock.
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self._submit: Dict[Tuple[int, str], float] = {}
+        self._complete: Dict[Tuple[int, str], float] = {}
+
+    def _observe(self, table: Dict[Tuple[int, str], float], key: Tuple[int, str], seconds: float) -> None:
+        if seconds < 0:
+            return
+        previous = table.get(key)
+        table[key] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    def observe_submit(self, account_id: int, job_type: str, seconds: float) -> None:
+        """Time the provider took to accept a job."""
+        self._observe(self._submit, (account_id, job_category(job_type)), seconds)
+
+    def observe_completion(self, account_id: int, job_type: str, seconds: float) -> None:
+        """Time from accepted submission to completed job."""
+        self._observe(self._complete, (account_id, job_category(job_type)), seconds)
+
+    def estimate(self, account_id: int, job_type: str) -> Optional[float]:
+        """Expected submission + completion seconds (None without completion samples)."""
+        key = (account_id, job_category(job_type))
+        if key not in self._complete:
+            return None
+        return self._submit.get(key, 0.0) + self._complete[key]
+
+    def submit_seconds(self, account_id: int) -> Optional[float]:
+        """Mean submission EWMA of an account across job categories (None without samples)."""
+        values = [self._submit[key] for key in ((account_id, "image"), (account_id, "video")) if key in self._submit]
+        return sum(values) / len(values) if values else None
+
+    def snapshot(self, account_id: int) -> Dict[str, Optional[float]]:
+        """EWMAs of an account, for stats."""
+        result = {}
+        for category in ("image", "video"):
+            key = (account_id, category)
+            result[f"{category}_submit_seconds"] = self._submit.get(key)
+            result[f"{category}_completion_seconds"] = self._complete.get(key)
+        return result
+
+
+# ============================================
+# Policies
+# ============================================
+
+class SelectionPolicy(ABC):
+    """
+    Picks an account for a job.
+
+    choose() gets the accounts with room for the job (AccountSlots, highest
+    priority first, never empty) and returns the chosen account_id. Called
+    under the capacity tracker's lock: must not block or do I/O.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def choose(self, candidates: Sequence, job_type: str, is_slow: bool,
+               latency: AccountLatency) -> int:
+        """account_id of the chosen candidate."""
+
+
+class StrictPriorityPolicy(SelectionPolicy):
+    """Highest priority first; slow jobs spread by slow-slot share."""
+
+    name = "strict_priority"
+
+    def choose(self, candidates, job_type, is_slow, latency):
+        # Slow jobs spread evenly (priority breaks ties), leaving fast
+        # capacity on every account
+        if not is_slow:
+            return candidates[0].account_id
+        return min(candidates, key=lambda account: account.slow_load(job_type)).account_id
+
+
+class WeightedRoundRobinPolicy(SelectionPolicy):
+    """Smooth weighted round-robin over the accounts with room, weight = priority."""
+
+    name = "weighted_round_robin"
+
+    def __init__(self):
+        self._current: Dict[Tuple[str, int], float] = {}
+
+    def choose(self, candidates, job_type, is_slow, latency):
+        category = job_category(job_type)
+        weights = {account.account_id: max(account.priority, 1) for account in candidates}
+        for account_id, weight in weights.items():
+            self._current[(category, account_id)] = self._current.get((category, account_id), 0.0) + weight
+
+        chosen = max(weights, key=lambda account_id: self._current[(category, account_id)])
+        self._current[(category, chosen)] -= sum(weights.values())
+        return chosen
+
+
+class LeastLoadedPolicy(SelectionPolicy):
+    """Smallest share of slots in use (slow slots first for slow jobs)."""
+
+    name = "least_loaded"
+
+    def choose(self, candidates, job_type, is_slow, latency):
+        if is_slow:
+            key = lambda account: (account.slow_load(job_type), account.load(job_type))
+        else:
+            key = lambda account: account.load(job_type)
+        return min(candidates, key=key).account_id
+
+
+class LatencyAwarePolicy(SelectionPolicy):
+    """
+    Lowest expected turnaround: EWMA submission + completion time, scaled
+    by (1 + share of slots in use) since busy accounts slow down.
+
+    Accounts without samples are scored with the fastest known estimate so
+    they get tried; with no samples at all this falls back to least_loaded.
+    """
+
+    name = "latency_aware"
+
+    def __init__(self):
+        self._fallback = LeastLoadedPolicy()
+
+    def choose(self, candidates, job_type, is_slow, latency):
+        estimates = {account.account_id: latency.estimate(account.account_id, job_type) for account in candidates}
+        known = [value for value in estimates.values() if value is not None]
+        if not known:
+            return self._fallback.choose(candidates, job_type, is_slow, latency)
+
+        optimistic = min(known)
+
+        def expected(account):
+            base = estimates[account.account_id]
+            if base is None:
+                base = optimistic
+            load = account.slow_load(job_type) if is_slow else account.load(job_type)
+            return base * (1 + load)
+
+        return min(candidates, key=expected).account_id
+
+
+POLICIES = {
+    policy.name: policy
+    for policy in (StrictPriorityPolicy, WeightedRoundRobinPolicy, LeastLoadedPolicy, LatencyAwarePolicy)
+}
+
+
+def get_policy_config() -> Dict[str, str]:
+    """Policy name per job type ("default" for the rest) from the system setting."""
+    config = {"default": DEFAULT_POLICY}
+    setting = settings_repo.get_setting(SETTING_KEY)
+    if not setting or not setting.get("setting_value"):
+        return config
+    try:
+        overrides = json.loads(setting["setting_value"])
+        for key, name in overrides.items():
+            if name not in POLICIES:
+                logger.warning(f"Unknown account selection policy {name!r} for {key}, ignoring")
+                continue
+            config[str(key)] = name
+    except (TypeError, ValueError, AttributeError):
+        logger.warning(f"Invalid {SETTING_KEY} setting, ignoring")
+    return config
+
+
+def build_policies(config: Dict[str, str]) -> Dict[str, SelectionPolicy]:
+    """One policy instance per configured name (so stateful policies share state across job types)."""
+    instances = {name: POLICIES[name]() for name in set(config.values())}
+    return {key: instances[name] for key, name in config.items()}
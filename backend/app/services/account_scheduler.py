@@ -1,17 +1,445 @@
 """
 Account scheduler for distributing jobs across multiple Higgsfield accounts.
 Handles account selection based on capacity and priority.
+
+Capacity is tracked in memory (AccountCapacityTracker): account limits and
+in-flight image/video/slow counts, updated when jobs are bound to an
+account and from job events, and periodically reconciled with the
+database, so selecting an account does no I/O. Coroutines waiting for an
+account (AccountScheduler.wait_for_account) are woken when capacity is
+released instead of polling. Which account with room
+gets a job is up to the selection policy configured for its job type
+(account_policies.py); accounts quarantined as unhealthy are skipped
+(account_health.py).
 """
 
-from typing import Optional, Dict
+import asyncio
+import json
+import logging
+import threading
 import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional, Dict, List, Tuple
+
 from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
+from app.services.account_health import AccountHealth
+from app.services.account_policies import (
+    DEFAULT_POLICY, AccountLatency, SelectionPolicy, build_policies, get_policy_config,
+)
+from app.services.providers.client_registry import higgsfield_clients
+from app.services.providers.higgsfield_client import HiggsfieldClient, higgsfield_client
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TYPES = ('t2i', 'i2i')
+
+
+class NoAccountAvailableError(Exception):
+    """Every active Higgsfield account is at capacity for this kind of job."""
+    def __init__(self, job_type: str, model: str):
+        self.job_type = job_type
+        self.model = model
+        super().__init__(f"No Higgsfield account available for {model} ({job_type})")
+
+
+@dataclass
+class AccountSlots:
+    """Limits and in-flight job counts of one account."""
+    account_id: int
+    priority: int
+    is_active: bool
+    max_parallel_images: int
+    max_parallel_videos: int
+    max_slow_images: int
+    max_slow_videos: int
+    image_jobs: int = 0
+    video_jobs: int = 0
+    slow_image_jobs: int = 0
+    slow_video_jobs: int = 0
+
+    @classmethod
+    def from_row(cls, row: dict) -> "AccountSlots":
+        return cls(
+            account_id=row['account_id'],
+            priority=row['priority'],
+            is_active=bool(row['is_active']),
+            max_parallel_images=row['max_parallel_images'],
+            max_parallel_videos=row['max_parallel_videos'],
+            max_slow_images=row['max_slow_images'],
+            max_slow_videos=row['max_slow_videos'],
+        )
+
+    def can_start(self, job_type: str, is_slow: bool) -> bool:
+        if not self.is_active:
+            return False
+        if job_type in IMAGE_TYPES:
+            if self.image_jobs >= self.max_parallel_images:
+                return False
+            return not (is_slow and self.slow_image_jobs >= self.max_slow_images)
+        if self.video_jobs >= self.max_parallel_videos:
+            return False
+        return not (is_slow and self.slow_video_jobs >= self.max_slow_videos)
+
+    def add(self, job_type: str, is_slow: bool, n: int = 1) -> None:
+        if job_type in IMAGE_TYPES:
+            self.image_jobs = max(self.image_jobs + n, 0)
+            if is_slow:
+                self.slow_image_jobs = max(self.slow_image_jobs + n, 0)
+        else:
+            self.video_jobs = max(self.video_jobs + n, 0)
+            if is_slow:
+                self.slow_video_jobs = max(self.slow_video_jobs + n, 0)
+
+    def load(self, job_type: str) -> float:
+        """Share of the slots in use for this kind of job."""
+        if job_type in IMAGE_TYPES:
+            return self.image_jobs / max(self.max_parallel_images, 1)
+        return self.video_jobs / max(self.max_parallel_videos, 1)
+
+    def slow_load(self, job_type: str) -> float:
+        """Share of the slow slots in use for this kind of job."""
+        if job_type in IMAGE_TYPES:
+            return self.slow_image_jobs / max(self.max_slow_images, 1)
+        return self.slow_video_jobs / max(self.max_slow_videos, 1)
+
+    def stats(self) -> Dict[str, int]:
+        """Same shape as higgsfield_accounts_repo.get_account_stats."""
+        return {
+            'total_jobs': self.image_jobs + self.video_jobs,
+            'image_jobs': self.image_jobs,
+            'video_jobs': self.video_jobs,
+            'slow_image_jobs': self.slow_image_jobs,
+            'slow_video_jobs': self.slow_video_jobs
+        }
+
+
+@dataclass
+class _TrackedJob:
+    account_id: int
+    job_type: str
+    is_slow: bool
+    tracked_at: float  # monotonic
+    submitted_at: Optional[float] = None  # monotonic, once accepted by the provider (this process)
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Waiter:
+    """One coroutine waiting for an account; re-armed before every attempt."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def rearm(self) -> None:
+        if self.future.done():
+            self.future = self.loop.create_future()
+
+
+class CapacityWaiters:
+    """
+    FIFO queues of coroutines waiting for account capacity, one queue per
+    job type and slow flag.
+
+    notify() may be called from any thread when capacity is released: it
+    wakes the oldest waiter of each queue for that kind of job, on the
+    waiter's event loop. Only the oldest waiter of a queue tries to take an
+    account; once it has one it leaves and wakes the next, so waiters are
+    served in arrival order and newcomers cannot jump the queue.
+    """
+
+    def __init__(self):
+        self._queues: Dict[Tuple[str, bool], Deque[_Waiter]] = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, key: Tuple[str, bool], loop: asyncio.AbstractEventLoop) -> _Waiter:
+        waiter = _Waiter(loop)
+        with self._lock:
+            self._queues.setdefault(key, deque()).append(waiter)
+        return waiter
+
+    def is_head(self, key: Tuple[str, bool], waiter: _Waiter) -> bool:
+        with self._lock:
+            queue = self._queues.get(key)
+            return bool(queue) and queue[0] is waiter
+
+    def remove(self, key: Tuple[str, bool], waiter: _Waiter) -> None:
+        """Leave the queue; the next waiter gets its turn."""
+        with self._lock:
+            queue = self._queues.get(key)
+            if not queue:
+                return
+            was_head = queue[0] is waiter
+            try:
+                queue.remove(waiter)
+            except ValueError:
+                return
+            if not queue:
+                del self._queues[key]
+            elif was_head:
+                self._wake_head_locked(queue)
+
+    @staticmethod
+    def _wake_head_locked(queue: Deque[_Waiter]) -> None:
+        head = queue[0]
+        try:
+            head.loop.call_soon_threadsafe(_wake, head.future)
+        except RuntimeError:
+            pass  # Loop closed; the waiter is gone
+
+    def notify(self, job_type: Optional[str] = None) -> None:
+        """Capacity for job_type's kind of job (None = any) was released."""
+        image = job_type in IMAGE_TYPES
+        with self._lock:
+            for (queued_type, _), queue in self._queues.items():
+                if job_type is None or (queued_type in IMAGE_TYPES) == image:
+                    self._wake_head_locked(queue)
+
+    def count(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+
+class AccountCapacityTracker:
+    """
+    In-process capacity table of the Higgsfield accounts.
+
+    Jobs are counted against an account when bound to it (acquire, or a
+    job event carrying its account_id) and released when they leave
+    pending/processing. reconcile() rebuilds the table from the database
+    (on startup, after account changes and periodically) to pick up jobs
+    handled by other processes or whose events were missed.
+    """
+
+    def __init__(self, classify: Callable[..., bool], reconcile_interval_seconds: int = 60):
+        self._classify = classify
+        self.reconcile_interval_seconds = reconcile_interval_seconds
+        self._accounts: Dict[int, AccountSlots] = {}
+        self._order: List[int] = []  # active account ids, highest priority first
+        self._jobs: Dict[str, _TrackedJob] = {}
+        self._lock = threading.Lock()
+        self._reconciled_at: Optional[float] = None
+        self._policies: Dict[str, SelectionPolicy] = build_policies({"default": DEFAULT_POLICY})
+        self.latency = AccountLatency()
+        self.health = AccountHealth()
+        self.waiters = CapacityWaiters()
+
+    def _is_slow(self, row: dict) -> bool:
+        """Stored classification of a job row/event (classified by model for legacy rows)."""
+        if row.get('is_slow') is not None:
+            return bool(row['is_slow'])
+        return self._classify(row.get('type') or "", row.get('model') or "")
+
+    def load_policies(self) -> None:
+        """(Re)load the selection policy per job type from system settings."""
+        policies = build_policies(get_policy_config())
+        with self._lock:
+            self._policies = policies
+
+    def reconcile(self) -> None:
+        """Rebuild limits, in-flight counts and selection policies from the database."""
+        started = time.monotonic()
+        self.load_policies()
+        accounts = higgsfield_accounts_repo.list_accounts()
+        higgsfield_clients.sync(accounts)
+        jobs = {
+            row['job_id']: _TrackedJob(row['account_id'], row['type'], self._is_slow(row), started)
+            for row in higgsfield_accounts_repo.get_in_flight_jobs()
+        }
+
+        with self._lock:
+            # Keep jobs bound while we were reading (not visible in the snapshot),
+            # and the submission times of jobs we already follow
+            for job_id, job in self._jobs.items():
+                if job_id not in jobs:
+                    if job.tracked_at >= started:
+                        jobs[job_id] = job
+                elif jobs[job_id].account_id == job.account_id:
+                    jobs[job_id] = job
+
+            self._accounts = {row['account_id']: AccountSlots.from_row(row) for row in accounts}
+            self._order = [row['account_id'] for row in accounts if row['is_active']]
+            self._jobs = {}
+            for job_id, job in jobs.items():
+                self._track_locked(job_id, job)
+            self._reconciled_at = time.monotonic()
+        self.waiters.notify()
+
+        logger.debug(f"Account capacity reconciled: {len(accounts)} accounts, {len(jobs)} in-flight jobs")
+
+    def maybe_reconcile(self) -> None:
+        """Reconcile if the table was never loaded or is older than the interval."""
+        reconciled_at = self._reconciled_at
+        if reconciled_at is None or time.monotonic() - reconciled_at > self.reconcile_interval_seconds:
+            self.reconcile()
+
+    def _ensure_loaded(self) -> None:
+        if self._reconciled_at is None:
+            self.reconcile()
+
+    def _track_locked(self, job_id: str, job: _TrackedJob) -> None:
+        self._jobs[job_id] = job
+        account = self._accounts.get(job.account_id)
+        if account is not None:
+            account.add(job.job_type, job.is_slow)
+
+    def _release_locked(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        self.health.cancel_probe(job.account_id, job_id)
+        account = self._accounts.get(job.account_id)
+        if account is not None:
+            account.add(job.job_type, job.is_slow, -1)
+        self.waiters.notify(job.job_type)
+
+    def preferred_account(self) -> Optional[int]:
+        """Highest-priority active account not quarantined (None without accounts)."""
+        self._ensure_loaded()
+        now = time.monotonic()
+        with self._lock:
+            for account_id in self._order:
+                if self.health.is_selectable(account_id, now):
+                    return account_id
+            return self._order[0] if self._order else None
+
+    def has_active_accounts(self) -> bool:
+        self._ensure_loaded()
+        return bool(self._order)
+
+    def can_start(self, account_id: int, job_type: str, is_slow: bool) -> bool:
+        self._ensure_loaded()
+        with self._lock:
+            account = self._accounts.get(account_id)
+            return account is not None and account.can_start(job_type, is_slow)
+
+    def policy_for(self, job_type: str) -> SelectionPolicy:
+        return self._policies.get(job_type) or self._policies["default"]
+
+    def _pick_locked(self, job_type: str, is_slow: bool, now: float) -> Optional[int]:
+        candidates = [
+            self._accounts[account_id] for account_id in self._order
+            if self._accounts[account_id].can_start(job_type, is_slow)
+            and self.health.is_selectable(account_id, now)
+        ]
+        if not candidates:
+            return None
+        # An account back from quarantine gets the next job it can take as its probe
+        for account in candidates:
+            if self.health.needs_probe(account.account_id, now):
+                return account.account_id
+        return self.policy_for(job_type).choose(candidates, job_type, is_slow, self.latency)
+
+    def find_account(self, job_type: str, is_slow: bool) -> Optional[int]:
+        """Best active account with room for the job (not reserved)."""
+        self._ensure_loaded()
+        with self._lock:
+            return self._pick_locked(job_type, is_slow, time.monotonic())
+
+    def acquire(self, job_id: str, job_type: str, is_slow: bool) -> Optional[int]:
+        """Pick an account for a job and count the job against it, atomically."""
+        self._ensure_loaded()
+        with self._lock:
+            self._release_locked(job_id)
+            now = time.monotonic()
+            account_id = self._pick_locked(job_type, is_slow, now)
+            if account_id is not None:
+                if self.health.needs_probe(account_id, now):
+                    self.health.start_probe(account_id, job_id, now)
+                self._track_locked(job_id, _TrackedJob(account_id, job_type, is_slow, now))
+            return account_id
+
+    def release(self, job_id: str) -> None:
+        """Stop counting a job (finished, or its submission failed)."""
+        with self._lock:
+            self._release_locked(job_id)
+
+    def record_submission(self, job_id: str, seconds: float) -> None:
+        """A job was accepted by its account's provider after `seconds`."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.submitted_at = time.monotonic()
+            self.latency.observe_submit(job.account_id, job.job_type, seconds)
+            self.health.record_success(job.account_id, job.submitted_at)
+
+    def record_failure(self, job_id: str, error: Optional[BaseException]) -> None:
+        """A job's submission failed because of its account: count it against
+        the account's health and free the slot."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                self.health.record_failure(job.account_id, error, time.monotonic())
+            self._release_locked(job_id)
+
+    def on_job_event(self, event: dict) -> None:
+        """Job event listener: follow jobs bound or finished (in any process)."""
+        job_id = event.get("job_id")
+        if not job_id:
+            return
+        account_id = event.get("account_id")
+        with self._lock:
+            if event.get("status") not in ("pending", "processing") or account_id is None:
+                tracked = self._jobs.get(job_id)
+                if event.get("status") == "completed" and tracked is not None and tracked.submitted_at is not None:
+                    self.latency.observe_completion(
+                        tracked.account_id, tracked.job_type, time.monotonic() - tracked.submitted_at
+                    )
+                self._release_locked(job_id)
+                return
+            tracked = self._jobs.get(job_id)
+            if tracked is not None and tracked.account_id == account_id:
+                return
+            self._release_locked(job_id)
+            self._track_locked(job_id, _TrackedJob(
+                account_id, event.get("type") or "", self._is_slow(event), time.monotonic()
+            ))
+
+    def get_stats(self, account_id: int) -> Optional[Dict[str, int]]:
+        """In-flight counts of an account (None if unknown)."""
+        self._ensure_loaded()
+        with self._lock:
+            account = self._accounts.get(account_id)
+            return account.stats() if account is not None else None
+
+    def get_latency(self, account_id: int) -> Dict[str, Optional[float]]:
+        """Submission/completion EWMAs of an account (None = no samples yet)."""
+        with self._lock:
+            return self.latency.snapshot(account_id)
+
+    def get_health(self, account_id: int) -> Dict:
+        """Health status and score of an account (see AccountHealth.snapshot)."""
+        with self._lock:
+            # Latency factor: submission time vs the median account's
+            submit_times = sorted(
+                value for value in (self.latency.submit_seconds(other) for other in self._accounts)
+                if value is not None
+            )
+            own = self.latency.submit_seconds(account_id)
+            latency_factor = 1.0
+            if own and submit_times:
+                latency_factor = min(1.0, submit_times[len(submit_times) // 2] / own)
+            return self.health.snapshot(account_id, latency_factor)
+
+    def reset_health(self, account_id: int) -> None:
+        """Clear an account's health history and quarantine (admin, new credentials)."""
+        with self._lock:
+            self.health.reset(account_id)
+        self.waiters.notify()
 
 
 class AccountScheduler:
     """
     Scheduler for selecting the best available Higgsfield account for a job.
     """
+
+    def __init__(self):
+        self.capacity = AccountCapacityTracker(self.classify_job_as_slow)
     
     # Model classification for "slow" jobs
     SLOW_IMAGE_MODELS = {
@@ -69,12 +497,28 @@ class AccountScheduler:
             # Check duration - longer videos are slower
             duration = params.get('duration', '5s')
             if duration:
-                duration_int = int(str(duration).replace('s', ''))
+                try:
+                    duration_int = int(str(duration).replace('s', ''))
+                except ValueError:
+                    duration_int = 0
                 if duration_int >= 10:
                     return True
         
         return False
     
+    def classify_job_params(self, job_type: str, model: str, input_params: Optional[str]) -> bool:
+        """classify_job_as_slow for a stored job (input_params JSON)."""
+        try:
+            params = json.loads(input_params or "{}")
+        except (TypeError, ValueError):
+            params = {}
+        if not isinstance(params, dict):
+            params = {}
+        return self.classify_job_as_slow(
+            job_type, model or "",
+            **{key: params[key] for key in ('resolution', 'duration') if params.get(key) is not None}
+        )
+    
     def can_start_job(
         self,
         account_id: int,
@@ -82,7 +526,8 @@ class AccountScheduler:
         is_slow: bool
     ) -> bool:
         """
-        Check if an account has capacity to start a new job.
+        Check if an account has capacity to start a new job
+        (in-memory capacity table, no I/O).
         
         Args:
             account_id: The account to check
@@ -92,99 +537,199 @@ class AccountScheduler:
         Returns:
             True if the account can accept the job
         """
-        account = higgsfield_accounts_repo.get_account(account_id)
-        if not account or not account['is_active']:
-            return False
-        
-        stats = higgsfield_accounts_repo.get_account_stats(account_id)
-        
-        # Check if it's an image or video job
-        is_image = job_type in ('t2i', 'i2i')
-        
-        if is_image:
-            # Check image limits
-            if stats['image_jobs'] >= account['max_parallel_images']:
-                return False
-            
-            if is_slow and stats['slow_image_jobs'] >= account['max_slow_images']:
-                return False
-        else:
-            # Check video limits
-            if stats['video_jobs'] >= account['max_parallel_videos']:
-                return False
-            
-            if is_slow and stats['slow_video_jobs'] >= account['max_slow_videos']:
-                return False
-        
-        return True
+        return self.capacity.can_start(account_id, job_type, is_slow)
     
     def select_account_for_job(
         self,
         job_type: str,
         model: str,
+        job_id: Optional[str] = None,
+        is_slow: Optional[bool] = None,
         **params
     ) -> Optional[int]:
         """
-        Select the best available account for a job.
+        Select the best available account for a job: among the accounts
+        with capacity (in-memory capacity table), the one the selection
+        policy configured for the job type picks.
         
         Args:
             job_type: 't2i', 'i2i', 't2v', 'i2v'
             model: Model name
+            job_id: Count the job against the selected account right away,
+                so concurrent selections cannot overshoot its limits
+            is_slow: Stored slow classification (classified from the
+                model and params if None)
             **params: Additional job parameters
         
         Returns:
             account_id if an account is available, None otherwise
         """
         # Classify job
-        is_slow = self.classify_job_as_slow(job_type, model, **params)
-        
-        # Get active accounts ordered by priority
-        accounts = higgsfield_accounts_repo.list_accounts(active_only=True)
+        if is_slow is None:
+            is_slow = self.classify_job_as_slow(job_type, model, **params)
         
-        if not accounts:
-            print("No active Higgsfield accounts configured")
+        if not self.capacity.has_active_accounts():
+            logger.warning("No active Higgsfield accounts configured")
             return None
         
-        # Find first account with capacity
-        for account in accounts:
-            if self.can_start_job(account['account_id'], job_type, is_slow):
-                return account['account_id']
+        if job_id is not None:
+            return self.capacity.acquire(job_id, job_type, is_slow)
+        return self.capacity.find_account(job_type, is_slow)
+    
+    def get_client_for_job(
+        self,
+        job_type: str,
+        model: str,
+        job_id: Optional[str] = None,
+        is_slow: Optional[bool] = None,
+        **params
+    ) -> Tuple[Optional[int], Optional[HiggsfieldClient]]:
+        """
+        Select an account for a job and build its client.
+        
+        Every Higgsfield submission path (generate endpoints, dispatcher,
+        public API) goes through here so load spreads across accounts.
+        With a job_id the job is counted against the account until
+        release_job or its finished event.
+        
+        Returns:
+            (account_id, client) for the selected account,
+            (None, default .env client) when no accounts are configured,
+            (None, None) when every account is at capacity - queue the job
+        """
+        if not self.capacity.has_active_accounts():
+            return None, higgsfield_client
+        
+        account_id = self.select_account_for_job(job_type, model, job_id=job_id, is_slow=is_slow, **params)
+        if account_id is None:
+            return None, None
+        
+        return account_id, self.get_client(account_id)
+    
+    async def wait_for_client_for_job(
+        self,
+        job_type: str,
+        model: str,
+        job_id: str,
+        timeout: float,
+        is_slow: Optional[bool] = None,
+        **params
+    ) -> Tuple[Optional[int], Optional[HiggsfieldClient]]:
+        """
+        get_client_for_job for callers that cannot queue the job (public
+        API): when every account is full, wait up to timeout seconds for a
+        slot, first come, first served (see wait_for_account).
+        
+        Returns:
+            Same as get_client_for_job; (None, None) if no slot freed up in time
+        """
+        if not self.capacity.has_active_accounts():
+            return None, higgsfield_client
+        
+        account_id = await self.wait_for_account(
+            job_type, model, job_id=job_id, is_slow=is_slow, timeout=timeout, **params
+        )
+        if account_id is None:
+            return None, None
         
-        # No account available
-        return None
+        return account_id, self.get_client(account_id)
     
-    def wait_for_available_account(
+    def release_job(self, job_id: str) -> None:
+        """Free the account slot of a job whose submission did not go through."""
+        self.capacity.release(job_id)
+    
+    def record_submission(self, job_id: str, seconds: float) -> None:
+        """Feed a job's accepted-submission time to latency-aware selection and account health."""
+        self.capacity.record_submission(job_id, seconds)
+    
+    def record_failure(self, job_id: str, error: Optional[BaseException]) -> None:
+        """Free the account slot of a job whose submission failed because of the account."""
+        self.capacity.record_failure(job_id, error)
+    
+    def get_client(self, account_id: Optional[int]) -> HiggsfieldClient:
+        """
+        Client for the account a job was submitted on (status polls,
+        follow-up calls). Works for deactivated accounts so their in-flight
+        jobs can finish; falls back to the default client for jobs without
+        an account. Clients are reused per account (client_registry.py).
+        """
+        return higgsfield_clients.get(account_id)
+    
+    def get_default_client(self) -> HiggsfieldClient:
+        """
+        Client for calls not tied to a job (uploads, token, history): the
+        highest-priority active, healthy account, or the default .env
+        client when no accounts are configured.
+        """
+        return self.get_client(self.capacity.preferred_account())
+    
+    def invalidate_client(self, account_id: int) -> None:
+        """Forget an account's cached client (credentials or status changed)."""
+        higgsfield_clients.invalidate(account_id)
+    
+    def get_session_stats(self, account_id: int) -> Optional[Dict[str, dict]]:
+        """Per-host HTTP stats of an account's client session (None until it is used)."""
+        return higgsfield_clients.session_stats(account_id)
+    
+    async def wait_for_account(
         self,
         job_type: str,
         model: str,
-        timeout: int = 30,
-        poll_interval: int = 2,
+        job_id: Optional[str] = None,
+        is_slow: Optional[bool] = None,
+        timeout: float = 30,
+        recheck_interval: float = 5,
         **params
     ) -> Optional[int]:
         """
-        Wait for an account to become available.
+        Wait, without blocking the event loop, for an account to take a job.
+        
+        Waiters sleep until a job of the same kind (image/video) releases
+        its account slot, and are served first come, first served per job
+        type and slow flag. They also re-check every recheck_interval
+        seconds, for capacity that frees up without a release (an account
+        leaving quarantine).
         
         Args:
             job_type: 't2i', 'i2i', 't2v', 'i2v'
             model: Model name
+            job_id: Count the job against the account once selected (see
+                select_account_for_job); without it the slot is not reserved
+            is_slow: Stored slow classification (classified if None)
             timeout: Maximum seconds to wait
-            poll_interval: Seconds between checks
+            recheck_interval: Maximum seconds between checks without a wakeup
             **params: Additional job parameters
         
         Returns:
             account_id when available, None if timeout reached
         """
-        start_time = time.time()
+        if is_slow is None:
+            is_slow = self.classify_job_as_slow(job_type, model, **params)
         
-        while time.time() - start_time < timeout:
-            account_id = self.select_account_for_job(job_type, model, **params)
-            if account_id is not None:
-                return account_id
-            
-            # Wait before next check
-            time.sleep(poll_interval)
-        
-        return None
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        key = (job_type, is_slow)
+        waiter = self.capacity.waiters.enqueue(key, loop)
+        try:
+            while True:
+                # Re-arm before checking so a release in between is not missed
+                waiter.rearm()
+                if self.capacity.waiters.is_head(key, waiter):
+                    account_id = self.select_account_for_job(
+                        job_type, model, job_id=job_id, is_slow=is_slow, **params
+                    )
+                    if account_id is not None:
+                        return account_id
+                
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(waiter.future, min(remaining, recheck_interval))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.capacity.waiters.remove(key, waiter)
     
     def get_account_credentials(self, account_id: int) -> Optional[Dict[str, str]]:
         """
@@ -1,4 +1,11 @@
-from app.database.db import get_db_context
+from typing import Dict, Iterable, List, Optional
+from app.config import settings
+from app.database.db import get_db_context, execute_in_transaction
+from app.repositories import jobs_repo
+from app.schemas.jobs import JobCreate
+from app.services.credits_service import credits_service
+from app.services import jobs_service
+from app.services.provider_capacity import capacity_model
 from app.utils.logger import logger
 
 class ConcurrencyService:
@@ -16,6 +23,7 @@ class ConcurrencyService:
                 sp.video_concurrent_limit,
                 sp.queue_limit,
                 sp.name as plan_name,
+                sp.queue_lane,
                 sp.description as plan_description,
                 u.plan_expires_at
             FROM users u
@@ -37,40 +45,111 @@ class ConcurrencyService:
                 "image_concurrent_limit": 1,
                 "video_concurrent_limit": 1,
                 "queue_limit": 3,
-                "plan_name": "Free"
+                "plan_name": "Free",
+                "queue_lane": "free"
             }
 
+    @staticmethod
+    def get_plan_limits_for_users(user_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Get plan limits for many users in one query.
+        Users without a plan get the same Free defaults as get_user_plan_limits.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        
+        placeholders = ",".join("?" for _ in user_ids)
+        query = f"""
+            SELECT 
+                u.user_id,
+                sp.plan_id,
+                sp.total_concurrent_limit,
+                sp.image_concurrent_limit,
+                sp.video_concurrent_limit,
+                sp.queue_limit,
+                sp.name as plan_name,
+                sp.queue_lane
+            FROM users u
+            JOIN subscription_plans sp ON u.plan_id = sp.plan_id
+            WHERE u.user_id IN ({placeholders})
+        """
+        
+        with get_db_context() as conn:
+            rows = conn.execute(query, tuple(user_ids)).fetchall()
+        
+        limits = {row["user_id"]: dict(row) for row in rows}
+        for user_id in user_ids:
+            if user_id not in limits:
+                limits[user_id] = {
+                    "plan_id": None,
+                    "total_concurrent_limit": 2,
+                    "image_concurrent_limit": 1,
+                    "video_concurrent_limit": 1,
+                    "queue_limit": 3,
+                    "plan_name": "Free",
+                    "queue_lane": "free"
+                }
+        return limits
+
+    @staticmethod
+    def get_processing_counts() -> List[dict]:
+        """
+        Count PROCESSING jobs grouped by user, type and model (all users).
+        Used by the fair scheduler to compute free capacity in one query.
+        """
+        query = """
+            SELECT user_id, type, model, COUNT(*) as count
+            FROM jobs
+            WHERE status = 'processing'
+            GROUP BY user_id, type, model
+        """
+        
+        with get_db_context() as conn:
+            return [dict(row) for row in conn.execute(query).fetchall()]
+
     @staticmethod
     def get_active_job_counts(user_id: str):
         """
         Count active PROCESSING and PENDING jobs for a user.
+        Pending jobs holding a reserved slot (accepted for background
+        dispatch, or being dispatched) count as active, not queued.
         """
+        with get_db_context() as conn:
+            return ConcurrencyService._count_active_jobs(conn, user_id)
+
+    @staticmethod
+    def _count_active_jobs(conn, user_id: str) -> dict:
         query = """
             SELECT 
-                SUM(CASE WHEN status = 'processing' THEN 1 ELSE 0 END) as total_active,
-                SUM(CASE WHEN status = 'processing' AND type IN ('t2i', 'i2i') THEN 1 ELSE 0 END) as image_active,
-                SUM(CASE WHEN status = 'processing' AND type IN ('t2v', 'i2v') THEN 1 ELSE 0 END) as video_active,
+                SUM(CASE WHEN active THEN 1 ELSE 0 END) as total_active,
+                SUM(CASE WHEN active AND type IN ('t2i', 'i2i') THEN 1 ELSE 0 END) as image_active,
+                SUM(CASE WHEN active AND type IN ('t2v', 'i2v') THEN 1 ELSE 0 END) as video_active,
                 
-                SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as total_pending,
-                SUM(CASE WHEN status = 'pending' AND type IN ('t2i', 'i2i') THEN 1 ELSE 0 END) as image_pending,
-                SUM(CASE WHEN status = 'pending' AND type IN ('t2v', 'i2v') THEN 1 ELSE 0 END) as video_pending
-            FROM jobs
-            WHERE user_id = ? 
-            AND status IN ('processing', 'pending')
+                SUM(CASE WHEN NOT active THEN 1 ELSE 0 END) as total_pending,
+                SUM(CASE WHEN NOT active AND type IN ('t2i', 'i2i') THEN 1 ELSE 0 END) as image_pending,
+                SUM(CASE WHEN NOT active AND type IN ('t2v', 'i2v') THEN 1 ELSE 0 END) as video_pending
+            FROM (
+                SELECT type, (
+                    status = 'processing'
+                    OR COALESCE(dispatch_state, '') IN ('accepted', 'dispatching')
+                ) as active
+                FROM jobs
+                WHERE user_id = ? 
+                AND status IN ('processing', 'pending')
+            )
         """
         
-        with get_db_context() as conn:
-            cursor = conn.execute(query, (user_id,))
-            row = cursor.fetchone()
-            
-            return {
-                "total_active": row["total_active"] or 0,
-                "image_active": row["image_active"] or 0,
-                "video_active": row["video_active"] or 0,
-                "total_pending": row["total_pending"] or 0,
-                "image_pending": row["image_pending"] or 0,
-                "video_pending": row["video_pending"] or 0
-            }
+        row = conn.execute(query, (user_id,)).fetchone()
+        
+        return {
+            "total_active": row["total_active"] or 0,
+            "image_active": row["image_active"] or 0,
+            "video_active": row["video_active"] or 0,
+            "total_pending": row["total_pending"] or 0,
+            "image_pending": row["image_pending"] or 0,
+            "video_pending": row["video_pending"] or 0
+        }
 
     @staticmethod
     def check_can_start_job(user_id: str, job_type: str) -> dict:
@@ -78,6 +157,8 @@ class ConcurrencyService:
         Check if a user can start a new job of a specific type.
         Returns comprehensive status for both immediate start and queue options.
         
+        This is a snapshot: use reserve_job to act on the answer atomically.
+        
         Returns: {
             "can_start": bool,       # Can start immediately (processing)
             "can_queue": bool,       # Can be added to queue (pending)
@@ -88,7 +169,10 @@ class ConcurrencyService:
         """
         limits = ConcurrencyService.get_user_plan_limits(user_id)
         usage = ConcurrencyService.get_active_job_counts(user_id)
-        
+        return ConcurrencyService._evaluate(limits, usage, job_type)
+
+    @staticmethod
+    def _evaluate(limits: dict, usage: dict, job_type: str) -> dict:
         is_video = job_type in ['t2v', 'i2v']
         is_image = job_type in ['t2i', 'i2i']
         
@@ -128,3 +212,108 @@ class ConcurrencyService:
             "current_usage": usage,
             "limits": limits
         }
+
+    @staticmethod
+    def reserve_job(job_data: JobCreate, reason: str, lease_owner: Optional[str] = None) -> dict:
+        """
+        Check limits, create the job and charge its credits in one
+        BEGIN IMMEDIATE transaction, so parallel requests (or workers)
+        can never overshoot the plan limits.
+        
+        The job is created pending: "accepted" when it got a slot (counted
+        as active; submit it with JobQueueService.dispatch_job or leave it
+        to the dispatch workers), "queued" otherwise. A slot also needs
+        room under the provider/model in-flight caps (provider_capacity.py),
+        so a saturated provider queues the job instead. Rejected jobs are
+        not created.
+        
+        With a lease_owner, a job that gets a slot is created already
+        claimed for dispatch by that owner ("dispatching"): the dispatch
+        workers leave it to the caller, who submits it with
+        JobQueueService.dispatch_job(job_id, lease_owner).
+        
+        Returns: {
+            "decision": "start" | "queue" | "reject",
+            "dispatch_state": str,     # "accepted" / "dispatching" / "queued" (None if rejected)
+            "credits_remaining": int,  # None if rejected
+            "reason": str,
+            "current_usage": dict,
+            "limits": dict,
+            "queue_position": int,     # Queued jobs only (else None)
+            "estimated_start_at": str  # Queued jobs only (else None)
+        }
+        
+        Raises:
+            InsufficientCreditsError: If the user can no longer pay (nothing created)
+        """
+        limits = ConcurrencyService.get_user_plan_limits(job_data.user_id)
+        capacity_limits = capacity_model.get_limits()
+        
+        def do_reserve(conn):
+            usage = ConcurrencyService._count_active_jobs(conn, job_data.user_id)
+            check = ConcurrencyService._evaluate(limits, usage, job_data.type)
+            if check["can_start"]:
+                saturated = capacity_model.saturated_key(
+                    job_data.model, capacity_model.get_in_flight(conn), capacity_limits
+                )
+                if saturated:
+                    check["can_start"] = False
+                    if not check["can_queue"]:
+                        check["reason"] = f"{saturated} is at capacity and your queue is full"
+            result = {
+                "decision": "reject",
+                "dispatch_state": None,
+                "credits_remaining": None,
+                "reason": check["reason"],
+                "current_usage": usage,
+                "limits": limits,
+                "queue_position": None,
+                "estimated_start_at": None
+            }
+            if not check["can_start"] and not check["can_queue"]:
+                return result
+            
+            result["decision"] = "start" if check["can_start"] else "queue"
+            result["dispatch_state"] = "accepted" if check["can_start"] else "queued"
+            jobs_repo.insert_job(conn, jobs_service.classify(job_data), "pending", result["dispatch_state"])
+            if check["can_start"] and lease_owner:
+                jobs_repo.claim_in_transaction(conn, job_data.job_id, lease_owner, settings.DISPATCH_LEASE_SECONDS)
+                result["dispatch_state"] = "dispatching"
+            result["credits_remaining"] = credits_service.deduct_credits_in_transaction(
+                conn, job_data.user_id, job_data.credits_cost, job_data.job_id, reason
+            )
+            return result
+        
+        result = execute_in_transaction(do_reserve)
+        if result["decision"] != "reject":
+            jobs_service.publish_created(job_data, "pending")
+        if result["decision"] == "queue":
+            estimate = ConcurrencyService.get_queue_estimate(job_data.user_id, job_data.job_id, limits)
+            if estimate:
+                result["queue_position"] = estimate["queue_position"]
+                result["estimated_start_at"] = estimate["estimated_start_at"]
+        return result
+
+    @staticmethod
+    def get_queue_estimates(user_id: str, limits: Optional[dict] = None) -> List[dict]:
+        """
+        Queue position and estimated start time of each of a user's queued
+        jobs (see ProviderCapacityModel.estimate_queue). Never raises: the
+        estimates are informational.
+        """
+        try:
+            if limits is None:
+                limits = ConcurrencyService.get_user_plan_limits(user_id)
+            usage = ConcurrencyService.get_active_job_counts(user_id)
+            return capacity_model.estimate_queue(user_id, limits, usage)
+        except Exception as e:
+            logger.error(f"Error estimating queue for user {user_id}: {e}")
+            return []
+
+    @staticmethod
+    def get_queue_estimate(user_id: str, job_id: str, limits: Optional[dict] = None) -> Optional[dict]:
+        """Queue estimate of one queued job (None if it is not queued)."""
+        for estimate in ConcurrencyService.get_queue_estimates(user_id, limits):
+            if estimate["job_id"] == job_id:
+                return estimate
+        return None
@@ -97,49 +97,64 @@ class CreditsService:
         Raises:
             InsufficientCreditsError: If user doesn't have enough credits
         """
-        def do_deduction(conn):
-            # Get current balance
-            cursor = conn.execute(
-                "SELECT credits FROM users WHERE user_id = ?",
-                (user_id,)
-            )
-            row = cursor.fetchone()
-            if not row:
-                raise ValueError(f"User not found: {user_id}")
-            
-            balance_before = row["credits"]
-            balance_after = balance_before - amount
-            
-            if balance_after < 0:
-                raise InsufficientCreditsError(amount, balance_before)
-            
-            # Deduct credits
-            conn.execute(
-                "UPDATE users SET credits = ?, updated_at = ? WHERE user_id = ?",
-                (balance_after, datetime.utcnow().isoformat(), user_id)
-            )
-            
-            # Log transaction
-            conn.execute(
-                """
-                INSERT INTO credit_transactions 
-                (user_id, job_id, type, amount, balance_before, balance_after, reason, created_at)
-                VALUES (?, ?, 'deduct', ?, ?, ?, ?, ?)
-                """,
-                (
-                    user_id,
-                    job_id,
-                    -amount,  # Negative for deduction
-                    balance_before,
-                    balance_after,
-                    reason,
-                    datetime.utcnow().isoformat()
-                )
+        return execute_in_transaction(
+            lambda conn: self.deduct_credits_in_transaction(conn, user_id, amount, job_id, reason)
+        )
+    
+    def deduct_credits_in_transaction(
+        self,
+        conn,
+        user_id: str,
+        amount: int,
+        job_id: str,
+        reason: str
+    ) -> int:
+        """
+        Deduct credits inside the caller's transaction (see deduct_credits).
+        
+        Raises:
+            InsufficientCreditsError: If user doesn't have enough credits
+        """
+        # Get current balance
+        cursor = conn.execute(
+            "SELECT credits FROM users WHERE user_id = ?",
+            (user_id,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            raise ValueError(f"User not found: {user_id}")
+        
+        balance_before = row["credits"]
+        balance_after = balance_before - amount
+        
+        if balance_after < 0:
+            raise InsufficientCreditsError(amount, balance_before)
+        
+        # Deduct credits
+        conn.execute(
+            "UPDATE users SET credits = ?, updated_at = ? WHERE user_id = ?",
+            (balance_after, datetime.utcnow().isoformat(), user_id)
+        )
+        
+        # Log transaction
+        conn.execute(
+            """
+            INSERT INTO credit_transactions 
+            (user_id, job_id, type, amount, balance_before, balance_after, reason, created_at)
+            VALUES (?, ?, 'deduct', ?, ?, ?, ?, ?)
+            """,
+            (
+                user_id,
+                job_id,
+                -amount,  # Negative for deduction
+                balance_before,
+                balance_after,
+                reason,
+                datetime.utcnow().isoformat()
             )
-            
-            return balance_after
+        )
         
-        return execute_in_transaction(do_deduction)
+        return balance_after
     
     def refund_credits(self, user_id: str, job_id: str) -> Optional[int]:
         """
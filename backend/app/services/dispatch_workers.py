@@ -0,0 +1,161 @@
+"""
+Dispatch worker pool.
+
+Queue promotion submits jobs to providers, which can take seconds (or a
+Chrome reCAPTCHA solve for Veo). Callers never dispatch inline: the fair
+scheduler (fair_scheduler.py) requests a scheduling round here, a worker
+computes the batch of jobs that fit the free capacity, and dedicated workers
+run the blocking submissions in threads, so one slow submission never delays
+status checks for other jobs.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Optional, List
+
+from app.services.fair_scheduler import fair_scheduler, PendingJob
+from app.services.job_queue_service import JobQueueService
+
+logger = logging.getLogger(__name__)
+
+# Work item asking a worker to run a scheduling round
+SCHEDULE = "schedule"
+
+
+class DispatchWorkerPool:
+    """Internal work queue of scheduling rounds and job submissions."""
+
+    def __init__(self, num_workers: int = 4, max_queue_size: int = 1000):
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+        self._round_requested = False
+        self._retry_timer: Optional[asyncio.TimerHandle] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> None:
+        """Create the queue, spawn worker tasks and attach to the scheduler."""
+        if self.is_running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"dispatch-worker-{i}")
+            for i in range(self.num_workers)
+        ]
+        fair_scheduler.set_trigger(self.request_round)
+        logger.info(f"Started {self.num_workers} dispatch workers")
+
+    async def stop(self) -> None:
+        """Cancel worker tasks and wait for them to exit."""
+        fair_scheduler.set_trigger(None)
+        if self._retry_timer is not None:
+            self._retry_timer.cancel()
+            self._retry_timer = None
+        for task in self._workers:
+            task.cancel()
+        for task in self._workers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        self._queue = None
+        with self._lock:
+            self._round_requested = False
+
+    def request_round(self) -> bool:
+        """
+        Ask the workers to run a scheduling round.
+
+        Non-blocking and safe to call from any thread. Requests made while a
+        round is already queued are coalesced.
+
+        Returns:
+            True if a new round was enqueued
+        """
+        if not self.is_running:
+            return False
+
+        with self._lock:
+            if self._round_requested:
+                return False
+            self._round_requested = True
+
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, SCHEDULE)
+        except RuntimeError:
+            with self._lock:
+                self._round_requested = False
+            return False
+        return True
+
+    def _enqueue(self, item) -> bool:
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            logger.warning("Dispatch queue full, dropping work item")
+            if item == SCHEDULE:
+                with self._lock:
+                    self._round_requested = False
+            return False
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _run_round(self) -> None:
+        # Allow new round requests while this one runs
+        with self._lock:
+            self._round_requested = False
+
+        free = self.max_queue_size - self._queue.qsize()
+        batch = await asyncio.to_thread(fair_scheduler.next_batch, free)
+        for job in batch:
+            if not self._enqueue(job):
+                fair_scheduler.dispatch_finished(job, dispatched=False)
+        self._schedule_retry_round()
+
+    def _schedule_retry_round(self) -> None:
+        """Run another round when the earliest retry backoff elapses."""
+        delay = fair_scheduler.seconds_until_retry()
+        if delay is None:
+            return
+        if self._retry_timer is not None:
+            self._retry_timer.cancel()
+        self._retry_timer = self._loop.call_later(delay + 0.1, self.request_round)
+
+    async def _dispatch(self, index: int, job: PendingJob) -> None:
+        dispatched = False
+        try:
+            dispatched = bool(await asyncio.to_thread(JobQueueService.dispatch_job, job.job_id))
+            if dispatched:
+                logger.info(f"Dispatch worker {index} promoted job {job.job_id} for user {job.user_id}")
+        finally:
+            await asyncio.to_thread(fair_scheduler.dispatch_finished, job, dispatched)
+            if not dispatched:
+                self._schedule_retry_round()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            item = await self._queue.get()
+            try:
+                if item == SCHEDULE:
+                    await self._run_round()
+                else:
+                    await self._dispatch(index, item)
+            except Exception as e:
+                logger.error(f"Dispatch worker {index} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+
+# Singleton instance (started from the application lifespan)
+dispatch_pool = DispatchWorkerPool()
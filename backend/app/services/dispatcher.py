@@ -7,35 +7,49 @@ import json
 import logging
 from typing import Optional, Dict, Any
 
-from app.services.providers.higgsfield_client import higgsfield_client, HiggsfieldClient
 from app.services.providers.google_client import google_veo_client
+from app.services.providers.selenium_solver import solve_recaptcha_v3_enterprise
 from app.repositories import jobs_repo
-from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
+from app.services.account_scheduler import account_scheduler, NoAccountAvailableError
+from app.services.metrics import provider_for_model
 
 logger = logging.getLogger(__name__)
 
-def get_higgsfield_client():
-    """
-    Get Higgsfield client using active account from DB (highest priority).
-    Falls back to default .env client if no active accounts found.
-    """
-    try:
-        accounts = higgsfield_accounts_repo.list_accounts(active_only=True)
-        if accounts:
-            account_id = accounts[0]['account_id']
-            return HiggsfieldClient.create_from_account(account_id)
-    except Exception as e:
-        logger.error(f"Error fetching Higgsfield account: {e}")
-    return higgsfield_client
+# reCAPTCHA Enterprise site used by Google Labs (Veo generation)
+VEO_RECAPTCHA_SITE_KEY = '6LdsFiUsAAAAAIjVDZcuLhaHiDn5nnHVXVRQGeMV'
+VEO_RECAPTCHA_SITE_URL = 'https://labs.google'
 
 class Dispatcher:
     """Handles execution of jobs based on database records."""
 
     @staticmethod
-    def execute_job(job: Dict[str, Any]) -> Optional[str]:
+    def _end_frame(input_images_data: list) -> Optional[Dict[str, Any]]:
+        """Rebuild the optional end frame (second stored image) like the endpoints do."""
+        if len(input_images_data) < 2:
+            return None
+        start, end = input_images_data[0], input_images_data[1]
+        if not end.get("id") or not end.get("url"):
+            return None
+        return {
+            "type": "media_input",
+            "id": end["id"],
+            "url": end["url"],
+            # Fallback to start image dims if end image dims missing
+            "width": end.get("width") or start.get("width"),
+            "height": end.get("height") or start.get("height")
+        }
+
+    @staticmethod
+    def execute_job(job: Dict[str, Any], raise_errors: bool = False) -> Optional[str]:
         """
         Executes a job based on its type and model.
         Returns the provider_job_id if successful, None otherwise.
+        With raise_errors, provider errors propagate to the caller
+        (used by the queue to decide whether to retry).
+        
+        Higgsfield jobs are submitted on the account with free capacity
+        (recorded on the job); NoAccountAvailableError is raised (with
+        raise_errors) when every account is full.
         """
         try:
             job_type = job.get("type")
@@ -50,15 +64,19 @@ class Dispatcher:
             def get_param(key, default=None):
                 return input_params.get(key, default)
 
-            aspect_ratio = get_param("aspect_ratio", "16:9") # Default vary by model but safe fallback
-            resolution = get_param("resolution", "720p")
+            # Defaults match the generate endpoints (Veo defaults to portrait)
+            aspect_ratio = get_param("aspect_ratio") or ("9:16" if model and model.startswith("veo") else "16:9")
+            resolution = get_param("resolution") or "720p"
             duration = get_param("duration")
             speed = get_param("speed", "fast")
             audio = get_param("audio")
             sound = get_param("sound") # Alias for audio in some endpoints
             
-            # Normalize audio boolean
-            has_audio = audio if audio is not None else (sound if sound is not None else False)
+            # Normalize audio boolean (endpoints default to audio on)
+            has_audio = audio if audio is not None else (sound if sound is not None else True)
+            
+            # Jobs from the JSON /generate endpoint were submitted via client.generate_video
+            generic_route = get_param("route") == "generate"
             
             # Normalize input images
             # Some clients expect list of dicts, some expect list of strings (urls)
@@ -66,12 +84,22 @@ class Dispatcher:
             
             provider_job_id = None
             
+            # Higgsfield jobs go to an account with free capacity
+            client = None
+            if provider_for_model(model) == "higgsfield":
+                account_id, client = account_scheduler.get_client_for_job(
+                    job_type, model, job_id=job["job_id"], is_slow=job.get("is_slow"),
+                    resolution=resolution, duration=duration
+                )
+                if client is None:
+                    raise NoAccountAvailableError(job_type, model)
+                jobs_repo.set_account(job["job_id"], account_id)
+            
             # ============================================
             # IMAGE GENERATION
             # ============================================
             if model == "nano-banana":
                 use_unlim = True if speed == "slow" else False
-                client = get_higgsfield_client()
                 provider_job_id = client.generate_image(
                     prompt=prompt,
                     input_images=input_images_data,
@@ -82,7 +110,6 @@ class Dispatcher:
                 
             elif model == "nano-banana-pro":
                 use_unlim = True if speed == "slow" else False
-                client = get_higgsfield_client()
                 provider_job_id = client.generate_image(
                     prompt=prompt,
                     input_images=input_images_data,
@@ -101,22 +128,31 @@ class Dispatcher:
                     # Veo client expects single input image dict or None
                     input_image = input_images_data[0]
                 
+                # Veo requires a fresh reCAPTCHA token per submission (Chrome solve)
+                token_data = solve_recaptcha_v3_enterprise(VEO_RECAPTCHA_SITE_KEY, VEO_RECAPTCHA_SITE_URL)
+                if isinstance(token_data, tuple):
+                    recaptcha_token, user_agent = token_data
+                else:
+                    recaptcha_token, user_agent = token_data, None
+                
                 provider_job_id = google_veo_client.generate_video(
                     prompt=prompt,
                     model=model,
                     aspect_ratio=aspect_ratio,
-                    input_image=input_image
+                    input_image=input_image,
+                    recaptchaToken=recaptcha_token,
+                    user_agent=user_agent
                 )
 
             # ============================================
             # VIDEO GENERATION - KLING (HIGGSFIELD)
             # ============================================
-            elif model == "kling-2.5-turbo":
+            elif model == "kling-2.5-turbo" and not generic_route:
                 use_unlim = True if speed == "slow" else False
                 if job_type == "i2v":
                     # I2V requires specific image fields
                     img = input_images_data[0] if input_images_data else {}
-                    client = get_higgsfield_client()
+                    mode = get_param("mode") or ("pro" if resolution == "1080p" else "std")
                     provider_job_id = client.send_job_kling_2_5_turbo_i2v(
                         prompt=prompt,
                         duration=duration or 5,
@@ -125,6 +161,8 @@ class Dispatcher:
                         img_url=img.get("url"),
                         width=img.get("width"),
                         height=img.get("height"),
+                        input_image_end=Dispatcher._end_frame(input_images_data) if mode == "pro" else None,
+                        mode=mode,
                         use_unlim=use_unlim
                     )
                 else:
@@ -133,11 +171,10 @@ class Dispatcher:
                     # If we add T2V support later, add here.
                     logger.warning(f"Unsupported job type {job_type} for model {model}")
 
-            elif model == "kling-o1-video":
+            elif model == "kling-o1-video" and not generic_route:
                 use_unlim = True if speed == "slow" else False
                 if job_type == "i2v":
                     img = input_images_data[0] if input_images_data else {}
-                    client = get_higgsfield_client()
                     provider_job_id = client.send_job_kling_o1_i2v(
                         prompt=prompt,
                         duration=duration or 5,
@@ -146,13 +183,13 @@ class Dispatcher:
                         img_url=img.get("url"),
                         width=img.get("width"),
                         height=img.get("height"),
+                        input_image_end=Dispatcher._end_frame(input_images_data),
                         use_unlim=use_unlim
                     )
             
-            elif model == "kling-2.6":
+            elif model == "kling-2.6" and not generic_route:
                 use_unlim = True if speed == "slow" else False
                 if job_type == "t2v":
-                    client = get_higgsfield_client()
                     provider_job_id = client.send_job_kling_2_6_t2v(
                         prompt=prompt,
                         duration=duration or 5,
@@ -162,7 +199,6 @@ class Dispatcher:
                     )
                 elif job_type == "i2v":
                     img = input_images_data[0] if input_images_data else {}
-                    client = get_higgsfield_client()
                     provider_job_id = client.send_job_kling_2_6_i2v(
                         prompt=prompt,
                         duration=duration or 5,
@@ -181,7 +217,6 @@ class Dispatcher:
                 # Generic fallback if routers use main generate_video method 
                 # (Active for generic kling requests from JSON endpoint)
                 use_unlim = True if speed == "slow" else False
-                client = get_higgsfield_client()
                 provider_job_id = client.generate_video(
                     prompt=prompt,
                     model=model,
@@ -195,8 +230,14 @@ class Dispatcher:
 
             return provider_job_id
 
+        except NoAccountAvailableError:
+            if raise_errors:
+                raise
+            return None
         except Exception as e:
             logger.error(f"Dispatcher failed to execute job {job.get('job_id')}: {str(e)}")
+            if raise_errors:
+                raise
             import traceback
             traceback.print_exc()
             return None
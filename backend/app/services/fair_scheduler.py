@@ -0,0 +1,408 @@
+"""
+Global fair-share scheduler for queued (pending) jobs.
+
+All pending work is kept in memory, one FIFO queue per user, rebuilt from the
+database on start and kept current from job events (job_events.py). When a
+slot frees up (a job completes, fails or is cancelled) or new work arrives, a
+scheduling round picks jobs to dispatch (a periodic sweep, promotion_sweep.py,
+also reconciles with the database and triggers a round):
+
+- Weighted fair queuing across users: each user has a virtual time that
+  advances by 1/weight per dispatched job; the backlogged user with the
+  lowest virtual time goes next. The weight is the user's priority lane
+  weight: each plan has a queue lane (subscription_plans.queue_lane, a stable
+  slug that survives plan renames: free/starter/professional/business) and
+  the lane weights come from the 'queue_lane_weights' system setting, so
+  higher plans get a larger share when the providers are saturated.
+- Aging: a user's head job earns one extra turn per 'queue_aging_seconds'
+  waited, so low-priority lanes keep progressing under sustained load.
+- Plan limits: total/image/video concurrent limits per user.
+- Global capacity: in-flight caps per provider and model (provider_capacity.py).
+  Accepted jobs already hold their provider slot.
+- Retry backoff: jobs whose submission failed are skipped until their
+  next_attempt_at (see JobQueueService.dispatch_job).
+
+Picked jobs are submitted by the dispatch worker pool (dispatch_workers.py).
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app.repositories import jobs_repo, settings_repo
+from app.services import metrics
+from app.services.concurrency_service import ConcurrencyService
+from app.services.provider_capacity import capacity_model
+
+logger = logging.getLogger(__name__)
+
+IMAGE_TYPES = ("t2i", "i2i")
+VIDEO_TYPES = ("t2v", "i2v")
+
+# Pending jobs per user considered in a round (a blocked image job
+# should not hide a startable video job behind it)
+LOOKAHEAD = 10
+
+LANE_WEIGHTS_KEY = "queue_lane_weights"
+AGING_SECONDS_KEY = "queue_aging_seconds"
+DEFAULT_LANE_WEIGHTS = {"free": 1.0, "starter": 2.0, "professional": 4.0, "business": 8.0}
+DEFAULT_AGING_SECONDS = 120.0
+
+
+def get_lane_weights() -> Dict[str, float]:
+    """Dispatch share per priority lane (defaults merged with the system setting)."""
+    weights = dict(DEFAULT_LANE_WEIGHTS)
+    setting = settings_repo.get_setting(LANE_WEIGHTS_KEY)
+    if setting and setting.get("setting_value"):
+        try:
+            overrides = json.loads(setting["setting_value"])
+            weights.update({str(k).lower(): float(v) for k, v in overrides.items() if v and float(v) > 0})
+        except (TypeError, ValueError, AttributeError):
+            logger.warning(f"Invalid {LANE_WEIGHTS_KEY} setting, ignoring")
+    return weights
+
+
+def get_aging_seconds() -> float:
+    """Seconds of waiting worth one extra dispatch turn (0 disables aging)."""
+    setting = settings_repo.get_setting(AGING_SECONDS_KEY)
+    if setting and setting.get("setting_value"):
+        try:
+            return max(float(setting["setting_value"]), 0.0)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid {AGING_SECONDS_KEY} setting, ignoring")
+    return DEFAULT_AGING_SECONDS
+
+
+def lane_for(plan: dict) -> str:
+    """Priority lane of a plan (its queue_lane slug; plans not yet migrated fall back to the name)."""
+    return (plan.get("queue_lane") or plan.get("plan_name") or "free").lower()
+
+
+@dataclass
+class PendingJob:
+    job_id: str
+    user_id: str
+    type: str
+    model: str
+    created_at: str
+    reserved: bool = False  # Accepted with a reserved slot (accept-then-dispatch)
+    next_attempt_at: Optional[str] = None  # Retry backoff after a failed submission
+
+    @classmethod
+    def from_row(cls, row: dict) -> "PendingJob":
+        return cls(
+            job_id=row["job_id"],
+            user_id=row["user_id"],
+            type=row["type"],
+            model=row["model"],
+            created_at=row.get("created_at") or "",
+            reserved=row.get("dispatch_state") == "accepted",
+            next_attempt_at=row.get("next_attempt_at"),
+        )
+
+    @property
+    def sort_key(self):
+        # Reserved jobs already hold their slot: dispatch them before queued ones
+        return (not self.reserved, self.created_at)
+
+    @property
+    def provider(self) -> str:
+        return metrics.provider_for_model(self.model)
+
+    def is_due(self, now: str) -> bool:
+        return not self.next_attempt_at or self.next_attempt_at <= now
+
+
+@dataclass
+class _UserQueue:
+    jobs: List[PendingJob] = field(default_factory=list)
+    virtual_time: float = 0.0
+
+
+class FairScheduler:
+    """In-memory pending queues with weighted fair selection across users."""
+
+    def __init__(self):
+        self._users: Dict[str, _UserQueue] = {}
+        self._job_owner: Dict[str, str] = {}       # job_id -> user_id
+        self._dispatching: Dict[str, PendingJob] = {}  # picked, not yet processing
+        self._lock = threading.Lock()
+        self._on_work: Optional[Callable[[], None]] = None
+        self._next_retry_at: Optional[str] = None  # Earliest backoff skipped in the last round
+
+    # ============================================
+    # Pending set maintenance
+    # ============================================
+
+    def rebuild(self) -> int:
+        """Reload every pending job from the database."""
+        rows = jobs_repo.get_pending_jobs()
+        with self._lock:
+            self._users.clear()
+            self._job_owner.clear()
+            self._dispatching.clear()
+            for row in rows:
+                self._add_locked(PendingJob.from_row(row))
+        logger.info(f"Fair scheduler rebuilt with {len(rows)} pending jobs")
+        return len(rows)
+
+    def _min_virtual_time_locked(self) -> Optional[float]:
+        times = [queue.virtual_time for queue in self._users.values() if queue.jobs]
+        return min(times) if times else None
+
+    def _add_locked(self, job: PendingJob) -> None:
+        if job.job_id in self._job_owner or job.job_id in self._dispatching:
+            return
+        queue = self._users.get(job.user_id)
+        if queue is None:
+            # Newly backlogged users start at the current virtual clock,
+            # so idle time is not banked as extra share
+            queue = _UserQueue(virtual_time=self._min_virtual_time_locked() or 0.0)
+            self._users[job.user_id] = queue
+        queue.jobs.append(job)
+        queue.jobs.sort(key=lambda j: j.sort_key)
+        self._job_owner[job.job_id] = job.user_id
+
+    def _remove_locked(self, job_id: str) -> None:
+        self._dispatching.pop(job_id, None)
+        user_id = self._job_owner.pop(job_id, None)
+        if user_id is None:
+            return
+        queue = self._users.get(user_id)
+        if queue is None:
+            return
+        queue.jobs = [job for job in queue.jobs if job.job_id != job_id]
+        if not queue.jobs:
+            del self._users[user_id]
+
+    def resync_users(self, user_ids: List[str], rows: List[dict]) -> int:
+        """
+        Reconcile the pending queues of some users with the database.
+
+        Adds jobs missed by the in-memory view (e.g. a failed dispatch that
+        was not requeued) and drops jobs that are no longer pending.
+
+        Returns:
+            Number of jobs added
+        """
+        by_user: Dict[str, List[dict]] = {user_id: [] for user_id in user_ids}
+        for row in rows:
+            by_user.setdefault(row["user_id"], []).append(row)
+
+        added = 0
+        with self._lock:
+            for user_id, user_rows in by_user.items():
+                pending_ids = {row["job_id"] for row in user_rows}
+                queue = self._users.get(user_id)
+                if queue is not None:
+                    for job in list(queue.jobs):
+                        if job.job_id not in pending_ids:
+                            self._remove_locked(job.job_id)
+                for row in user_rows:
+                    if row["job_id"] not in self._job_owner and row["job_id"] not in self._dispatching:
+                        self._add_locked(PendingJob.from_row(row))
+                        added += 1
+        return added
+
+    @property
+    def has_trigger(self) -> bool:
+        return self._on_work is not None
+
+    def add_job(self, job: PendingJob) -> None:
+        with self._lock:
+            self._add_locked(job)
+
+    def remove_job(self, job_id: str) -> None:
+        with self._lock:
+            self._remove_locked(job_id)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._job_owner)
+
+    def on_job_event(self, event: dict) -> None:
+        """
+        Job event listener: track pending jobs and trigger a round when work
+        arrives or a slot frees up.
+        """
+        job_id = event.get("job_id")
+        status = event.get("status")
+        if not job_id:
+            return
+
+        if status == "pending":
+            if event.get("dispatch_state") == "dispatching":
+                return  # Created already claimed: submitted by its creator (JobQueueService.submit_or_queue)
+            self.add_job(PendingJob.from_row(event))
+            self.request_round()
+        elif status == "processing":
+            self.remove_job(job_id)
+        else:
+            # completed / failed / cancelled / deleted: slot freed
+            self.remove_job(job_id)
+            self.request_round()
+
+    # ============================================
+    # Scheduling
+    # ============================================
+
+    def set_trigger(self, callback: Optional[Callable[[], None]]) -> None:
+        """Install the callback that runs a scheduling round (dispatch pool)."""
+        self._on_work = callback
+
+    def request_round(self) -> None:
+        """Ask for a scheduling round (coalesced by the dispatch pool)."""
+        if self._on_work is not None:
+            self._on_work()
+
+    def next_batch(self, max_jobs: int = 100) -> List[PendingJob]:
+        """
+        Pick the jobs to dispatch now, in weighted fair order.
+
+        Picked jobs are held as "dispatching" (counted against capacity)
+        until dispatch_finished is called for them.
+        """
+        with self._lock:
+            if not self._users:
+                metrics.scheduler_queued_jobs.clear()
+                return []
+            user_ids = list(self._users.keys())
+            dispatching = list(self._dispatching.values())
+            reserved = [job for queue in self._users.values() for job in queue.jobs if job.reserved]
+
+        # Capacity snapshot: processing jobs in the DB + jobs being dispatched
+        # (+ accepted jobs, which already hold their provider slot)
+        limits = ConcurrencyService.get_plan_limits_for_users(user_ids)
+        user_usage: Dict[str, Dict[str, int]] = {}
+        in_flight: Dict[str, int] = {}  # provider / model -> jobs
+
+        def count(user_id: str, job_type: str, model: str, n: int = 1, provider_slot: bool = True) -> None:
+            usage = user_usage.setdefault(user_id, {"total": 0, "image": 0, "video": 0})
+            usage["total"] += n
+            if job_type in IMAGE_TYPES:
+                usage["image"] += n
+            elif job_type in VIDEO_TYPES:
+                usage["video"] += n
+            if provider_slot:
+                for key in capacity_model.keys_for(model):
+                    in_flight[key] = in_flight.get(key, 0) + n
+
+        for row in ConcurrencyService.get_processing_counts():
+            count(row["user_id"], row["type"], row["model"], row["count"])
+        for job in dispatching:
+            count(job.user_id, job.type, job.model)
+        for job in reserved:
+            for key in capacity_model.keys_for(job.model):
+                in_flight[key] = in_flight.get(key, 0) + 1
+
+        capacity_limits = capacity_model.get_limits()
+        lane_weights = get_lane_weights()
+        aging_seconds = get_aging_seconds()
+        now = datetime.utcnow().isoformat() + 'Z'
+        backing_off: List[str] = []
+
+        def fits(job: PendingJob) -> bool:
+            if not job.is_due(now):
+                backing_off.append(job.next_attempt_at)
+                return False
+            if not job.reserved and capacity_model.saturated_key(job.model, in_flight, capacity_limits):
+                return False
+            plan = limits[job.user_id]
+            usage = user_usage.get(job.user_id, {"total": 0, "image": 0, "video": 0})
+            if usage["total"] >= plan["total_concurrent_limit"]:
+                return False
+            if job.type in IMAGE_TYPES and usage["image"] >= plan["image_concurrent_limit"]:
+                return False
+            if job.type in VIDEO_TYPES and usage["video"] >= plan["video_concurrent_limit"]:
+                return False
+            return True
+
+        def weight(job: PendingJob) -> float:
+            lane = lane_for(limits[job.user_id])
+            return lane_weights.get(lane, lane_weights["free"])
+
+        def priority(user_id: str):
+            # Lowest virtual time first, minus the aging credit of the head
+            # job; oldest head job breaks ties
+            head = self._users[user_id].jobs[0]
+            credit = 0.0
+            if aging_seconds:
+                credit = (metrics.elapsed_seconds(head.created_at) or 0.0) / aging_seconds
+            return (self._users[user_id].virtual_time - credit, head.sort_key)
+
+        batch: List[PendingJob] = []
+        with self._lock:
+            lane_counts: Dict[str, int] = {}
+            for uid in user_ids:
+                if uid in self._users and uid in limits:
+                    for job in self._users[uid].jobs:
+                        lane = lane_for(limits[uid])
+                        lane_counts[lane] = lane_counts.get(lane, 0) + 1
+
+            candidates = {uid for uid in user_ids if uid in self._users and uid in limits}
+            while candidates and len(batch) < max_jobs:
+                user_id = min(candidates, key=priority)
+                queue = self._users[user_id]
+                job = next((j for j in queue.jobs[:LOOKAHEAD] if fits(j)), None)
+                if job is None:
+                    candidates.discard(user_id)
+                    continue
+
+                queue.virtual_time += 1.0 / weight(job)
+                self._remove_locked(job.job_id)
+                self._dispatching[job.job_id] = job
+                count(job.user_id, job.type, job.model, provider_slot=not job.reserved)
+                batch.append(job)
+                metrics.job_lane_wait_seconds.observe(
+                    metrics.elapsed_seconds(job.created_at) or 0.0,
+                    lane=lane_for(limits[user_id])
+                )
+
+                if user_id not in self._users:
+                    candidates.discard(user_id)
+
+            self._next_retry_at = min(backing_off) if backing_off else None
+
+        metrics.scheduler_queued_jobs.clear()
+        for lane, queued in lane_counts.items():
+            metrics.scheduler_queued_jobs.set(queued, lane=lane)
+
+        return batch
+
+    def seconds_until_retry(self) -> Optional[float]:
+        """Seconds until the earliest job skipped for backoff becomes due (None if none)."""
+        next_retry_at = self._next_retry_at
+        if not next_retry_at:
+            return None
+        due = datetime.fromisoformat(next_retry_at.rstrip('Z'))
+        return max((due - datetime.utcnow()).total_seconds(), 0.0)
+
+    def dispatch_finished(self, job: PendingJob, dispatched: bool) -> None:
+        """
+        Release a picked job. If the dispatch failed and the job is still
+        pending, it goes back to its user's queue (keeping its place) with
+        its retry backoff, unless another worker holds its dispatch lease.
+        It is rebuilt from its row: a failed dispatch gives up the reserved
+        slot (dispatch_state back to 'queued'), so the job has to pass the
+        provider caps again.
+        """
+        with self._lock:
+            self._dispatching.pop(job.job_id, None)
+        if dispatched:
+            return
+
+        row = jobs_repo.get_by_id(job.job_id)
+        if row and row["status"] == "pending" and row.get("dispatch_state") != "dispatching":
+            self.add_job(PendingJob.from_row(row))
+            with self._lock:
+                if row.get("next_attempt_at") and (
+                    not self._next_retry_at or row["next_attempt_at"] < self._next_retry_at
+                ):
+                    self._next_retry_at = row["next_attempt_at"]
+
+
+# Singleton instance
+fair_scheduler = FairScheduler()
@@ -0,0 +1,124 @@
+"""
+Normalization of user images before they are uploaded to a provider.
+
+Phone photos arrive as 10-20 MB files with EXIF orientation, GPS and
+camera metadata. Before upload an image is:
+
+- rotated upright per its EXIF orientation, with its metadata dropped
+  (the ICC color profile is kept),
+- downscaled so its long edge fits the target provider's max edge
+  (IMAGE_UPLOAD_MAX_EDGE_HIGGSFIELD / _VEO, 0 = no limit; the long edge
+  covers portrait and landscape aspect ratios alike),
+- re-encoded as JPEG at IMAGE_UPLOAD_JPEG_QUALITY, or PNG when it has
+  transparency.
+
+Images that need none of this (upright, small enough, no metadata) are
+passed through byte for byte, so they are not re-compressed. Decoding is
+CPU-bound: async callers use prepare_image_async, which runs on a
+dedicated thread pool (IMAGE_PREPROCESS_WORKERS); sync callers already
+run in worker threads.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from app.config import settings
+from app.services import metrics
+from app.utils.images import ImageInfo, probe_image
+
+logger = logging.getLogger(__name__)
+
+HIGGSFIELD = "higgsfield"
+VEO = "veo"
+
+_ORIENTATION_TAG = 0x0112
+_METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment")
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PREPROCESS_WORKERS, thread_name_prefix="image-preprocess"
+)
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    data: bytes
+    width: int
+    height: int
+    mime_type: str
+    original_size: int
+
+
+def _max_edge(target: str) -> int:
+    if target == VEO:
+        return settings.IMAGE_UPLOAD_MAX_EDGE_VEO
+    return settings.IMAGE_UPLOAD_MAX_EDGE_HIGGSFIELD
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def _encode(image: Image.Image, icc_profile) -> tuple:
+    """(bytes, mime type) of the normalized image, without EXIF/XMP metadata."""
+    output = BytesIO()
+    extra = {"icc_profile": icc_profile} if icc_profile else {}
+    if _has_alpha(image):
+        image.save(output, "PNG", **extra)
+        return output.getvalue(), "image/png"
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image.save(output, "JPEG", quality=settings.IMAGE_UPLOAD_JPEG_QUALITY, optimize=True, **extra)
+    return output.getvalue(), "image/jpeg"
+
+
+def _normalize(data: bytes, info: ImageInfo, max_edge: int) -> PreparedImage:
+    with Image.open(BytesIO(data)) as image:
+        orientation = image.getexif().get(_ORIENTATION_TAG, 1)
+        has_metadata = any(image.info.get(key) for key in _METADATA_KEYS)
+        oversized = bool(max_edge) and max(info.width, info.height) > max_edge
+        if not oversized and orientation in (0, 1) and not has_metadata:
+            return PreparedImage(data, info.width, info.height, info.mime_type, len(data))
+
+        icc_profile = image.info.get("icc_profile")
+        if oversized and info.format == "JPEG":
+            # Let the JPEG decoder downscale by a power of two (DCT scaling):
+            # far less work than decoding full resolution, then resizing
+            image.draft("RGB", (max_edge, max_edge))
+        normalized = ImageOps.exif_transpose(image)
+        if oversized:
+            normalized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        encoded, mime_type = _encode(normalized, icc_profile)
+        return PreparedImage(encoded, normalized.width, normalized.height, mime_type, len(data))
+
+
+def prepare_image(data: bytes, target: str = HIGGSFIELD) -> PreparedImage:
+    """
+    Normalize an image for upload to a provider (HIGGSFIELD or VEO).
+
+    Raises InvalidImageError if the bytes are not a JPEG, PNG or WebP image.
+    """
+    started = time.monotonic()
+    info = probe_image(data)
+    prepared = _normalize(data, info, _max_edge(target))
+
+    metrics.image_preprocess_seconds.observe(time.monotonic() - started, target=target)
+    metrics.image_upload_bytes_in_total.inc(len(data), target=target)
+    metrics.image_upload_bytes_saved_total.inc(max(0, len(data) - len(prepared.data)), target=target)
+    if prepared.data is not data:
+        logger.debug(
+            f"Normalized {info.format} {info.width}x{info.height} ({len(data)} bytes) for {target}: "
+            f"{prepared.mime_type} {prepared.width}x{prepared.height} ({len(prepared.data)} bytes)"
+        )
+    return prepared
+
+
+async def prepare_image_async(data: bytes, target: str = HIGGSFIELD) -> PreparedImage:
+    """prepare_image on the preprocessing thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, prepare_image, data, target)
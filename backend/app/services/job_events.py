@@ -0,0 +1,232 @@
+"""
+In-process job event bus with cross-worker fan-out.
+
+Every job status transition is published here (jobs_service.py calls
+publish_job after each status write). Subscribers in this worker - the
+/api/jobs/stream SSE endpoint - receive the event immediately. The event is
+also appended to the job_events table, which acts as a local broker stand-in:
+the relay task in every other worker tails that table and fans the event out
+to its own subscribers. Server-side listeners (the fair scheduler) receive
+every event, local or relayed.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+from app.database.db import fetch_one, fetch_all, execute
+
+logger = logging.getLogger(__name__)
+
+# Fields of the job row that are pushed to clients (prompt/input data omitted)
+EVENT_FIELDS = (
+    "job_id",
+    "user_id",
+    "type",
+    "model",
+    "status",
+    "dispatch_state",
+    "next_attempt_at",
+    "account_id",
+    "is_slow",
+    "output_url",
+    "error_message",
+    "credits_cost",
+    "credits_refunded",
+    "created_at",
+    "completed_at",
+)
+
+
+class JobEventBus:
+    """Publish/subscribe hub for job status updates, keyed by user."""
+
+    def __init__(self, max_queue_size: int = 100):
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._last_event_id = 0
+        self._listeners: List[Callable[[dict], None]] = []
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Attach the bus to the server event loop.
+
+        Publishers may run in worker threads, so delivery to subscriber
+        queues is always scheduled onto this loop.
+        """
+        self._loop = loop
+        row = fetch_one("SELECT MAX(id) as last_id FROM job_events")
+        self._last_event_id = (row or {}).get("last_id") or 0
+
+    # ============================================
+    # Subscriptions
+    # ============================================
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        """Register a new subscriber queue for a user's job events."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        """Remove a subscriber queue."""
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+    def add_listener(self, callback: Callable[[dict], None]) -> None:
+        """
+        Register a server-side callback for every job event (local and relayed).
+        Called synchronously in the publishing thread; must be cheap.
+        """
+        self._listeners.append(callback)
+
+    def _notify_listeners(self, event: dict) -> None:
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Job event listener failed for job {event.get('job_id')}: {e}")
+
+    # ============================================
+    # Publishing
+    # ============================================
+
+    @staticmethod
+    def build_event(job: dict) -> dict:
+        """Build the client-facing event payload from a job row."""
+        event = {field: job.get(field) for field in EVENT_FIELDS}
+        event["credits_refunded"] = bool(event.get("credits_refunded"))
+        return event
+
+    def publish_job(self, job_id: str, job: Optional[dict] = None) -> None:
+        """
+        Publish the current state of a job: the row the status write
+        returned, or loaded from the database if the caller has none.
+        """
+        try:
+            if job is None:
+                job = fetch_one("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+            if job:
+                self.publish(self.build_event(job))
+        except Exception as e:
+            # Event delivery must never break the status write that triggered it
+            logger.error(f"Failed to publish event for job {job_id}: {e}")
+
+    def publish(self, event: dict) -> None:
+        """Deliver an event locally and append it to the broker table."""
+        try:
+            execute(
+                """
+                INSERT INTO job_events (worker_id, job_id, user_id, payload, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    self.worker_id,
+                    event.get("job_id"),
+                    event.get("user_id"),
+                    json.dumps(event),
+                    datetime.utcnow().isoformat() + 'Z'
+                )
+            )
+        except Exception as e:
+            logger.error(f"Failed to persist job event {event.get('job_id')}: {e}")
+
+        self._notify_listeners(event)
+        self._deliver_local(event)
+
+    def _deliver_local(self, event: dict) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._fanout, event)
+        except RuntimeError:
+            # Loop is shutting down
+            pass
+
+    def _fanout(self, event: dict) -> None:
+        """Push an event to every local subscriber of its user (loop thread only)."""
+        with self._lock:
+            queues = list(self._subscribers.get(event.get("user_id"), ()))
+
+        for queue in queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop the oldest event, the newest state wins
+                try:
+                    queue.get_nowait()
+                    queue.put_nowait(event)
+                except (asyncio.QueueEmpty, asyncio.QueueFull):
+                    pass
+
+    # ============================================
+    # Broker relay (cross-worker fan-out)
+    # ============================================
+
+    def poll_broker(self, batch_size: int = 500) -> int:
+        """
+        Fan out events written by other workers since the last poll.
+
+        Blocking (database read): the relay task runs it in a thread, so
+        delivery to subscriber queues goes through the event loop.
+
+        Returns:
+            Number of events relayed to local subscribers
+        """
+        rows: List[dict] = fetch_all(
+            """
+            SELECT id, worker_id, payload FROM job_events
+            WHERE id > ?
+            ORDER BY id ASC
+            LIMIT ?
+            """,
+            (self._last_event_id, batch_size)
+        )
+
+        relayed = 0
+        for row in rows:
+            self._last_event_id = row["id"]
+            if row["worker_id"] == self.worker_id:
+                continue  # Already delivered locally
+            try:
+                event = json.loads(row["payload"])
+            except (TypeError, ValueError):
+                continue
+            self._notify_listeners(event)
+            self._deliver_local(event)
+            relayed += 1
+
+        return relayed
+
+    def prune_broker(self, retention_minutes: int = 10) -> int:
+        """
+        Delete broker rows older than the retention window.
+
+        Every status write appends a row; relays only need the rows written
+        since their last poll, so a window of minutes keeps the table small.
+        """
+        cutoff = (datetime.utcnow() - timedelta(minutes=retention_minutes)).isoformat() + 'Z'
+        return execute("DELETE FROM job_events WHERE created_at < ?", (cutoff,))
+
+
+# Singleton instance
+job_event_bus = JobEventBus()
@@ -1,101 +1,410 @@
-
 """
 Service to manage job queue and promotion.
-Handles FIFO promotion of pending jobs when concurrent slots become available.
+Submits pending jobs to their provider once the fair scheduler
+(see fair_scheduler.py) has picked them for a free slot.
 """
+import asyncio
 import logging
-from datetime import datetime
+import random
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Optional, List
 
+from app.config import settings
+from app.database.db import execute_in_transaction
+from app.services.account_health import is_auth_error, status_code_of
+from app.services.account_scheduler import account_scheduler, NoAccountAvailableError
 from app.services.concurrency_service import ConcurrencyService
+from app.services.credits_service import credits_service, InsufficientCreditsError
 from app.services.dispatcher import Dispatcher
+from app.services.fair_scheduler import fair_scheduler, PendingJob
+from app.services.job_events import job_event_bus
+from app.services import jobs_service
 from app.repositories import jobs_repo
+from app.schemas.jobs import JobCreate
+from app.services import metrics
 
 logger = logging.getLogger(__name__)
 
+# Provider HTTP statuses worth retrying (everything else 4xx is a bad request)
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429}
+
+
+def is_transient_error(error: Optional[BaseException]) -> bool:
+    """
+    Whether a failed submission is worth retrying.
+
+    The HTTP status comes from the provider error (see status_code_of);
+    4xx responses (other than timeouts/rate limits) and unknown
+    models will fail the same way again. Network errors, 5xx and submissions
+    that returned no provider id are treated as transient.
+    """
+    if error is None:
+        return True
+    if "Unknown model" in str(error):
+        return False
+    code = status_code_of(error)
+    if code is not None:
+        return code >= 500 or code in RETRYABLE_STATUS_CODES
+    return True
+
+
+def is_account_error(error: Optional[BaseException]) -> bool:
+    """Whether a failed submission reflects on the account it was sent with."""
+    return is_auth_error(error) or is_transient_error(error)
+
+
+def retry_delay_seconds(attempt: int) -> float:
+    """Jittered exponential backoff for the given (1-based) failed attempt."""
+    delay = min(
+        settings.DISPATCH_RETRY_MAX_SECONDS,
+        settings.DISPATCH_RETRY_BASE_SECONDS * (2 ** (attempt - 1))
+    )
+    # Equal jitter: at least half the delay, so retries still back off
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class QueueFullError(Exception):
+    """A new job was rejected: no free slot and the user's queue is full (nothing created)."""
+    def __init__(self, reservation: dict):
+        self.reservation = reservation
+        super().__init__(reservation["reason"])
+
+    @property
+    def detail(self) -> dict:
+        return {
+            "error": "Queue full",
+            "message": self.reservation["reason"],
+            "current_usage": self.reservation["current_usage"],
+            "limits": self.reservation["limits"]
+        }
+
+
+class SubmissionFailedError(Exception):
+    """A new job submitted right away was rejected by its provider (dead-lettered, credits refunded)."""
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        super().__init__(f"Failed to create job {job_id} on provider")
+
+
+def new_lease_owner() -> str:
+    """Lease owner for one dispatch attempt: this process plus a unique claim id."""
+    return f"{job_event_bus.worker_id}/{uuid.uuid4().hex[:8]}"
+
+
+class LeaseHeartbeat:
+    """Renews a dispatch lease in the background while a submission runs."""
+
+    def __init__(self, job_id: str, lease_owner: str, lease_seconds: float):
+        self.job_id = job_id
+        self.lease_owner = lease_owner
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not jobs_repo.extend_lease(self.job_id, self.lease_owner, self.lease_seconds):
+                    logger.warning(f"Lost dispatch lease on job {self.job_id}")
+                    return
+            except Exception as e:
+                logger.error(f"Error renewing dispatch lease on job {self.job_id}: {e}")
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread = threading.Thread(
+            target=self._run, name=f"lease-{self.job_id[:8]}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
 class JobQueueService:
     """Manages the job queue and promotion logic."""
 
+    @staticmethod
+    async def submit_or_queue(job_data: JobCreate, reason: str, defer: bool = False) -> dict:
+        """
+        Reserve a slot for a new job, create it and charge its credits (see
+        ConcurrencyService.reserve_job), then submit it right away if it got
+        a slot, unless deferred (accept-then-dispatch: the dispatch workers
+        submit it).
+
+        A job submitted here is created already claimed for dispatch, so
+        the fair scheduler, which hears about it from the same pending
+        event, never picks it as well. If the submission fails but can be
+        retried, the job goes back to the scheduler.
+
+        Args:
+            job_data: The new job.
+            reason: Credit transaction description.
+            defer: Leave the submission to the dispatch workers.
+
+        Returns:
+            {"credits_remaining", "dispatch_state", "queue_position", "estimated_start_at"}
+
+        Raises:
+            QueueFullError: No slot and the user's queue is full (nothing created)
+            SubmissionFailedError: The provider rejected the job (credits refunded)
+            InsufficientCreditsError: The user can no longer pay (nothing created)
+        """
+        job_id = job_data.job_id
+        lease_owner = None if defer else new_lease_owner()
+        # BEGIN IMMEDIATE transaction: may wait on the database lock, so off the loop
+        reservation = await asyncio.to_thread(
+            ConcurrencyService.reserve_job, job_data, reason, lease_owner
+        )
+        if reservation["decision"] == "reject":
+            raise QueueFullError(reservation)
+
+        dispatch_state = reservation["dispatch_state"]
+        if dispatch_state == "dispatching":
+            job = await asyncio.to_thread(JobQueueService._dispatch_reserved, job_id, lease_owner)
+            if job["status"] == "failed":
+                raise SubmissionFailedError(job_id)
+            dispatch_state = job["dispatch_state"]
+
+        return {
+            "credits_remaining": reservation["credits_remaining"],
+            "dispatch_state": dispatch_state,
+            "queue_position": reservation["queue_position"],
+            "estimated_start_at": reservation["estimated_start_at"]
+        }
+
+    @staticmethod
+    def _dispatch_reserved(job_id: str, lease_owner: str) -> dict:
+        """Submit a job created already claimed by lease_owner; a job left pending goes to the scheduler."""
+        JobQueueService.dispatch_job(job_id, lease_owner)
+        job = jobs_repo.get_by_id(job_id)
+        if job["status"] == "pending":
+            # Not submitted (retry backoff, or no account free): queue it
+            fair_scheduler.dispatch_finished(PendingJob.from_row(job), dispatched=False)
+            fair_scheduler.request_round()
+        return job
+
+    @staticmethod
+    def dispatch_job(job_id: str, lease_owner: Optional[str] = None) -> Optional[str]:
+        """
+        Submit a pending job to its provider and mark it processing.
+
+        The job is claimed under a lease first (renewed by a heartbeat while
+        the submission runs), so concurrent workers, processes or hosts never
+        submit the same job twice; if this worker dies, the lease expires
+        and the job is recovered (recover_expired_leases). The job only
+        becomes processing if this worker still holds the lease once the
+        provider accepted it (see _abandon_submission). This may take
+        seconds; callers run it on a dispatch worker thread (see
+        dispatch_workers.py), never on the event loop.
+
+        Args:
+            job_id: The pending job to dispatch.
+            lease_owner: Lease the caller already holds on the job (see
+                submit_or_queue); claimed here otherwise.
+
+        Failed submissions are recorded on the job (attempt count, last
+        error, next_attempt_at) and retried with jittered exponential
+        backoff; errors caused by the account (transient or auth failures)
+        also count against its health, so a failing account is quarantined
+        and retries go to healthy ones. Permanent errors, or DISPATCH_MAX_ATTEMPTS failures, move
+        the job to the dead letter: failed with its credits refunded. When
+        every Higgsfield account is full the job simply stays queued.
+
+        Returns:
+            The provider job ID if dispatched, None otherwise.
+        """
+        lease_seconds = settings.DISPATCH_LEASE_SECONDS
+        if lease_owner is None:
+            lease_owner = new_lease_owner()
+            job = jobs_repo.claim_for_dispatch(job_id, lease_owner, lease_seconds)
+        else:
+            job = jobs_repo.get_by_id(job_id)
+            if job and (job["status"] != "pending" or job.get("lease_owner") != lease_owner):
+                job = None
+        if job is None:
+            logger.debug(f"Job {job_id} already leased, backing off or no longer pending")
+            return None
+
+        labels = metrics.job_labels(job)
+        queue_wait = metrics.elapsed_seconds(job.get("created_at"))
+
+        error = None
+        try:
+            dispatch_started = metrics.monotonic()
+            with LeaseHeartbeat(job_id, lease_owner, lease_seconds):
+                provider_job_id = Dispatcher.execute_job(job, raise_errors=True)
+        except NoAccountAvailableError:
+            # Not a failed attempt: wait in the queue for an account slot
+            # (a finishing job triggers the next scheduling round)
+            logger.info(f"No Higgsfield account free for job {job_id}, keeping it queued")
+            jobs_repo.release_dispatch_claim(job_id, lease_owner)
+            return None
+        except Exception as e:
+            logger.error(f"Dispatcher raised for job {job_id}: {e}")
+            error = e
+            provider_job_id = None
+
+        if not provider_job_id:
+            if is_account_error(error):
+                account_scheduler.record_failure(job_id, error)
+            else:
+                account_scheduler.release_job(job_id)
+            JobQueueService._handle_dispatch_failure(job, error, lease_owner)
+            return None
+
+        dispatch_seconds = metrics.monotonic() - dispatch_started
+        account_scheduler.record_submission(job_id, dispatch_seconds)
+
+        # Provider id + processing in one conditional write: only while this
+        # worker still holds the lease on the pending job
+        if not jobs_service.mark_submitted(job_id, lease_owner, provider_job_id):
+            JobQueueService._abandon_submission(job_id, provider_job_id)
+            return None
+
+        metrics.job_queue_wait_seconds.observe(queue_wait, **labels)
+        metrics.job_dispatch_seconds.observe(dispatch_seconds, **labels)
+        logger.info(f"Dispatched job {job_id} (provider id {provider_job_id})")
+        return provider_job_id
+
+    @staticmethod
+    def _abandon_submission(job_id: str, provider_job_id: str) -> None:
+        """
+        The provider accepted a job this worker no longer owns: it was
+        cancelled, failed or deleted meanwhile, or the lease expired and
+        another worker claimed it. The provider job is ignored (never
+        polled or delivered) and its account slot freed, unless another
+        worker is dispatching the job now: that worker's slot is the live one.
+        """
+        current = jobs_repo.get_by_id(job_id)
+        if current and current["status"] == "pending" and current.get("lease_owner"):
+            logger.warning(
+                f"Lost dispatch lease on job {job_id} before recording provider job {provider_job_id}, ignoring it"
+            )
+            return
+
+        logger.warning(
+            f"Job {job_id} left pending during submission "
+            f"({current['status'] if current else 'deleted'}), ignoring provider job {provider_job_id}"
+        )
+        account_scheduler.release_job(job_id)
+
+    @staticmethod
+    def _handle_dispatch_failure(job: dict, error: Optional[BaseException], lease_owner: str) -> None:
+        """Schedule a retry for a failed submission, or dead-letter the job."""
+        job_id = job["job_id"]
+        labels = metrics.job_labels(job)
+        attempt = (job.get("dispatch_attempts") or 0) + 1
+        message = str(error)[:500] if error is not None else "Provider returned no job id"
+
+        # Rejected credentials are the account's problem, not the job's: retry elsewhere
+        if is_account_error(error) and attempt < settings.DISPATCH_MAX_ATTEMPTS:
+            delay = retry_delay_seconds(attempt)
+            next_attempt_at = (datetime.utcnow() + timedelta(seconds=delay)).isoformat() + 'Z'
+            logger.warning(
+                f"Dispatch attempt {attempt} failed for job {job_id}, retrying in {delay:.0f}s: {message}"
+            )
+            jobs_repo.record_dispatch_failure(job_id, message, next_attempt_at, lease_owner)
+            metrics.job_dispatch_retries_total.inc(**labels)
+            return
+
+        logger.error(f"Dead-lettering job {job_id} after {attempt} dispatch attempts: {message}")
+        if not jobs_service.mark_dead_letter(job_id, message, lease_owner):
+            return  # Cancelled, deleted or lease lost meanwhile
+
+        metrics.jobs_dead_lettered_total.inc(**labels)
+        try:
+            new_balance = credits_service.refund_credits(job["user_id"], job_id)
+            if new_balance is not None:
+                logger.info(f"Refunded dead-lettered job {job_id}. New balance for user {job['user_id']}: {new_balance}")
+        except Exception as e:
+            logger.error(f"Error refunding dead-lettered job {job_id}: {e}")
+
+    @staticmethod
+    def requeue_dead_letter_jobs(job_ids: List[str]) -> dict:
+        """
+        Put dead-lettered jobs back in the queue (admin).
+
+        Each job is requeued in its own transaction with a fresh attempt
+        budget; refunded credits are charged again, so jobs of users who can
+        no longer pay are skipped.
+
+        Returns:
+            {"requeued": [job_id, ...], "skipped": {job_id: reason}}
+        """
+        requeued: List[str] = []
+        skipped = {}
+
+        for job_id in job_ids:
+            def do_requeue(conn):
+                job = jobs_repo.requeue_dead_letter(conn, job_id)
+                if job is None:
+                    return False
+                if job["credits_refunded"] and job["credits_cost"]:
+                    credits_service.deduct_credits_in_transaction(
+                        conn,
+                        job["user_id"],
+                        job["credits_cost"],
+                        job_id,
+                        f"Requeued {job['model']} job"
+                    )
+                return True
+
+            try:
+                if not execute_in_transaction(do_requeue):
+                    skipped[job_id] = "not dead-lettered"
+                    continue
+            except InsufficientCreditsError:
+                skipped[job_id] = "insufficient credits"
+                continue
+            except Exception as e:
+                logger.error(f"Error requeueing dead-lettered job {job_id}: {e}")
+                skipped[job_id] = "error"
+                continue
+
+            # Pending event adds the job to the fair scheduler
+            job_event_bus.publish_job(job_id)
+            requeued.append(job_id)
+
+        if requeued:
+            logger.info(f"Requeued {len(requeued)} dead-lettered jobs")
+        return {"requeued": requeued, "skipped": skipped}
+
     @staticmethod
     def promote_next_job(user_id: str) -> Optional[str]:
         """
         Attempts to promote the oldest pending job for a user to processing state.
-        
+
+        Jobs whose type is blocked by a type-specific limit are skipped, so a
+        video can start while the image slots are full (Hybrid limits).
+        Normal promotion goes through the fair scheduler; this is a direct
+        per-user path for scripts and admin tooling.
+
         Args:
             user_id: The user ID to check promotion for.
-            
+
         Returns:
             The job_id of the promoted job if successful, None otherwise.
         """
         try:
-            # 1. Get user's plan limits and usage
-            # We need to know which TYPE of job can be promoted.
-            # However, simpler approach: Get oldest pending job, check if it can run.
-            # If not, maybe check next oldest? Strict FIFO usually blocks if head is blocked.
-            # Let's try strict FIFO for simplicity first: head of line must clear checks.
-            
-            # Fetch pending jobs for user (sorted by created_at ASC)
-            pending_jobs, count = jobs_repo.get_by_user(
-                user_id=user_id, 
-                page=1, 
-                limit=10, 
-                status="pending"
-            )
-            
-            if not pending_jobs:
-                return None
-                
-            # Try to promote the first job that fits limits
-            # (Or strict FIFO: check first, if blocked, return None)
-            # "Hybrid" implies we might have total slots free but image slots full.
-            # If head is image and image full, but video free, should we skip to video?
-            # Standard queues usually don't skip to avoid starvation or complexity.
-            # Users might prefer their video to start if image is blocked.
-            # Let's iterate through the first few pending jobs and try to start one.
-            
-            for job in pending_jobs:
-                job_id = job["job_id"]
-                job_type = job["type"]
-                
-                # Check limits
-                limit_check = ConcurrencyService.check_can_start_job(user_id, job_type)
-                
-                if limit_check["allowed"]:
-                    # Can start!
-                    logger.info(f"Promoting job {job_id} for user {user_id}")
-                    
-                    # 1. Execute via Dispatcher (External API call)
-                    # This might take a few seconds, ideally async background task.
-                    # For now we do it synchronously to ensure it works before updating DB.
-                    provider_job_id = Dispatcher.execute_job(job)
-                    
-                    if provider_job_id:
-                        # 2. Update DB status to processing
-                        # We use a specialized update in jobs_repo or just update_status
-                        # We also need to set provider_job_id
-                        jobs_repo.set_provider_id(job_id, provider_job_id)
-                        
-                        # Update status + started_processing_at (we need a repo method for this)
-                        # For now, update_status sets 'completed_at' for completion/failure. 
-                        # We need to handle 'started_processing_at'. 
-                        # I'll update the repo update_status or add a new one.
-                        # For now, let's just use update_status('processing').
-                        jobs_repo.update_status(job_id, "processing")
-                        
-                        return job_id
-                    else:
-                        logger.error(f"Failed to dispatch job {job_id} during promotion.")
-                        # Should we mark it failed? Or leave pending to retry?
-                        # Leave pending for retry is safer but might block queue if persistent error.
-                        # Convert to failed after N attempts? 
-                        # For now, leave pending.
-                else:
-                    # Job blocked by limit. 
-                    # If we implement Skip logic (allow video if image blocked), continue loop.
-                    # If Strict FIFO, break.
-                    # Let's ALLOW Skip logic for better UX (Hybrid limits).
+            pending_jobs = [
+                job for job in jobs_repo.get_active_by_user(user_id)
+                if job["status"] == "pending"
+            ]
+
+            for job in pending_jobs[:10]:
+                limit_check = ConcurrencyService.check_can_start_job(user_id, job["type"])
+                if not limit_check["can_start"]:
                     continue
-                    
+
+                logger.info(f"Promoting job {job['job_id']} for user {user_id}")
+                if JobQueueService.dispatch_job(job["job_id"]):
+                    return job["job_id"]
+
             return None
 
         except Exception as e:
@@ -103,9 +412,41 @@ class JobQueueService:
             return None
 
     @staticmethod
-    def try_promote_jobs_for_all_users():
+    def try_promote_jobs_for_all_users(max_parallel: int = 4) -> int:
         """
-        Background task helper to sweep users with pending jobs.
-        (Optional, if we want periodic sweeps)
+        Sweep users with pending jobs and free capacity.
+
+        Catches work the event-driven path missed: failed dispatches left
+        pending, slots freed in another process, jobs whose events were lost.
+        Jobs whose dispatch lease expired (the worker died mid-submission)
+        are returned to the queue first. Users are found in one query; their pending queues are reconciled
+        with the fair scheduler and a round is requested. Jobs are promoted
+        oldest first per user (fair share across users), with at most
+        DISPATCH_WORKERS (or max_parallel without a worker pool) concurrent
+        provider submissions.
+
+        Returns:
+            Number of users with promotable jobs
         """
-        pass
+        recovered = jobs_service.recover_expired_leases()
+        if recovered:
+            logger.warning(f"Recovered {len(recovered)} jobs with expired dispatch leases")
+
+        users = jobs_repo.get_users_with_promotable_jobs()
+        if not users:
+            return 0
+
+        user_ids = [user["user_id"] for user in users]
+        fair_scheduler.resync_users(user_ids, jobs_repo.get_pending_jobs(user_ids))
+
+        if fair_scheduler.has_trigger:
+            fair_scheduler.request_round()
+        else:
+            # No dispatch worker pool (scripts): dispatch the batch here
+            batch = fair_scheduler.next_batch()
+            with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+                results = executor.map(lambda job: JobQueueService.dispatch_job(job.job_id), batch)
+                for job, provider_job_id in zip(batch, results):
+                    fair_scheduler.dispatch_finished(job, bool(provider_job_id))
+
+        return len(users)
@@ -1,14 +1,101 @@
 # jobs_service.py
-"""Service handling job creation, updates, and polling."""
+"""
+Service handling job creation and status transitions.
 
-def create_job(data: dict):
-    # Placeholder implementation
-    return {"job_id": "dummy-id", "status": "queued"}
+Wraps the writes of jobs_repo with what has to happen around them: the
+slow-job classification of new jobs, creation metrics and publishing every
+transition on the job event bus (job_events.py). The repository only talks
+to the database; status writes return the updated row, which is published
+as is.
+"""
+from typing import List, Optional
 
-def update_job(job_id: str, updates: dict):
-    # Placeholder implementation
-    return {"job_id": job_id, "status": updates.get("status", "updated")}
+from app.repositories import jobs_repo
+from app.schemas.jobs import JobCreate
+from app.services import metrics
+from app.services.account_scheduler import account_scheduler
+from app.services.job_events import job_event_bus
 
-def get_job_status(job_id: str):
-    # Placeholder implementation
-    return {"job_id": job_id, "status": "pending"}
+
+def classify(job_data: JobCreate) -> JobCreate:
+    """Fill in the slow-job classification of a new job (counted against the account's slow limits)."""
+    if job_data.is_slow is None:
+        job_data.is_slow = account_scheduler.classify_job_params(
+            job_data.type, job_data.model, job_data.input_params
+        )
+    return job_data
+
+
+def create(job_data: JobCreate, status: str = 'pending', dispatch_state: Optional[str] = None) -> dict:
+    """Create a job record (see jobs_repo.create) and publish it."""
+    job = jobs_repo.create(classify(job_data), status, dispatch_state)
+    publish_created(job_data, status, job)
+    return job
+
+
+def publish_created(job_data: JobCreate, status: str, job: Optional[dict] = None) -> None:
+    """Record creation metrics and publish the new job's event (after its transaction committed)."""
+    labels = metrics.job_labels({"model": job_data.model})
+    metrics.jobs_created_total.inc(status=status, **labels)
+    if status == 'processing' and job_data.provider_job_id:
+        metrics.job_queue_wait_seconds.observe(0, **labels)
+
+    job_event_bus.publish_job(job_data.job_id, job)
+
+
+def _published(job: Optional[dict]) -> bool:
+    if job is None:
+        return False
+    job_event_bus.publish_job(job["job_id"], job)
+    return True
+
+
+def update_status(
+    job_id: str,
+    status: str,
+    output_url: Optional[str] = None,
+    error_message: Optional[str] = None
+) -> bool:
+    """Update a job's status (see jobs_repo.update_status) and publish it."""
+    return _published(jobs_repo.update_status(job_id, status, output_url, error_message))
+
+
+def fail_if_processing(job_id: str, error_message: str) -> bool:
+    """Fail a job only if it is still processing (see jobs_repo.fail_if_processing)."""
+    return _published(jobs_repo.fail_if_processing(job_id, error_message))
+
+
+def fail_if_stale_pending(job_id: str, error_message: str, minutes: int = 30) -> bool:
+    """Fail a pending job only if it is still stale (see jobs_repo.fail_if_stale_pending)."""
+    return _published(jobs_repo.fail_if_stale_pending(job_id, error_message, minutes))
+
+
+def mark_submitted(job_id: str, lease_owner: str, provider_job_id: str) -> bool:
+    """Start processing a job its provider accepted, if lease_owner still holds it (see jobs_repo.mark_submitted)."""
+    return _published(jobs_repo.mark_submitted(job_id, lease_owner, provider_job_id))
+
+
+def mark_dead_letter(job_id: str, error: str, lease_owner: str) -> bool:
+    """Dead-letter a pending job held under lease_owner (see jobs_repo.mark_dead_letter)."""
+    return _published(jobs_repo.mark_dead_letter(job_id, error, lease_owner))
+
+
+def cancel_job(job_id: str, user_id: str) -> bool:
+    """Cancel a user's active job and publish it (frees its slot / queue entry)."""
+    return _published(jobs_repo.cancel_job(job_id, user_id))
+
+
+def delete_job(job_id: str, user_id: str) -> bool:
+    """Delete a user's job; deleting an active job frees its slot / queue entry."""
+    status = jobs_repo.delete_job(job_id, user_id)
+    if status is None:
+        return False
+
+    if status in ('pending', 'processing'):
+        job_event_bus.publish({"job_id": job_id, "user_id": user_id, "status": "deleted"})
+    return True
+
+
+def recover_expired_leases() -> List[str]:
+    """Requeue jobs whose dispatch lease expired (see jobs_repo.recover_expired_leases)."""
+    return [job["job_id"] for job in jobs_repo.recover_expired_leases() if _published(job)]
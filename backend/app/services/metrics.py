@@ -0,0 +1,321 @@
+"""
+In-process metrics registry exported in Prometheus text format.
+
+A deliberately small implementation (counters, gauges, histograms with
+labels) so the backend does not need prometheus_client. Values are per
+worker process; Prometheus aggregates across workers by instance.
+"""
+
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Buckets (seconds) spanning sub-second dispatches to hour-long video jobs
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class _Metric(ABC):
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Exposition lines of the metric (HELP, TYPE, then one line per sample)."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+    metric_type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed at scrape time."""
+    metric_type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def clear(self) -> None:
+        """Drop all labelled values (before recomputing them)."""
+        with self._lock:
+            self._values.clear()
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the (unlabelled) value by calling function on each scrape."""
+        self._function = function
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        if self._function is not None:
+            try:
+                lines.append(f"{self.name} {_format_value(self._function())}")
+            except Exception as e:
+                logger.error(f"Error computing gauge {self.name}: {e}")
+            return lines
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        if value is None or value < 0:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0] * len(self.buckets) + [0.0, 0]
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return int(state[-1]) if state else 0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            for i, bound in enumerate(self.buckets):
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(state[i])}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+# ============================================
+# Helpers
+# ============================================
+
+def provider_for_model(model: Optional[str]) -> str:
+    """Name of the upstream provider serving a model."""
+    if model and model.startswith("veo"):
+        return "google_veo"
+    return "higgsfield"
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """Parse a stored job timestamp (UTC ISO string, optional 'Z' suffix)."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "").replace(" ", "T"))
+    except ValueError:
+        return None
+
+
+def elapsed_seconds(start, end=None) -> Optional[float]:
+    """Seconds between two stored timestamps (end defaults to now, UTC)."""
+    start_dt = parse_timestamp(start)
+    end_dt = parse_timestamp(end) if end is not None else datetime.utcnow()
+    if start_dt is None or end_dt is None:
+        return None
+    return max((end_dt - start_dt).total_seconds(), 0.0)
+
+
+def monotonic() -> float:
+    return time.monotonic()
+
+
+# ============================================
+# Job pipeline metrics
+# ============================================
+# Lifecycle: create -> dispatch -> provider accepted -> first poll
+#            -> completion detected -> client notified
+
+JOB_LABELS = ("model", "provider")
+
+jobs_created_total = registry.counter(
+    "jobs_created_total", "Jobs created, by initial status", JOB_LABELS + ("status",))
+jobs_finished_total = registry.counter(
+    "jobs_finished_total", "Jobs reaching a terminal status", JOB_LABELS + ("status",))
+
+job_queue_wait_seconds = registry.histogram(
+    "job_queue_wait_seconds", "Time from job creation to dispatch (time spent pending)", JOB_LABELS)
+job_dispatch_seconds = registry.histogram(
+    "job_dispatch_seconds", "Time for the provider to accept a submission", JOB_LABELS)
+job_first_poll_seconds = registry.histogram(
+    "job_first_poll_seconds", "Time from provider acceptance to the first status poll", JOB_LABELS)
+job_provider_duration_seconds = registry.histogram(
+    "job_provider_duration_seconds", "Time from provider acceptance to completion detected", JOB_LABELS)
+job_end_to_end_seconds = registry.histogram(
+    "job_end_to_end_seconds", "Time from job creation to completion detected", JOB_LABELS)
+job_notify_lag_seconds = registry.histogram(
+    "job_notify_lag_seconds", "Time from completion detected to the client receiving the result", JOB_LABELS)
+job_poll_interval_seconds = registry.histogram(
+    "job_poll_interval_seconds", "Age of our view of a job when it is re-polled (staleness)", ("provider",))
+
+job_slots_reclaimed_total = registry.counter(
+    "job_slots_reclaimed_total", "Stuck processing jobs failed after their deadline, freeing a slot", JOB_LABELS)
+job_dispatch_retries_total = registry.counter(
+    "job_dispatch_retries_total", "Failed provider submissions scheduled for retry", JOB_LABELS)
+jobs_dead_lettered_total = registry.counter(
+    "jobs_dead_lettered_total", "Jobs failed and refunded after their submission could not be retried", JOB_LABELS)
+
+job_lane_wait_seconds = registry.histogram(
+    "job_lane_wait_seconds", "Time queued jobs waited before being picked for dispatch, by priority lane", ("lane",))
+scheduler_queued_jobs = registry.gauge(
+    "scheduler_queued_jobs", "Pending jobs in the fair scheduler at the last round, by priority lane", ("lane",))
+
+account_quarantines_total = registry.counter(
+    "higgsfield_account_quarantines_total", "Higgsfield accounts taken out of selection as unhealthy", ("account",))
+
+monitor_sweep_duration_seconds = registry.histogram(
+    "job_monitor_sweep_duration_seconds", "Duration of one job monitor sweep")
+monitor_jobs_checked = registry.gauge(
+    "job_monitor_jobs_checked", "Jobs checked in the last monitor sweep")
+monitor_jobs_checked_total = registry.counter(
+    "job_monitor_jobs_checked_total", "Jobs checked by the monitor", ("provider",))
+monitor_poll_errors_total = registry.counter(
+    "job_monitor_poll_errors_total", "Provider status polls that raised", ("provider",))
+
+image_preprocess_seconds = registry.histogram(
+    "image_preprocess_seconds", "Time to normalize a user image before provider upload", ("target",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+image_upload_bytes_in_total = registry.counter(
+    "image_upload_bytes_in_total", "Bytes of user images received for provider upload", ("target",))
+image_upload_bytes_saved_total = registry.counter(
+    "image_upload_bytes_saved_total", "Bytes not uploaded thanks to image normalization", ("target",))
+image_upload_seconds = registry.histogram(
+    "image_upload_seconds", "Time to upload a user image to a provider, normalization included", ("provider",))
+
+
+def job_labels(job: dict) -> Dict[str, str]:
+    model = job.get("model") or "unknown"
+    return {"model": model, "provider": provider_for_model(model)}
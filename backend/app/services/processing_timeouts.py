@@ -0,0 +1,152 @@
+"""
+Per-model processing deadlines.
+
+A job stuck in 'processing' (the provider lost it, or a status parse error
+is reported as "processing") holds a concurrency slot and a monitor poll
+forever. Deadlines decide when such a job is given up on:
+
+1. Admin override from the 'processing_timeout_minutes' system setting
+   (JSON map of model -> minutes, "default" for every model)
+2. Observed p95 processing duration of the model x PROCESSING_TIMEOUT_MULTIPLIER
+3. Static fallback by job type when there is not enough history
+"""
+
+import json
+import logging
+import math
+import time
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.repositories import jobs_repo, settings_repo
+
+logger = logging.getLogger(__name__)
+
+SETTING_KEY = "processing_timeout_minutes"
+
+# Fallback deadlines (minutes) by job type when a model has too little history
+STATIC_DEADLINES = {
+    "t2i": 20,
+    "i2i": 20,
+    "t2v": 60,
+    "i2v": 60,
+}
+DEFAULT_DEADLINE_MINUTES = 60
+
+
+def _positive_minutes(value) -> Optional[float]:
+    """value as a positive, finite number of minutes (None if it is not one)."""
+    if isinstance(value, bool):
+        return None
+    try:
+        minutes = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(minutes) or minutes <= 0:
+        return None
+    return minutes
+
+
+class ProcessingTimeoutService:
+    """Resolves processing deadlines per model, caching observed durations."""
+
+    def __init__(self, refresh_interval_seconds: int = 900, min_samples: int = 20):
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.min_samples = min_samples
+        self._observed: Dict[str, float] = {}  # model -> deadline minutes
+        self._refreshed_at = 0.0
+
+    @staticmethod
+    def _percentile(values: List[float], percentile: float) -> float:
+        ordered = sorted(values)
+        index = max(math.ceil(percentile * len(ordered)) - 1, 0)
+        return ordered[index]
+
+    def refresh_observed(self) -> Dict[str, float]:
+        """Recompute deadlines from recently completed jobs."""
+        durations: Dict[str, List[float]] = {}
+        for row in jobs_repo.get_recent_processing_durations():
+            if row.get("duration_seconds") is None or row["duration_seconds"] < 0:
+                continue
+            durations.setdefault(row["model"], []).append(row["duration_seconds"])
+
+        observed = {}
+        for model, values in durations.items():
+            if len(values) < self.min_samples:
+                continue
+            p95_minutes = self._percentile(values, 0.95) / 60
+            deadline = p95_minutes * settings.PROCESSING_TIMEOUT_MULTIPLIER
+            observed[model] = min(
+                max(deadline, settings.PROCESSING_TIMEOUT_MIN_MINUTES),
+                settings.PROCESSING_TIMEOUT_MAX_MINUTES
+            )
+
+        self._observed = observed
+        self._refreshed_at = time.monotonic()
+        return observed
+
+    def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._refreshed_at <= self.refresh_interval_seconds:
+            return
+        try:
+            self.refresh_observed()
+        except Exception as e:
+            logger.error(f"Failed to refresh observed processing durations: {e}")
+            self._refreshed_at = time.monotonic()
+
+    @staticmethod
+    def get_overrides() -> Dict[str, float]:
+        """
+        Admin-configured deadlines from system settings.
+
+        Only positive, finite numbers of minutes are valid; other entries
+        (0, negative, non-numeric) are logged and ignored, so the model
+        falls back to its observed or static deadline.
+        """
+        setting = settings_repo.get_setting(SETTING_KEY)
+        if not setting or not setting.get("setting_value"):
+            return {}
+        try:
+            overrides = json.loads(setting["setting_value"])
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid {SETTING_KEY} setting, ignoring")
+            return {}
+        if not isinstance(overrides, dict):
+            logger.warning(f"Invalid {SETTING_KEY} setting (expected a JSON object), ignoring")
+            return {}
+
+        valid = {}
+        for model, value in overrides.items():
+            minutes = _positive_minutes(value)
+            if minutes is None:
+                logger.warning(f"Invalid {SETTING_KEY} override for {model}: {value!r} (must be positive minutes), ignoring")
+                continue
+            valid[str(model)] = minutes
+        return valid
+
+    def get_deadline_minutes(self, model: str, job_type: Optional[str] = None,
+                             overrides: Optional[Dict[str, float]] = None) -> float:
+        """Max minutes a job of this model may stay in processing."""
+        self._maybe_refresh()
+        if overrides is None:
+            overrides = self.get_overrides()
+
+        if model in overrides:
+            return overrides[model]
+        if "default" in overrides:
+            return overrides["default"]
+        if model in self._observed:
+            return self._observed[model]
+        return STATIC_DEADLINES.get(job_type, DEFAULT_DEADLINE_MINUTES)
+
+    def shortest_deadline_minutes(self, overrides: Optional[Dict[str, float]] = None) -> float:
+        """Lower bound over all deadlines, used to pre-filter candidate jobs."""
+        self._maybe_refresh()
+        if overrides is None:
+            overrides = self.get_overrides()
+        candidates = list(overrides.values()) + list(self._observed.values()) + list(STATIC_DEADLINES.values())
+        return min(candidates)
+
+
+# Singleton instance
+processing_timeouts = ProcessingTimeoutService()
@@ -0,0 +1,267 @@
+"""
+Provider capacity model: global admission control and queue estimates.
+
+Plan limits cap work per user; this caps the total in-flight work (processing
+jobs plus pending jobs holding a reserved slot) per provider and per model,
+so bursts queue here instead of being throttled upstream:
+
+1. Caps: the 'max_in_flight' system setting (JSON map of provider or model
+   -> max in-flight jobs), falling back to HIGGSFIELD_MAX_IN_FLIGHT /
+   GOOGLE_VEO_MAX_IN_FLIGHT for providers. 0 or missing = unlimited.
+2. Throughput: learned from the mean processing duration of recently
+   completed jobs per model (static fallback by job type), i.e. a model
+   with cap C and mean duration D drains about C / D jobs per second.
+
+New jobs only get a slot while their provider and model are below their
+caps (ConcurrencyService.reserve_job), the fair scheduler applies the same
+caps when promoting, and queued jobs get a queue position and an estimated
+start time from the caps and learned throughput.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from app.config import settings
+from app.repositories import jobs_repo, settings_repo
+from app.services.metrics import provider_for_model
+
+logger = logging.getLogger(__name__)
+
+SETTING_KEY = "max_in_flight"
+
+IMAGE_TYPES = ("t2i", "i2i")
+VIDEO_TYPES = ("t2v", "i2v")
+
+# Fallback processing durations (seconds) by job type when a model has too little history
+STATIC_DURATIONS = {
+    "t2i": 60,
+    "i2i": 60,
+    "t2v": 300,
+    "i2v": 300,
+}
+DEFAULT_DURATION_SECONDS = 120
+
+
+def _cap(value) -> Optional[int]:
+    """value as a non-negative whole number of jobs (None if it is not one)."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, float):
+        if not value.is_integer():
+            return None
+        value = int(value)
+    try:
+        cap = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cap if cap >= 0 else None
+
+
+class ProviderCapacityModel:
+    """In-flight caps per provider/model and learned processing throughput."""
+
+    def __init__(self, refresh_interval_seconds: int = 300, min_samples: int = 5):
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.min_samples = min_samples
+        self._durations: Dict[str, float] = {}  # model -> mean processing seconds
+        self._refreshed_at = 0.0
+
+    # ============================================
+    # Caps
+    # ============================================
+
+    @staticmethod
+    def get_overrides() -> Dict[str, int]:
+        """
+        Admin-configured caps from system settings.
+
+        Only non-negative whole numbers are valid (0 = unlimited); other
+        entries (negative, fractional, non-numeric) are logged and ignored,
+        so the provider or model keeps its default cap.
+        """
+        setting = settings_repo.get_setting(SETTING_KEY)
+        if not setting or not setting.get("setting_value"):
+            return {}
+        try:
+            overrides = json.loads(setting["setting_value"])
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid {SETTING_KEY} setting, ignoring")
+            return {}
+        if not isinstance(overrides, dict):
+            logger.warning(f"Invalid {SETTING_KEY} setting (expected a JSON object), ignoring")
+            return {}
+
+        valid = {}
+        for key, value in overrides.items():
+            if value is None:
+                continue
+            cap = _cap(value)
+            if cap is None:
+                logger.warning(f"Invalid {SETTING_KEY} cap for {key}: {value!r} (must be a whole number >= 0), ignoring")
+                continue
+            valid[str(key)] = cap
+        return valid
+
+    def get_limits(self, overrides: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """Max in-flight jobs keyed by provider or model name (0 = unlimited)."""
+        if overrides is None:
+            overrides = self.get_overrides()
+        limits = {
+            "higgsfield": settings.HIGGSFIELD_MAX_IN_FLIGHT,
+            "google_veo": settings.GOOGLE_VEO_MAX_IN_FLIGHT,
+        }
+        limits.update(overrides)
+        return limits
+
+    @staticmethod
+    def keys_for(model: str) -> tuple:
+        """Capacity keys a job of this model counts against."""
+        return (provider_for_model(model), model)
+
+    @staticmethod
+    def count_in_flight(rows: Iterable[dict]) -> Dict[str, int]:
+        """Fold per-model counts (model, count) into per-provider and per-model totals."""
+        in_flight: Dict[str, int] = {}
+        for row in rows:
+            for key in ProviderCapacityModel.keys_for(row["model"]):
+                in_flight[key] = in_flight.get(key, 0) + row["count"]
+        return in_flight
+
+    def get_in_flight(self, conn=None) -> Dict[str, int]:
+        """Current in-flight jobs per provider and per model."""
+        return self.count_in_flight(jobs_repo.get_in_flight_counts(conn))
+
+    def saturated_key(self, model: str, in_flight: Dict[str, int],
+                      limits: Dict[str, int]) -> Optional[str]:
+        """The provider or model whose cap a new job of this model would exceed, if any."""
+        for key in self.keys_for(model):
+            cap = limits.get(key) or 0
+            if cap and in_flight.get(key, 0) >= cap:
+                return key
+        return None
+
+    # ============================================
+    # Learned throughput
+    # ============================================
+
+    def refresh_observed(self) -> Dict[str, float]:
+        """Recompute mean processing durations from recently completed jobs."""
+        durations: Dict[str, List[float]] = {}
+        for row in jobs_repo.get_recent_processing_durations(days=1, limit=2000):
+            if row.get("duration_seconds") is None or row["duration_seconds"] < 0:
+                continue
+            durations.setdefault(row["model"], []).append(row["duration_seconds"])
+
+        self._durations = {
+            model: sum(values) / len(values)
+            for model, values in durations.items()
+            if len(values) >= self.min_samples
+        }
+        self._refreshed_at = time.monotonic()
+        return self._durations
+
+    def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._refreshed_at <= self.refresh_interval_seconds:
+            return
+        try:
+            self.refresh_observed()
+        except Exception as e:
+            logger.error(f"Failed to refresh observed throughput: {e}")
+            self._refreshed_at = time.monotonic()
+
+    def mean_duration_seconds(self, model: str, job_type: Optional[str] = None) -> float:
+        """Expected processing seconds of one job of this model."""
+        self._maybe_refresh()
+        if model in self._durations:
+            return self._durations[model]
+        return STATIC_DURATIONS.get(job_type, DEFAULT_DURATION_SECONDS)
+
+    # ============================================
+    # Queue estimates
+    # ============================================
+
+    def estimate_queue(self, user_id: str, plan_limits: dict, usage: dict) -> List[dict]:
+        """
+        Queue position and estimated start time of a user's queued jobs.
+
+        The position counts queued jobs of the same provider created earlier
+        (all users), aggregated in the database rather than loading every
+        pending job. The start estimate is the longest of the waits for a
+        provider slot, a model slot and one of the user's own plan slots,
+        each draining at cap / mean duration jobs per second, or the retry
+        backoff. It is an estimate: fair sharing reorders users and
+        durations vary.
+
+        Args:
+            user_id: Whose queued jobs to estimate
+            plan_limits: The user's plan limits (ConcurrencyService.get_user_plan_limits)
+            usage: The user's active counts (ConcurrencyService.get_active_job_counts)
+
+        Returns:
+            [{"job_id", "model", "queue_position", "estimated_start_at"}, ...]
+            oldest first
+        """
+        queued = jobs_repo.get_queued_by_user(user_id)
+        if not queued:
+            return []
+
+        # Queued jobs (all users) ahead of each of the user's jobs, per provider/model
+        ahead: Dict[str, Dict[str, int]] = {}
+        for row in jobs_repo.count_queued_ahead(user_id):
+            counts = ahead.setdefault(row["job_id"], {})
+            for key in self.keys_for(row["model"]):
+                counts[key] = counts.get(key, 0) + row["count"]
+
+        limits = self.get_limits()
+        in_flight = self.get_in_flight()
+        now = datetime.utcnow()
+
+        user_ahead = {"total": 0, "image": 0, "video": 0}
+        estimates = []
+
+        for row in queued:
+            keys = self.keys_for(row["model"])
+            job_ahead = ahead.get(row["job_id"], {})
+            duration = self.mean_duration_seconds(row["model"], row["type"])
+            waits = []
+
+            for key in keys:
+                cap = limits.get(key) or 0
+                if cap:
+                    backlog = in_flight.get(key, 0) + job_ahead.get(key, 0) - cap + 1
+                    waits.append(backlog * duration / cap)
+
+            category = "image" if row["type"] in IMAGE_TYPES else "video" if row["type"] in VIDEO_TYPES else None
+            slots = [("total", plan_limits["total_concurrent_limit"])]
+            if category:
+                slots.append((category, plan_limits[f"{category}_concurrent_limit"]))
+            for name, cap in slots:
+                if cap:
+                    backlog = usage[f"{name}_active"] + user_ahead[name] - cap + 1
+                    waits.append(backlog * duration / cap)
+
+            retry_at = row.get("next_attempt_at")
+            if retry_at:
+                due = datetime.fromisoformat(retry_at.rstrip('Z'))
+                waits.append((due - now).total_seconds())
+
+            wait = max([0.0] + waits)
+            estimates.append({
+                "job_id": row["job_id"],
+                "model": row["model"],
+                "queue_position": job_ahead.get(keys[0], 0) + 1,
+                "estimated_start_at": (now + timedelta(seconds=wait)).isoformat() + 'Z',
+            })
+
+            user_ahead["total"] += 1
+            if category:
+                user_ahead[category] += 1
+
+        return estimates
+
+
+# Singleton instance
+capacity_model = ProviderCapacityModel()
@@ -0,0 +1,105 @@
+"""
+Registry of reusable Higgsfield clients, one per account.
+
+Clients keep warm state (HTTP session, cached JWT), so they are built once
+per account and reused by every caller instead of being rebuilt from the
+database per request. Entries are invalidated when an account is updated
+or deactivated (routers/admin_accounts.py) and when a capacity reconcile
+sees its credentials changed in another process; dropped clients have
+their HTTP sessions closed. close() closes every client at shutdown.
+
+Obtain clients through AccountScheduler (get_client, get_client_for_job,
+get_default_client), which also picks the account.
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
+from app.services.providers.higgsfield_client import HiggsfieldClient, higgsfield_client
+
+logger = logging.getLogger(__name__)
+
+
+class HiggsfieldClientRegistry:
+    """Cached HiggsfieldClient per account_id."""
+
+    def __init__(self):
+        self._clients: Dict[int, Tuple[HiggsfieldClient, Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, account_id: Optional[int]) -> HiggsfieldClient:
+        """
+        Client for an account (active or not, so in-flight jobs of a
+        deactivated account can finish). Jobs without an account, and
+        unknown accounts, get the default .env client.
+        """
+        if account_id is None:
+            return higgsfield_client
+
+        with self._lock:
+            entry = self._clients.get(account_id)
+        if entry is not None:
+            return entry[0]
+
+        account = higgsfield_accounts_repo.get_account(account_id)
+        if not account:
+            return higgsfield_client
+
+        credentials = (account['sses'], account['cookie'])
+        client = HiggsfieldClient(sses=credentials[0], cookie=credentials[1])
+        with self._lock:
+            # Another thread may have built one meanwhile: keep the first
+            entry = self._clients.setdefault(account_id, (client, credentials))
+        return entry[0]
+
+    def invalidate(self, account_id: int) -> None:
+        """Drop (and close) an account's client; the next get() builds a fresh one."""
+        with self._lock:
+            entry = self._clients.pop(account_id, None)
+        if entry is not None:
+            entry[0].close()
+
+    def sync(self, accounts: Iterable[dict]) -> None:
+        """Drop clients whose account was deleted or whose credentials changed."""
+        current = {account['account_id']: (account['sses'], account['cookie']) for account in accounts}
+        with self._lock:
+            stale = [
+                account_id for account_id, (_, credentials) in self._clients.items()
+                if current.get(account_id) != credentials
+            ]
+            dropped = [self._clients.pop(account_id)[0] for account_id in stale]
+        for client in dropped:
+            client.close()
+        if stale:
+            logger.info(f"Dropped Higgsfield clients of changed accounts: {stale}")
+
+    def session_stats(self, account_id: int) -> Optional[Dict[str, dict]]:
+        """HTTP session stats of an account's cached client (None if not built yet)."""
+        with self._lock:
+            entry = self._clients.get(account_id)
+        return entry[0].session_stats() if entry is not None else None
+
+    def clear(self) -> None:
+        """Drop and close every cached client."""
+        with self._lock:
+            dropped = [client for client, _ in self._clients.values()]
+            self._clients.clear()
+        for client in dropped:
+            client.close()
+
+    async def close(self) -> None:
+        """Shutdown: close every cached client and the default client, on the running loop."""
+        with self._lock:
+            dropped = [client for client, _ in self._clients.values()]
+            self._clients.clear()
+        for client in [*dropped, higgsfield_client]:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing Higgsfield client: {e}")
+
+
+# Singleton instance
+higgsfield_clients = HiggsfieldClientRegistry()
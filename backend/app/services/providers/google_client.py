@@ -7,8 +7,12 @@ import random
 import uuid
 import base64
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional, Tuple, List
 from app.config import settings
+from app.services import metrics
+from app.services.image_preprocessing import VEO, prepare_image
+from app.services.providers.http_session import SessionStats, provider_timeout
 
 
 class GoogleVeoClient:
@@ -60,6 +64,12 @@ class GoogleVeoClient:
         # Current access token
         self._access_token = None
         self._token_expiry = 0
+
+        # Long-lived session: pooled keep-alive connections to labs.google,
+        # aisandbox and the image hosts (requests speaks HTTP/1.1 only)
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self._stats = SessionStats()
     
     def reload_credentials(self):
         """Reload credentials from .env file (called after admin updates)."""
@@ -70,6 +80,25 @@ class GoogleVeoClient:
         self._access_token = None  # Clear cached token
         self._token_expiry = 0
 
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on the client's session with the provider timeouts."""
+        started = time.monotonic()
+        try:
+            response = self._session.request(method, url, timeout=provider_timeout(), **kwargs)
+        except Exception:
+            self._stats.record(url, time.monotonic() - started, ok=False)
+            raise
+        self._stats.record(url, time.monotonic() - started, ok=response.status_code < 400)
+        return response
+
+    def session_stats(self) -> dict:
+        """Per-host request counts, errors and mean latency."""
+        return self._stats.snapshot()
+
+    def close(self) -> None:
+        """Close the client's HTTP session (app shutdown)."""
+        self._session.close()
+
     def _generate_random_string(self) -> str:
         """Generate a random alphanumeric boundary string."""
         return str(uuid.uuid4())
@@ -128,7 +157,7 @@ class GoogleVeoClient:
         }
         
         try:
-            response = requests.get(url, headers=headers)
+            response = self._request("GET", url, headers=headers)
             response.raise_for_status()
             token = response.json().get('access_token')
             if not token:
@@ -142,9 +171,13 @@ class GoogleVeoClient:
     def upload_image_bytes(self, image_data: bytes, aspect_ratio: str = "9:16", user_agent: Optional[str] = None) -> str:
         """
         Upload image bytes for I2V generation.
+        The image is normalized first (image_preprocessing.py); raises
+        InvalidImageError if it is not a JPEG, PNG or WebP image.
         """
+        started = time.monotonic()
+        image = prepare_image(image_data, VEO)
         token = self.get_jwt_token()
-        image_base64 = base64.b64encode(image_data).decode('utf-8')
+        image_base64 = base64.b64encode(image.data).decode('utf-8')
         
         url = "https://aisandbox-pa.googleapis.com/v1:uploadUserImage"
         
@@ -154,7 +187,7 @@ class GoogleVeoClient:
         payload_dict = {
             "imageInput": {
                 "rawImageBytes": image_base64,
-                "mimeType": "image/jpeg",
+                "mimeType": image.mime_type,
                 "isUserUploaded": True,
                 "aspectRatio": mapped_ratio
             },
@@ -167,8 +200,9 @@ class GoogleVeoClient:
         headers = self._get_common_headers(token, user_agent=user_agent)
         headers['content-type'] = 'application/json'
         
-        response = requests.post(url, json=payload_dict, headers=headers)
+        response = self._request("POST", url, json=payload_dict, headers=headers)
         response.raise_for_status()
+        metrics.image_upload_seconds.observe(time.monotonic() - started, provider="google_veo")
         
         return response.json().get('mediaGenerationId', {}).get('mediaGenerationId')
     
@@ -217,7 +251,7 @@ class GoogleVeoClient:
         
         headers = self._get_common_headers(token, user_agent=user_agent)
         
-        response = requests.post(url, json=payload, headers=headers)
+        response = self._request("POST", url, json=payload, headers=headers)
         response.raise_for_status()
         data = response.json()
         
@@ -275,7 +309,7 @@ class GoogleVeoClient:
         headers['cache-control'] = 'no-cache'
         headers['pragma'] = 'no-cache'
         
-        response = requests.post(url, json=payload, headers=headers)
+        response = self._request("POST", url, json=payload, headers=headers)
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError:
@@ -310,7 +344,7 @@ class GoogleVeoClient:
         
         headers = self._get_common_headers(token)
         
-        response = requests.post(url, json=payload, headers=headers)
+        response = self._request("POST", url, json=payload, headers=headers)
         response.raise_for_status()
         data = response.json()
         
@@ -364,7 +398,7 @@ class GoogleVeoClient:
             # I2V
             if "media_id" not in input_image and "url" in input_image:
                 # Download and re-upload
-                img_response = requests.get(input_image["url"])
+                img_response = self._request("GET", input_image["url"])
                 img_response.raise_for_status()
                 media_id = self.upload_image_bytes(img_response.content, aspect_ratio, user_agent=user_agent)
             elif "media_id" in input_image:
@@ -1,16 +1,116 @@
+import asyncio
+import base64
+import functools
+import inspect
 import json
+import logging
+import threading
 import time
 import random
+from typing import Dict, Optional, Tuple
 from curl_cffi import requests
-from PIL import Image
-from io import BytesIO
+from curl_cffi.requests import AsyncSession
 from app.config import settings
+from app.services import metrics
+from app.services.image_preprocessing import PreparedImage, prepare_image, prepare_image_async
+from app.services.providers.http_session import SessionStats, provider_timeout
+
+logger = logging.getLogger(__name__)
+
+# Lifetime assumed for a JWT whose exp claim cannot be read
+DEFAULT_JWT_TTL_SECONDS = 50
+
+# Close tasks of retired async sessions (kept referenced until they finish)
+_closing_tasks = set()
+
+
+def _close_async_session(loop: asyncio.AbstractEventLoop, session: AsyncSession) -> None:
+    """
+    Close an AsyncSession on the event loop it was created on (its handles
+    and timers belong to that loop). If that loop can no longer run it,
+    only the session's idle connection handles are freed.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    try:
+        if running is loop:
+            task = loop.create_task(session.close())
+            _closing_tasks.add(task)
+            task.add_done_callback(_closing_tasks.discard)
+            return
+        if not loop.is_closed() and loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        if not loop.is_closed() and running is None:
+            loop.run_until_complete(session.close())
+            return
+    except Exception as e:
+        logger.warning(f"Error closing Higgsfield async session: {e}")
+        return
+
+    while True:
+        try:
+            curl = session.pool.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if curl is not None:
+            curl.close()
+
+
+class HiggsfieldAPIError(Exception):
+    """A Higgsfield/Clerk request returned an HTTP error status."""
+    def __init__(self, message: str, status_code: int):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+def _retry_on_unauthorized(method):
+    """Retry an API call (sync or async) once with a fresh JWT when the cached one was rejected (401)."""
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            try:
+                return await method(self, *args, **kwargs)
+            except HiggsfieldAPIError as e:
+                if e.status_code != 401:
+                    raise
+                logger.info(f"JWT rejected during {method.__name__}, retrying with a fresh token")
+                self.invalidate_jwt()
+                return await method(self, *args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except HiggsfieldAPIError as e:
+            if e.status_code != 401:
+                raise
+            logger.info(f"JWT rejected during {method.__name__}, retrying with a fresh token")
+            self.invalidate_jwt()
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class HiggsfieldClient:
+    """
+    Higgsfield API client for one account.
+
+    Every API method has a native async counterpart (same name + "_async")
+    for use on the event loop: it sends through a curl_cffi AsyncSession
+    and sleeps between retries with asyncio.sleep, so one worker can keep
+    many provider calls in flight. The sync methods are for worker threads
+    (dispatcher, scripts). Both share request building, response parsing
+    and the cached JWT.
+    """
+
     def __init__(self, sses: str, cookie: str):
         """
         Initialize Higgsfield client with credentials.
-        
+
         Args:
             sses: Higgsfield SSES session token
             cookie: Higgsfield authentication cookie
@@ -19,51 +119,60 @@ class HiggsfieldClient:
         self.cookie = cookie
         self.base_url = "https://fnf.higgsfield.ai"
         self.clerk_url = "https://clerk.higgsfield.ai"
-    
+        # Long-lived session: pooled keep-alive connections (HTTP/2 via the
+        # chrome fingerprint) to fnf/clerk/CDN; thread-safe (a curl handle per thread)
+        self._session = requests.Session(impersonate="chrome")
+        # Async session and JWT fetch lock, bound to the event loop that created them
+        self._async_state: Optional[Tuple[asyncio.AbstractEventLoop, AsyncSession, asyncio.Lock]] = None
+        self._stats = SessionStats()
+        # Cached JWT (token, expires_at epoch seconds), shared by all threads
+        self._jwt: Optional[tuple] = None
+        self._jwt_lock = threading.Lock()  # held while fetching a token
+
     @classmethod
     def create_from_account(cls, account_id: int):
         """
         Create client instance from database account.
-        
+
         Args:
             account_id: ID of Higgsfield account in database
-            
+
         Returns:
             HiggsfieldClient instance
-            
+
         Raises:
             ValueError: If account not found or inactive
         """
         from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
-        
+
         account = higgsfield_accounts_repo.get_account(account_id)
         if not account:
             raise ValueError(f"Higgsfield account {account_id} not found")
-        
+
         if not account['is_active']:
             raise ValueError(f"Higgsfield account {account_id} is inactive")
-        
+
         return cls(sses=account['sses'], cookie=account['cookie'])
-    
+
     @classmethod
     def create_default(cls):
         """
         Create client instance from .env settings (fallback).
-        
+
         Returns:
             HiggsfieldClient instance
-            
+
         Raises:
             ValueError: If credentials not set in .env
         """
         sses = settings.HIGGSFIELD_SSES
         cookie = settings.HIGGSFIELD_COOKIE
-        
+
         if not sses or not cookie:
             raise ValueError("HIGGSFIELD_SSES and HIGGSFIELD_COOKIE must be set in .env")
-        
+
         return cls(sses=sses, cookie=cookie)
-    
+
     def reload_credentials(self):
         """
         Reload credentials from .env file (called after admin updates).
@@ -74,6 +183,82 @@ class HiggsfieldClient:
         import os
         self.sses = os.getenv("HIGGSFIELD_SSES", "")
         self.cookie = os.getenv("HIGGSFIELD_COOKIE", "")
+        self.invalidate_jwt()
+
+    # ============================================
+    # HTTP
+    # ============================================
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request on the client's session with the provider timeouts."""
+        started = time.monotonic()
+        try:
+            # The account cookie is sent explicitly: don't collect cookies from responses
+            response = self._session.request(
+                method, url, timeout=provider_timeout(), discard_cookies=True, **kwargs
+            )
+        except Exception:
+            self._stats.record(url, time.monotonic() - started, ok=False)
+            raise
+        self._record(url, started, response)
+        return response
+
+    def _async_context(self) -> Tuple[AsyncSession, asyncio.Lock]:
+        """Async session and JWT fetch lock of the running event loop (created on first use)."""
+        loop = asyncio.get_running_loop()
+        state = self._async_state
+        if state is None or state[0] is not loop:
+            if state is not None:
+                # Used from a new event loop: retire the previous loop's session
+                _close_async_session(state[0], state[1])
+            session = AsyncSession(impersonate="chrome", max_clients=settings.PROVIDER_ASYNC_MAX_CONNECTIONS)
+            state = self._async_state = (loop, session, asyncio.Lock())
+        return state[1], state[2]
+
+    async def _request_async(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Async _request, on the event loop's AsyncSession."""
+        session, _ = self._async_context()
+        started = time.monotonic()
+        try:
+            response = await session.request(
+                method, url, timeout=provider_timeout(), discard_cookies=True, **kwargs
+            )
+        except Exception:
+            self._stats.record(url, time.monotonic() - started, ok=False)
+            raise
+        self._record(url, started, response)
+        return response
+
+    def close(self) -> None:
+        """
+        Close the client's HTTP sessions; it must not be used afterwards.
+        The async session is closed on its event loop (see aclose to wait
+        for it from that loop).
+        """
+        state, self._async_state = self._async_state, None
+        if state is not None:
+            _close_async_session(state[0], state[1])
+        self._session.close()
+
+    async def aclose(self) -> None:
+        """close(), awaiting the async session when it belongs to the running loop."""
+        state, self._async_state = self._async_state, None
+        if state is not None:
+            if state[0] is asyncio.get_running_loop():
+                await state[1].close()
+            else:
+                _close_async_session(state[0], state[1])
+        self._session.close()
+
+    def _record(self, url: str, started: float, response: requests.Response) -> None:
+        self._stats.record(
+            url, time.monotonic() - started, ok=response.status_code < 400,
+            local_port=getattr(response, "local_port", None)
+        )
+
+    def session_stats(self) -> dict:
+        """Per-host request counts, errors, mean latency and connections opened."""
+        return self._stats.snapshot()
 
     def _get_headers(self, auth_token: str = None):
         headers = {
@@ -94,22 +279,38 @@ class HiggsfieldClient:
             headers['authorization'] = auth_token
         return headers
 
+    def _json_headers(self, auth_token: str) -> dict:
+        headers = self._get_headers(auth_token)
+        headers['content-type'] = 'application/json'
+        return headers
+
     def _handle_response(self, response: requests.Response, operation: str = "API request"):
         """Sanitize HTTP errors to prevent exposing internal URLs"""
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError:
-            raise Exception(f"{operation} failed with status {response.status_code}: {response.text}")
+            if response.status_code == 401:
+                # Cached JWT rejected: the next call fetches a new one
+                self.invalidate_jwt()
+            raise HiggsfieldAPIError(
+                f"{operation} failed with status {response.status_code}: {response.text}",
+                response.status_code
+            )
 
-    def get_jwt_token(self) -> str:
+    # ============================================
+    # AUTHENTICATION
+    # ============================================
+
+    def _jwt_request(self) -> Tuple[str, dict, str]:
+        """(url, headers, body) of a Clerk token request."""
         url = f"{self.clerk_url}/v1/client/sessions/{self.sses}/tokens?__clerk_api_version=2025-11-10&_clerk_js_version=5.109.0"
-        payload = 'organization_id='
         headers = self._get_headers()
         headers['content-type'] = 'application/x-www-form-urlencoded'
+        return url, headers, 'organization_id='
 
-        response = requests.post(url, headers=headers, data=payload, impersonate="chrome")
+    def _parse_jwt_response(self, response: requests.Response) -> str:
         self._handle_response(response, "Authentication")
-        
+
         try:
             data = response.json()
             token = data.get("jwt")
@@ -119,25 +320,126 @@ class HiggsfieldClient:
         except (json.JSONDecodeError, ValueError) as e:
             raise Exception(f"Failed to parse authentication response")
 
-    def get_jwt_token_with_retry(self, max_retries: int = 3) -> str:
+    def get_jwt_token(self) -> str:
+        """Fetch a new JWT from Clerk (uncached; API calls use get_jwt_token_with_retry)."""
+        url, headers, payload = self._jwt_request()
+        response = self._request("POST", url, headers=headers, data=payload)
+        return self._parse_jwt_response(response)
+
+    async def get_jwt_token_async(self) -> str:
+        url, headers, payload = self._jwt_request()
+        response = await self._request_async("POST", url, headers=headers, data=payload)
+        return self._parse_jwt_response(response)
+
+    @staticmethod
+    def _token_expiry(token: str) -> Optional[float]:
+        """exp claim (epoch seconds) of a "Bearer <jwt>" token, decoded locally."""
+        try:
+            payload = token.split(" ", 1)[-1].split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+
+    def _store_jwt(self, token: str) -> str:
+        expires_at = self._token_expiry(token) or time.time() + DEFAULT_JWT_TTL_SECONDS
+        self._jwt = (token, expires_at)
+        return token
+
+    def _fetch_jwt(self, max_retries: int) -> str:
+        """Fetch and cache a new JWT (caller holds _jwt_lock)."""
         for attempt in range(max_retries):
             try:
-                return self.get_jwt_token()
+                token = self.get_jwt_token()
+                break
             except Exception:
                 if attempt < max_retries - 1:
                     time.sleep(2)
                     continue
                 raise
+        return self._store_jwt(token)
 
-    def check_upload(self, img_id: str, max_retries: int = 3) -> str:
+    async def _fetch_jwt_async(self, max_retries: int) -> str:
+        """Fetch and cache a new JWT (caller holds the loop's JWT lock)."""
         for attempt in range(max_retries):
             try:
-                jwt_token = self.get_jwt_token_with_retry()
-                url = f"{self.base_url}/media/{img_id}/upload"
-                headers = self._get_headers(jwt_token)
-                headers['content-length'] = '0'
+                token = await self.get_jwt_token_async()
+                break
+            except Exception:
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2)
+                    continue
+                raise
+        return self._store_jwt(token)
+
+    def _refresh_jwt_in_background(self) -> None:
+        """Fetch the next JWT ahead of expiry, unless a fetch is already running."""
+        if not self._jwt_lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                self._fetch_jwt(max_retries=1)
+            except Exception as e:
+                logger.warning(f"Background JWT refresh failed: {e}")
+            finally:
+                self._jwt_lock.release()
+
+        threading.Thread(target=refresh, name="higgsfield-jwt-refresh", daemon=True).start()
+
+    def _valid_jwt(self) -> Optional[str]:
+        """The cached JWT unless missing or (nearly) expired."""
+        cached = self._jwt
+        if cached is not None and cached[1] - time.time() > settings.HIGGSFIELD_JWT_EXPIRY_MARGIN_SECONDS:
+            return cached[0]
+        return None
+
+    def _cached_jwt(self) -> Optional[str]:
+        """_valid_jwt, starting a background refresh when it is close to expiry."""
+        token = self._valid_jwt()
+        if token is not None and self._jwt[1] - time.time() < settings.HIGGSFIELD_JWT_REFRESH_AHEAD_SECONDS:
+            self._refresh_jwt_in_background()
+        return token
+
+    def get_jwt_token_with_retry(self, max_retries: int = 3) -> str:
+        """
+        JWT for API calls, cached until shortly before its exp claim.
+
+        Within HIGGSFIELD_JWT_REFRESH_AHEAD_SECONDS of expiry the cached
+        token is still returned while the next one is fetched in the
+        background; only a missing or (nearly) expired token makes the
+        caller wait. Concurrent callers share one fetch.
+        """
+        token = self._cached_jwt()
+        if token is not None:
+            return token
+
+        with self._jwt_lock:
+            # Another thread may have fetched one while we waited
+            return self._valid_jwt() or self._fetch_jwt(max_retries)
+
+    async def get_jwt_token_with_retry_async(self, max_retries: int = 3) -> str:
+        """get_jwt_token_with_retry for the event loop: concurrent coroutines share one fetch."""
+        token = self._cached_jwt()
+        if token is not None:
+            return token
+
+        _, lock = self._async_context()
+        async with lock:
+            return self._valid_jwt() or await self._fetch_jwt_async(max_retries)
 
-                response = requests.post(url, headers=headers, data={}, impersonate="chrome")
+    def invalidate_jwt(self) -> None:
+        """Drop the cached JWT (rejected by the API, or credentials changed)."""
+        self._jwt = None
+
+    # ============================================
+    # MEDIA UPLOAD
+    # ============================================
+
+    def check_upload(self, img_id: str, max_retries: int = 3) -> str:
+        for attempt in range(max_retries):
+            try:
+                response = self._request("POST", **self._check_upload_request(img_id, self.get_jwt_token_with_retry()))
                 self._handle_response(response, "Upload check")
                 return response.text
             except (requests.RequestException, Exception) as e:
@@ -146,136 +448,265 @@ class HiggsfieldClient:
                     continue
                 raise Exception(f"Failed to check upload after {max_retries} attempts: {e}")
 
+    async def check_upload_async(self, img_id: str, max_retries: int = 3) -> str:
+        for attempt in range(max_retries):
+            try:
+                jwt_token = await self.get_jwt_token_with_retry_async()
+                response = await self._request_async("POST", **self._check_upload_request(img_id, jwt_token))
+                self._handle_response(response, "Upload check")
+                return response.text
+            except (requests.RequestException, Exception) as e:
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2)
+                    continue
+                raise Exception(f"Failed to check upload after {max_retries} attempts: {e}")
+
+    def _check_upload_request(self, img_id: str, jwt_token: str) -> dict:
+        headers = self._get_headers(jwt_token)
+        headers['content-length'] = '0'
+        return {"url": f"{self.base_url}/media/{img_id}/upload", "headers": headers, "data": {}}
+
     def create_reference_media(self, max_retries: int = 3) -> dict:
         for attempt in range(max_retries):
+            response = None
             try:
-                jwt_token = self.get_jwt_token_with_retry()
-                url = f"{self.base_url}/reference-media"
-                headers = self._get_headers(jwt_token)
-                headers['content-type'] = 'application/json'
-                
-                payload = json.dumps({"mimetype": "image/jpeg"})
-
-                response = requests.post(url, headers=headers, data=payload, impersonate="chrome")
-                self._handle_response(response, "Create reference media")
-                
-                data = response.json()
-                if not data.get("id") or not data.get("upload_url"):
-                     raise ValueError(f"Missing required fields in response: {data}")
-
-                return {
-                    "id": data.get("id"),
-                    "url": data.get("url"),
-                    "upload_url": data.get("upload_url")
-                }
+                response = self._request(
+                    "POST", f"{self.base_url}/reference-media",
+                    headers=self._json_headers(self.get_jwt_token_with_retry()),
+                    data=json.dumps({"mimetype": "image/jpeg"})
+                )
+                return self._parse_reference_media(response)
             except (json.JSONDecodeError, ValueError, requests.RequestException) as e:
                 if attempt < max_retries - 1:
                     time.sleep(2)
                     continue
-                response_text = getattr(response, 'text', 'No response')[:200] if 'response' in locals() else 'No response'
-                raise Exception(f"Failed to create reference media after {max_retries} attempts: {e}, Response: {response_text}")
+                raise self._media_error("create reference media", max_retries, e, response)
+
+    async def create_reference_media_async(self, max_retries: int = 3) -> dict:
+        for attempt in range(max_retries):
+            response = None
+            try:
+                response = await self._request_async(
+                    "POST", f"{self.base_url}/reference-media",
+                    headers=self._json_headers(await self.get_jwt_token_with_retry_async()),
+                    data=json.dumps({"mimetype": "image/jpeg"})
+                )
+                return self._parse_reference_media(response)
+            except (json.JSONDecodeError, ValueError, requests.RequestException) as e:
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2)
+                    continue
+                raise self._media_error("create reference media", max_retries, e, response)
+
+    def _parse_reference_media(self, response: requests.Response) -> dict:
+        self._handle_response(response, "Create reference media")
+
+        data = response.json()
+        if not data.get("id") or not data.get("upload_url"):
+             raise ValueError(f"Missing required fields in response: {data}")
+
+        return {
+            "id": data.get("id"),
+            "url": data.get("url"),
+            "upload_url": data.get("upload_url")
+        }
 
     def batch_media(self, max_retries: int = 3) -> dict:
         for attempt in range(max_retries):
+            response = None
             try:
-                jwt_token = self.get_jwt_token_with_retry()
-                url = f"{self.base_url}/media/batch"
-                headers = self._get_headers(jwt_token)
-                headers['content-type'] = 'application/json'
-                
-                payload = json.dumps({"mimetypes": ["image/jpeg"]})
-
-                response = requests.post(url, headers=headers, data=payload, impersonate="chrome")
-                self._handle_response(response, "Check reference media")
-                
-                data = response.json()
-                
-                # batch_media returns a list, take the first item
-                item = None
-                if isinstance(data, list) and len(data) > 0:
-                    item = data[0]
-                elif isinstance(data, dict):
-                    item = data
-                
-                if not item or not item.get("id") or not item.get("upload_url"):
-                     raise ValueError(f"Invalid or missing data in batch response: {data}")
-
-                return {
-                    "id": item.get("id"),
-                    "url": item.get("url"),
-                    "upload_url": item.get("upload_url")
-                }
+                response = self._request(
+                    "POST", f"{self.base_url}/media/batch",
+                    headers=self._json_headers(self.get_jwt_token_with_retry()),
+                    data=json.dumps({"mimetypes": ["image/jpeg"]})
+                )
+                return self._parse_batch_media(response)
             except (json.JSONDecodeError, ValueError, requests.RequestException) as e:
                 if attempt < max_retries - 1:
                     time.sleep(2)
                     continue
-                response_text = getattr(response, 'text', 'No response')[:200] if 'response' in locals() else 'No response'
-                raise Exception(f"Failed to create batch media after {max_retries} attempts: {e}, Response: {response_text}")
+                raise self._media_error("create batch media", max_retries, e, response)
+
+    async def batch_media_async(self, max_retries: int = 3) -> dict:
+        for attempt in range(max_retries):
+            response = None
+            try:
+                response = await self._request_async(
+                    "POST", f"{self.base_url}/media/batch",
+                    headers=self._json_headers(await self.get_jwt_token_with_retry_async()),
+                    data=json.dumps({"mimetypes": ["image/jpeg"]})
+                )
+                return self._parse_batch_media(response)
+            except (json.JSONDecodeError, ValueError, requests.RequestException) as e:
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2)
+                    continue
+                raise self._media_error("create batch media", max_retries, e, response)
+
+    def _parse_batch_media(self, response: requests.Response) -> dict:
+        self._handle_response(response, "Check reference media")
+
+        data = response.json()
+
+        # batch_media returns a list, take the first item
+        item = None
+        if isinstance(data, list) and len(data) > 0:
+            item = data[0]
+        elif isinstance(data, dict):
+            item = data
+
+        if not item or not item.get("id") or not item.get("upload_url"):
+             raise ValueError(f"Invalid or missing data in batch response: {data}")
+
+        return {
+            "id": item.get("id"),
+            "url": item.get("url"),
+            "upload_url": item.get("upload_url")
+        }
+
+    @staticmethod
+    def _media_error(action: str, max_retries: int, error: Exception, response) -> Exception:
+        response_text = getattr(response, 'text', 'No response')[:200] if response is not None else 'No response'
+        return Exception(f"Failed to {action} after {max_retries} attempts: {error}, Response: {response_text}")
+
+    @_retry_on_unauthorized
+    def create_upload_link(self) -> dict:
+        """Create an upload link for media: dict with id, url and upload_url (S3 PUT target)."""
+        response = self._request("POST", **self._upload_link_request(self.get_jwt_token_with_retry()))
+        return self._parse_upload_link(response)
+
+    @_retry_on_unauthorized
+    async def create_upload_link_async(self) -> dict:
+        response = await self._request_async("POST", **self._upload_link_request(await self.get_jwt_token_with_retry_async()))
+        return self._parse_upload_link(response)
 
     def upload_image_complete(self, image_data: bytes) -> dict:
         """
         Complete image upload workflow:
-        1. Create upload link
-        2. Upload image to S3
-        3. Confirm upload
-        4. Get image dimensions
-        
+        1. Normalize the image: upright, metadata stripped, downscaled
+           (image_preprocessing.py); rejects non-images before any request
+        2. Create upload link
+        3. Upload image to S3
+        4. Confirm upload
+
+        The image is normalized once; a rejected JWT (401) only retries
+        the provider calls.
+
         Args:
             image_data: Image binary data
-            
+
         Returns:
-            dict with keys: id, url, width, height
+            dict with keys: id, url, width, height (of the uploaded image)
+
+        Raises:
+            InvalidImageError: If the bytes are not a JPEG, PNG or WebP image
         """
-        # Step 1: Create upload link
-        jwt_token = self.get_jwt_token_with_retry()
-        url = f"{self.base_url}/media?require_consent=true"
+        started = time.monotonic()
+        # Step 1: Normalize the image
+        image = prepare_image(image_data)
+
+        # Step 2: Create upload link
+        link = self.create_upload_link()
+
+        # Steps 3-4: Upload image to S3 and confirm
+        self._put_upload(link, image)
+        metrics.image_upload_seconds.observe(time.monotonic() - started, provider="higgsfield")
+        return self._uploaded_image(link, image)
+
+    @_retry_on_unauthorized
+    def _put_upload(self, link: dict, image: PreparedImage) -> None:
+        """PUT a prepared image to its upload link and confirm the upload."""
+        upload_response = self._request("PUT", link["upload_url"], headers=self._s3_upload_headers(image.mime_type), data=image.data)
+        self._handle_response(upload_response, "Upload image")
+        self.check_upload(link["id"])
+
+    async def upload_image_complete_async(self, image_data: bytes) -> dict:
+        """upload_image_complete on the event loop; the upload link is created while the image is normalized."""
+        started = time.monotonic()
+        link_task = asyncio.ensure_future(self.create_upload_link_async())
+        try:
+            image = await prepare_image_async(image_data)
+        except BaseException:
+            link_task.cancel()
+            raise
+        link = await link_task
+
+        await self._put_upload_async(link, image)
+        metrics.image_upload_seconds.observe(time.monotonic() - started, provider="higgsfield")
+        return self._uploaded_image(link, image)
+
+    @_retry_on_unauthorized
+    async def _put_upload_async(self, link: dict, image: PreparedImage) -> None:
+        upload_response = await self._request_async("PUT", link["upload_url"], headers=self._s3_upload_headers(image.mime_type), data=image.data)
+        self._handle_response(upload_response, "Upload image")
+        await self.check_upload_async(link["id"])
+
+    def _upload_link_request(self, jwt_token: str) -> dict:
         headers = self._get_headers(jwt_token)
         headers['content-length'] = '0'
-        
-        response = requests.post(url, headers=headers, data={}, impersonate="chrome")
+        return {"url": f"{self.base_url}/media?require_consent=true", "headers": headers, "data": {}}
+
+    def _parse_upload_link(self, response: requests.Response) -> dict:
         self._handle_response(response, "Get image dimensions")
-        
+
         data = response.json()
         img_id = data.get("id")
         img_url = data.get("url")
         upload_url = data.get("upload_url")
-        
+
         if not img_id or not img_url or not upload_url:
             raise ValueError(f"Missing required fields in response: {data}")
-        
-        # Step 2: Upload image to S3
-        upload_headers = {
+        return {"id": img_id, "url": img_url, "upload_url": upload_url}
+
+    @staticmethod
+    def _s3_upload_headers(mime_type: str) -> dict:
+        return {
             'Accept': '*/*',
-            'Content-Type': 'image/jpeg',
+            'Content-Type': mime_type,
             'Origin': 'https://higgsfield.ai'
         }
-        
-        upload_response = requests.put(upload_url, headers=upload_headers, data=image_data, impersonate="chrome")
-        self._handle_response(upload_response, "Upload image")
-        
-        # Step 3: Confirm upload
-        self.check_upload(img_id)
-        
-        # Step 4: Get image dimensions
-        img_response = requests.get(img_url, impersonate="chrome")
-        self._handle_response(img_response, "Get image info")
-        img = Image.open(BytesIO(img_response.content))
-        width, height = img.size
-        
+
+    @staticmethod
+    def _uploaded_image(link: dict, image: PreparedImage) -> dict:
         return {
-            "id": img_id,
-            "url": img_url,
-            "width": width,
-            "height": height
+            "id": link["id"],
+            "url": link["url"],
+            "width": image.width,
+            "height": image.height
         }
 
-    def generate_image(self, prompt: str, input_images: list = [], aspect_ratio: str = "9:16", resolution: str = "1k", model: str = "nano-banana", use_unlim: bool = True) -> str:
-        jwt_token = self.get_jwt_token_with_retry()
-        
+    # ============================================
+    # JOBS
+    # ============================================
+
+    def _submit_job(self, url: str, payload: dict, operation: str) -> Optional[str]:
+        """POST a job payload; returns the job set id."""
+        headers = self._json_headers(self.get_jwt_token_with_retry())
+        response = self._request("POST", url, headers=headers, data=json.dumps(payload))
+        return self._parse_job_set_id(response, operation)
+
+    async def _submit_job_async(self, url: str, payload: dict, operation: str) -> Optional[str]:
+        headers = self._json_headers(await self.get_jwt_token_with_retry_async())
+        response = await self._request_async("POST", url, headers=headers, data=json.dumps(payload))
+        return self._parse_job_set_id(response, operation)
+
+    def _parse_job_set_id(self, response: requests.Response, operation: str) -> Optional[str]:
+        self._handle_response(response, operation)
+        try:
+            data = response.json()
+            if 'job_sets' in data and len(data['job_sets']) > 0:
+                return data['job_sets'][0]['id']
+            return None
+        except (json.JSONDecodeError, ValueError) as e:
+            raise Exception(f"Failed to parse {operation} response")
+
+    def _image_job(self, prompt: str, input_images: list, aspect_ratio: str, resolution: str,
+                   model: str, use_unlim: bool) -> Tuple[str, dict]:
+        """(url, payload) of an image generation job."""
         # Default dimensions
         width = 1024
         height = 1024
-        
+
         # Infer dimensions from first input image if available (I2I)
         if input_images and len(input_images) > 0:
             first_img = input_images[0]
@@ -289,11 +720,11 @@ class HiggsfieldClient:
         # Check if it's regular Nano Banana (not PRO)
         # Handle both "nano-banana" and "Nano Banana" formats
         model_lower = model.lower().replace("-", " ")  # Normalize to space-separated
-        
+
         if "nano banana" in model_lower and "pro" not in model_lower:
             url = f"{self.base_url}/jobs/nano-banana"
             # nano-banana: Include aspect_ratio to ensure correct dimensions
-            payload = json.dumps({
+            payload = {
                 "params": {
                     "prompt": prompt,
                     "input_images": input_images,
@@ -304,12 +735,12 @@ class HiggsfieldClient:
                     "use_unlim": use_unlim
                 },
                 "use_unlim": use_unlim
-            })
+            }
         else:
             # Default to nano-banana-pro (nano-banana-2) for PRO models
             url = f"{self.base_url}/jobs/nano-banana-2"
             # nano-banana-pro: aspect_ratio AND resolution supported
-            payload = json.dumps({
+            payload = {
                 "params": {
                     "prompt": prompt,
                     "input_images": input_images,
@@ -321,36 +752,43 @@ class HiggsfieldClient:
                     "resolution": resolution
                 },
                 "use_unlim": use_unlim
-            })
-        
-        headers = self._get_headers(jwt_token)
-        headers['content-type'] = 'application/json'
+            }
+        return url, payload
 
-        response = requests.post(url, headers=headers, data=payload, impersonate="chrome")
-        self._handle_response(response, "Generate image")
-        try:
-            data = response.json()
-            if 'job_sets' in data and len(data['job_sets']) > 0:
-                return data['job_sets'][0]['id']
-            return None
-        except (json.JSONDecodeError, ValueError) as e:
-            raise Exception(f"Failed to parse image generation response")
+    @_retry_on_unauthorized
+    def generate_image(self, prompt: str, input_images: list = [], aspect_ratio: str = "9:16", resolution: str = "1k", model: str = "nano-banana", use_unlim: bool = True) -> str:
+        url, payload = self._image_job(prompt, input_images, aspect_ratio, resolution, model, use_unlim)
+        return self._submit_job(url, payload, "Generate image")
+
+    @_retry_on_unauthorized
+    async def generate_image_async(self, prompt: str, input_images: list = [], aspect_ratio: str = "9:16", resolution: str = "1k", model: str = "nano-banana", use_unlim: bool = True) -> str:
+        url, payload = self._image_job(prompt, input_images, aspect_ratio, resolution, model, use_unlim)
+        return await self._submit_job_async(url, payload, "Generate image")
 
+    @_retry_on_unauthorized
     def get_job_status(self, job_id: str) -> dict:
-        jwt_token = self.get_jwt_token_with_retry()
-        url = f"{self.base_url}/job-sets/{job_id}"
-        headers = self._get_headers(jwt_token)
+        headers = self._get_headers(self.get_jwt_token_with_retry())
+        response = self._request("GET", f"{self.base_url}/job-sets/{job_id}", headers=headers)
+        return self._parse_job_status(response)
+
+    @_retry_on_unauthorized
+    async def get_job_status_async(self, job_id: str) -> dict:
+        headers = self._get_headers(await self.get_jwt_token_with_retry_async())
+        response = await self._request_async("GET", f"{self.base_url}/job-sets/{job_id}", headers=headers)
+        return self._parse_job_status(response)
 
-        response = requests.get(url, headers=headers, impersonate="chrome")
+    def _parse_job_status(self, response: requests.Response) -> dict:
+        if response.status_code == 401:
+            self._handle_response(response, "Get job status")
         try:
             data = response.json()
             first_job = data['jobs'][0]
             status = first_job['status']
             result = None
-            
+
             if status == 'completed':
                 result = first_job['results']['raw']['url']
-            
+
             error_msg = None
             if status in ('failed', 'error', 'cancelled'):
                 # Try to find error detail
@@ -360,7 +798,7 @@ class HiggsfieldClient:
                     error_msg = str(first_job['failure_reason'])
                 elif 'message' in first_job:
                     error_msg = str(first_job['message'])
-            
+
             return {"status": status, "result": result, "error": error_msg}
         except (json.JSONDecodeError, ValueError) as e:
             raise Exception(f"Failed to parse job status response: {e}, Response: {response.text[:200]}")
@@ -405,24 +843,19 @@ class HiggsfieldClient:
         # Fallback to 9:16 for unknown ratios often used in mobile
         return mapping.get(aspect_ratio, (1080, 1920))
 
-    def generate_video_kling_2_5_turbo(self, prompt: str, duration: int, resolution: str,
-                                        input_image: dict = None, use_unlim: bool = True) -> str:
-        """
-        Generate video using Kling 2.5 Turbo
-        Uses /jobs/kling endpoint with resolution parameter
-        """
-        jwt_token = self.get_jwt_token_with_retry()
+    def _kling_2_5_turbo_job(self, prompt: str, duration: int, resolution: str,
+                             input_image: dict = None, use_unlim: bool = True) -> Tuple[str, dict]:
         url = f"{self.base_url}/jobs/kling"
-        
+
         # Default dimensions
         width = 1024
         height = 1024
-        
+
         # Get dimensions from input image if provided
         if input_image:
             width = input_image.get('width', 1024)
             height = input_image.get('height', 1024)
-        
+
         payload = {
             "params": {
                 "width": width,
@@ -441,7 +874,7 @@ class HiggsfieldClient:
             },
             "use_unlim": use_unlim
         }
-        
+
         # Add input image for I2V only (do not include field for T2V)
         if input_image:
             payload["params"]["input_image"] = {
@@ -451,34 +884,35 @@ class HiggsfieldClient:
                 "width": input_image["width"],
                 "height": input_image["height"]
             }
-        
-        headers = self._get_headers(jwt_token)
-        headers['content-type'] = 'application/json'
+        return url, payload
 
-        response = requests.post(url, headers=headers, data=json.dumps(payload), impersonate="chrome")
-        self._handle_response(response, "Kling 2.5 Turbo Generate")
-        
-        data = response.json()
-        if 'job_sets' in data and len(data['job_sets']) > 0:
-            return data['job_sets'][0]['id']
-        return None
-
-    def generate_video_kling_o1(self, prompt: str, duration: int, aspect_ratio: str,
-                                 input_image: dict = None, use_unlim: bool = True) -> str:
+    @_retry_on_unauthorized
+    def generate_video_kling_2_5_turbo(self, prompt: str, duration: int, resolution: str,
+                                        input_image: dict = None, use_unlim: bool = True) -> str:
         """
-        Generate video using Kling O1 Video
-        Uses /jobs/kling-omni-flf endpoint with aspect_ratio parameter
+        Generate video using Kling 2.5 Turbo
+        Uses /jobs/kling endpoint with resolution parameter
         """
-        jwt_token = self.get_jwt_token_with_retry()
+        url, payload = self._kling_2_5_turbo_job(prompt, duration, resolution, input_image, use_unlim)
+        return self._submit_job(url, payload, "Kling 2.5 Turbo Generate")
+
+    @_retry_on_unauthorized
+    async def generate_video_kling_2_5_turbo_async(self, prompt: str, duration: int, resolution: str,
+                                                    input_image: dict = None, use_unlim: bool = True) -> str:
+        url, payload = self._kling_2_5_turbo_job(prompt, duration, resolution, input_image, use_unlim)
+        return await self._submit_job_async(url, payload, "Kling 2.5 Turbo Generate")
+
+    def _kling_o1_job(self, prompt: str, duration: int, aspect_ratio: str,
+                      input_image: dict = None, use_unlim: bool = True) -> Tuple[str, dict]:
         url = f"{self.base_url}/jobs/kling-omni-flf"
-        
+
         width, height = self._get_dimensions_from_aspect_ratio(aspect_ratio)
-        
+
         # Override with input image dimensions if provided
         if input_image:
             width = input_image.get('width', width)
             height = input_image.get('height', height)
-        
+
         payload = {
             "params": {
                 "aspect_ratio": aspect_ratio,
@@ -492,7 +926,7 @@ class HiggsfieldClient:
             },
             "use_unlim": use_unlim
         }
-        
+
         # Add input image for I2V - Kling O1 format (no width/height in input_image)
         if input_image:
             payload["params"]["input_image"] = {
@@ -502,35 +936,36 @@ class HiggsfieldClient:
             }
         else:
             payload["params"]["input_image"] = None
-        
-        headers = self._get_headers(jwt_token)
-        headers['content-type'] = 'application/json'
+        return url, payload
 
-        response = requests.post(url, headers=headers, data=json.dumps(payload), impersonate="chrome")
-        self._handle_response(response, "Get job status")
-        
-        data = response.json()
-        if 'job_sets' in data and len(data['job_sets']) > 0:
-            return data['job_sets'][0]['id']
-        return None
-
-    def generate_video_kling_2_6(self, prompt: str, duration: int, aspect_ratio: str,
-                                  sound: bool = True, input_image: dict = None, 
-                                  use_unlim: bool = True) -> str:
+    @_retry_on_unauthorized
+    def generate_video_kling_o1(self, prompt: str, duration: int, aspect_ratio: str,
+                                 input_image: dict = None, use_unlim: bool = True) -> str:
         """
-        Generate video using Kling 2.6
-        Uses /jobs/kling2-6 endpoint with aspect_ratio and sound parameters
+        Generate video using Kling O1 Video
+        Uses /jobs/kling-omni-flf endpoint with aspect_ratio parameter
         """
-        jwt_token = self.get_jwt_token_with_retry()
+        url, payload = self._kling_o1_job(prompt, duration, aspect_ratio, input_image, use_unlim)
+        return self._submit_job(url, payload, "Kling O1 Generate")
+
+    @_retry_on_unauthorized
+    async def generate_video_kling_o1_async(self, prompt: str, duration: int, aspect_ratio: str,
+                                             input_image: dict = None, use_unlim: bool = True) -> str:
+        url, payload = self._kling_o1_job(prompt, duration, aspect_ratio, input_image, use_unlim)
+        return await self._submit_job_async(url, payload, "Kling O1 Generate")
+
+    def _kling_2_6_job(self, prompt: str, duration: int, aspect_ratio: str,
+                       sound: bool = True, input_image: dict = None,
+                       use_unlim: bool = True) -> Tuple[str, dict]:
         url = f"{self.base_url}/jobs/kling2-6"
-        
+
         width, height = self._get_dimensions_from_aspect_ratio(aspect_ratio)
-        
+
         # Override with input image dimensions if provided
         if input_image:
             width = input_image.get('width', width)
             height = input_image.get('height', height)
-        
+
         payload = {
             "params": {
                 "width": width,
@@ -547,7 +982,7 @@ class HiggsfieldClient:
             },
             "use_unlim": use_unlim
         }
-        
+
         # Add input image for I2V - Kling 2.6 format (no width/height in input_image)
         if input_image:
             payload["params"]["input_image"] = {
@@ -557,17 +992,46 @@ class HiggsfieldClient:
             }
         else:
             payload["params"]["input_image"] = None
-        
-        headers = self._get_headers(jwt_token)
-        headers['content-type'] = 'application/json'
+        return url, payload
 
-        response = requests.post(url, headers=headers, data=json.dumps(payload), impersonate="chrome")
-        self._handle_response(response, "Generate video")
-        
-        data = response.json()
-        if 'job_sets' in data and len(data['job_sets']) > 0:
-            return data['job_sets'][0]['id']
-        return None
+    @_retry_on_unauthorized
+    def generate_video_kling_2_6(self, prompt: str, duration: int, aspect_ratio: str,
+                                  sound: bool = True, input_image: dict = None,
+                                  use_unlim: bool = True) -> str:
+        """
+        Generate video using Kling 2.6
+        Uses /jobs/kling2-6 endpoint with aspect_ratio and sound parameters
+        """
+        url, payload = self._kling_2_6_job(prompt, duration, aspect_ratio, sound, input_image, use_unlim)
+        return self._submit_job(url, payload, "Generate video")
+
+    @_retry_on_unauthorized
+    async def generate_video_kling_2_6_async(self, prompt: str, duration: int, aspect_ratio: str,
+                                              sound: bool = True, input_image: dict = None,
+                                              use_unlim: bool = True) -> str:
+        url, payload = self._kling_2_6_job(prompt, duration, aspect_ratio, sound, input_image, use_unlim)
+        return await self._submit_job_async(url, payload, "Generate video")
+
+    def _video_call(self, prompt: str, model: str, duration: str, resolution: str,
+                    aspect_ratio: str, audio: bool, input_images: list,
+                    use_unlim: bool) -> Tuple[str, Dict]:
+        """Name and arguments of the model-specific method generate_video routes to."""
+        duration_int = self._parse_duration(duration)
+
+        # Extract first input image if provided
+        input_image = None
+        if input_images and len(input_images) > 0:
+            input_image = input_images[0]
+
+        common = {"prompt": prompt, "duration": duration_int, "input_image": input_image, "use_unlim": use_unlim}
+        if model == "kling-2.5-turbo":
+            return "generate_video_kling_2_5_turbo", dict(common, resolution=resolution)
+        elif model == "kling-o1-video":
+            return "generate_video_kling_o1", dict(common, aspect_ratio=aspect_ratio)
+        elif model == "kling-2.6":
+            return "generate_video_kling_2_6", dict(common, aspect_ratio=aspect_ratio, sound=audio)
+        else:
+            raise ValueError(f"Unknown model: {model}")
 
     def generate_video(self, prompt: str, model: str = "kling-2.5-turbo",
                        duration: str = "5s", resolution: str = "720p",
@@ -575,7 +1039,7 @@ class HiggsfieldClient:
                        input_images: list = None, use_unlim: bool = True) -> str:
         """
         Dispatcher method - routes to correct model-specific method
-        
+
         Args:
             prompt: Text description of the video
             model: Model to use (kling-2.5-turbo, kling-o1-video, kling-2.6)
@@ -585,59 +1049,33 @@ class HiggsfieldClient:
             audio: Whether to generate audio (for kling-2.6, maps to 'sound')
             input_images: List of input images for I2V mode
             use_unlim: Use unlimited credits
-            
+
         Returns:
             job_id: ID to poll for video generation status
         """
-        duration_int = self._parse_duration(duration)
-        
-        # Extract first input image if provided
-        input_image = None
-        if input_images and len(input_images) > 0:
-            input_image = input_images[0]
-        
-        if model == "kling-2.5-turbo":
-            return self.generate_video_kling_2_5_turbo(
-                prompt=prompt,
-                duration=duration_int,
-                resolution=resolution,
-                input_image=input_image,
-                use_unlim=use_unlim
-            )
-        elif model == "kling-o1-video":
-            return self.generate_video_kling_o1(
-                prompt=prompt,
-                duration=duration_int,
-                aspect_ratio=aspect_ratio,
-                input_image=input_image,
-                use_unlim=use_unlim
-            )
-        elif model == "kling-2.6":
-            return self.generate_video_kling_2_6(
-                prompt=prompt,
-                duration=duration_int,
-                aspect_ratio=aspect_ratio,
-                sound=audio,
-                input_image=input_image,
-                use_unlim=use_unlim
-            )
-        else:
-            raise ValueError(f"Unknown model: {model}")
+        name, kwargs = self._video_call(prompt, model, duration, resolution, aspect_ratio,
+                                        audio, input_images, use_unlim)
+        return getattr(self, name)(**kwargs)
+
+    async def generate_video_async(self, prompt: str, model: str = "kling-2.5-turbo",
+                                   duration: str = "5s", resolution: str = "720p",
+                                   aspect_ratio: str = "16:9", audio: bool = True,
+                                   input_images: list = None, use_unlim: bool = True) -> str:
+        """generate_video on the event loop."""
+        name, kwargs = self._video_call(prompt, model, duration, resolution, aspect_ratio,
+                                        audio, input_images, use_unlim)
+        return await getattr(self, f"{name}_async")(**kwargs)
 
     # ============================================
     # NEW MODEL-SPECIFIC METHODS (matching higgsfield_api.py)
     # ============================================
-    
-    def send_job_kling_2_5_turbo_i2v(self, prompt: str, duration: int, resolution: str,
-                                      img_id: str, img_url: str, width: int, height: int,
-                                      input_image_end: dict = None, mode: str = "std",
-                                      use_unlim: bool = True) -> str:
-        """
-        Kling 2.5 Turbo I2V - matches send_job_i2v_kling_2_5_turbo in higgsfield_api.py
-        """
-        jwt_token = self.get_jwt_token_with_retry()
+
+    def _kling_2_5_turbo_i2v_job(self, prompt: str, duration: int, resolution: str,
+                                 img_id: str, img_url: str, width: int, height: int,
+                                 input_image_end: dict = None, mode: str = "std",
+                                 use_unlim: bool = True) -> Tuple[str, dict]:
         url = f"{self.base_url}/jobs/kling"
-        
+
         payload = {
             "params": {
                 "input_image": {
@@ -663,28 +1101,35 @@ class HiggsfieldClient:
             },
             "use_unlim": use_unlim
         }
-        
-        headers = self._get_headers(jwt_token)
-        headers['content-type'] = 'application/json'
-        
-        response = requests.post(url, headers=headers, data=json.dumps(payload), impersonate="chrome")
-        self._handle_response(response, "Kling 2.5 Turbo I2V")
-        
-        data = response.json()
-        if 'job_sets' in data and len(data['job_sets']) > 0:
-            return data['job_sets'][0]['id']
-        return None
+        return url, payload
 
-    def send_job_kling_o1_i2v(self, prompt: str, duration: int, aspect_ratio: str,
-                              img_id: str, img_url: str, width: int, height: int,
-                              input_image_end: dict = None,
-                              use_unlim: bool = True) -> str:
+    @_retry_on_unauthorized
+    def send_job_kling_2_5_turbo_i2v(self, prompt: str, duration: int, resolution: str,
+                                      img_id: str, img_url: str, width: int, height: int,
+                                      input_image_end: dict = None, mode: str = "std",
+                                      use_unlim: bool = True) -> str:
         """
-        Kling O1 I2V - matches send_job_i2v_kling_o1 in higgsfield_api.py
+        Kling 2.5 Turbo I2V - matches send_job_i2v_kling_2_5_turbo in higgsfield_api.py
         """
-        jwt_token = self.get_jwt_token_with_retry()
+        url, payload = self._kling_2_5_turbo_i2v_job(prompt, duration, resolution, img_id, img_url,
+                                                     width, height, input_image_end, mode, use_unlim)
+        return self._submit_job(url, payload, "Kling 2.5 Turbo I2V")
+
+    @_retry_on_unauthorized
+    async def send_job_kling_2_5_turbo_i2v_async(self, prompt: str, duration: int, resolution: str,
+                                                  img_id: str, img_url: str, width: int, height: int,
+                                                  input_image_end: dict = None, mode: str = "std",
+                                                  use_unlim: bool = True) -> str:
+        url, payload = self._kling_2_5_turbo_i2v_job(prompt, duration, resolution, img_id, img_url,
+                                                     width, height, input_image_end, mode, use_unlim)
+        return await self._submit_job_async(url, payload, "Kling 2.5 Turbo I2V")
+
+    def _kling_o1_i2v_job(self, prompt: str, duration: int, aspect_ratio: str,
+                          img_id: str, img_url: str, width: int, height: int,
+                          input_image_end: dict = None,
+                          use_unlim: bool = True) -> Tuple[str, dict]:
         url = f"{self.base_url}/jobs/kling-omni-flf"
-        
+
         payload = {
             "params": {
                 "aspect_ratio": aspect_ratio,
@@ -703,29 +1148,36 @@ class HiggsfieldClient:
             },
             "use_unlim": use_unlim
         }
-        
-        headers = self._get_headers(jwt_token)
-        headers['content-type'] = 'application/json'
-        
-        response = requests.post(url, headers=headers, data=json.dumps(payload), impersonate="chrome")
-        self._handle_response(response, "Kling O1 I2V")
-        
-        data = response.json()
-        if 'job_sets' in data and len(data['job_sets']) > 0:
-            return data['job_sets'][0]['id']
-        return None
+        return url, payload
 
-    def send_job_kling_2_6_t2v(self, prompt: str, duration: int, aspect_ratio: str,
-                               sound: bool = True, use_unlim: bool = True) -> str:
+    @_retry_on_unauthorized
+    def send_job_kling_o1_i2v(self, prompt: str, duration: int, aspect_ratio: str,
+                              img_id: str, img_url: str, width: int, height: int,
+                              input_image_end: dict = None,
+                              use_unlim: bool = True) -> str:
         """
-        Kling 2.6 T2V - matches send_job_t2v_kling_2_6 in higgsfield_api.py
+        Kling O1 I2V - matches send_job_i2v_kling_o1 in higgsfield_api.py
         """
-        jwt_token = self.get_jwt_token_with_retry()
+        url, payload = self._kling_o1_i2v_job(prompt, duration, aspect_ratio, img_id, img_url,
+                                              width, height, input_image_end, use_unlim)
+        return self._submit_job(url, payload, "Kling O1 I2V")
+
+    @_retry_on_unauthorized
+    async def send_job_kling_o1_i2v_async(self, prompt: str, duration: int, aspect_ratio: str,
+                                          img_id: str, img_url: str, width: int, height: int,
+                                          input_image_end: dict = None,
+                                          use_unlim: bool = True) -> str:
+        url, payload = self._kling_o1_i2v_job(prompt, duration, aspect_ratio, img_id, img_url,
+                                              width, height, input_image_end, use_unlim)
+        return await self._submit_job_async(url, payload, "Kling O1 I2V")
+
+    def _kling_2_6_t2v_job(self, prompt: str, duration: int, aspect_ratio: str,
+                           sound: bool = True, use_unlim: bool = True) -> Tuple[str, dict]:
         url = f"{self.base_url}/jobs/kling2-6"
-        
+
         # Calculate dimensions from aspect ratio
         width, height = self._get_dimensions_from_aspect_ratio(aspect_ratio)
-        
+
         payload = {
             "params": {
                 "width": width,
@@ -743,27 +1195,28 @@ class HiggsfieldClient:
             },
             "use_unlim": use_unlim
         }
-        
-        headers = self._get_headers(jwt_token)
-        headers['content-type'] = 'application/json'
-        
-        response = requests.post(url, headers=headers, data=json.dumps(payload), impersonate="chrome")
-        self._handle_response(response, "Kling 2.6 T2V")
-        
-        data = response.json()
-        if 'job_sets' in data and len(data['job_sets']) > 0:
-            return data['job_sets'][0]['id']
-        return None
+        return url, payload
 
-    def send_job_kling_2_6_i2v(self, prompt: str, duration: int, sound: bool,
-                               img_id: str, img_url: str, width: int, height: int,
-                               use_unlim: bool = True) -> str:
+    @_retry_on_unauthorized
+    def send_job_kling_2_6_t2v(self, prompt: str, duration: int, aspect_ratio: str,
+                               sound: bool = True, use_unlim: bool = True) -> str:
         """
-        Kling 2.6 I2V - matches send_job_i2v_kling_2_6 in higgsfield_api.py
+        Kling 2.6 T2V - matches send_job_t2v_kling_2_6 in higgsfield_api.py
         """
-        jwt_token = self.get_jwt_token_with_retry()
+        url, payload = self._kling_2_6_t2v_job(prompt, duration, aspect_ratio, sound, use_unlim)
+        return self._submit_job(url, payload, "Kling 2.6 T2V")
+
+    @_retry_on_unauthorized
+    async def send_job_kling_2_6_t2v_async(self, prompt: str, duration: int, aspect_ratio: str,
+                                           sound: bool = True, use_unlim: bool = True) -> str:
+        url, payload = self._kling_2_6_t2v_job(prompt, duration, aspect_ratio, sound, use_unlim)
+        return await self._submit_job_async(url, payload, "Kling 2.6 T2V")
+
+    def _kling_2_6_i2v_job(self, prompt: str, duration: int, sound: bool,
+                           img_id: str, img_url: str, width: int, height: int,
+                           use_unlim: bool = True) -> Tuple[str, dict]:
         url = f"{self.base_url}/jobs/kling2-6"
-        
+
         payload = {
             "params": {
                 "width": width,
@@ -786,19 +1239,26 @@ class HiggsfieldClient:
             },
             "use_unlim": use_unlim
         }
-        
-        headers = self._get_headers(jwt_token)
-        headers['content-type'] = 'application/json'
-        
-        response = requests.post(url, headers=headers, data=json.dumps(payload), impersonate="chrome")
-        self._handle_response(response, "Kling 2.6 I2V")
-        
-        data = response.json()
-        if 'job_sets' in data and len(data['job_sets']) > 0:
-            return data['job_sets'][0]['id']
-        return None
+        return url, payload
+
+    @_retry_on_unauthorized
+    def send_job_kling_2_6_i2v(self, prompt: str, duration: int, sound: bool,
+                               img_id: str, img_url: str, width: int, height: int,
+                               use_unlim: bool = True) -> str:
+        """
+        Kling 2.6 I2V - matches send_job_i2v_kling_2_6 in higgsfield_api.py
+        """
+        url, payload = self._kling_2_6_i2v_job(prompt, duration, sound, img_id, img_url, width, height, use_unlim)
+        return self._submit_job(url, payload, "Kling 2.6 I2V")
+
+    @_retry_on_unauthorized
+    async def send_job_kling_2_6_i2v_async(self, prompt: str, duration: int, sound: bool,
+                                           img_id: str, img_url: str, width: int, height: int,
+                                           use_unlim: bool = True) -> str:
+        url, payload = self._kling_2_6_i2v_job(prompt, duration, sound, img_id, img_url, width, height, use_unlim)
+        return await self._submit_job_async(url, payload, "Kling 2.6 I2V")
 
 # Singleton instance for backward compatibility (uses .env credentials)
-# For multi-account support, use Higgsfield Client.create_from_account(account_id)
+# For multi-account support, get clients from account_scheduler (client_registry.py)
 higgsfield_client = HiggsfieldClient.create_default()
 
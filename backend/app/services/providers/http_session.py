@@ -0,0 +1,59 @@
+"""
+Shared HTTP session helpers for provider clients.
+
+Each provider client keeps one long-lived session (connection pooling and
+keep-alive, HTTP/2 where the client library supports it) instead of paying
+DNS + TCP + TLS setup on every call, sends explicit connect/read timeouts,
+and records per-session stats.
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from app.config import settings
+
+
+def provider_timeout() -> Tuple[float, float]:
+    """(connect, read) timeout in seconds for provider calls."""
+    return (settings.PROVIDER_CONNECT_TIMEOUT_SECONDS, settings.PROVIDER_READ_TIMEOUT_SECONDS)
+
+
+class SessionStats:
+    """Request counts, errors and latency of one client session, per host."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, float]] = {}
+        self._connections: Dict[str, set] = {}
+
+    def record(self, url: str, seconds: float, ok: bool, local_port: Optional[int] = None) -> None:
+        """
+        Record one request. local_port (when the client library reports it)
+        identifies the connection used, so new connections can be told
+        from reused ones.
+        """
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            stats = self._hosts.setdefault(host, {"requests": 0, "errors": 0, "total_seconds": 0.0})
+            stats["requests"] += 1
+            stats["total_seconds"] += seconds
+            if not ok:
+                stats["errors"] += 1
+            if local_port:
+                ports = self._connections.setdefault(host, set())
+                if len(ports) < 10000:
+                    ports.add(local_port)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Per host: requests, errors, avg_ms and connections opened (None if unknown)."""
+        with self._lock:
+            return {
+                host: {
+                    "requests": int(stats["requests"]),
+                    "errors": int(stats["errors"]),
+                    "avg_ms": round(stats["total_seconds"] * 1000 / stats["requests"], 1) if stats["requests"] else None,
+                    "connections": len(self._connections[host]) if host in self._connections else None,
+                }
+                for host, stats in self._hosts.items()
+            }
@@ -1,16 +1,64 @@
 import asyncio
 import logging
+from datetime import datetime, timedelta
 from app.repositories import jobs_repo
+from app.services import jobs_service
 from app.services.credits_service import credits_service
+from app.services.processing_timeouts import processing_timeouts
+from app.services import metrics
 
 logger = logging.getLogger(__name__)
 
+def reclaim_stuck_processing_jobs() -> int:
+    """
+    Fail, refund and free the slot of processing jobs past their model deadline.
+    
+    Returns:
+        Number of jobs reclaimed
+    """
+    overrides = processing_timeouts.get_overrides()
+    shortest = processing_timeouts.shortest_deadline_minutes(overrides)
+    cutoff = (datetime.utcnow() - timedelta(minutes=shortest)).isoformat() + 'Z'
+    
+    reclaimed = 0
+    for job in jobs_repo.get_processing_jobs_started_before(cutoff):
+        job_id = job["job_id"]
+        user_id = job["user_id"]
+        deadline = processing_timeouts.get_deadline_minutes(job["model"], job["type"], overrides)
+        elapsed = metrics.elapsed_seconds(job.get("started_processing_at") or job.get("created_at"))
+        if elapsed is None or elapsed < deadline * 60:
+            continue
+        
+        try:
+            logger.info(f"Timing out stuck processing job {job_id} ({elapsed / 60:.0f}m > {deadline:.0f}m)")
+            if not jobs_service.fail_if_processing(
+                job_id,
+                f"Job timeout (processing > {deadline:.0f}m)"
+            ):
+                continue  # Finished concurrently
+            
+            new_balance = credits_service.refund_credits(user_id, job_id)
+            if new_balance is not None:
+                logger.info(f"Refunded job {job_id}. New balance for user {user_id}: {new_balance}")
+            
+            metrics.job_slots_reclaimed_total.inc(**metrics.job_labels(job))
+            reclaimed += 1
+            # Slot freed: the failed event triggers a fair scheduler round
+        except Exception as e:
+            logger.error(f"Error reclaiming stuck job {job_id}: {e}")
+    
+    return reclaimed
+
+
 async def run_pending_jobs_cleanup(check_interval_seconds: int = 60, stale_minutes: int = 30):
     """
     Background task to cleanup stale pending jobs.
     
-    Checks for jobs that have been in 'pending' state for longer than 
-    stale_minutes (default 30). Marks them as 'failed' and refunds credits.
+    Checks for jobs that have been waiting in 'pending' state for longer
+    than stale_minutes (default 30), skipping jobs being dispatched or in
+    retry backoff. Marks them as 'failed' and refunds credits.
+    Processing jobs past their per-model deadline are reclaimed the same way
+    (see processing_timeouts.py).
     """
     logger.info(f"Starting pending jobs cleanup task (interval={check_interval_seconds}s, stale={stale_minutes}m)")
     
@@ -27,13 +75,14 @@ async def run_pending_jobs_cleanup(check_interval_seconds: int = 60, stale_minut
                     user_id = job["user_id"]
                     
                     try:
-                        # 1. Update status to failed
+                        # 1. Update status to failed (unless a worker claimed it meanwhile)
                         logger.info(f"Timing out stale job {job_id}")
-                        jobs_repo.update_status(
-                            job_id, 
-                            "failed", 
-                            error_message=f"Job timeout (pending > {stale_minutes}m)"
-                        )
+                        if not jobs_service.fail_if_stale_pending(
+                            job_id,
+                            f"Job timeout (pending > {stale_minutes}m)",
+                            stale_minutes
+                        ):
+                            continue
                         
                         # 2. Refund credits
                         logger.info(f"Refunding credits for stale job {job_id}")
@@ -49,6 +98,13 @@ async def run_pending_jobs_cleanup(check_interval_seconds: int = 60, stale_minut
             
         except Exception as e:
             logger.error(f"Error in pending jobs cleanup loop: {e}")
+        
+        try:
+            reclaimed = reclaim_stuck_processing_jobs()
+            if reclaimed:
+                logger.info(f"Reclaimed {reclaimed} stuck processing jobs")
+        except Exception as e:
+            logger.error(f"Error reclaiming stuck processing jobs: {e}")
             
         # Sleep until next check
         await asyncio.sleep(check_interval_seconds)
@@ -0,0 +1,40 @@
+# tasks/job_events_relay.py
+"""Background task relaying job events published by other workers."""
+
+import asyncio
+import logging
+import time
+from app.config import settings
+from app.services.job_events import job_event_bus
+
+logger = logging.getLogger(__name__)
+
+
+async def run_job_events_relay(poll_interval_seconds: float = 1.0):
+    """
+    Tail the job_events broker table and fan new events out to local subscribers.
+
+    Events published by this worker are delivered directly and skipped here.
+    The broker is read in a thread so the event loop never blocks on SQLite.
+    Rows older than JOB_EVENTS_RETENTION_MINUTES are pruned every
+    JOB_EVENTS_PRUNE_INTERVAL_SECONDS.
+    """
+    logger.info(f"Starting job events relay (worker={job_event_bus.worker_id}, interval={poll_interval_seconds}s)")
+
+    pruned_at = time.monotonic()
+    while True:
+        try:
+            await asyncio.to_thread(job_event_bus.poll_broker)
+
+            if time.monotonic() - pruned_at >= settings.JOB_EVENTS_PRUNE_INTERVAL_SECONDS:
+                pruned_at = time.monotonic()
+                pruned = await asyncio.to_thread(
+                    job_event_bus.prune_broker, settings.JOB_EVENTS_RETENTION_MINUTES
+                )
+                if pruned:
+                    logger.debug(f"Pruned {pruned} job events")
+
+        except Exception as e:
+            logger.error(f"Error in job events relay loop: {e}")
+
+        await asyncio.sleep(poll_interval_seconds)
@@ -4,14 +4,17 @@
 import asyncio
 import logging
 from app.repositories import jobs_repo
+from app.services import jobs_service
 from app.services.credits_service import credits_service
-from app.services.providers.higgsfield_client import higgsfield_client, HiggsfieldClient
 from app.services.providers.google_client import google_veo_client
-from app.services.job_queue_service import JobQueueService
-from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
+from app.services.account_scheduler import account_scheduler
+from app.services import metrics
 
 logger = logging.getLogger(__name__)
 
+# job_id -> monotonic time of the last provider poll (staleness of our view)
+_last_polled = {}
+
 
 def map_external_status(external_status: str) -> str:
     """Map external API status to our internal status values."""
@@ -27,23 +30,13 @@ def map_external_status(external_status: str) -> str:
     return "processing"
 
 
-def get_higgsfield_client():
-    """
-    Get Higgsfield client using active account from DB (highest priority).
-    Falls back to default .env client if no active accounts found.
-    """
-    try:
-        accounts = higgsfield_accounts_repo.list_accounts(active_only=True)
-        if accounts:
-            # Accounts are already ordered by priority DESC in repo
-            # Pick the first one (highest priority)
-            account_id = accounts[0]['account_id']
-            return HiggsfieldClient.create_from_account(account_id)
-    except Exception as e:
-        logger.error(f"Error fetching Higgsfield account: {e}")
-    
-    # Fallback to default
-    return higgsfield_client
+def _record_completion_detected(job: dict, status: str, labels: dict) -> None:
+    """Observe provider and end-to-end durations once a terminal status is detected."""
+    metrics.jobs_finished_total.inc(status=status, **labels)
+    accepted_at = job.get("provider_accepted_at") or job.get("started_processing_at")
+    if accepted_at:
+        metrics.job_provider_duration_seconds.observe(metrics.elapsed_seconds(accepted_at), **labels)
+    metrics.job_end_to_end_seconds.observe(metrics.elapsed_seconds(job.get("created_at")), **labels)
 
 
 async def run_job_monitor(check_interval_seconds: int = 30):
@@ -56,14 +49,17 @@ async def run_job_monitor(check_interval_seconds: int = 30):
     logger.info(f"Starting job monitor task (interval={check_interval_seconds}s)")
     
     while True:
+        sweep_started = metrics.monotonic()
+        jobs_checked = 0
         try:
-            # Get active higgsfield client for this iteration
-            # We fetch it fresh each loop in case credentials updated
-            client = get_higgsfield_client()
-            
             # Get all active jobs (only ones that have been submitted to provider)
             active_jobs = jobs_repo.get_active_jobs()
             
+            # Forget jobs that are no longer active
+            active_ids = {job["job_id"] for job in active_jobs}
+            for stale_id in [job_id for job_id in _last_polled if job_id not in active_ids]:
+                del _last_polled[stale_id]
+            
             if active_jobs:
                 logger.debug(f"Job monitor: checking {len(active_jobs)} active jobs")
                 
@@ -74,6 +70,15 @@ async def run_job_monitor(check_interval_seconds: int = 30):
                     
                     user_id = job["user_id"]
                     current_status = job["status"]
+                    labels = metrics.job_labels(job)
+                    provider = labels["provider"]
+                    
+                    now = metrics.monotonic()
+                    if job_id in _last_polled:
+                        metrics.job_poll_interval_seconds.observe(now - _last_polled[job_id], provider=provider)
+                    _last_polled[job_id] = now
+                    jobs_checked += 1
+                    metrics.monitor_jobs_checked_total.inc(provider=provider)
                     
                     try:
                         # Determine provider based on job_id format (legacy) or provider_id format
@@ -82,8 +87,15 @@ async def run_job_monitor(check_interval_seconds: int = 30):
                             # Veo3 job
                             result = google_veo_client.get_job_status(provider_job_id)
                         else:
-                            # Kling job - Use dynamic client
-                            result = client.get_job_status(provider_job_id)
+                            # Kling job - use the (cached) client of the account it was submitted on
+                            client = account_scheduler.get_client(job.get("account_id"))
+                            result = await client.get_job_status_async(provider_job_id)
+                        
+                        if jobs_repo.mark_first_polled(job_id):
+                            metrics.job_first_poll_seconds.observe(
+                                metrics.elapsed_seconds(job.get("provider_accepted_at") or job.get("created_at")),
+                                **labels
+                            )
                         
                         # Debug (commented out)
                         # print(f"[JobMonitor] Job {job_id[:8]}... Higgsfield returned: {result}")
@@ -111,20 +123,23 @@ async def run_job_monitor(check_interval_seconds: int = 30):
                             if new_status == "completed":
                                 # Debug (commented out)
                                 # print(f"[JobMonitor] Updating job {job_id} to COMPLETED with URL: {output_url[:50]}...")
-                                success = jobs_repo.update_status(job_id, new_status, output_url=output_url)
+                                success = jobs_service.update_status(job_id, new_status, output_url=output_url)
                                 # Debug (commented out)
                                 # print(f"[JobMonitor] Job {job_id} update returned: {success}")
+                                if success:
+                                    _record_completion_detected(job, new_status, labels)
                                 
                                 # Verify the update (debug - commented out)
                                 # verify_job = jobs_repo.get_by_id(job_id)
                                 # print(f"[JobMonitor] Verified DB status: {verify_job['status'] if verify_job else 'NOT FOUND'}")
                                 
-                                # Job finished, free up slot -> promote next
-                                JobQueueService.promote_next_job(user_id)
+                                # Job finished, slot freed: the status event triggers
+                                # a fair scheduler round (fair_scheduler.py)
                                 
                             elif new_status == "failed":
                                 error_msg = result.get("error", "Generation failed")
-                                jobs_repo.update_status(job_id, new_status, error_message=error_msg)
+                                if jobs_service.update_status(job_id, new_status, error_message=error_msg):
+                                    _record_completion_detected(job, new_status, labels)
                                 
                                 # Refund credits if not already refunded
                                 if not job.get("credits_refunded", False):
@@ -135,14 +150,15 @@ async def run_job_monitor(check_interval_seconds: int = 30):
                                     if refund_result is not None:
                                         logger.info(f"Refunded job {job_id}. New balance: {refund_result}")
                                 
-                                # Job failed (but finished), free up slot -> promote next
-                                JobQueueService.promote_next_job(user_id)
+                                # Job failed (but finished), slot freed: the status event
+                                # triggers a fair scheduler round
                                         
                             else:
                                 # Other status changes (e.g., pending -> processing)
-                                jobs_repo.update_status(job_id, new_status)
+                                jobs_service.update_status(job_id, new_status)
                                 
                     except Exception as e:
+                        metrics.monitor_poll_errors_total.inc(provider=provider)
                         logger.error(f"Error checking job {job_id}: {e}")
                     
                     # Wait between each job check to avoid rate limiting
@@ -151,6 +167,9 @@ async def run_job_monitor(check_interval_seconds: int = 30):
         except Exception as e:
             logger.error(f"Error in job monitor loop: {e}")
         
+        metrics.monitor_sweep_duration_seconds.observe(metrics.monotonic() - sweep_started)
+        metrics.monitor_jobs_checked.set(jobs_checked)
+        
         # Sleep until next check
         await asyncio.sleep(check_interval_seconds)
 
@@ -0,0 +1,37 @@
+# tasks/promotion_sweep.py
+"""Background task sweeping all users for promotable pending jobs."""
+
+import asyncio
+import logging
+from app.services.account_scheduler import account_scheduler
+from app.services.job_queue_service import JobQueueService
+
+logger = logging.getLogger(__name__)
+
+
+async def run_promotion_sweep(check_interval_seconds: int = 15):
+    """
+    Periodically promote pending jobs of users with free capacity.
+    
+    Promotion is normally event-driven (a slot frees up -> fair scheduler
+    round). This sweep is the safety net for failed dispatches and slots
+    freed without an event, so pending jobs don't sit until the 30-minute
+    pending cleanup fails them. It also reconciles the in-memory account
+    capacity table with the database (at most once a minute).
+    """
+    logger.info(f"Starting promotion sweep task (interval={check_interval_seconds}s)")
+    
+    while True:
+        try:
+            users = await asyncio.to_thread(JobQueueService.try_promote_jobs_for_all_users)
+            if users:
+                logger.debug(f"Promotion sweep: {users} users with promotable jobs")
+        except Exception as e:
+            logger.error(f"Error in promotion sweep loop: {e}")
+        
+        try:
+            await asyncio.to_thread(account_scheduler.capacity.maybe_reconcile)
+        except Exception as e:
+            logger.error(f"Error reconciling account capacity: {e}")
+        
+        await asyncio.sleep(check_interval_seconds)
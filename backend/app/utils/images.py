@@ -0,0 +1,50 @@
+# utils/images.py
+"""Image helpers for provider uploads."""
+from dataclasses import dataclass
+from io import BytesIO
+
+from PIL import Image, UnidentifiedImageError
+
+# Formats the providers accept as input images
+UPLOAD_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+
+class InvalidImageError(ValueError):
+    """Uploaded bytes are not an image in a supported format."""
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    width: int
+    height: int
+    format: str     # PIL format name (JPEG, PNG, WEBP)
+    mime_type: str
+
+
+def probe_image(data: bytes) -> ImageInfo:
+    """
+    Dimensions and format of an image from its header.
+
+    PIL's open() is lazy: it parses the header (JPEG SOF marker, PNG IHDR,
+    WebP VP8 chunk) without decoding any pixel data, so this is cheap even
+    for large photos. Raises InvalidImageError for empty, unreadable or
+    unsupported images.
+    """
+    if not data:
+        raise InvalidImageError("Empty image")
+    try:
+        with Image.open(BytesIO(data)) as image:
+            width, height = image.size
+            image_format = image.format
+    except UnidentifiedImageError:
+        raise InvalidImageError("Not a recognized image file")
+    except (Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise InvalidImageError(f"Unreadable image: {e}")
+
+    if image_format not in UPLOAD_FORMATS:
+        raise InvalidImageError(
+            f"Unsupported image format {image_format}; use {', '.join(sorted(UPLOAD_FORMATS))}"
+        )
+    if width <= 0 or height <= 0:
+        raise InvalidImageError(f"Invalid image dimensions {width}x{height}")
+    return ImageInfo(width=width, height=height, format=image_format, mime_type=UPLOAD_FORMATS[image_format])
@@ -42,6 +42,56 @@ def create_access_token(user_id: str, email: str) -> str:
     return token
 
 
+# Token type of job event stream tickets (never accepted as access tokens)
+STREAM_TICKET_TYPE = "stream_ticket"
+
+
+def create_stream_ticket(user_id: str) -> str:
+    """
+    Create a short-lived ticket for the job event stream.
+    
+    EventSource cannot send an Authorization header, so the ticket is
+    passed in the URL, where it may end up in access logs. It only opens
+    the stream and expires after STREAM_TICKET_TTL_SECONDS.
+    
+    Args:
+        user_id: User's internal ID
+        
+    Returns:
+        Encoded JWT ticket string
+    """
+    now = datetime.utcnow()
+    expires = now + timedelta(seconds=settings.STREAM_TICKET_TTL_SECONDS)
+    
+    payload = {
+        "user_id": user_id,
+        "type": STREAM_TICKET_TYPE,
+        "iat": int(now.timestamp()),
+        "exp": int(expires.timestamp())
+    }
+    
+    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+
+
+def decode_stream_ticket(ticket: str) -> dict:
+    """
+    Decode and validate a job event stream ticket.
+    
+    Raises:
+        JWTError: If the ticket is invalid, expired or not a stream ticket
+    """
+    try:
+        payload = jwt.decode(ticket, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise JWTError("Stream ticket has expired")
+    except jwt.InvalidTokenError as e:
+        raise JWTError(f"Invalid stream ticket: {str(e)}")
+    
+    if payload.get("type") != STREAM_TICKET_TYPE:
+        raise JWTError("Not a stream ticket")
+    return payload
+
+
 def decode_access_token(token: str) -> dict:
     """
     Decode and validate a JWT access token.
@@ -61,11 +111,14 @@ def decode_access_token(token: str) -> dict:
             settings.JWT_SECRET,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        return payload
     except jwt.ExpiredSignatureError:
         raise JWTError("Token has expired")
     except jwt.InvalidTokenError as e:
         raise JWTError(f"Invalid token: {str(e)}")
+    
+    if payload.get("type") == STREAM_TICKET_TYPE:
+        raise JWTError("Stream tickets cannot be used as access tokens")
+    return payload
 
 
 def get_token_expiry_seconds() -> int:
@@ -0,0 +1,108 @@
+"""
+Measure per-call latency of one-shot provider requests vs a keep-alive session.
+
+Starts a local HTTP/1.1 keep-alive server standing in for the provider API
+and sends the same number of requests two ways: a new connection per call
+(curl_cffi.requests.post, how HiggsfieldClient used to call) and the
+client's long-lived session (HiggsfieldClient._request). --handshake-ms adds
+a delay to every new connection on the server, to approximate the TCP + TLS
+setup a real provider connection costs. Prints mean/p50/p95 per mode and
+the connections the session opened.
+
+Example:
+    python scripts/benchmark_provider_sessions.py --requests 200 --handshake-ms 40
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, List
+
+# Add backend directory to path so we can import app modules
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BACKEND_DIR))
+
+from curl_cffi import requests
+
+from app.services.providers.higgsfield_client import HiggsfieldClient
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+    disable_nagle_algorithm = True  # headers and body are separate writes
+    handshake_seconds = 0.0
+    body = json.dumps({"job_sets": [{"id": "benchmark"}]}).encode()
+
+    def setup(self):
+        # Runs once per connection: stands in for TCP + TLS setup
+        time.sleep(self.handshake_seconds)
+        super().setup()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(call: Callable[[], object], count: int) -> List[float]:
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one-shot provider requests with a keep-alive session.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per mode")
+    parser.add_argument("--handshake-ms", type=float, default=30.0,
+                        help="Server-side delay per new connection (simulated TCP + TLS setup)")
+    args = parser.parse_args()
+
+    StandInHandler.handshake_seconds = args.handshake_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/jobs/benchmark"
+    payload = json.dumps({"params": {"prompt": "benchmark"}})
+
+    client = HiggsfieldClient(sses="benchmark", cookie="benchmark")
+    modes = {
+        "one-shot": lambda: requests.post(url, data=payload, impersonate="chrome"),
+        "session": lambda: client._request("POST", url, data=payload),
+    }
+
+    print(f"{args.requests} requests per mode, {args.handshake_ms:.0f} ms per new connection\n")
+    print(f"{'mode':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    results = {}
+    for name, call in modes.items():
+        call()  # warm up (imports, curl handle)
+        timings = measure(call, args.requests)
+        results[name] = statistics.mean(timings)
+        print(f"{name:<12}{results[name]:>10.2f}{percentile(timings, 0.50):>10.2f}{percentile(timings, 0.95):>10.2f}")
+
+    server.shutdown()
+    stats = client.session_stats().get("127.0.0.1", {})
+    print(f"\nsession: {stats.get('requests')} requests over {stats.get('connections')} connection(s), "
+          f"{results['one-shot'] - results['session']:.2f} ms saved per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# tests/conftest.py
+"""Shared fixtures: a fresh SQLite database per test, users and jobs."""
+
+import contextlib
+import io
+import json
+import os
+import uuid
+
+# The provider settings are required at import time
+os.environ.setdefault("HIGGSFIELD_SSES", "test-sses")
+os.environ.setdefault("HIGGSFIELD_COOKIE", "test-cookie")
+
+import pytest
+
+from app.database import db
+from app.repositories import jobs_repo
+from app.schemas.jobs import JobCreate
+from app.services.job_events import job_event_bus
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path, monkeypatch):
+    """Point the app at an empty, initialized database in tmp_path."""
+    monkeypatch.setattr(db, "DATABASE_DIR", tmp_path)
+    monkeypatch.setattr(db, "DATABASE_PATH", tmp_path / "app.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.init_database()
+    return tmp_path
+
+
+@pytest.fixture
+def make_user():
+    """Create a user on a plan (1 Free, 2 Starter, 3 Professional, 4 Business)."""
+    def make(user_id: str = "u1", credits: int = 1000, plan_id: int = 1) -> str:
+        db.execute(
+            """
+            INSERT INTO users (user_id, google_id, email, username, credits, plan_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (user_id, f"g-{user_id}", f"{user_id}@example.com", user_id, credits, plan_id)
+        )
+        return user_id
+    return make
+
+
+@pytest.fixture
+def make_account():
+    """Create an active Higgsfield account row."""
+    def make(name: str = "acc-1", **limits) -> int:
+        columns = ["name", "sses", "cookie", *limits]
+        return db.execute_returning_id(
+            f"""
+            INSERT INTO higgsfield_accounts ({", ".join(columns)})
+            VALUES ({", ".join("?" for _ in columns)})
+            """,
+            (name, f"sses-{name}", f"cookie-{name}", *limits.values())
+        )
+    return make
+
+
+@pytest.fixture
+def make_job():
+    """Insert a job row directly (no events, no credits)."""
+    def make(
+        user_id: str = "u1",
+        job_type: str = "t2i",
+        model: str = "nano-banana",
+        status: str = "pending",
+        dispatch_state: str = None,
+        **params
+    ) -> dict:
+        job_data = JobCreate(
+            job_id=params.pop("job_id", None) or uuid.uuid4().hex,
+            user_id=user_id,
+            type=job_type,
+            model=model,
+            prompt="test prompt",
+            input_params=json.dumps(params),
+            credits_cost=10,
+            is_slow=False,
+        )
+        return jobs_repo.create(job_data, status, dispatch_state)
+    return make
+
+
+@pytest.fixture
+def job_events():
+    """Collect the events published on the job event bus during the test."""
+    events = []
+    job_event_bus.add_listener(events.append)
+    yield events
+    job_event_bus._listeners.remove(events.append)
@@ -0,0 +1,98 @@
+"""In-memory account capacity table (AccountCapacityTracker in account_scheduler.py)."""
+
+from app.database.db import execute
+from app.services.account_scheduler import AccountCapacityTracker, AccountScheduler
+
+
+def _tracker() -> AccountCapacityTracker:
+    """A tracker loaded from the database, as on startup."""
+    tracker = AccountCapacityTracker(AccountScheduler().classify_job_as_slow)
+    tracker.reconcile()
+    return tracker
+
+
+def _bind(job: dict, account_id: int) -> dict:
+    execute("UPDATE jobs SET account_id = ? WHERE job_id = ?", (account_id, job["job_id"]))
+    return {**job, "account_id": account_id}
+
+
+def test_acquire_counts_jobs_up_to_the_limit(make_account):
+    account_id = make_account(max_parallel_images=2)
+    tracker = _tracker()
+
+    assert tracker.acquire("j1", "t2i", False) == account_id
+    assert tracker.acquire("j2", "t2i", False) == account_id
+    assert tracker.acquire("j3", "t2i", False) is None
+    assert tracker.get_stats(account_id)["image_jobs"] == 2
+
+    tracker.release("j1")
+    assert tracker.acquire("j3", "t2i", False) == account_id
+
+
+def test_image_and_video_slots_are_separate(make_account):
+    account_id = make_account(max_parallel_images=1, max_parallel_videos=1)
+    tracker = _tracker()
+
+    assert tracker.acquire("image", "t2i", False) == account_id
+    assert tracker.acquire("video", "t2v", False) == account_id
+    assert not tracker.can_start(account_id, "i2i", False)
+    assert not tracker.can_start(account_id, "i2v", False)
+
+
+def test_acquire_again_does_not_count_the_job_twice(make_account):
+    account_id = make_account(max_parallel_images=1)
+    tracker = _tracker()
+
+    assert tracker.acquire("j1", "t2i", False) == account_id
+    assert tracker.acquire("j1", "t2i", False) == account_id
+    assert tracker.get_stats(account_id)["image_jobs"] == 1
+
+
+def test_spills_over_to_the_next_account(make_account):
+    first = make_account("acc-1", max_parallel_images=1, priority=200)
+    second = make_account("acc-2", max_parallel_images=1, priority=100)
+    tracker = _tracker()
+
+    assert tracker.acquire("j1", "t2i", False) == first
+    assert tracker.acquire("j2", "t2i", False) == second
+    assert tracker.acquire("j3", "t2i", False) is None
+
+
+def test_job_events_bind_and_release_jobs(make_account):
+    account_id = make_account(max_parallel_images=1)
+    tracker = _tracker()
+
+    # Bound by another process
+    tracker.on_job_event({"job_id": "j1", "status": "processing", "account_id": account_id, "type": "t2i"})
+    assert not tracker.can_start(account_id, "t2i", False)
+
+    tracker.on_job_event({"job_id": "j1", "status": "completed", "account_id": account_id})
+    assert tracker.can_start(account_id, "t2i", False)
+
+
+def test_reconcile_rebuilds_counts_from_the_database(make_user, make_job, make_account):
+    make_user("u1")
+    account_id = make_account()
+    _bind(make_job(status="processing"), account_id)
+    _bind(make_job(job_type="t2v", model="kling-2.6", status="pending"), account_id)
+    _bind(make_job(status="completed"), account_id)
+    tracker = _tracker()
+    tracker.acquire("lost", "t2i", False)  # Its finished event was missed
+
+    tracker.reconcile()
+
+    assert tracker.get_stats(account_id) == {
+        "total_jobs": 2, "image_jobs": 1, "video_jobs": 1, "slow_image_jobs": 0, "slow_video_jobs": 0,
+    }
+
+
+def test_deactivated_accounts_take_no_jobs(make_account):
+    account_id = make_account()
+    tracker = _tracker()
+    assert tracker.has_active_accounts()
+
+    execute("UPDATE higgsfield_accounts SET is_active = 0 WHERE account_id = ?", (account_id,))
+    tracker.reconcile()
+
+    assert not tracker.has_active_accounts()
+    assert tracker.acquire("j1", "t2i", False) is None
@@ -0,0 +1,129 @@
+"""Account health, quarantine and probation (account_health.py)."""
+
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.account_health import (
+    HEALTHY,
+    PROBATION,
+    QUARANTINED,
+    AccountHealth,
+    is_auth_error,
+    status_code_of,
+)
+from app.services.job_queue_service import is_account_error, is_transient_error
+from app.services.providers.higgsfield_client import HiggsfieldAPIError
+
+AUTH_ERROR = Exception("Higgsfield API Error 401: unauthorized")
+SERVER_ERROR = Exception("Higgsfield API Error 503")
+
+
+@pytest.fixture(autouse=True)
+def health_settings(monkeypatch):
+    monkeypatch.setattr(settings, "ACCOUNT_HEALTH_WINDOW_SECONDS", 600.0)
+    monkeypatch.setattr(settings, "ACCOUNT_HEALTH_MIN_SAMPLES", 4)
+    monkeypatch.setattr(settings, "ACCOUNT_MAX_ERROR_RATE", 0.5)
+    monkeypatch.setattr(settings, "ACCOUNT_AUTH_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "ACCOUNT_QUARANTINE_SECONDS", 100.0)
+    monkeypatch.setattr(settings, "ACCOUNT_QUARANTINE_MAX_SECONDS", 300.0)
+
+
+def test_auth_errors_are_recognized():
+    assert is_auth_error(AUTH_ERROR)
+    assert is_auth_error(Exception("JWT token not found"))
+    assert not is_auth_error(SERVER_ERROR)
+    assert not is_auth_error(None)
+
+
+def test_status_code_comes_from_the_error_before_the_message():
+    assert status_code_of(HiggsfieldAPIError("Upload rejected: token expired", 401)) == 401
+    assert status_code_of(HiggsfieldAPIError("Generate failed with status 500: oops", 503)) == 503
+    assert status_code_of(SERVER_ERROR) == 503
+    assert status_code_of(Exception("connection reset")) is None
+    assert status_code_of(None) is None
+
+
+def test_error_classes_use_the_status_attribute():
+    expired = HiggsfieldAPIError("Upload rejected: token expired", 401)
+    bad_request = HiggsfieldAPIError("Generate rejected", 422)
+    throttled = HiggsfieldAPIError("Slow down", 429)
+
+    assert is_auth_error(expired) and is_account_error(expired)
+    assert not is_transient_error(bad_request) and not is_account_error(bad_request)
+    assert is_transient_error(throttled)
+
+
+def test_consecutive_auth_failures_quarantine():
+    health = AccountHealth()
+    health.record_failure(1, AUTH_ERROR, now=0)
+    assert health.status(1, now=1) == HEALTHY
+
+    health.record_failure(1, AUTH_ERROR, now=2)
+    assert health.status(1, now=3) == QUARANTINED
+    assert not health.is_selectable(1, now=3)
+
+
+def test_error_rate_quarantines_after_enough_samples():
+    health = AccountHealth()
+    health.record_success(1, now=0)
+    health.record_failure(1, SERVER_ERROR, now=1)
+    health.record_success(1, now=2)
+    assert health.status(1, now=2) == HEALTHY  # 1 error in 3: too few samples
+
+    health.record_failure(1, SERVER_ERROR, now=3)
+    assert health.status(1, now=3) == QUARANTINED
+
+
+def test_probation_admits_one_probe_and_recovers():
+    health = AccountHealth()
+    health.record_failure(1, AUTH_ERROR, now=0)
+    health.record_failure(1, AUTH_ERROR, now=0)
+
+    assert health.status(1, now=101) == PROBATION
+    assert health.is_selectable(1, now=101)
+    health.start_probe(1, "probe-job", now=101)
+    assert not health.is_selectable(1, now=102)
+
+    health.record_success(1, now=110)
+    assert health.status(1, now=110) == HEALTHY
+    assert health.is_selectable(1, now=111)
+
+
+def test_failed_probe_doubles_the_quarantine_up_to_the_max():
+    health = AccountHealth()
+    health.record_failure(1, AUTH_ERROR, now=0)
+    health.record_failure(1, AUTH_ERROR, now=0)  # 100s
+
+    health.start_probe(1, "probe-1", now=100)
+    health.record_failure(1, SERVER_ERROR, now=101)  # 200s
+    assert health.status(1, now=300) == QUARANTINED
+    assert health.status(1, now=301) == PROBATION
+
+    health.record_failure(1, SERVER_ERROR, now=301)  # Capped at 300s
+    assert health.status(1, now=600) == QUARANTINED
+    assert health.status(1, now=601) == PROBATION
+
+
+def test_cancelled_probe_frees_probation():
+    health = AccountHealth()
+    health.record_failure(1, AUTH_ERROR, now=0)
+    health.record_failure(1, AUTH_ERROR, now=0)
+    health.start_probe(1, "probe-job", now=101)
+
+    health.cancel_probe(1, "probe-job")
+    assert health.needs_probe(1, now=102)
+
+
+def test_snapshot_scores_zero_while_quarantined():
+    health = AccountHealth()
+    now = time.monotonic()  # snapshot() reads the real clock
+    health.record_failure(1, AUTH_ERROR, now=now)
+    health.record_failure(1, AUTH_ERROR, now=now)
+
+    snapshot = health.snapshot(1)
+    assert snapshot["status"] == QUARANTINED
+    assert snapshot["score"] == 0.0
+    assert snapshot["quarantine_remaining_seconds"] == 100
+    assert snapshot["last_error"] == str(AUTH_ERROR)
@@ -0,0 +1,88 @@
+"""Account selection policies (account_policies.py)."""
+
+import json
+
+import pytest
+
+from app.repositories import settings_repo
+from app.services import account_policies
+from app.services.account_policies import (
+    AccountLatency,
+    LatencyAwarePolicy,
+    LeastLoadedPolicy,
+    SelectionPolicy,
+    StrictPriorityPolicy,
+    WeightedRoundRobinPolicy,
+)
+from app.services.account_scheduler import AccountSlots
+
+
+def _account(account_id: int, priority: int = 100, **counts) -> AccountSlots:
+    return AccountSlots(
+        account_id=account_id,
+        priority=priority,
+        is_active=True,
+        max_parallel_images=4,
+        max_parallel_videos=4,
+        max_slow_images=2,
+        max_slow_videos=2,
+        **counts
+    )
+
+
+def test_selection_policy_is_abstract():
+    with pytest.raises(TypeError):
+        SelectionPolicy()
+
+    class NoChoice(SelectionPolicy):
+        name = "no_choice"
+
+    with pytest.raises(TypeError):
+        NoChoice()
+
+
+def test_strict_priority_spreads_slow_jobs():
+    candidates = [_account(1, 200, slow_image_jobs=1), _account(2, 100)]
+    policy = StrictPriorityPolicy()
+
+    assert policy.choose(candidates, "t2i", False, AccountLatency()) == 1
+    assert policy.choose(candidates, "t2i", True, AccountLatency()) == 2
+
+
+def test_weighted_round_robin_follows_priority():
+    candidates = [_account(1, 3), _account(2, 1)]
+    policy = WeightedRoundRobinPolicy()
+
+    picks = [policy.choose(candidates, "t2i", False, AccountLatency()) for _ in range(8)]
+    assert picks.count(1) == 6
+    assert picks.count(2) == 2
+
+
+def test_least_loaded_picks_the_emptiest_account():
+    candidates = [_account(1, image_jobs=3), _account(2, image_jobs=1)]
+
+    assert LeastLoadedPolicy().choose(candidates, "t2i", False, AccountLatency()) == 2
+
+
+def test_latency_aware_prefers_the_faster_account():
+    latency = AccountLatency()
+    latency.observe_completion(1, "t2v", 60)
+    latency.observe_completion(2, "t2v", 20)
+    candidates = [_account(1), _account(2)]
+
+    assert LatencyAwarePolicy().choose(candidates, "t2v", False, latency) == 2
+    # Without samples it falls back to least_loaded
+    assert LatencyAwarePolicy().choose([_account(1, video_jobs=2), _account(2)], "t2v", False, AccountLatency()) == 2
+
+
+def test_policy_config_ignores_unknown_policies():
+    settings_repo.update_setting(
+        account_policies.SETTING_KEY, json.dumps({"t2v": "least_loaded", "t2i": "fastest"})
+    )
+
+    config = account_policies.get_policy_config()
+    assert config == {"default": "strict_priority", "t2v": "least_loaded"}
+
+    policies = account_policies.build_policies(config)
+    assert isinstance(policies["t2v"], LeastLoadedPolicy)
+    assert isinstance(policies["default"], StrictPriorityPolicy)
@@ -0,0 +1,102 @@
+"""Grouped account stats and the /accounts/capacity dashboard."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database.db import execute
+from app.deps import get_current_admin
+from app.repositories.higgsfield_accounts_repo import higgsfield_accounts_repo
+from app.routers import admin_accounts
+
+
+def _timestamp(seconds_ago: int) -> str:
+    return (datetime.utcnow() - timedelta(seconds=seconds_ago)).isoformat() + 'Z'
+
+
+@pytest.fixture
+def admin_api():
+    app = FastAPI()
+    app.include_router(admin_accounts.router, prefix="/api/admin/higgsfield")
+    app.dependency_overrides[get_current_admin] = lambda: {"user_id": "admin"}
+    return TestClient(app)
+
+
+@pytest.fixture
+def accounts(make_user, make_job, make_account):
+    """Two accounts with in-flight and finished jobs bound to them."""
+    make_user("u1")
+    busy = make_account("busy", max_parallel_images=4, max_slow_videos=2)
+    idle = make_account("idle")
+
+    def bind(job, account_id, is_slow=False, finished_ago=None):
+        execute(
+            "UPDATE jobs SET account_id = ?, is_slow = ?, completed_at = ?, started_processing_at = ? WHERE job_id = ?",
+            (
+                account_id, is_slow,
+                _timestamp(finished_ago) if finished_ago is not None else None,
+                _timestamp(finished_ago + 20) if finished_ago is not None else None,
+                job["job_id"],
+            )
+        )
+
+    bind(make_job(status="processing"), busy)
+    bind(make_job(status="pending"), busy)
+    bind(make_job(job_type="t2v", model="kling-2.6", status="processing"), busy, is_slow=True)
+    bind(make_job(status="completed"), busy, finished_ago=60)
+    bind(make_job(status="failed"), busy, finished_ago=120)
+    bind(make_job(status="completed"), busy, finished_ago=3600)  # Outside the window
+    return busy, idle
+
+
+def test_grouped_stats_match_the_per_account_query(accounts):
+    by_account = higgsfield_accounts_repo.get_stats_by_account()
+
+    for account_id in accounts:
+        expected = higgsfield_accounts_repo.get_account_stats(account_id)
+        assert by_account.get(account_id, higgsfield_accounts_repo.empty_stats()) == expected
+    assert by_account[accounts[0]] == {
+        "total_jobs": 3, "image_jobs": 2, "video_jobs": 1, "slow_image_jobs": 0, "slow_video_jobs": 1,
+    }
+
+
+def test_recent_completions_within_the_window(accounts):
+    busy, idle = accounts
+    recent = higgsfield_accounts_repo.get_recent_completions(minutes=15)
+
+    assert idle not in recent
+    assert recent[busy]["completed_jobs"] == 1
+    assert recent[busy]["failed_jobs"] == 1
+    assert recent[busy]["avg_completion_seconds"] == pytest.approx(20, abs=1)
+
+
+def test_capacity_dashboard(admin_api, accounts):
+    busy, idle = accounts
+    response = admin_api.get("/api/admin/higgsfield/accounts/capacity?window_minutes=15")
+    assert response.status_code == 200
+    body = response.json()
+
+    by_id = {account["account_id"]: account for account in body["accounts"]}
+    assert by_id[busy]["utilization"]["image"] == 0.5
+    assert by_id[busy]["utilization"]["slow_video"] == 0.5
+    assert by_id[busy]["recent"]["completed_jobs"] == 1
+    assert by_id[idle]["in_flight"]["total_jobs"] == 0
+    assert by_id[idle]["recent"]["avg_completion_seconds"] is None
+
+    totals = body["totals"]
+    assert totals["in_flight"]["total_jobs"] == 3
+    assert totals["limits"]["max_parallel_images"] == 4 + 8
+    assert totals["failed_jobs"] == 1
+
+
+def test_inactive_accounts_are_left_out_of_the_totals(admin_api, accounts):
+    busy, _ = accounts
+    execute("UPDATE higgsfield_accounts SET is_active = 0 WHERE account_id = ?", (busy,))
+
+    totals = admin_api.get("/api/admin/higgsfield/accounts/capacity").json()["totals"]
+
+    assert totals["in_flight"]["total_jobs"] == 0
+    assert totals["limits"]["max_parallel_images"] == 8
+    assert totals["completed_jobs"] == 1  # Finished jobs still count
@@ -0,0 +1,87 @@
+"""Waiting for an account without blocking the event loop (AccountScheduler.wait_for_account)."""
+
+import asyncio
+
+from app.services import account_scheduler as account_scheduler_module
+from app.services.account_scheduler import AccountScheduler
+
+
+def _full_scheduler(make_account) -> tuple:
+    """A scheduler with one image slot, already taken by job "busy"."""
+    scheduler = AccountScheduler()
+    account_id = make_account(max_parallel_images=1)
+    assert scheduler.capacity.acquire("busy", "t2i", False) == account_id
+    return scheduler, account_id
+
+
+def test_release_wakes_the_waiter(make_account):
+    scheduler, account_id = _full_scheduler(make_account)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, scheduler.release_job, "busy")
+        started = loop.time()
+        result = await scheduler.wait_for_account(
+            "t2i", "nano-banana", job_id="j1", timeout=5, recheck_interval=5
+        )
+        return result, loop.time() - started
+
+    result, waited = asyncio.run(scenario())
+    assert result == account_id
+    assert waited < 1  # Woken by the release, not the recheck
+    assert scheduler.capacity.get_stats(account_id)["image_jobs"] == 1
+
+
+def test_times_out_without_capacity(make_account):
+    scheduler, _ = _full_scheduler(make_account)
+
+    result = asyncio.run(scheduler.wait_for_account("t2i", "nano-banana", timeout=0.1, recheck_interval=0.05))
+
+    assert result is None
+    assert scheduler.capacity.waiters.count() == 0
+
+
+def test_waiters_are_served_in_arrival_order(make_account):
+    scheduler, account_id = _full_scheduler(make_account)
+    served = []
+
+    async def wait(job_id):
+        if await scheduler.wait_for_account("t2i", "nano-banana", job_id=job_id, timeout=5):
+            served.append(job_id)
+            await asyncio.sleep(0.02)
+            scheduler.release_job(job_id)
+
+    async def scenario():
+        tasks = []
+        for job_id in ("first", "second", "third"):
+            tasks.append(asyncio.create_task(wait(job_id)))
+            await asyncio.sleep(0.01)
+        scheduler.release_job("busy")
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert served == ["first", "second", "third"]
+
+
+def test_video_release_does_not_wake_image_waiters(make_account):
+    scheduler, _ = _full_scheduler(make_account)
+
+    async def scenario():
+        waiter = scheduler.capacity.waiters.enqueue(("t2i", False), asyncio.get_running_loop())
+        scheduler.capacity.waiters.notify("t2v")
+        await asyncio.sleep(0.01)
+        woken_by_video = waiter.future.done()
+        scheduler.capacity.waiters.notify("i2i")
+        await asyncio.sleep(0.01)
+        return woken_by_video, waiter.future.done()
+
+    assert asyncio.run(scenario()) == (False, True)
+
+
+def test_without_accounts_the_default_client_is_used_right_away():
+    scheduler = AccountScheduler()
+
+    account_id, client = asyncio.run(scheduler.wait_for_client_for_job("t2i", "nano-banana", "j1", timeout=5))
+
+    assert account_id is None
+    assert client is account_scheduler_module.higgsfield_client
@@ -0,0 +1,67 @@
+"""Stale pending job sweep (tasks/cleanup.py)."""
+
+from datetime import datetime, timedelta
+
+from app.database.db import execute
+from app.repositories import jobs_repo
+from app.services import jobs_service
+
+
+def _iso(minutes_ago: float) -> str:
+    return (datetime.utcnow() - timedelta(minutes=minutes_ago)).isoformat() + 'Z'
+
+
+def _age(job_id: str, minutes: float, **columns) -> None:
+    assignments = ", ".join(f"{name} = ?" for name in columns)
+    execute(
+        f"UPDATE jobs SET created_at = ?{', ' + assignments if columns else ''} WHERE job_id = ?",
+        (_iso(minutes), *columns.values(), job_id)
+    )
+
+
+def test_stale_sweep_skips_leased_and_backing_off_jobs(make_user, make_job):
+    make_user("u1")
+    stale = make_job(dispatch_state="queued")["job_id"]
+    retry_due_long_ago = make_job(dispatch_state="queued")["job_id"]
+    leased = make_job(dispatch_state="queued")["job_id"]
+    backing_off = make_job(dispatch_state="queued")["job_id"]
+    recent_retry = make_job(dispatch_state="queued")["job_id"]
+    fresh = make_job(dispatch_state="queued")["job_id"]
+
+    _age(stale, 45)
+    _age(retry_due_long_ago, 90, next_attempt_at=_iso(40))
+    _age(leased, 45)
+    jobs_repo.claim_for_dispatch(leased, "worker-1", 60)
+    _age(backing_off, 45, next_attempt_at=_iso(-5))
+    _age(recent_retry, 90, next_attempt_at=_iso(1))
+    _age(fresh, 5)
+
+    found = {job["job_id"] for job in jobs_repo.get_stale_pending_jobs(minutes=30)}
+    assert found == {stale, retry_due_long_ago}
+
+
+def test_legacy_pending_jobs_without_dispatch_state_are_stale(make_user, make_job):
+    make_user("u1")
+    legacy = make_job()["job_id"]
+    execute("UPDATE jobs SET dispatch_state = NULL WHERE job_id = ?", (legacy,))
+    _age(legacy, 45)
+
+    assert [job["job_id"] for job in jobs_repo.get_stale_pending_jobs(30)] == [legacy]
+    assert jobs_service.fail_if_stale_pending(legacy, "Job timeout", 30)
+    assert jobs_repo.get_by_id(legacy)["status"] == "failed"
+
+
+def test_stale_fail_is_conditional(make_user, make_job):
+    make_user("u1")
+    job_id = make_job(dispatch_state="queued")["job_id"]
+    _age(job_id, 45)
+    assert [job["job_id"] for job in jobs_repo.get_stale_pending_jobs(30)] == [job_id]
+
+    # A worker claims the job between the sweep's read and its write
+    assert jobs_repo.claim_for_dispatch(job_id, "worker-1", 60)
+    assert not jobs_service.fail_if_stale_pending(job_id, "Job timeout", 30)
+    assert jobs_repo.get_by_id(job_id)["status"] == "pending"
+
+    jobs_repo.release_dispatch_claim(job_id, "worker-1")
+    assert jobs_service.fail_if_stale_pending(job_id, "Job timeout", 30)
+    assert jobs_repo.get_by_id(job_id)["status"] == "failed"
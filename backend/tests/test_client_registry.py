@@ -0,0 +1,142 @@
+"""Higgsfield client reuse and HTTP session cleanup (client_registry.py)."""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database.db import execute
+from app.deps import get_current_admin
+from app.routers import admin_accounts
+from app.services.providers import client_registry, higgsfield_client as higgsfield_module
+from app.services.providers.client_registry import HiggsfieldClientRegistry
+from app.services.providers.higgsfield_client import HiggsfieldClient
+
+
+@pytest.fixture
+def closed(monkeypatch):
+    """Clients closed through close() or aclose()."""
+    closed = []
+
+    async def aclose(self):
+        closed.append(self)
+
+    monkeypatch.setattr(HiggsfieldClient, "close", lambda self: closed.append(self))
+    monkeypatch.setattr(HiggsfieldClient, "aclose", aclose)
+    return closed
+
+
+def test_clients_are_reused_per_account(make_account):
+    registry = HiggsfieldClientRegistry()
+    account_id = make_account()
+
+    assert registry.get(account_id) is registry.get(account_id)
+    assert registry.get(None) is client_registry.higgsfield_client
+
+
+def test_unknown_accounts_get_the_default_client():
+    assert HiggsfieldClientRegistry().get(999) is client_registry.higgsfield_client
+
+
+def test_invalidate_closes_the_dropped_client(make_account, closed):
+    registry = HiggsfieldClientRegistry()
+    account_id = make_account()
+    client = registry.get(account_id)
+
+    registry.invalidate(account_id)
+
+    assert closed == [client]
+    assert registry.get(account_id) is not client
+
+
+def test_sync_closes_clients_of_changed_accounts(make_account, closed):
+    registry = HiggsfieldClientRegistry()
+    changed, unchanged = make_account("acc-1"), make_account("acc-2")
+    changed_client, unchanged_client = registry.get(changed), registry.get(unchanged)
+    execute("UPDATE higgsfield_accounts SET cookie = 'rotated' WHERE account_id = ?", (changed,))
+
+    registry.sync(client_registry.higgsfield_accounts_repo.list_accounts())
+
+    assert closed == [changed_client]
+    assert registry.get(unchanged) is unchanged_client
+
+
+def test_sync_drops_deleted_accounts(make_account, closed):
+    registry = HiggsfieldClientRegistry()
+    account_id = make_account()
+    client = registry.get(account_id)
+
+    registry.sync([])
+
+    assert closed == [client]
+    assert registry.session_stats(account_id) is None
+
+
+def test_credential_update_rebuilds_the_client(make_account, closed, monkeypatch):
+    registry = HiggsfieldClientRegistry()
+    monkeypatch.setattr(admin_accounts.account_scheduler, "invalidate_client", registry.invalidate)
+    app = FastAPI()
+    app.include_router(admin_accounts.router)
+    app.dependency_overrides[get_current_admin] = lambda: {"user_id": "admin"}
+    account_id = make_account()
+    old = registry.get(account_id)
+
+    response = TestClient(app).put(f"/accounts/{account_id}", json={"cookie": "rotated"})
+
+    assert response.status_code == 200
+    assert closed == [old]
+    assert registry.get(account_id).cookie == "rotated"
+
+
+def test_shutdown_closes_every_client(make_account, closed):
+    registry = HiggsfieldClientRegistry()
+    client = registry.get(make_account())
+
+    asyncio.run(registry.close())
+
+    assert closed == [client, client_registry.higgsfield_client]
+
+
+def test_aclose_closes_both_sessions():
+    client = HiggsfieldClient(sses="sses", cookie="cookie")
+
+    async def scenario():
+        session, _ = client._async_context()
+        await client.aclose()
+        return session
+
+    session = asyncio.run(scenario())
+    assert session._closed
+    assert client._session._closed
+
+
+def test_new_event_loop_retires_the_previous_session(monkeypatch):
+    client = HiggsfieldClient(sses="sses", cookie="cookie")
+    retired = []
+    monkeypatch.setattr(
+        higgsfield_module, "_close_async_session",
+        lambda loop, session: retired.append(session)
+    )
+
+    async def session():
+        return client._async_context()[0]
+
+    first = asyncio.run(session())
+    second = asyncio.run(session())
+
+    assert first is not second
+    assert retired == [first]
+    client.close()
+
+
+def test_session_of_a_running_loop_is_closed_on_that_loop():
+    client = HiggsfieldClient(sses="sses", cookie="cookie")
+
+    async def scenario():
+        session, _ = client._async_context()
+        client.close()  # Sync close from the loop: scheduled on it
+        await asyncio.sleep(0.05)
+        return session
+
+    assert asyncio.run(scenario())._closed
@@ -0,0 +1,91 @@
+"""Atomic slot reservation against the plan limits (ConcurrencyService.reserve_job)."""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.database.db import fetch_all, fetch_one
+from app.schemas.jobs import JobCreate
+from app.services.concurrency_service import ConcurrencyService
+from app.services.credits_service import InsufficientCreditsError
+
+
+def _job(job_type: str = "t2i", model: str = "nano-banana", credits_cost: int = 10) -> JobCreate:
+    return JobCreate(
+        job_id=uuid.uuid4().hex,
+        user_id="u1",
+        type=job_type,
+        model=model,
+        prompt="test prompt",
+        input_params="{}",
+        credits_cost=credits_cost,
+    )
+
+
+def _credits() -> int:
+    return fetch_one("SELECT credits FROM users WHERE user_id = 'u1'")["credits"]
+
+
+def _reserve(job_data: JobCreate) -> dict:
+    return ConcurrencyService.reserve_job(job_data, "test job")
+
+
+def test_start_then_queue_then_reject(make_user):
+    make_user("u1", credits=1000, plan_id=1)  # Free: 1 image at a time, 3 queued
+
+    decisions = [_reserve(_job())["decision"] for _ in range(5)]
+
+    assert decisions == ["start", "queue", "queue", "queue", "reject"]
+    assert len(fetch_all("SELECT job_id FROM jobs")) == 4
+    assert _credits() == 1000 - 4 * 10
+
+
+def test_type_limits_are_separate(make_user):
+    make_user("u1", plan_id=1)
+
+    assert _reserve(_job("t2i"))["decision"] == "start"
+    assert _reserve(_job("t2v", "kling-2.5-turbo"))["decision"] == "start"
+    assert _reserve(_job("i2i"))["decision"] == "queue"
+
+
+def test_started_job_counts_as_active(make_user):
+    make_user("u1", plan_id=1)
+
+    result = _reserve(_job())
+
+    assert result["dispatch_state"] == "accepted"
+    assert result["credits_remaining"] == 990
+    usage = ConcurrencyService.get_active_job_counts("u1")
+    assert (usage["image_active"], usage["total_pending"]) == (1, 0)
+
+
+def test_queued_job_gets_an_estimate(make_user):
+    make_user("u1", plan_id=1)
+    _reserve(_job())
+
+    result = _reserve(_job())
+
+    assert result["dispatch_state"] == "queued"
+    assert result["queue_position"] == 1
+
+
+def test_insufficient_credits_create_nothing(make_user):
+    make_user("u1", credits=5, plan_id=1)
+
+    with pytest.raises(InsufficientCreditsError):
+        _reserve(_job(credits_cost=10))
+
+    assert fetch_all("SELECT job_id FROM jobs") == []
+    assert _credits() == 5
+
+
+def test_concurrent_reservations_never_overshoot(make_user):
+    make_user("u1", credits=1000, plan_id=1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: _reserve(_job()), range(8)))
+
+    decisions = sorted(result["decision"] for result in results)
+    assert decisions == ["queue"] * 3 + ["reject"] * 4 + ["start"]
+    assert _credits() == 1000 - 4 * 10
@@ -0,0 +1,132 @@
+"""Dispatch retries with backoff and the dead letter (job_queue_service.py)."""
+
+import pytest
+
+from app.config import settings
+from app.database.db import execute, fetch_one
+from app.repositories import jobs_repo
+from app.services import job_queue_service
+from app.services.job_queue_service import (
+    JobQueueService,
+    is_transient_error,
+    retry_delay_seconds,
+)
+
+
+@pytest.fixture(autouse=True)
+def account_slots(monkeypatch):
+    """Ignore account slot bookkeeping: these jobs are not bound to accounts."""
+    scheduler = job_queue_service.account_scheduler
+    monkeypatch.setattr(scheduler, "release_job", lambda job_id: None)
+    monkeypatch.setattr(scheduler, "record_failure", lambda job_id, error: None)
+
+
+def _fail_with(monkeypatch, error):
+    def execute_job(job, raise_errors=False):
+        raise error
+    monkeypatch.setattr(job_queue_service.Dispatcher, "execute_job", staticmethod(execute_job))
+
+
+def _credits(user_id: str = "u1") -> int:
+    return fetch_one("SELECT credits FROM users WHERE user_id = ?", (user_id,))["credits"]
+
+
+@pytest.mark.parametrize("message, transient", [
+    ("Connection reset by peer", True),
+    ("Higgsfield API Error 503: unavailable", True),
+    ("Higgsfield API Error 429: slow down", True),
+    ("Request failed with status 408", True),
+    ("Higgsfield API Error 400: bad prompt", False),
+    ("Unknown model: foo", False),
+])
+def test_is_transient_error(message, transient):
+    assert is_transient_error(Exception(message)) is transient
+
+
+def test_missing_provider_id_is_transient():
+    assert is_transient_error(None)
+
+
+def test_retry_delay_backs_off_with_equal_jitter(monkeypatch):
+    monkeypatch.setattr(settings, "DISPATCH_RETRY_BASE_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "DISPATCH_RETRY_MAX_SECONDS", 60.0)
+
+    for attempt, delay in ((1, 10), (2, 20), (3, 40), (4, 60), (10, 60)):
+        for _ in range(20):
+            assert delay / 2 <= retry_delay_seconds(attempt) <= delay
+
+
+def test_transient_failure_is_retried_later(make_user, make_job, monkeypatch):
+    make_user("u1")
+    job_id = make_job()["job_id"]
+    _fail_with(monkeypatch, Exception("Higgsfield API Error 503"))
+
+    assert JobQueueService.dispatch_job(job_id) is None
+
+    job = jobs_repo.get_by_id(job_id)
+    assert job["status"] == "pending"
+    assert job["dispatch_state"] == "queued"
+    assert job["dispatch_attempts"] == 1
+    assert job["next_attempt_at"]
+    assert job["lease_owner"] is None
+    # Backing off: not claimable before next_attempt_at
+    assert JobQueueService.dispatch_job(job_id) is None
+    assert jobs_repo.get_by_id(job_id)["dispatch_attempts"] == 1
+
+
+def test_permanent_failure_is_dead_lettered_and_refunded(make_user, make_job, monkeypatch, job_events):
+    make_user("u1", credits=100)
+    job_id = make_job()["job_id"]
+    _fail_with(monkeypatch, Exception("Higgsfield API Error 400: bad prompt"))
+
+    assert JobQueueService.dispatch_job(job_id) is None
+
+    job = jobs_repo.get_by_id(job_id)
+    assert job["status"] == "failed"
+    assert job["dispatch_state"] == "dead_letter"
+    assert "bad prompt" in job["error_message"]
+    assert job["credits_refunded"]
+    assert _credits() == 110
+    assert job_events[-1]["status"] == "failed"
+
+
+def test_exhausted_attempts_are_dead_lettered(make_user, make_job, monkeypatch):
+    monkeypatch.setattr(settings, "DISPATCH_MAX_ATTEMPTS", 3)
+    make_user("u1")
+    job_id = make_job()["job_id"]
+    execute("UPDATE jobs SET dispatch_attempts = 2 WHERE job_id = ?", (job_id,))
+    _fail_with(monkeypatch, Exception("Higgsfield API Error 503"))
+
+    JobQueueService.dispatch_job(job_id)
+
+    job = jobs_repo.get_by_id(job_id)
+    assert job["dispatch_state"] == "dead_letter"
+    assert job["dispatch_attempts"] == 3
+
+
+def test_requeue_charges_the_refunded_credits_again(make_user, make_job, monkeypatch):
+    make_user("u1", credits=100)
+    job_id = make_job()["job_id"]
+    _fail_with(monkeypatch, Exception("Higgsfield API Error 400"))
+    JobQueueService.dispatch_job(job_id)
+    assert _credits() == 110
+
+    result = JobQueueService.requeue_dead_letter_jobs([job_id, "missing"])
+
+    assert result == {"requeued": [job_id], "skipped": {"missing": "not dead-lettered"}}
+    job = jobs_repo.get_by_id(job_id)
+    assert (job["status"], job["dispatch_state"], job["dispatch_attempts"]) == ("pending", "queued", 0)
+    assert _credits() == 100
+
+
+def test_requeue_skips_users_who_cannot_pay(make_user, make_job, monkeypatch):
+    make_user("u1", credits=100)
+    job_id = make_job()["job_id"]
+    _fail_with(monkeypatch, Exception("Higgsfield API Error 400"))
+    JobQueueService.dispatch_job(job_id)
+    execute("UPDATE users SET credits = 0 WHERE user_id = 'u1'")
+
+    result = JobQueueService.requeue_dead_letter_jobs([job_id])
+
+    assert result == {"requeued": [], "skipped": {job_id: "insufficient credits"}}
+    assert jobs_repo.get_by_id(job_id)["dispatch_state"] == "dead_letter"
@@ -0,0 +1,110 @@
+"""Dispatch worker pool (dispatch_workers.py)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import dispatch_workers
+from app.services.dispatch_workers import DispatchWorkerPool
+from app.services.fair_scheduler import FairScheduler
+from app.services.job_queue_service import JobQueueService
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = FairScheduler()
+    monkeypatch.setattr(dispatch_workers, "fair_scheduler", scheduler)
+    return scheduler
+
+
+@pytest.fixture
+def submissions(monkeypatch):
+    """Fake provider submissions: job_id -> (started, finished, thread); "slow" jobs take 0.5s."""
+    submissions = {}
+
+    def dispatch_job(job_id, lease_owner=None):
+        started = time.monotonic()
+        if job_id.startswith("slow"):
+            time.sleep(0.5)
+        submissions[job_id] = (started, time.monotonic(), threading.current_thread())
+        return f"provider-{job_id}"
+
+    monkeypatch.setattr(JobQueueService, "dispatch_job", staticmethod(dispatch_job))
+    return submissions
+
+
+async def _until(condition, timeout: float = 5) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_round_dispatches_the_batch_off_the_loop(make_user, make_job, scheduler, submissions):
+    make_user("u1")
+    make_user("u2")
+    make_job("u1", job_id="slow-1")
+    make_job("u2", job_id="fast-1")
+    scheduler.rebuild()
+
+    async def scenario():
+        pool = DispatchWorkerPool(num_workers=2)
+        pool.start()
+        try:
+            assert scheduler.has_trigger
+            scheduler.request_round()
+            await _until(lambda: len(submissions) == 2)
+        finally:
+            await pool.stop()
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scenario())
+    assert submissions["fast-1"][1] < submissions["slow-1"][1]  # Not stuck behind the slow one
+    assert all(thread is not loop_thread for _, _, thread in submissions.values())
+    assert scheduler.pending_count() == 0
+    assert not scheduler.has_trigger
+
+
+def test_round_requests_are_coalesced(scheduler):
+    pool = DispatchWorkerPool(num_workers=1)
+    assert not pool.request_round()  # Not running
+
+    async def scenario():
+        pool.start()
+        try:
+            requested = [pool.request_round(), pool.request_round()]
+            await asyncio.sleep(0)  # Enqueued on the loop
+            depth = pool.queue_depth()
+            await _until(lambda: pool.queue_depth() == 0)
+            return requested, depth, pool.request_round()
+        finally:
+            await pool.stop()
+
+    requested, depth, after_round = asyncio.run(scenario())
+    assert requested == [True, False]
+    assert depth == 1
+    assert after_round  # The round ran: new requests are accepted again
+
+
+def test_failed_dispatch_goes_back_to_the_scheduler(make_user, make_job, scheduler, monkeypatch):
+    make_user("u1")
+    job_id = make_job("u1")["job_id"]
+    scheduler.rebuild()
+    attempts = []
+    monkeypatch.setattr(
+        JobQueueService, "dispatch_job", staticmethod(lambda job_id, lease_owner=None: attempts.append(job_id))
+    )
+
+    async def scenario():
+        pool = DispatchWorkerPool(num_workers=1)
+        pool.start()
+        try:
+            scheduler.request_round()
+            await _until(lambda: attempts and scheduler.pending_count() == 1)
+        finally:
+            await pool.stop()
+
+    asyncio.run(scenario())
+    assert attempts[0] == job_id
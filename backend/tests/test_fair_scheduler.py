@@ -0,0 +1,99 @@
+"""Fair-share scheduling of queued jobs (fair_scheduler.py)."""
+
+import json
+
+import pytest
+
+from app.database.db import execute
+from app.repositories import jobs_repo, settings_repo
+from app.services.fair_scheduler import FairScheduler
+
+
+@pytest.fixture
+def scheduler():
+    return FairScheduler()
+
+
+def _set_caps(caps: dict) -> None:
+    settings_repo.update_setting("max_in_flight", json.dumps(caps))
+
+
+def test_reserved_job_passes_provider_caps(make_user, make_job, scheduler):
+    make_user("u1")
+    make_user("u2")
+    make_job("u2", status="processing")
+    reserved = make_job("u1", dispatch_state="accepted")["job_id"]
+    _set_caps({"higgsfield": 1})
+
+    scheduler.rebuild()
+    assert [job.job_id for job in scheduler.next_batch()] == [reserved]
+
+
+def test_failed_reserved_dispatch_requeues_without_its_slot(make_user, make_job, scheduler):
+    make_user("u1")
+    make_user("u2")
+    job_id = make_job("u1", dispatch_state="accepted")["job_id"]
+    _set_caps({"higgsfield": 1})
+
+    scheduler.rebuild()
+    [picked] = scheduler.next_batch()
+    assert picked.reserved
+
+    # The dispatch found no free account; meanwhile another job took the provider's only slot
+    assert jobs_repo.claim_for_dispatch(job_id, "worker-1", 60)
+    assert jobs_repo.release_dispatch_claim(job_id, "worker-1")
+    make_job("u2", status="processing")
+    scheduler.dispatch_finished(picked, dispatched=False)
+
+    assert scheduler.pending_count() == 1
+    assert scheduler.next_batch() == []
+
+
+def test_requeued_job_keeps_its_retry_backoff(make_user, make_job, scheduler):
+    make_user("u1")
+    job_id = make_job("u1", dispatch_state="queued")["job_id"]
+
+    scheduler.rebuild()
+    [picked] = scheduler.next_batch()
+    assert jobs_repo.claim_for_dispatch(job_id, "worker-1", 60)
+    assert jobs_repo.record_dispatch_failure(job_id, "HTTP 503", "2999-01-01T00:00:00Z", "worker-1")
+    scheduler.dispatch_finished(picked, dispatched=False)
+
+    assert scheduler.next_batch() == []
+    assert scheduler.seconds_until_retry() > 0
+
+
+def _picks(scheduler, rounds: int) -> list:
+    picked = []
+    for _ in range(rounds):
+        [job] = scheduler.next_batch(max_jobs=1)
+        scheduler.dispatch_finished(job, dispatched=True)
+        picked.append(job.user_id)
+    return picked
+
+
+def test_higher_lanes_get_a_larger_share(make_user, make_job, scheduler):
+    make_user("free", plan_id=1)
+    make_user("business", plan_id=4)
+    settings_repo.update_setting("queue_aging_seconds", "0")
+    for _ in range(10):
+        make_job("free")
+        make_job("business")
+
+    scheduler.rebuild()
+    picks = _picks(scheduler, 9)
+    assert picks.count("business") == 8
+    assert picks.count("free") == 1
+
+
+def test_renamed_plan_keeps_its_lane(make_user, make_job, scheduler):
+    make_user("free", plan_id=1)
+    make_user("business", plan_id=4)
+    settings_repo.update_setting("queue_aging_seconds", "0")
+    execute("UPDATE subscription_plans SET name = 'Gói Sáng Tạo' WHERE plan_id = 4")
+    for _ in range(10):
+        make_job("free")
+        make_job("business")
+
+    scheduler.rebuild()
+    assert _picks(scheduler, 9).count("business") == 8
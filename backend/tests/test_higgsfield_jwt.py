@@ -0,0 +1,121 @@
+"""JWT caching and refresh in HiggsfieldClient (user-046)."""
+
+import asyncio
+import base64
+import json
+import threading
+import time
+
+import pytest
+from curl_cffi.requests.exceptions import HTTPError
+
+from app.config import settings
+from app.services.providers import higgsfield_client as higgsfield_module
+from app.services.providers.higgsfield_client import HiggsfieldClient
+
+
+def _token(expires_in: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": time.time() + expires_in}).encode()).decode().rstrip("=")
+    return f"Bearer header.{payload}.signature"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "HIGGSFIELD_JWT_EXPIRY_MARGIN_SECONDS", 5.0)
+    monkeypatch.setattr(settings, "HIGGSFIELD_JWT_REFRESH_AHEAD_SECONDS", 20.0)
+    client = HiggsfieldClient(sses="sses", cookie="cookie")
+    client.fetched = []
+    client.next_expiry = 600
+
+    def get_jwt_token():
+        token = _token(client.next_expiry)
+        client.fetched.append(token)
+        return token
+
+    async def get_jwt_token_async():
+        await asyncio.sleep(0.01)
+        return get_jwt_token()
+
+    monkeypatch.setattr(client, "get_jwt_token", get_jwt_token)
+    monkeypatch.setattr(client, "get_jwt_token_async", get_jwt_token_async)
+    yield client
+    client.close()
+
+
+def _wait_for_refresh():
+    for thread in threading.enumerate():
+        if thread.name == "higgsfield-jwt-refresh":
+            thread.join(timeout=5)
+
+
+def test_token_is_cached_until_expiry(client):
+    first = client.get_jwt_token_with_retry()
+
+    assert client.get_jwt_token_with_retry() == first
+    assert len(client.fetched) == 1
+
+
+def test_nearly_expired_token_is_fetched_again(client):
+    client.next_expiry = 3  # Inside the expiry margin
+    client.get_jwt_token_with_retry()
+    client.next_expiry = 600
+
+    second = client.get_jwt_token_with_retry()
+    assert client.fetched == [client.fetched[0], second]
+
+
+def test_token_close_to_expiry_is_refreshed_in_the_background(client):
+    client.next_expiry = 15  # Inside the refresh window, still valid
+    first = client.get_jwt_token_with_retry()
+    client.next_expiry = 600
+
+    assert client.get_jwt_token_with_retry() == first  # No wait
+    _wait_for_refresh()
+    assert len(client.fetched) == 2
+    assert client.get_jwt_token_with_retry() == client.fetched[1]
+
+
+def test_token_without_exp_gets_the_default_lifetime(client, monkeypatch):
+    monkeypatch.setattr(client, "get_jwt_token", lambda: "Bearer opaque")
+
+    client.get_jwt_token_with_retry()
+    assert client._jwt[1] == pytest.approx(time.time() + higgsfield_module.DEFAULT_JWT_TTL_SECONDS, abs=2)
+
+
+def test_concurrent_async_callers_share_one_fetch(client):
+    async def scenario():
+        return await asyncio.gather(*(client.get_jwt_token_with_retry_async() for _ in range(5)))
+
+    tokens = asyncio.run(scenario())
+    assert len(set(tokens)) == 1
+    assert len(client.fetched) == 1
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, data: dict = None):
+        self.status_code = status_code
+        self.text = json.dumps(data or {})
+        self._data = data or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(self.text)
+
+    def json(self):
+        return self._data
+
+
+def test_rejected_token_is_replaced_and_the_call_retried(client, monkeypatch):
+    link = {"id": "media-1", "url": "https://cdn/media-1", "upload_url": "https://s3/media-1"}
+    responses = [FakeResponse(401), FakeResponse(200, link)]
+    sent_tokens = []
+
+    def request(method, url, headers=None, **kwargs):
+        sent_tokens.append(headers["authorization"])
+        return responses.pop(0)
+
+    monkeypatch.setattr(client, "_request", request)
+
+    assert client.create_upload_link() == link
+    assert len(client.fetched) == 2
+    assert sent_tokens == client.fetched
@@ -0,0 +1,131 @@
+"""Image normalization before provider upload (image_preprocessing.py)."""
+
+import asyncio
+from io import BytesIO
+
+import pytest
+from curl_cffi.requests.exceptions import HTTPError
+from PIL import Image
+
+from app.config import settings
+from app.services import image_preprocessing
+from app.services.image_preprocessing import prepare_image
+from app.services.providers import higgsfield_client as higgsfield_module
+from app.services.providers.higgsfield_client import HiggsfieldClient
+from app.utils.images import InvalidImageError
+
+
+def _image_bytes(size=(40, 20), fmt="JPEG", mode="RGB", orientation=None) -> bytes:
+    image = Image.new(mode, size, "red")
+    output = BytesIO()
+    extra = {}
+    if orientation is not None:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        extra["exif"] = exif.tobytes()
+    image.save(output, fmt, **extra)
+    return output.getvalue()
+
+
+def test_clean_small_image_passes_through():
+    data = _image_bytes(fmt="PNG")
+
+    prepared = prepare_image(data)
+    assert prepared.data is data
+    assert (prepared.width, prepared.height, prepared.mime_type) == (40, 20, "image/png")
+
+
+def test_exif_orientation_is_applied_and_stripped():
+    prepared = prepare_image(_image_bytes(orientation=6))  # Rotated 90 degrees
+
+    assert (prepared.width, prepared.height) == (20, 40)
+    with Image.open(BytesIO(prepared.data)) as image:
+        assert image.getexif().get(0x0112) is None
+
+
+def test_oversized_image_is_downscaled_to_the_target_edge(monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_UPLOAD_MAX_EDGE_HIGGSFIELD", 100)
+    monkeypatch.setattr(settings, "IMAGE_UPLOAD_MAX_EDGE_VEO", 50)
+    portrait = _image_bytes(size=(200, 400))
+
+    prepared = prepare_image(portrait)
+    assert (prepared.width, prepared.height) == (50, 100)
+    assert prepared.mime_type == "image/jpeg"
+    assert prepare_image(portrait, image_preprocessing.VEO).height == 50
+
+
+def test_transparent_image_stays_png(monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_UPLOAD_MAX_EDGE_HIGGSFIELD", 10)
+
+    prepared = prepare_image(_image_bytes(fmt="PNG", mode="RGBA"))
+    assert prepared.mime_type == "image/png"
+    assert (prepared.width, prepared.height) == (10, 5)
+
+
+def test_non_image_is_rejected():
+    with pytest.raises(InvalidImageError):
+        prepare_image(b"not an image")
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.text = "" if status_code < 400 else "unauthorized"
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(self.text)
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    """A client whose first S3 PUT gets a 401; counts image preparations and PUTs."""
+    counts = {"prepared": 0, "puts": 0}
+    link = {"id": "media-1", "url": "https://cdn/media-1", "upload_url": "https://s3/media-1"}
+
+    def counted(prepare):
+        def wrapper(*args, **kwargs):
+            counts["prepared"] += 1
+            return prepare(*args, **kwargs)
+        return wrapper
+
+    def response():
+        counts["puts"] += 1
+        return FakeResponse(401 if counts["puts"] == 1 else 200)
+
+    async def response_async(*args, **kwargs):
+        return response()
+
+    async def link_async():
+        return link
+
+    async def check_async(img_id):
+        return "ok"
+
+    monkeypatch.setattr(higgsfield_module, "prepare_image", counted(higgsfield_module.prepare_image))
+    monkeypatch.setattr(image_preprocessing, "prepare_image", counted(image_preprocessing.prepare_image))
+    client = HiggsfieldClient(sses="sses", cookie="cookie")
+    monkeypatch.setattr(client, "create_upload_link", lambda: link)
+    monkeypatch.setattr(client, "create_upload_link_async", link_async)
+    monkeypatch.setattr(client, "check_upload", lambda img_id: "ok")
+    monkeypatch.setattr(client, "check_upload_async", check_async)
+    monkeypatch.setattr(client, "_request", lambda *args, **kwargs: response())
+    monkeypatch.setattr(client, "_request_async", response_async)
+    yield client, counts
+    client.close()
+
+
+def test_unauthorized_upload_prepares_the_image_once(uploads):
+    client, counts = uploads
+
+    result = client.upload_image_complete(_image_bytes(orientation=6))
+    assert (result["width"], result["height"]) == (20, 40)
+    assert counts == {"prepared": 1, "puts": 2}
+
+
+def test_unauthorized_async_upload_prepares_the_image_once(uploads):
+    client, counts = uploads
+
+    result = asyncio.run(client.upload_image_complete_async(_image_bytes()))
+    assert result["id"] == "media-1"
+    assert counts == {"prepared": 1, "puts": 2}
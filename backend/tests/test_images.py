@@ -0,0 +1,39 @@
+"""Image header probing (utils/images.py)."""
+
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from app.utils.images import InvalidImageError, probe_image
+
+
+def _encode(fmt: str, size=(64, 48)) -> bytes:
+    output = BytesIO()
+    Image.new("RGB", size, "blue").save(output, fmt)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("fmt, mime_type", [
+    ("JPEG", "image/jpeg"),
+    ("PNG", "image/png"),
+    ("WEBP", "image/webp"),
+])
+def test_probe_reads_dimensions_and_format(fmt, mime_type):
+    info = probe_image(_encode(fmt))
+
+    assert (info.width, info.height) == (64, 48)
+    assert (info.format, info.mime_type) == (fmt, mime_type)
+
+
+def test_probe_reads_only_the_header():
+    data = _encode("PNG", size=(3000, 2000))
+
+    # Truncated pixel data: the header alone gives the dimensions
+    assert probe_image(data[:100]).width == 3000
+
+
+@pytest.mark.parametrize("data", [b"", b"not an image", _encode("GIF")])
+def test_probe_rejects_unsupported_data(data):
+    with pytest.raises(InvalidImageError):
+        probe_image(data)
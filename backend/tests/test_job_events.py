@@ -0,0 +1,138 @@
+"""Job event bus relay, broker pruning and stream tickets."""
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.database.db import execute, fetch_one
+from app.deps import get_current_user_sse
+from app.routers import jobs as jobs_router
+from app.services.job_events import JobEventBus
+from app.utils.jwt_utils import (
+    JWTError,
+    create_access_token,
+    create_stream_ticket,
+    decode_access_token,
+    decode_stream_ticket,
+)
+
+
+def _insert_event(worker_id: str, event: dict, created_at: str = None) -> None:
+    execute(
+        """
+        INSERT INTO job_events (worker_id, job_id, user_id, payload, created_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (
+            worker_id, event["job_id"], event["user_id"], json.dumps(event),
+            created_at or datetime.utcnow().isoformat() + 'Z'
+        )
+    )
+
+
+def test_relay_polls_in_a_thread_and_delivers_on_the_loop():
+    async def scenario():
+        bus = JobEventBus()
+        bus.bind_loop(asyncio.get_running_loop())
+        queue = bus.subscribe("u1")
+        _insert_event("other-worker", {"job_id": "j1", "user_id": "u1", "status": "completed"})
+        _insert_event(bus.worker_id, {"job_id": "j2", "user_id": "u1", "status": "completed"})
+
+        relayed = await asyncio.to_thread(bus.poll_broker)
+        event = await asyncio.wait_for(queue.get(), timeout=1)
+        return relayed, event, queue.qsize()
+
+    relayed, event, remaining = asyncio.run(scenario())
+    assert relayed == 1
+    assert event["job_id"] == "j1"
+    assert remaining == 0
+
+
+def test_prune_broker_keeps_recent_events():
+    old = (datetime.utcnow() - timedelta(minutes=30)).isoformat() + 'Z'
+    _insert_event("w", {"job_id": "old", "user_id": "u1"}, created_at=old)
+    _insert_event("w", {"job_id": "new", "user_id": "u1"})
+
+    assert JobEventBus().prune_broker(retention_minutes=10) == 1
+    assert fetch_one("SELECT job_id FROM job_events")["job_id"] == "new"
+
+
+def test_stream_ticket_is_single_purpose(make_user):
+    make_user("u1")
+    ticket = create_stream_ticket("u1")
+    access_token = create_access_token("u1", "u1@example.com")
+
+    assert decode_stream_ticket(ticket)["user_id"] == "u1"
+    with pytest.raises(JWTError):
+        decode_access_token(ticket)
+    with pytest.raises(JWTError):
+        decode_stream_ticket(access_token)
+
+
+def test_stream_accepts_tickets_not_access_tokens_in_the_url(make_user):
+    make_user("u1")
+
+    user = asyncio.run(get_current_user_sse(ticket=create_stream_ticket("u1"), credentials=None))
+    assert user.user_id == "u1"
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(get_current_user_sse(ticket=create_access_token("u1", "u1@example.com"), credentials=None))
+    assert exc.value.status_code == 401
+
+
+def test_expired_stream_ticket_is_rejected(make_user, monkeypatch):
+    from app.config import settings
+
+    make_user("u1")
+    monkeypatch.setattr(settings, "STREAM_TICKET_TTL_SECONDS", -1)
+    with pytest.raises(JWTError):
+        decode_stream_ticket(create_stream_ticket("u1"))
+
+
+def test_stream_reads_and_writes_off_the_loop(make_user, make_job, monkeypatch):
+    make_user("u1")
+    make_job(status="processing")
+    finished = make_job(status="completed")
+    threads = {}
+
+    def recording(name, func):
+        def wrapper(*args):
+            threads[name] = threading.current_thread()
+            return func(*args)
+        return wrapper
+
+    monkeypatch.setattr(jobs_router.jobs_repo, "get_active_by_user",
+                        recording("snapshot", jobs_router.jobs_repo.get_active_by_user))
+    monkeypatch.setattr(jobs_router.jobs_repo, "mark_client_notified",
+                        recording("notified", jobs_router.jobs_repo.mark_client_notified))
+
+    class Request:
+        async def is_disconnected(self):
+            return "notified" in threads
+
+    bus = JobEventBus()
+    monkeypatch.setattr(jobs_router, "job_event_bus", bus)
+
+    async def stream():
+        response = await jobs_router.stream_job_updates(Request(), current_user=SimpleNamespace(user_id="u1"))
+        messages = []
+        async for message in response.body_iterator:
+            messages.append(message)
+            if len(messages) == 2:
+                bus.publish(bus.build_event(finished))
+        return messages, threading.current_thread()
+
+    async def scenario():
+        bus.bind_loop(asyncio.get_running_loop())
+        return await asyncio.wait_for(stream(), timeout=5)
+
+    messages, loop_thread = asyncio.run(scenario())
+    assert len(messages) == 3  # retry, snapshot, update
+    assert set(threads) == {"snapshot", "notified"}
+    assert loop_thread not in threads.values()
+    assert fetch_one("SELECT client_notified_at FROM jobs WHERE job_id = ?", (finished["job_id"],))["client_notified_at"]
@@ -0,0 +1,179 @@
+"""Dispatch under a lease (JobQueueService.dispatch_job, submit_or_queue)."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.database.db import execute
+from app.repositories import jobs_repo
+from app.schemas.jobs import JobCreate
+from app.services import job_queue_service
+from app.services.fair_scheduler import FairScheduler
+from app.services.job_events import job_event_bus
+from app.services.job_queue_service import JobQueueService
+
+
+@pytest.fixture
+def released(monkeypatch):
+    """Job ids whose account slot was released."""
+    released = []
+    monkeypatch.setattr(job_queue_service.account_scheduler, "release_job", released.append)
+    monkeypatch.setattr(job_queue_service.account_scheduler, "record_submission", lambda *args: None)
+    return released
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """A fair scheduler listening to job events, used by submit_or_queue."""
+    scheduler = FairScheduler()
+    monkeypatch.setattr(job_queue_service, "fair_scheduler", scheduler)
+    job_event_bus.add_listener(scheduler.on_job_event)
+    yield scheduler
+    job_event_bus._listeners.remove(scheduler.on_job_event)
+
+
+def _submit_with(monkeypatch, during_submission=None, provider_job_id="provider-1", error=None):
+    def execute_job(job, raise_errors=False):
+        if during_submission:
+            during_submission(job)
+        if error:
+            raise error
+        return provider_job_id
+    monkeypatch.setattr(job_queue_service.Dispatcher, "execute_job", staticmethod(execute_job))
+
+
+def test_dispatch_marks_job_processing(make_user, make_job, monkeypatch, released, job_events):
+    make_user("u1")
+    job_id = make_job(dispatch_state="accepted")["job_id"]
+    _submit_with(monkeypatch)
+
+    assert JobQueueService.dispatch_job(job_id) == "provider-1"
+
+    job = jobs_repo.get_by_id(job_id)
+    assert job["status"] == "processing"
+    assert job["provider_job_id"] == "provider-1"
+    assert job["dispatch_state"] == "submitted"
+    assert job["lease_owner"] is None
+    assert job["started_processing_at"]
+    assert job_events[-1]["status"] == "processing"
+    assert released == []
+
+
+def test_cancelled_during_submission_is_not_revived(make_user, make_job, monkeypatch, released):
+    make_user("u1")
+    job_id = make_job(dispatch_state="accepted")["job_id"]
+    _submit_with(monkeypatch, lambda job: jobs_repo.cancel_job(job_id, "u1"))
+
+    assert JobQueueService.dispatch_job(job_id) is None
+
+    job = jobs_repo.get_by_id(job_id)
+    assert job["status"] == "cancelled"
+    assert job["provider_job_id"] is None
+    assert released == [job_id]
+
+
+def test_lost_lease_does_not_finalize(make_user, make_job, monkeypatch, released):
+    make_user("u1")
+    job_id = make_job(dispatch_state="accepted")["job_id"]
+
+    def lease_taken_over(job):
+        # Our lease expires and another worker claims the job
+        execute("UPDATE jobs SET lease_expires = '2000-01-01T00:00:00Z' WHERE job_id = ?", (job_id,))
+        assert jobs_repo.claim_for_dispatch(job_id, "worker-2", 60)
+
+    _submit_with(monkeypatch, lease_taken_over)
+
+    assert JobQueueService.dispatch_job(job_id) is None
+
+    job = jobs_repo.get_by_id(job_id)
+    assert job["status"] == "pending"
+    assert job["lease_owner"] == "worker-2"
+    assert job["provider_job_id"] is None
+    # The new owner's account slot is left alone
+    assert released == []
+
+
+def test_failed_job_is_not_revived(make_user, make_job, monkeypatch, released):
+    make_user("u1")
+    job_id = make_job(dispatch_state="accepted")["job_id"]
+    _submit_with(monkeypatch, lambda job: jobs_repo.update_status(job_id, "failed", error_message="refunded"))
+
+    assert JobQueueService.dispatch_job(job_id) is None
+    assert jobs_repo.get_by_id(job_id)["status"] == "failed"
+    assert released == [job_id]
+
+
+def _new_job(job_id: str = "job-1") -> JobCreate:
+    return JobCreate(
+        job_id=job_id,
+        user_id="u1",
+        type="t2i",
+        model="nano-banana",
+        prompt="a cat",
+        input_params="{}",
+        credits_cost=10,
+    )
+
+
+def test_submitted_job_is_never_picked_by_the_scheduler(make_user, monkeypatch, released, scheduler):
+    make_user("u1")
+    picked_meanwhile = []
+    _submit_with(monkeypatch, lambda job: picked_meanwhile.extend(scheduler.next_batch()))
+
+    result = asyncio.run(JobQueueService.submit_or_queue(_new_job(), reason="test"))
+
+    assert result["dispatch_state"] == "submitted"
+    assert picked_meanwhile == []
+    assert jobs_repo.get_by_id("job-1")["status"] == "processing"
+
+
+def test_deferred_job_is_left_to_the_scheduler(make_user, monkeypatch, scheduler):
+    make_user("u1")
+
+    result = asyncio.run(JobQueueService.submit_or_queue(_new_job(), reason="test", defer=True))
+
+    assert result["dispatch_state"] == "accepted"
+    assert [job.job_id for job in scheduler.next_batch()] == ["job-1"]
+
+
+def test_failed_submission_goes_back_to_the_scheduler(make_user, monkeypatch, scheduler):
+    make_user("u1")
+    monkeypatch.setattr(job_queue_service.account_scheduler, "record_failure", lambda *args: None)
+    _submit_with(monkeypatch, error=Exception("HTTP 503"))
+
+    result = asyncio.run(JobQueueService.submit_or_queue(_new_job(), reason="test"))
+
+    assert result["dispatch_state"] == "queued"
+    assert scheduler.pending_count() == 1
+    assert scheduler.seconds_until_retry() > 0
+
+
+def test_full_queue_rejects_without_creating(make_user, monkeypatch, scheduler):
+    make_user("u1")  # Free: one image slot and three queued jobs
+    for n in range(4):
+        asyncio.run(JobQueueService.submit_or_queue(_new_job(f"job-{n}"), reason="test", defer=True))
+
+    with pytest.raises(job_queue_service.QueueFullError) as exc:
+        asyncio.run(JobQueueService.submit_or_queue(_new_job("job-x"), reason="test", defer=True))
+    assert exc.value.detail["error"] == "Queue full"
+    assert jobs_repo.get_by_id("job-x") is None
+
+
+def test_reservation_runs_off_the_event_loop(make_user, monkeypatch, scheduler):
+    make_user("u1")
+    reserve_job = job_queue_service.ConcurrencyService.reserve_job
+    threads = []
+
+    def recording_reserve_job(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return reserve_job(*args, **kwargs)
+
+    monkeypatch.setattr(job_queue_service.ConcurrencyService, "reserve_job", staticmethod(recording_reserve_job))
+
+    async def scenario():
+        await JobQueueService.submit_or_queue(_new_job(), reason="test", defer=True)
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads and threads[0] is not loop_thread
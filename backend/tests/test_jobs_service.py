@@ -0,0 +1,67 @@
+"""Job creation and status transitions (jobs_service.py)."""
+
+import ast
+import inspect
+
+from app.repositories import jobs_repo
+from app.schemas.jobs import JobCreate
+from app.services import jobs_service
+
+
+def test_jobs_repo_does_not_import_services():
+    tree = ast.parse(inspect.getsource(jobs_repo))
+    imported = [
+        node.module for node in ast.walk(tree)
+        if isinstance(node, ast.ImportFrom) and node.module
+    ]
+    assert not [module for module in imported if module.startswith("app.services")]
+
+
+def test_create_classifies_and_publishes(make_user, job_events):
+    make_user("u1")
+    job = jobs_service.create(JobCreate(
+        job_id="job-1",
+        user_id="u1",
+        type="t2v",
+        model="kling-2.6",
+        prompt="a cat",
+        input_params='{"duration": "5s"}',
+        credits_cost=10,
+    ))
+
+    assert job["is_slow"] == 1
+    assert [(event["job_id"], event["status"]) for event in job_events] == [("job-1", "pending")]
+
+
+def test_update_status_publishes_updated_row(make_user, make_job, job_events):
+    make_user("u1")
+    job = make_job(status="processing")
+
+    assert jobs_service.update_status(job["job_id"], "completed", output_url="https://cdn/out.png")
+    assert job_events[-1]["status"] == "completed"
+    assert job_events[-1]["output_url"] == "https://cdn/out.png"
+
+    assert not jobs_service.update_status("missing", "completed")
+    assert len(job_events) == 1
+
+
+def test_fail_if_processing_only_fails_processing_jobs(make_user, make_job, job_events):
+    make_user("u1")
+    job = make_job(status="processing")
+    jobs_service.update_status(job["job_id"], "completed", output_url="https://cdn/out.png")
+
+    assert not jobs_service.fail_if_processing(job["job_id"], "timed out")
+    assert jobs_repo.get_by_id(job["job_id"])["status"] == "completed"
+
+
+def test_delete_active_job_publishes_deleted(make_user, make_job, job_events):
+    make_user("u1")
+    active = make_job(status="pending")
+    finished = make_job(status="pending")
+    jobs_service.update_status(finished["job_id"], "failed", error_message="boom")
+    job_events.clear()
+
+    assert jobs_service.delete_job(active["job_id"], "u1")
+    assert jobs_service.delete_job(finished["job_id"], "u1")
+    assert not jobs_service.delete_job(active["job_id"], "u1")
+    assert [(event["job_id"], event["status"]) for event in job_events] == [(active["job_id"], "deleted")]
@@ -0,0 +1,64 @@
+"""Metrics registry and the /metrics endpoint."""
+
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.routers import metrics as metrics_router
+from app.services import metrics
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(metrics_router.router, prefix="/metrics")
+    return TestClient(app)
+
+
+def test_metric_base_is_abstract():
+    with pytest.raises(TypeError):
+        metrics._Metric("base", "Abstract base")
+
+
+def test_counter_and_histogram_render():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter("test_total", "Test counter", ("model",))
+    histogram = registry.histogram("test_seconds", "Test histogram", buckets=(1, 5))
+    counter.inc(model="a")
+    counter.inc(2, model="a")
+    histogram.observe(3)
+
+    rendered = registry.render()
+    assert 'test_total{model="a"} 3' in rendered
+    assert 'test_seconds_bucket{le="1"} 0' in rendered
+    assert 'test_seconds_bucket{le="5"} 1' in rendered
+    assert "test_seconds_count 1" in rendered
+
+
+def test_failing_gauge_function_is_logged(caplog):
+    gauge = metrics.Gauge("broken", "Broken gauge")
+    gauge.set_function(lambda: 1 / 0)
+
+    with caplog.at_level(logging.ERROR, logger="app.services.metrics"):
+        lines = gauge.render()
+    assert lines == ["# HELP broken Broken gauge", "# TYPE broken gauge"]
+    assert "broken" in caplog.text
+
+
+def test_metrics_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert "# TYPE jobs_active gauge" in response.text
@@ -0,0 +1,44 @@
+"""Processing deadline resolution (processing_timeouts.py)."""
+
+import json
+
+from app.repositories import settings_repo
+from app.services.processing_timeouts import (
+    SETTING_KEY,
+    STATIC_DEADLINES,
+    ProcessingTimeoutService,
+)
+
+
+def _set_overrides(value) -> None:
+    settings_repo.update_setting(SETTING_KEY, value if isinstance(value, str) else json.dumps(value))
+
+
+def _service() -> ProcessingTimeoutService:
+    service = ProcessingTimeoutService()
+    service._refreshed_at = float("inf")  # no observed history
+    return service
+
+
+def test_valid_overrides_win():
+    _set_overrides({"kling-2.6": 45, "default": "30"})
+    service = _service()
+
+    assert service.get_deadline_minutes("kling-2.6", "t2v") == 45
+    assert service.get_deadline_minutes("nano-banana", "t2i") == 30
+
+
+def test_zero_negative_and_non_numeric_overrides_are_ignored(caplog):
+    _set_overrides({"kling-2.6": 0, "veo3.1-fast": -5, "nano-banana": "soon", "sora": True, "default": None})
+    service = _service()
+
+    assert service.get_overrides() == {}
+    assert service.get_deadline_minutes("kling-2.6", "t2v") == STATIC_DEADLINES["t2v"]
+    assert "kling-2.6" in caplog.text and "veo3.1-fast" in caplog.text
+
+
+def test_malformed_setting_is_ignored():
+    _set_overrides("[1, 2]")
+    assert ProcessingTimeoutService.get_overrides() == {}
+    _set_overrides("not json")
+    assert ProcessingTimeoutService.get_overrides() == {}
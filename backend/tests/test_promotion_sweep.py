@@ -0,0 +1,93 @@
+"""Periodic promotion sweep across all users (JobQueueService.try_promote_jobs_for_all_users)."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database.db import execute
+from app.repositories import jobs_repo
+from app.services import job_queue_service
+from app.services.fair_scheduler import FairScheduler
+from app.services.job_queue_service import JobQueueService
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = FairScheduler()
+    monkeypatch.setattr(job_queue_service, "fair_scheduler", scheduler)
+    return scheduler
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Job ids submitted by the sweep (fake provider)."""
+    dispatched = []
+
+    def dispatch_job(job_id, lease_owner=None):
+        dispatched.append(job_id)
+        return f"provider-{job_id}"
+
+    monkeypatch.setattr(JobQueueService, "dispatch_job", staticmethod(dispatch_job))
+    return dispatched
+
+
+def _in(seconds: int) -> str:
+    return (datetime.utcnow() + timedelta(seconds=seconds)).isoformat() + 'Z'
+
+
+def test_promotable_users_have_free_capacity_and_due_jobs(make_user, make_job):
+    for user_id in ("full", "free", "backing-off"):
+        make_user(user_id, plan_id=1)  # Free: 2 concurrent jobs
+    make_job("full", status="processing")
+    make_job("full", job_type="t2v", model="kling-2.5-turbo", status="processing")
+    make_job("full")
+    make_job("free")
+    backing_off = make_job("backing-off")
+    execute("UPDATE jobs SET next_attempt_at = ? WHERE job_id = ?", (_in(60), backing_off["job_id"]))
+
+    users = jobs_repo.get_users_with_promotable_jobs()
+
+    assert [user["user_id"] for user in users] == ["free"]
+    assert (users[0]["pending_count"], users[0]["total_limit"]) == (1, 2)
+
+
+def test_sweep_dispatches_jobs_the_scheduler_missed(make_user, make_job, scheduler, dispatched):
+    make_user("u1")
+    make_user("u2")
+    missed = [make_job("u1")["job_id"], make_job("u2")["job_id"]]
+    assert scheduler.pending_count() == 0  # Their events were lost
+
+    assert JobQueueService.try_promote_jobs_for_all_users() == 2
+
+    assert sorted(dispatched) == sorted(missed)
+    assert scheduler.pending_count() == 0
+
+
+def test_sweep_requests_a_round_from_the_worker_pool(make_user, make_job, scheduler, dispatched):
+    make_user("u1")
+    job_id = make_job("u1")["job_id"]
+    rounds = []
+    scheduler.set_trigger(lambda: rounds.append(True))
+
+    JobQueueService.try_promote_jobs_for_all_users()
+
+    assert rounds == [True]
+    assert dispatched == []
+    assert [job.job_id for job in scheduler.next_batch()] == [job_id]
+
+
+def test_sweep_recovers_expired_leases(make_user, make_job, scheduler, dispatched, job_events):
+    make_user("u1")
+    job_id = make_job("u1", dispatch_state="dispatching")["job_id"]
+    execute(
+        "UPDATE jobs SET lease_owner = 'dead-worker', lease_expires = ? WHERE job_id = ?",
+        (_in(-60), job_id)
+    )
+    held = make_job("u1", dispatch_state="dispatching")["job_id"]
+    execute("UPDATE jobs SET lease_owner = 'live-worker', lease_expires = ? WHERE job_id = ?", (_in(60), held))
+
+    JobQueueService.try_promote_jobs_for_all_users()
+
+    assert dispatched == [job_id]
+    assert jobs_repo.get_by_id(held)["lease_owner"] == "live-worker"
+    assert [(event["job_id"], event["dispatch_state"]) for event in job_events] == [(job_id, "accepted")]
@@ -0,0 +1,75 @@
+"""Provider caps and queue estimates (provider_capacity.py)."""
+
+import json
+import logging
+
+from app.config import settings
+from app.database.db import execute
+from app.repositories import settings_repo
+from app.services.concurrency_service import ConcurrencyService
+from app.services.provider_capacity import ProviderCapacityModel
+
+
+def _set_caps(caps: dict) -> None:
+    settings_repo.update_setting("max_in_flight", json.dumps(caps))
+
+
+def _created(job_id: str, created_at: str) -> None:
+    execute("UPDATE jobs SET created_at = ? WHERE job_id = ?", (created_at, job_id))
+
+
+def test_in_flight_counts_processing_and_reserved(make_user, make_job):
+    make_user("u1")
+    make_job(status="processing", model="kling-2.6", job_type="t2v")
+    make_job(dispatch_state="accepted", model="kling-2.6", job_type="t2v")
+    make_job(dispatch_state="queued", model="kling-2.6", job_type="t2v")
+
+    in_flight = ProviderCapacityModel().get_in_flight()
+    assert in_flight == {"higgsfield": 2, "kling-2.6": 2}
+
+
+def test_queue_positions_count_earlier_queued_jobs_of_the_provider(make_user, make_job):
+    make_user("u1")
+    make_user("u2")
+    other_first = make_job("u2", dispatch_state="queued")["job_id"]
+    mine_first = make_job("u1", dispatch_state="queued")["job_id"]
+    other_veo = make_job("u2", dispatch_state="queued", model="veo3.1-fast", job_type="t2v")["job_id"]
+    reserved = make_job("u2", dispatch_state="accepted")["job_id"]
+    mine_second = make_job("u1", dispatch_state="queued", model="nano-banana-pro")["job_id"]
+    for index, job_id in enumerate((other_first, mine_first, other_veo, reserved, mine_second)):
+        _created(job_id, f"2026-01-01T00:00:0{index}Z")
+    _set_caps({"higgsfield": 1})
+
+    limits = ConcurrencyService.get_user_plan_limits("u1")
+    usage = ConcurrencyService.get_active_job_counts("u1")
+    estimates = ProviderCapacityModel().estimate_queue("u1", limits, usage)
+
+    assert [(e["job_id"], e["queue_position"]) for e in estimates] == [(mine_first, 2), (mine_second, 3)]
+    assert estimates[0]["estimated_start_at"] <= estimates[1]["estimated_start_at"]
+
+
+def test_no_estimates_without_queued_jobs(make_user, make_job):
+    make_user("u1")
+    make_job(dispatch_state="accepted")
+    limits = ConcurrencyService.get_user_plan_limits("u1")
+    usage = ConcurrencyService.get_active_job_counts("u1")
+    assert ProviderCapacityModel().estimate_queue("u1", limits, usage) == []
+
+
+def test_invalid_caps_are_ignored(caplog):
+    _set_caps({"higgsfield": -1, "kling-2.6": 2.5, "veo3.1-fast": "lots", "google_veo": 0, "nano-banana": "3"})
+    model = ProviderCapacityModel()
+
+    with caplog.at_level(logging.WARNING, logger="app.services.provider_capacity"):
+        overrides = model.get_overrides()
+
+    assert overrides == {"google_veo": 0, "nano-banana": 3}
+    assert "higgsfield" in caplog.text and "kling-2.6" in caplog.text
+    limits = model.get_limits(overrides)
+    assert limits["higgsfield"] == settings.HIGGSFIELD_MAX_IN_FLIGHT
+    assert model.saturated_key("nano-banana-pro", {}, limits) is None
+
+
+def test_malformed_caps_setting_is_ignored():
+    settings_repo.update_setting("max_in_flight", "[1, 2]")
+    assert ProviderCapacityModel.get_overrides() == {}
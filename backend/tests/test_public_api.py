@@ -0,0 +1,144 @@
+"""Public API submissions hold an account slot under their job id (public_api.py)."""
+
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.middleware.api_key_auth import verify_api_key_dependency
+from app.repositories import jobs_repo
+from app.routers import public_api
+from app.services.account_scheduler import AccountScheduler
+
+
+class FakeClient:
+    def __init__(self, provider_job_id=None, error=None):
+        self.provider_job_id = provider_job_id
+        self.error = error
+
+    async def generate_image_async(self, **kwargs):
+        if self.error:
+            raise self.error
+        return {"job_id": self.provider_job_id}
+
+    async def generate_video_async(self, **kwargs):
+        if self.error:
+            raise self.error
+        return self.provider_job_id
+
+
+@pytest.fixture
+def slots(monkeypatch):
+    """Account slot bookkeeping: reserved job ids and their outcome."""
+    slots = {"reserved": [], "released": [], "failed": [], "submitted": []}
+    scheduler = public_api.account_scheduler
+    monkeypatch.setattr(scheduler, "release_job", slots["released"].append)
+    monkeypatch.setattr(scheduler, "record_failure", lambda job_id, error: slots["failed"].append(job_id))
+    monkeypatch.setattr(scheduler, "record_submission", lambda job_id, seconds: slots["submitted"].append(job_id))
+    monkeypatch.setattr(public_api.api_keys_repo, "deduct_balance", lambda key_id, cost: 100 - cost)
+    monkeypatch.setattr(public_api.api_keys_repo, "log_usage", lambda **kwargs: None)
+    return slots
+
+
+@pytest.fixture
+def use_client(monkeypatch, slots, make_account):
+    account_id = make_account()
+
+    def use(client):
+        async def wait_for_client_for_job(job_type, model, job_id, timeout, **params):
+            slots["reserved"].append(job_id)
+            return account_id, client
+        monkeypatch.setattr(public_api.account_scheduler, "wait_for_client_for_job", wait_for_client_for_job)
+    return use
+
+
+@pytest.fixture
+def api(make_user):
+    make_user("u1")
+    app = FastAPI()
+    app.include_router(public_api.router, prefix="/v1")
+    app.dependency_overrides[verify_api_key_dependency] = lambda: {
+        "key_id": 1, "user_id": "u1", "balance": 100, "key_prefix": "sk_live_x", "created_at": None
+    }
+    return TestClient(app)
+
+
+def test_image_job_keeps_its_reserved_slot(api, use_client, slots):
+    use_client(FakeClient(provider_job_id="provider-1"))
+
+    response = api.post("/v1/image/generate", data={"prompt": "a cat", "model": "nano-banana"})
+
+    assert response.status_code == 200, response.text
+    job_id = response.json()["job_id"]
+    assert slots["reserved"] == [job_id]
+    assert slots["submitted"] == [job_id]
+    assert slots["released"] == slots["failed"] == []
+    job = jobs_repo.get_by_id(job_id)
+    assert job["status"] == "processing"
+    assert job["provider_job_id"] == "provider-1"
+    assert job["account_id"]
+
+
+def test_failed_image_submission_frees_the_slot(api, use_client, slots):
+    use_client(FakeClient(error=Exception("Higgsfield API Error 503")))
+
+    response = api.post("/v1/image/generate", data={"prompt": "a cat", "model": "nano-banana"})
+
+    assert response.status_code == 500
+    [job_id] = slots["reserved"]
+    assert slots["failed"] == [job_id]
+    assert jobs_repo.get_by_id(job_id) is None
+
+
+def test_rejected_video_submission_releases_the_slot(api, use_client, slots):
+    use_client(FakeClient(error=Exception("Higgsfield API Error 400: bad prompt")))
+
+    response = api.post("/v1/video/generate", data={"prompt": "a cat", "model": "kling-2.6", "mode": "t2v"})
+
+    assert response.status_code == 500
+    assert slots["released"] == slots["reserved"]
+    assert slots["failed"] == []
+
+
+def test_invalid_video_request_reserves_nothing(api, use_client, slots):
+    use_client(FakeClient(provider_job_id="provider-1"))
+
+    response = api.post("/v1/video/generate", data={"prompt": "a cat", "model": "kling-2.6", "mode": "i2v"})
+
+    assert response.status_code == 400
+    assert slots["reserved"] == []
+
+
+@pytest.fixture
+def full_account(monkeypatch, make_account):
+    """A fresh scheduler whose only account's image slot is taken by job "busy"."""
+    scheduler = AccountScheduler()
+    monkeypatch.setattr(public_api, "account_scheduler", scheduler)
+    monkeypatch.setattr(scheduler, "get_client", lambda account_id: FakeClient(provider_job_id="provider-1"))
+    monkeypatch.setattr(public_api.api_keys_repo, "deduct_balance", lambda key_id, cost: 100 - cost)
+    monkeypatch.setattr(public_api.api_keys_repo, "log_usage", lambda **kwargs: None)
+    account_id = make_account(max_parallel_images=1)
+    assert scheduler.capacity.acquire("busy", "t2i", False) == account_id
+    return scheduler
+
+
+def test_busy_accounts_are_waited_for(api, full_account, monkeypatch):
+    monkeypatch.setattr(settings, "PUBLIC_API_ACCOUNT_WAIT_SECONDS", 5.0)
+    threading.Timer(0.1, full_account.release_job, ["busy"]).start()
+
+    response = api.post("/v1/image/generate", data={"prompt": "a cat", "model": "nano-banana"})
+
+    assert response.status_code == 200, response.text
+    assert jobs_repo.get_by_id(response.json()["job_id"])["status"] == "processing"
+
+
+def test_busy_accounts_time_out_with_503(api, full_account, monkeypatch):
+    monkeypatch.setattr(settings, "PUBLIC_API_ACCOUNT_WAIT_SECONDS", 0.1)
+
+    response = api.post("/v1/image/generate", data={"prompt": "a cat", "model": "nano-banana"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "10"
+    assert full_account.capacity.waiters.count() == 0
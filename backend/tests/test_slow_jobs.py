@@ -0,0 +1,58 @@
+"""Slow-job classification and the per-account slow limits."""
+
+import pytest
+
+from app.database.db import execute
+from app.services.account_scheduler import AccountCapacityTracker, AccountScheduler
+
+scheduler = AccountScheduler()
+
+
+@pytest.mark.parametrize("job_type, model, params, slow", [
+    ("t2i", "nano-banana", {}, False),
+    ("t2i", "nano-banana-pro", {}, True),
+    ("i2i", "nano-banana", {"resolution": "4k"}, True),
+    ("t2v", "kling-2.5-turbo", {}, False),
+    ("t2v", "kling-2.6", {}, True),
+    ("i2v", "kling-2.5-turbo", {"resolution": "1080p"}, True),
+    ("t2v", "kling-2.5-turbo", {"duration": "10s"}, True),
+    ("t2v", "kling-2.5-turbo", {"duration": "auto"}, False),
+])
+def test_classify_job_as_slow(job_type, model, params, slow):
+    assert scheduler.classify_job_as_slow(job_type, model, **params) is slow
+
+
+def test_classify_stored_params():
+    assert scheduler.classify_job_params("t2v", "kling-2.5-turbo", '{"duration": "10s", "prompt": "x"}')
+    assert not scheduler.classify_job_params("t2v", "kling-2.5-turbo", "not json")
+    assert not scheduler.classify_job_params("t2v", "kling-2.5-turbo", '["10s"]')
+    assert not scheduler.classify_job_params("t2i", None, None)
+
+
+def test_slow_limit_within_the_parallel_limit(make_account):
+    account_id = make_account(max_parallel_videos=3, max_slow_videos=1)
+    tracker = AccountCapacityTracker(scheduler.classify_job_as_slow)
+
+    assert tracker.acquire("slow-1", "t2v", True) == account_id
+    assert tracker.acquire("slow-2", "t2v", True) is None
+    assert tracker.acquire("fast-1", "t2v", False) == account_id
+    assert tracker.acquire("fast-2", "t2v", False) == account_id
+    assert tracker.acquire("fast-3", "t2v", False) is None
+    assert tracker.get_stats(account_id)["slow_video_jobs"] == 1
+
+
+def test_stored_classification_wins_over_the_model(make_user, make_job, make_account):
+    make_user("u1")
+    account_id = make_account()
+    stored_fast = make_job(job_type="t2v", model="kling-2.6", status="processing")  # is_slow = 0
+    legacy = make_job(job_type="t2v", model="kling-2.6", status="processing")
+    execute("UPDATE jobs SET account_id = ?", (account_id,))
+    execute("UPDATE jobs SET is_slow = NULL WHERE job_id = ?", (legacy["job_id"],))
+
+    tracker = AccountCapacityTracker(scheduler.classify_job_as_slow)
+    tracker.reconcile()
+
+    stats = tracker.get_stats(account_id)
+    assert stats["video_jobs"] == 2
+    assert stats["slow_video_jobs"] == 1  # Only the legacy row, classified by its model
+    assert stored_fast["is_slow"] == 0
@@ -29,12 +29,29 @@ interface AccountStats {
     slow_video_jobs: number;
 }
 
+interface AccountRecent {
+    completed_jobs: number;
+    failed_jobs: number;
+    completed_per_minute: number;
+    avg_completion_seconds: number | null;
+}
+
+interface AccountCapacity {
+    account_id: number;
+    health: string;
+    in_flight: AccountStats;
+    recent: AccountRecent;
+}
+
+const CAPACITY_REFRESH_MS = 5000;
+
 export default function HiggsfieldAccountsPage() {
     const { admin, isLoading: authLoading } = useAdminAuth();
     const router = useRouter();
     
     const [accounts, setAccounts] = useState<HiggsfieldAccount[]>([]);
     const [accountStats, setAccountStats] = useState<Record<number, AccountStats>>({});
+    const [accountCapacity, setAccountCapacity] = useState<Record<number, AccountCapacity>>({});
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
     const [success, setSuccess] = useState('');
@@ -81,8 +98,7 @@ export default function HiggsfieldAccountsPage() {
             const data = await res.json();
             setAccounts(data);
             
-            // Fetch stats for each account
-            await fetchAllStats(data);
+            await fetchAllStats();
         } catch (err: any) {
             setError(err.message);
         } finally {
@@ -90,37 +106,34 @@ export default function HiggsfieldAccountsPage() {
         }
     };
 
-    const fetchAllStats = async (accountsList: HiggsfieldAccount[]) => {
+    // Live stats of all accounts in one request (in-flight jobs, recent throughput)
+    const fetchAllStats = async () => {
         const token = localStorage.getItem('admin_token');
-        const statsPromises = accountsList.map(async (account) => {
-            try {
-                const res = await fetch(
-                    `${process.env.NEXT_PUBLIC_API}/api/admin/higgsfield/accounts/${account.account_id}/stats`,
-                    { headers: { 'Authorization': `Bearer ${token}` } }
-                );
-                if (res.ok) {
-                    const data = await res.json();
-                    return { id: account.account_id, stats: data.stats };
-                }
-            } catch (err) {
-                console.error(`Failed to fetch stats for account ${account.account_id}`);
-            }
-            return null;
-        });
-
-        const results = await Promise.all(statsPromises);
-        const statsMap: Record<number, AccountStats> = {};
-        results.forEach(result => {
-            if (result) {
-                statsMap[result.id] = result.stats;
-            }
-        });
-        setAccountStats(statsMap);
+        try {
+            const res = await fetch(
+                `${process.env.NEXT_PUBLIC_API}/api/admin/higgsfield/accounts/capacity`,
+                { headers: { 'Authorization': `Bearer ${token}` } }
+            );
+            if (!res.ok) return;
+            const data = await res.json();
+            const statsMap: Record<number, AccountStats> = {};
+            const capacityMap: Record<number, AccountCapacity> = {};
+            data.accounts.forEach((account: AccountCapacity) => {
+                statsMap[account.account_id] = account.in_flight;
+                capacityMap[account.account_id] = account;
+            });
+            setAccountStats(statsMap);
+            setAccountCapacity(capacityMap);
+        } catch (err) {
+            console.error('Failed to fetch account capacity');
+        }
     };
 
     useEffect(() => {
         if (admin) {
             fetchAccounts();
+            const interval = setInterval(fetchAllStats, CAPACITY_REFRESH_MS);
+            return () => clearInterval(interval);
         }
     }, [admin]);
 
@@ -351,6 +364,7 @@ export default function HiggsfieldAccountsPage() {
                                 slow_image_jobs: 0,
                                 slow_video_jobs: 0
                             };
+                            const capacity = accountCapacity[account.account_id];
 
                             return (
                                 <div
@@ -380,6 +394,12 @@ export default function HiggsfieldAccountsPage() {
                                                 <p className="text-sm text-gray-500">
                                                     ID: {account.account_id} • Created: {new Date(account.created_at).toLocaleDateString()}
                                                 </p>
+                                                {capacity && (
+                                                    <p className="text-sm text-gray-500 mt-1">
+                                                        Health: {capacity.health} • Last 15 min: {capacity.recent.completed_jobs} completed, {capacity.recent.failed_jobs} failed
+                                                        {capacity.recent.avg_completion_seconds !== null && ` • Avg completion: ${Math.round(capacity.recent.avg_completion_seconds)}s`}
+                                                    </p>
+                                                )}
                                             </div>
                                             
                                             <div className="flex gap-2">